@@ -0,0 +1,71 @@
+"""
+取得スクリプトの解析・成分インデックス生成・OCR 知識抽出の処理速度を、保存済みデータからオフラインで測る。
+
+  OTC:     parse_detail_fields / parse_ingredients / build_ingredient_index
+  医療用:  parse_csv_rows / split_generic_components / build_products / build_ingredient_index
+  OCR:     parse_entries
+
+入力は --bench-scale の倍率ごとに corpora.py で作る。--bench-save で結果を JSON に保存し、
+--bench-baseline で保存済みの結果と比べる(1件あたりの時間が --bench-max-slowdown 倍を超えた処理は失敗にする)。
+
+  python3 -m pytest benchmarks/bench_dataset_pipeline.py --bench-scale 1 10 --bench-save bench_before.json
+  python3 -m pytest benchmarks/bench_dataset_pipeline.py --bench-scale 100 --bench-rounds 1 -k parse_entries
+"""
+
+from typing import Callable, Dict, Tuple
+
+import pytest
+
+from build_ocr_household_knowledge import parse_entries
+from corpora import iyaku_corpus, iyaku_index_names, ocr_corpus, otc_corpus, otc_index_names
+from fetch_pmda_iyaku_dataset import build_products, parse_csv_rows, split_generic_components
+from fetch_pmda_otc_dataset import parse_detail_fields, parse_ingredients
+from pmda_ingredient_index import IYAKU_INDEX_FIELDS, OTC_INDEX_FIELDS, build_ingredient_index
+
+# (件数, 計測する処理)
+Case = Tuple[int, Callable[[], object]]
+
+
+def otc_case(name: str, data_dir, scale: int) -> Case:
+    products, pages, texts = otc_corpus(data_dir, scale)
+    if name == "otc.parse_detail_fields":
+        return len(pages), lambda: [parse_detail_fields(page) for page in pages]
+    if name == "otc.parse_ingredients":
+        return len(texts), lambda: [parse_ingredients(text) for text in texts]
+    return len(products), lambda: build_ingredient_index(products, OTC_INDEX_FIELDS, otc_index_names)
+
+
+def iyaku_case(name: str, data_dir, scale: int) -> Case:
+    csv_text, csv_rows, products = iyaku_corpus(data_dir, scale)
+    if name == "iyaku.parse_csv_rows":
+        return len(csv_rows), lambda: parse_csv_rows(csv_text)
+    if name == "iyaku.split_generic_components":
+        generic_names = [row["一般名"] for row in csv_rows]
+        return len(generic_names), lambda: [split_generic_components(generic_name) for generic_name in generic_names]
+    if name == "iyaku.build_products":
+        return len(csv_rows), lambda: build_products(csv_rows)
+    return len(products), lambda: build_ingredient_index(products, IYAKU_INDEX_FIELDS, iyaku_index_names)
+
+
+def ocr_case(name: str, data_dir, scale: int) -> Case:
+    lines, entry_count = ocr_corpus(data_dir, scale)
+    return entry_count, lambda: parse_entries(lines)
+
+
+CASES: Dict[str, Callable[[str, object, int], Case]] = {
+    "otc.parse_detail_fields": otc_case,
+    "otc.parse_ingredients": otc_case,
+    "otc.build_ingredient_index": otc_case,
+    "iyaku.parse_csv_rows": iyaku_case,
+    "iyaku.split_generic_components": iyaku_case,
+    "iyaku.build_products": iyaku_case,
+    "iyaku.build_ingredient_index": iyaku_case,
+    "ocr.parse_entries": ocr_case,
+}
+
+
+@pytest.mark.parametrize("name", list(CASES))
+def test_pipeline_throughput(bench, data_dir, scale, name):
+    items, func = CASES[name](name, data_dir, scale)
+    results = bench.run({name: func}, items, scale=scale)
+    assert not bench.slowdowns(results)
@@ -0,0 +1,41 @@
+"""
+OTC 取得スクリプトの parse_ingredients / clean_text の処理速度を、保存済みデータセットの成分分量テキストで
+従来実装(tests/legacy_otc_text.py)と比べる。出力の一致は tests/test_otc_text_parsing.py で確かめる。
+
+  python3 -m pytest benchmarks/bench_otc_text_parsing.py --bench-rounds 20
+"""
+
+import pytest
+
+from fetch_pmda_otc_dataset import clean_text, parse_ingredients
+from legacy_otc_text import build_clean_text_corpus, legacy_clean_text, legacy_parse_ingredients
+from pmda_compact_store import load_products
+
+
+@pytest.fixture(scope="module")
+def products(data_dir):
+    return load_products(data_dir / "pmda_otc_products.json")["products"]
+
+
+def test_parse_ingredients_throughput(bench, products):
+    texts = [str(product.get("ingredient_text") or "") for product in products]
+    results = bench.run(
+        {
+            "otc_text.parse_ingredients (legacy)": lambda: [legacy_parse_ingredients(text) for text in texts],
+            "otc_text.parse_ingredients": lambda: [parse_ingredients(text) for text in texts],
+        },
+        len(texts),
+    )
+    assert not bench.slowdowns(results)
+
+
+def test_clean_text_throughput(bench, products):
+    corpus = build_clean_text_corpus(products)
+    results = bench.run(
+        {
+            "otc_text.clean_text (legacy)": lambda: [legacy_clean_text(text, keep) for text, keep in corpus],
+            "otc_text.clean_text": lambda: [clean_text(text, keep) for text, keep in corpus],
+        },
+        len(corpus),
+    )
+    assert not bench.slowdowns(results)
@@ -0,0 +1,65 @@
+"""
+検索ページの解析(pmda_html.parse_search_page)の処理速度を、正規表現で何度もページを走査していた従来の関数
+(tests/legacy_search_page.py)と比べる。出力の一致は tests/test_pmda_html.py で確かめる。
+
+--bench-cache-dir を指定すると HTTP 応答キャッシュ(取得スクリプトの --cache-dir)にある検索結果・ページ送り応答の HTML を使い、
+従来の関数と結果が一致することも確かめる。指定しない場合は保存済み OTC データセットから検索結果ページ相当の HTML を生成する。
+
+  python3 -m pytest benchmarks/bench_search_page_parsing.py --bench-rounds 30 --bench-cache-dir .cache/pmda
+"""
+
+import json
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from legacy_search_page import legacy_parse, single_pass_parse, synthetic_search_page
+from pmda_compact_store import load_products
+
+LIST_ROWS = 100
+
+
+def load_cached_pages(cache_dir: Path) -> List[str]:
+    pages: List[str] = []
+    for entry_path in sorted((cache_dir / "entries").glob("*/*.json")):
+        entry = json.loads(entry_path.read_text(encoding="utf-8"))
+        url = str(entry.get("url", ""))
+        if not ("/otcSearch/" in url or "/iyakuSearch/" in url) or "exportSearchResult" in url:
+            continue
+        blob_path = cache_dir / "blobs" / entry["body_sha256"][:2] / entry["body_sha256"]
+        body = blob_path.read_bytes().decode(entry.get("encoding") or "utf-8", errors="replace")
+        if "PageChangeRequest" in url:
+            body = str(json.loads(body).get("ResultList", ""))
+        pages.append(body)
+    return pages
+
+
+@pytest.fixture(scope="module")
+def pages(request, data_dir) -> List[str]:
+    cache_dir = request.config.getoption("--bench-cache-dir")
+    if cache_dir:
+        cached = load_cached_pages(Path(cache_dir))
+        if not cached:
+            pytest.skip(f"no search pages in {cache_dir}")
+        return cached
+    products = load_products(data_dir / "pmda_otc_products.json")["products"]
+    chunks = [products[pos:pos + LIST_ROWS] for pos in range(0, len(products), LIST_ROWS)]
+    return [synthetic_search_page(chunk, page_no, LIST_ROWS, len(products)) for page_no, chunk in enumerate(chunks, 1)]
+
+
+def test_cached_pages_match_legacy(pages):
+    # 生成したページは tests/test_pmda_html.py で確かめているが、実際の応答はここでしか読めない。
+    for page in pages:
+        assert single_pass_parse(page) == legacy_parse(page)
+
+
+def test_search_page_throughput(bench, pages):
+    results = bench.run(
+        {
+            "search_page.legacy_regex": lambda: [legacy_parse(page) for page in pages],
+            "search_page.parse_search_page": lambda: [single_pass_parse(page) for page in pages],
+        },
+        len(pages),
+    )
+    assert not bench.slowdowns(results)
@@ -0,0 +1,61 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+BENCH_DIR = Path(__file__).resolve().parent
+REPO_ROOT = BENCH_DIR.parent
+# scripts/ のモジュールはスクリプトと同じく scripts/ を import パスに置いて読み込む。
+# 従来実装との比較に使う参照実装は tests/ にある。
+for path in (BENCH_DIR, REPO_ROOT / "scripts", REPO_ROOT / "tests"):
+    sys.path.insert(0, str(path))
+
+from harness import BenchRecorder  # noqa: E402
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("bench", "処理速度の計測")
+    group.addoption("--bench-rounds", type=int, default=3, help="計測回数（最速の回を使う）")
+    group.addoption("--bench-scale", type=int, nargs="+", default=[1, 10], help="入力の倍率（複数指定可）")
+    group.addoption("--bench-data-dir", default=str(REPO_ROOT / "data"), help="保存済みデータセットのディレクトリ")
+    group.addoption("--bench-cache-dir", default=None, help="検索ページ解析に使う HTTP 応答キャッシュ（未指定時は生成したページ）")
+    group.addoption("--bench-save", default=None, help="結果を保存する JSON パス")
+    group.addoption("--bench-baseline", default=None, help="比較する保存済みの結果（--bench-save の出力）")
+    group.addoption("--bench-max-slowdown", type=float, default=1.25, help="--bench-baseline に対して許容する1件あたりの時間の倍率")
+
+
+def pytest_configure(config):
+    baseline = config.getoption("--bench-baseline")
+    config.bench_recorder = BenchRecorder(
+        rounds=config.getoption("--bench-rounds"),
+        baseline=Path(baseline) if baseline else None,
+        max_slowdown=config.getoption("--bench-max-slowdown"),
+    )
+
+
+def pytest_generate_tests(metafunc):
+    if "scale" in metafunc.fixturenames:
+        metafunc.parametrize("scale", metafunc.config.getoption("--bench-scale"))
+
+
+@pytest.fixture
+def bench(request) -> BenchRecorder:
+    return request.config.bench_recorder
+
+
+@pytest.fixture(scope="session")
+def data_dir(request) -> Path:
+    return Path(request.config.getoption("--bench-data-dir"))
+
+
+def pytest_terminal_summary(terminalreporter, config):
+    recorder: BenchRecorder = config.bench_recorder
+    if not recorder.results:
+        return
+    terminalreporter.section("benchmarks")
+    for line in recorder.table():
+        terminalreporter.write_line(line)
+    save = config.getoption("--bench-save")
+    if save:
+        recorder.save(Path(save))
+        terminalreporter.write_line(f"saved: {save}")
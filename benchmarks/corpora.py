@@ -0,0 +1,160 @@
+"""
+処理速度の計測に使う入力を、保存済みデータセットから作る。
+
+  pmda_otc_products.json           → 製品詳細ページ相当の HTML と成分分量テキスト
+  pmda_iyaku_ingredient_index.json → 検索結果エクスポート相当の CSV
+  ocr_household_knowledge.json     → OCR 出力相当のテキスト
+
+scale では各入力を scale 倍にする(製品名・コード・見出しに連番を付け、集約で重複としてまとめられないようにする)。
+同じ入力を使う計測が続くため、直近の1組だけ保持する。
+"""
+
+from __future__ import annotations
+
+import csv
+import html
+import io
+import json
+import random
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Sequence, Tuple
+
+from build_ocr_household_knowledge import Line, parse_entries, parse_lines
+from fetch_pmda_iyaku_dataset import build_products, normalize_text, parse_csv_rows
+from pmda_compact_store import load_products
+from pmda_ingredient_index import IngredientIndex
+
+# エクスポート CSV の列(3行目が見出し)。
+IYAKU_CSV_COLUMNS = (
+    "一般名",
+    "販売名",
+    "製造販売業者等",
+    "添付文書",
+    "患者向医薬品ガイド／ワクチン接種を受ける人へのガイド",
+    "インタビューフォーム",
+)
+
+def scaled_otc_products(products: Sequence[Dict[str, object]], scale: int) -> List[Dict[str, object]]:
+    scaled: List[Dict[str, object]] = []
+    for rep in range(scale):
+        suffix = f"-{rep}" if rep else ""
+        for product in products:
+            scaled.append({**product, "code": f"{product.get('code')}{suffix}", "product_name": f"{product.get('product_name')}{suffix}"})
+    return scaled
+
+
+def detail_page(product: Dict[str, object]) -> str:
+    # 製品詳細ページ相当の HTML(項目名は td.head、値は td.deta。成分分量は改行を <br /> で持つ)。
+    def cell(value: object) -> str:
+        return html.escape(str(value or ""), quote=False).replace("\n", "<br />\n")
+
+    fields = [
+        ("販売名", product.get("product_name")),
+        ("製造販売元", product.get("manufacturer")),
+        ("薬効分類", product.get("category")),
+        ("リスク区分", product.get("risk_class")),
+        ("剤形", product.get("dosage_form")),
+        ("医薬品区分", product.get("classification")),
+        ("成分・分量", product.get("ingredient_text")),
+        ("添加物", "、".join(str(item) for item in product.get("additives") or [])),  # type: ignore[union-attr]
+    ]
+    rows = "".join(
+        f'<tr><td class="head" style="width:20%">{html.escape(name)}</td><td class="deta"><p>{cell(value)}</p></td></tr>\n'
+        for name, value in fields
+    )
+    menu = '<div class="menu"><a href="/PmdaSearch/otcSearch/">一般用医薬品</a></div>' * 20
+    return (
+        "<html><head><title>一般用医薬品・要指導医薬品 詳細</title><script>var x = 1;</script></head><body>"
+        f'{menu}<table class="DataTable">\n{rows}</table></body></html>'
+    )
+
+
+def iyaku_csv_text(index: IngredientIndex, scale: int) -> str:
+    # 検索結果エクスポート相当の CSV(1〜2行目は検索条件、3行目が見出し)。
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\r\n")
+    writer.writerow(["医療用医薬品 検索結果"])
+    writer.writerow(["検索条件", "更新日:2010/01/01～2026/01/01"])
+    writer.writerow(IYAKU_CSV_COLUMNS)
+    count = len(index.columns["product_name"])
+    for rep in range(scale):
+        suffix = f"-{rep}" if rep else ""
+        for product_id in range(count):
+            product = index.product(product_id)
+            month, day = product_id % 12 + 1, product_id % 28 + 1
+            writer.writerow(
+                [
+                    product["generic_name"],
+                    product["product_name"] + suffix,
+                    product["manufacturer"],
+                    f"PDF({2010 + product_id % 16}年{month:02d}月{day:02d}日) HTML XML",
+                    "患者向医薬品ガイド" if product_id % 5 == 0 else "",
+                    "インタビューフォーム" if product_id % 3 == 0 else "",
+                ]
+            )
+    return buffer.getvalue()
+
+
+def ocr_text(profiles: Sequence[Dict[str, object]], scale: int) -> str:
+    # 保存済みの OCR 知識から、見出し行・各区分の見出しと本文・ページ区切りを持つ OCR 出力相当のテキストを作る。
+    rng = random.Random(7)
+    out = ["前書き 本書の使い方", "===== ページ 1 ====="]
+    page = 1
+    for rep in range(scale):
+        for profile in profiles:
+            aliases: List[str] = profile["aliases"]  # type: ignore[assignment]
+            treatment: Dict[str, Dict[str, str]] = profile["treatment"]  # type: ignore[assignment]
+            analysis: Dict[str, str] = profile["analysis"]  # type: ignore[assignment]
+            if rng.random() < 0.5:
+                page += 1
+                out.append(f"===== ページ {page} =====")
+            title = aliases[1] if len(aliases) > 1 else profile["ingredient_name"]
+            out.append(f"医薬品 {title}{rep if rep else ''} 危険度 : {aliases[-1]}")
+            out.append("中毒症状")
+            out.append(" | ".join(profile["symptoms"]) + "、" + "・".join(profile["critical_symptoms"]))  # type: ignore[arg-type]
+            out.append("処置法")
+            out.append(treatment["lavage"]["note"] + " 胃洗浄 活性炭" + (" 血液透析" if rng.random() < 0.3 else ""))
+            out.append("ポイント")
+            out.append(analysis["interpretation"])
+            out.append(f"{rng.randint(1, 50)} mg/kg 以上で中毒、{rng.randint(1, 5)}-{rng.randint(6, 9)} g/kg で致死")
+            out.append("体内動態")
+            out.append(profile["toxicokinetics"]["metabolism"] + " 肝機能 心電図")  # type: ignore[index]
+            out.append("主な製品")
+            out.append("、".join(profile["product_aliases"]) or "なし")  # type: ignore[arg-type]
+            out.append("特記事項 " + analysis["notes"])
+            out.append("")
+    return "\n".join(out)
+
+
+def otc_index_names(product: Dict[str, object]) -> List[str]:
+    # fetch_pmda_otc_dataset.main と同じ成分名の取り出し方。
+    return [str(ingredient.get("name", "")).strip() for ingredient in product.get("ingredients", [])]  # type: ignore[union-attr]
+
+
+def iyaku_index_names(product: Dict[str, object]) -> List[str]:
+    # fetch_pmda_iyaku_dataset.main と同じ成分名の取り出し方。
+    return [normalize_text(ingredient.get("name", "")) for ingredient in product.get("ingredients", [])]  # type: ignore[union-attr]
+
+
+@lru_cache(maxsize=1)
+def otc_corpus(data_dir: Path, scale: int) -> Tuple[List[Dict[str, object]], List[str], List[str]]:
+    products: List[Dict[str, object]] = load_products(data_dir / "pmda_otc_products.json")["products"]  # type: ignore[assignment]
+    otc_products = scaled_otc_products(products, scale)
+    pages = [detail_page(product) for product in otc_products]
+    texts = [str(product.get("ingredient_text") or "") for product in otc_products]
+    return otc_products, pages, texts
+
+
+@lru_cache(maxsize=1)
+def iyaku_corpus(data_dir: Path, scale: int) -> Tuple[str, List[Dict[str, str]], List[Dict[str, object]]]:
+    csv_text = iyaku_csv_text(IngredientIndex.load(data_dir / "pmda_iyaku_ingredient_index.json"), scale)
+    csv_rows = parse_csv_rows(csv_text)
+    return csv_text, csv_rows, build_products(csv_rows)
+
+
+@lru_cache(maxsize=1)
+def ocr_corpus(data_dir: Path, scale: int) -> Tuple[List[Line], int]:
+    profiles = json.loads((data_dir / "ocr_household_knowledge.json").read_text(encoding="utf-8"))["profiles"]
+    lines = parse_lines(ocr_text(profiles, scale))
+    return lines, len(parse_entries(lines))
@@ -0,0 +1,97 @@
+"""
+ベンチマーク共通の計測と結果の記録。
+
+measure() は複数の処理を各回交互に実行し、処理ごとに最速の回の秒数を返す(負荷の揺らぎが片方だけに偏らないようにする)。
+BenchRecorder は計測結果を (処理名, 倍率, 件数, 秒数) として集め、保存済みの結果(--bench-save の出力)と
+1件あたりの時間を比べる。pytest からは conftest.py の bench フィクスチャとして使う。
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+def measure(funcs: Dict[str, Callable[[], object]], rounds: int) -> Dict[str, float]:
+    best = {label: float("inf") for label in funcs}
+    for _ in range(max(1, rounds)):
+        for label, func in funcs.items():
+            started = time.perf_counter()
+            func()
+            best[label] = min(best[label], time.perf_counter() - started)
+    return best
+
+
+@dataclass
+class BenchResult:
+    name: str
+    scale: int
+    items: int
+    seconds: float
+
+    @property
+    def rate(self) -> float:
+        return self.items / self.seconds if self.seconds > 0 else float("inf")
+
+
+def load_baseline(path: Path) -> Dict[Tuple[str, int], float]:
+    # 処理名・倍率ごとの1件あたりの秒数。
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    return {(item["name"], item["scale"]): item["seconds"] / max(1, item["items"]) for item in payload["results"]}
+
+
+class BenchRecorder:
+    def __init__(self, rounds: int, baseline: Optional[Path] = None, max_slowdown: float = 1.25) -> None:
+        self.rounds = rounds
+        self.baseline = load_baseline(baseline) if baseline is not None else None
+        self.max_slowdown = max_slowdown
+        self.results: List[BenchResult] = []
+
+    def run(self, funcs: Dict[str, Callable[[], object]], items: int, scale: int = 1) -> Dict[str, BenchResult]:
+        # funcs を交互に計測して記録する。items は1回の実行で処理する件数。
+        timings = measure(funcs, self.rounds)
+        results = {label: BenchResult(label, scale, items, seconds) for label, seconds in timings.items()}
+        self.results.extend(results.values())
+        return results
+
+    def slowdowns(self, results: Dict[str, BenchResult]) -> List[str]:
+        # 基準より1件あたり max_slowdown 倍を超えて遅くなった処理。
+        regressions: List[str] = []
+        if self.baseline is None:
+            return regressions
+        for result in results.values():
+            previous = self.baseline.get((result.name, result.scale))
+            if previous:
+                ratio = (result.seconds / max(1, result.items)) / previous
+                if ratio > self.max_slowdown:
+                    regressions.append(f"{result.name} (scale {result.scale}): {ratio:.2f}x slower")
+        return regressions
+
+    def compared(self, result: BenchResult) -> str:
+        previous = self.baseline.get((result.name, result.scale)) if self.baseline is not None else None
+        if not previous:
+            return ""
+        return f"{(result.seconds / max(1, result.items)) / previous:.2f}x time"
+
+    def table(self) -> List[str]:
+        lines = [f"{'benchmark':<40} {'scale':>5} {'items':>9} {'best ms':>10} {'items/sec':>12}  vs baseline"]
+        for result in self.results:
+            lines.append(
+                f"{result.name:<40} {result.scale:>5} {result.items:>9,} {result.seconds * 1000:>10.1f} "
+                f"{result.rate:>12,.0f}  {self.compared(result)}"
+            )
+        return lines
+
+    def save(self, path: Path) -> None:
+        payload = {
+            "measured_at": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "rounds": self.rounds,
+            "results": [asdict(result) for result in self.results],
+        }
+        path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
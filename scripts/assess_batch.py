@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+症例 JSONL({weight, elapsedMin, symptoms, drugs[], ocrText?})を一括評価し、成分ごとの重症度・治療適応を
+優先度順に JSONL で出力する(オフライン・複数プロセス)。
+
+判定は index.html の addDrugCore と同一(toxicnavi.assessment)。入力書式は toxicnavi.batch を参照。
+
+入力:
+  index.html (内蔵データ)
+  data/pmda_otc_products.json / data/pmda_iyaku_products.json / data/ocr_household_knowledge.json
+  症例 JSONL(ファイルまたは標準入力)
+
+出力:
+  評価結果 JSONL(ファイルまたは標準出力、入力と同じ順)
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from toxicnavi.batch import DEFAULT_CHUNK_SIZE, run_batch  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="症例 JSONL の一括中毒評価")
+    parser.add_argument("input", nargs="?", default="-", help="症例 JSONL（既定: 標準入力）")
+    parser.add_argument("--output", default="-", help="出力先 JSONL（既定: 標準出力）")
+    parser.add_argument("--data-dir", default=str(REPO_ROOT / "data"), help="データセットのディレクトリ")
+    parser.add_argument("--index-html", default=str(REPO_ROOT / "index.html"), help="内蔵データを含む index.html")
+    parser.add_argument("--jobs", type=int, default=0, help="並列プロセス数（0: CPU 数、1: 単一プロセス）")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="ワーカーへ一度に渡す症例数")
+    parser.add_argument("--summary", action="store_true", help="優先度一覧の項目のみ出力（JPIC 情報・治療詳細を省く）")
+    args = parser.parse_args()
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    started = time.perf_counter()
+    try:
+        count = run_batch(
+            source,
+            output,
+            data_dir=Path(args.data_dir),
+            index_html=Path(args.index_html),
+            jobs=args.jobs,
+            chunk_size=args.chunk_size,
+            summary=args.summary,
+        )
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+    elapsed = time.perf_counter() - started
+    print(f"assessed: {count} records ({elapsed:.1f}s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+内蔵データ・PMDA 製品データセット・OCR 知識を index.html と同じ規則で統合し、
+1つの SQLite データベースとして保存する。
+
+入力:
+  index.html (内蔵データ)
+  data/pmda_otc_products.json / data/pmda_iyaku_products.json / data/ocr_household_knowledge.json
+
+出力:
+  data/toxicnavi_knowledge.sqlite
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from toxicnavi.builtin import load_builtin_tables  # noqa: E402
+from toxicnavi.knowledge import OCR_KNOWLEDGE_FILE, PRODUCT_DATASETS, KnowledgeBase, read_ocr_profiles, read_product_datasets  # noqa: E402
+from toxicnavi.store import DEFAULT_DB_NAME, build_database  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="統合知識ベースの SQLite 出力")
+    parser.add_argument("--data-dir", default=str(REPO_ROOT / "data"), help="データセットのディレクトリ")
+    parser.add_argument("--index-html", default=str(REPO_ROOT / "index.html"), help="内蔵データを含む index.html")
+    parser.add_argument("--output", default=None, help=f"出力先（既定: <data-dir>/{DEFAULT_DB_NAME}）")
+    args = parser.parse_args()
+
+    data_dir = Path(args.data_dir)
+    output_path = Path(args.output) if args.output else data_dir / DEFAULT_DB_NAME
+    started = time.perf_counter()
+
+    knowledge = KnowledgeBase(load_builtin_tables(Path(args.index_html)))
+    datasets = read_product_datasets(data_dir)
+    for label, products in datasets:
+        merged = knowledge.merge_products(products, label)
+        print(f"{label}: products={len(products)} +products={merged['addedProducts']} +ingredients={merged['addedIngredients']}")
+    if (data_dir / OCR_KNOWLEDGE_FILE).exists():
+        merged = knowledge.merge_ocr_profiles(read_ocr_profiles(data_dir))
+        print(f"OCR: profiles={merged['loadedProfiles']} +products={merged['addedProducts']} +synonyms={merged['addedSynonyms']}")
+
+    missing = [name for name, _ in PRODUCT_DATASETS if not (data_dir / name).exists()]
+    if not (data_dir / OCR_KNOWLEDGE_FILE).exists():
+        missing.append(OCR_KNOWLEDGE_FILE)
+    if missing:
+        print(f"skipped (not found): {', '.join(missing)}")
+
+    stats = build_database(knowledge, output_path, datasets, knowledge.merge_stats)
+    elapsed = time.perf_counter() - started
+    print(
+        f"saved: {output_path} (products={stats['products']} ingredients={stats['ingredients']} "
+        f"synonyms={stats['synonyms']} pmda_records={stats['pmda_records']}, {elapsed:.1f}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+製品名・成分名・同義語の正規化名索引(normalized_name → 元のキー)を生成する。
+
+index.html はこの索引を読み込むと、データ統合時の normalizeName の再計算を省略できる。
+正規化規則は index.html の normalizeName と同一(toxicnavi.jscompat.normalize_name)。
+
+入力:
+  index.html (内蔵データ)
+  data/pmda_otc_products.json / data/pmda_iyaku_products.json / data/ocr_household_knowledge.json
+
+出力:
+  data/toxicnavi_name_index.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from toxicnavi.knowledge import KnowledgeBase  # noqa: E402
+from toxicnavi.name_index import DEFAULT_NAME_INDEX_NAME, write_name_index  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="正規化名索引の生成")
+    parser.add_argument("--data-dir", default=str(REPO_ROOT / "data"), help="データセットのディレクトリ")
+    parser.add_argument("--index-html", default=str(REPO_ROOT / "index.html"), help="内蔵データを含む index.html")
+    parser.add_argument("--output", default=None, help=f"出力先（既定: <data-dir>/{DEFAULT_NAME_INDEX_NAME}）")
+    args = parser.parse_args()
+
+    data_dir = Path(args.data_dir)
+    output_path = Path(args.output) if args.output else data_dir / DEFAULT_NAME_INDEX_NAME
+    knowledge = KnowledgeBase.load_default(data_dir, Path(args.index_html))
+    write_name_index(output_path, knowledge, knowledge.merge_stats)
+    print(
+        f"saved: {output_path} (products={len(knowledge.product_keys)} "
+        f"ingredients={len(knowledge.ingredient_keys)} synonyms={len(knowledge.ingredient_synonym_index)})"
+    )
+
+
+if __name__ == "__main__":
+    main()
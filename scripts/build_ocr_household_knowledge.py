@@ -3,23 +3,43 @@
 OCRテキストから家庭用品・医薬品中毒の構造化知識JSONを生成する。
 
 入力:
-  uploads/ocr_result_1770368005162.txt
+  uploads/ocr_result_1770368005162.txt（複数巻に分かれた OCR 出力は --input に順に並べる）
 
 出力:
-  data/ocr_household_knowledge.json
+  data/ocr_household_knowledge.json（--format jsonl では1行1プロファイル）
+
+入力は1行ずつ読み、見出し行(危険度を含む行)から次の見出し行の手前までを1項目として、
+項目が閉じた時点でプロファイルを出力する。メモリに持つのは処理中の1項目分だけで、
+数百 MB の OCR 出力でも全体を読み込まない。
+--cache を指定すると項目ごとの結果をブロックの内容のハッシュで保存し、次回は行が変わった項目だけを作り直す
+(変わらなかった項目は evidence.updated_at も前回のまま)。
 """
 
 from __future__ import annotations
 
 import argparse
+import hashlib
 import json
+import multiprocessing
+import os
 import re
+import shutil
+import threading
 import unicodedata
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Optional, Sequence, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, TypeVar
+
+from keyword_scanner import KeywordScanner
+
+
+# --jobs でワーカーへ一度に渡す項目数。
+DEFAULT_CHUNK_SIZE = 16
+# --cache のファイル形式(ヘッダの format)。
+PROFILE_CACHE_FORMAT = "ocr-profile-cache"
 
+_T = TypeVar("_T")
 
 PAGE_RE = re.compile(r"^=+\s*ページ\s*(\d+)\s*=+$")
 TITLE_RE = re.compile(r"^(?P<title>.+?)\s*危険度(?:[:：・]\s*|[\s]*)?(?P<risk>.*)$")
@@ -63,6 +83,33 @@ TEST_KEYWORDS = [
     ("SpO2", "SpO2"),
 ]
 
+# 症状・処置法などの分割後の語句から除く語(参考文献・症例記載などの文章の断片)。
+TOKEN_SKIP_WORDS = frozenset({"可能性", "場合", "記載", "文献", "症例", "資料"})
+LAVAGE_NOT_WORDS = frozenset({"胃洗浄は不要", "胃洗浄不要", "胃洗浄は行わない", "胃洗浄禁忌"})
+CHARCOAL_NOT_WORDS = frozenset({"活性炭不要", "活性炭は不要", "活性炭禁忌"})
+DIALYSIS_WORDS = frozenset({"血液透析", "血液吸着", "血液浄化"})
+ANTIDOTE_NONE_WORDS = frozenset({"解毒剤はない", "解毒剤なし", "特異的な治療法はない", "特異的な解毒剤はない"})
+OTHER_TREATMENT_SKIP_WORDS = frozenset({"ファイルシート", "IV", "文献", "参考", "危険度"})
+PRODUCT_ALIAS_SKIP_WORDS = frozenset({"主な製品", "危険度", "ファイルシート", "文献", "強アルカリ性", "中性"})
+CRITICAL_KEYWORD_SET = frozenset(CRITICAL_KEYWORDS)
+
+# 上のキーワードと節見出しをまとめて1回の走査で検出する照合器(各関数は検出結果の集合を調べる)。
+KEYWORDS = KeywordScanner(
+    [label for label, _ in SECTION_LABELS]
+    + CRITICAL_KEYWORDS
+    + [keyword for keyword, _ in TEST_KEYWORDS]
+    + ["胃洗浄", "活性炭"]
+    + sorted(
+        TOKEN_SKIP_WORDS
+        | LAVAGE_NOT_WORDS
+        | CHARCOAL_NOT_WORDS
+        | DIALYSIS_WORDS
+        | ANTIDOTE_NONE_WORDS
+        | OTHER_TREATMENT_SKIP_WORDS
+        | PRODUCT_ALIAS_SKIP_WORDS
+    )
+)
+
 
 @dataclass
 class Line:
@@ -98,7 +145,7 @@ def split_tokens(text: str) -> List[str]:
             continue
         if token in {"中毒症状", "処置法", "基本的処置", "治療", "ポイント", "特記事項"}:
             continue
-        if any(word in token for word in ["可能性", "場合", "記載", "文献", "症例", "資料"]):
+        if KEYWORDS.contains_any(token, TOKEN_SKIP_WORDS):
             continue
         items.append(token)
     # 順序維持で重複除去
@@ -126,16 +173,35 @@ def is_title_line(text: str) -> bool:
     return True
 
 
-def parse_lines(source: str) -> List[Line]:
+def iter_lines(chunks: Iterable[str]) -> Iterator[Line]:
+    # chunks はファイルの各行など、改行で区切られた文字列の並び。ページ区切り行を読むたびにページ番号を更新する。
     current_page = 0
-    parsed: List[Line] = []
-    for raw in source.splitlines():
-        marker = PAGE_RE.match(raw.strip())
-        if marker:
-            current_page = int(marker.group(1))
-            continue
-        parsed.append(Line(page=current_page, text=raw.rstrip("\n")))
-    return parsed
+    for chunk in chunks:
+        # str.splitlines と同じ区切り(\x0c や \u2028 など)で分ける。
+        for raw in chunk.splitlines():
+            marker = PAGE_RE.match(raw.strip())
+            if marker:
+                current_page = int(marker.group(1))
+                continue
+            yield Line(page=current_page, text=raw.rstrip("\n"))
+
+
+def parse_lines(source: str) -> List[Line]:
+    return list(iter_lines([source]))
+
+
+def iter_blocks(lines: Iterable[Line]) -> Iterator[List[Line]]:
+    # 見出し行から次の見出し行の手前までを1項目として返す(最初の見出しより前の行は捨てる)。
+    block: List[Line] = []
+    for line in lines:
+        if is_title_line(line.text):
+            if block:
+                yield block
+            block = [line]
+        elif block:
+            block.append(line)
+    if block:
+        yield block
 
 
 def cleanup_title(raw_title: str) -> str:
@@ -181,9 +247,11 @@ def parse_title_info(line: str) -> Tuple[str, str, List[str]]:
 
 
 def detect_section_label(line: str) -> Optional[str]:
-    normalized = clean_inline(line).replace(" ", "")
+    hits = KEYWORDS.hits(clean_inline(line).replace(" ", ""))
+    if not hits:
+        return None
     for label, key in SECTION_LABELS:
-        if label in normalized:
+        if label in hits:
             return key
     return None
 
@@ -234,13 +302,13 @@ def build_thresholds(lines: Sequence[str]) -> Dict[str, Optional[float]]:
 
 
 def build_critical_symptoms(symptoms: Sequence[str], extra_lines: Sequence[str]) -> List[str]:
-    joined = " ".join(extra_lines)
+    joined_hits = KEYWORDS.hits(" ".join(extra_lines))
     result: List[str] = []
     for symptom in symptoms:
-        if any(keyword in symptom for keyword in CRITICAL_KEYWORDS):
+        if KEYWORDS.contains_any(symptom, CRITICAL_KEYWORD_SET):
             result.append(symptom)
     for keyword in CRITICAL_KEYWORDS:
-        if keyword in joined and keyword not in result:
+        if keyword in joined_hits and keyword not in result:
             result.append(keyword)
     dedup: List[str] = []
     seen = set()
@@ -255,21 +323,21 @@ def build_critical_symptoms(symptoms: Sequence[str], extra_lines: Sequence[str])
 
 def build_treatment_payload(section: Dict[str, List[str]]) -> Dict[str, object]:
     treatment_lines = section.get("decontamination", []) + section.get("basic", []) + section.get("treatment", [])
-    treatment_text = " ".join(treatment_lines)
+    treatment_hits = KEYWORDS.hits(" ".join(treatment_lines))
 
-    has_lavage = "胃洗浄" in treatment_text
-    lavage_not = any(word in treatment_text for word in ["胃洗浄は不要", "胃洗浄不要", "胃洗浄は行わない", "胃洗浄禁忌"])
-    has_charcoal = "活性炭" in treatment_text
-    charcoal_not = any(word in treatment_text for word in ["活性炭不要", "活性炭は不要", "活性炭禁忌"])
-    has_dialysis = any(word in treatment_text for word in ["血液透析", "血液吸着", "血液浄化"])
-    antidote_none = any(word in treatment_text for word in ["解毒剤はない", "解毒剤なし", "特異的な治療法はない", "特異的な解毒剤はない"])
+    has_lavage = "胃洗浄" in treatment_hits
+    lavage_not = not treatment_hits.isdisjoint(LAVAGE_NOT_WORDS)
+    has_charcoal = "活性炭" in treatment_hits
+    charcoal_not = not treatment_hits.isdisjoint(CHARCOAL_NOT_WORDS)
+    has_dialysis = not treatment_hits.isdisjoint(DIALYSIS_WORDS)
+    antidote_none = not treatment_hits.isdisjoint(ANTIDOTE_NONE_WORDS)
 
     other_items = split_tokens(" | ".join(section.get("treatment_notes", []) + section.get("points", []) + section.get("notes", [])))
     filtered_other_items = []
     for item in other_items:
         if len(item) < 3 or len(item) > 28:
             continue
-        if any(word in item for word in ["ファイルシート", "IV", "文献", "参考", "危険度"]):
+        if KEYWORDS.contains_any(item, OTHER_TREATMENT_SKIP_WORDS):
             continue
         filtered_other_items.append(item)
     others = [{"name": item, "severity_min": 2, "note": item} for item in filtered_other_items[:8]]
@@ -299,10 +367,10 @@ def build_treatment_payload(section: Dict[str, List[str]]) -> Dict[str, object]:
 
 
 def build_recommended_tests(block_lines: Sequence[str]) -> List[str]:
-    blob = " ".join(block_lines)
+    blob_hits = KEYWORDS.hits(" ".join(block_lines))
     tests: List[str] = []
     for keyword, label in TEST_KEYWORDS:
-        if keyword in blob and label not in tests:
+        if keyword in blob_hits and label not in tests:
             tests.append(label)
     if not tests:
         tests = ["バイタル", "血液ガス", "電解質"]
@@ -320,104 +388,225 @@ def build_timeline(symptoms: Sequence[str], critical_symptoms: Sequence[str]) ->
     ]
 
 
-def parse_entries(lines: Sequence[Line]) -> List[Dict[str, object]]:
-    title_positions = [idx for idx, line in enumerate(lines) if is_title_line(line.text)]
-    profiles: List[Dict[str, object]] = []
+def build_profile(block: Sequence[Line]) -> Optional[Dict[str, object]]:
+    # 見出し行から始まる1項目分の行からプロファイルを作る(見出しから成分名が取れない場合は None)。
+    ingredient_name, component, aliases = parse_title_info(block[0].text)
+    if not ingredient_name:
+        return None
 
-    for pos_idx, start in enumerate(title_positions):
-        end = title_positions[pos_idx + 1] if pos_idx + 1 < len(title_positions) else len(lines)
-        block = lines[start:end]
-        if not block:
+    section: Dict[str, List[str]] = {"head": [clean_inline(block[0].text)]}
+    current = "head"
+    pages = {block[0].page}
+    for row in block[1:]:
+        pages.add(row.page)
+        text = clean_inline(row.text)
+        if not text:
             continue
-
-        ingredient_name, component, aliases = parse_title_info(block[0].text)
-        if not ingredient_name:
+        label = detect_section_label(text)
+        if label:
+            current = label
+            section.setdefault(current, [])
             continue
+        section.setdefault(current, []).append(text)
 
-        section: Dict[str, List[str]] = {"head": [clean_inline(block[0].text)]}
-        current = "head"
-        pages = {block[0].page}
-        for row in block[1:]:
-            pages.add(row.page)
-            text = clean_inline(row.text)
-            if not text:
-                continue
-            label = detect_section_label(text)
-            if label:
-                current = label
-                section.setdefault(current, [])
-                continue
-            section.setdefault(current, []).append(text)
+    symptom_lines = section.get("symptoms", [])
+    symptom_tokens = split_tokens(" | ".join(symptom_lines))
+    symptoms = symptom_tokens[:24] if symptom_tokens else ["情報不足"]
+    critical_symptoms = build_critical_symptoms(symptoms, extra_lines=[line.text for line in block])
 
-        symptom_lines = section.get("symptoms", [])
-        symptom_tokens = split_tokens(" | ".join(symptom_lines))
-        symptoms = symptom_tokens[:24] if symptom_tokens else ["情報不足"]
-        critical_symptoms = build_critical_symptoms(symptoms, extra_lines=[line.text for line in block])
+    thresholds = build_thresholds([line.text for line in block])
+    treatment = build_treatment_payload(section)
+    timeline = build_timeline(symptoms, critical_symptoms)
 
-        thresholds = build_thresholds([line.text for line in block])
-        treatment = build_treatment_payload(section)
-        timeline = build_timeline(symptoms, critical_symptoms)
+    product_aliases_raw = split_tokens(" | ".join(section.get("products", [])))
+    product_aliases: List[str] = []
+    for alias in product_aliases_raw:
+        if len(alias) < 2 or len(alias) > 30:
+            continue
+        if KEYWORDS.contains_any(alias, PRODUCT_ALIAS_SKIP_WORDS):
+            continue
+        if not re.search(r"[一-龥ぁ-んァ-ヶA-Za-z]", alias):
+            continue
+        product_aliases.append(alias)
+    # 順序保持重複除去
+    dedup_product_aliases: List[str] = []
+    seen_alias = set()
+    for alias in product_aliases:
+        key = alias.lower()
+        if key in seen_alias:
+            continue
+        seen_alias.add(key)
+        dedup_product_aliases.append(alias)
+    product_aliases = dedup_product_aliases[:24]
+    recommended_tests = build_recommended_tests([line.text for line in block])
 
-        product_aliases_raw = split_tokens(" | ".join(section.get("products", [])))
-        product_aliases: List[str] = []
-        for alias in product_aliases_raw:
-            if len(alias) < 2 or len(alias) > 30:
-                continue
-            if any(word in alias for word in ["主な製品", "危険度", "ファイルシート", "文献", "強アルカリ性", "中性"]):
-                continue
-            if not re.search(r"[一-龥ぁ-んァ-ヶA-Za-z]", alias):
-                continue
-            product_aliases.append(alias)
-        # 順序保持重複除去
-        dedup_product_aliases: List[str] = []
-        seen_alias = set()
-        for alias in product_aliases:
-            key = alias.lower()
-            if key in seen_alias:
-                continue
-            seen_alias.add(key)
-            dedup_product_aliases.append(alias)
-        product_aliases = dedup_product_aliases[:24]
-        recommended_tests = build_recommended_tests([line.text for line in block])
+    pk_lines = section.get("pk", [])
+    pk_summary = clean_inline(" / ".join(pk_lines[:4])) if pk_lines else "情報不足"
+    notes_summary = clean_inline(" / ".join(section.get("notes", [])[:4])) if section.get("notes") else ""
+    interpretation = clean_inline(" / ".join(section.get("points", [])[:3])) or "症候・曝露量を総合評価"
 
-        pk_lines = section.get("pk", [])
-        pk_summary = clean_inline(" / ".join(pk_lines[:4])) if pk_lines else "情報不足"
-        notes_summary = clean_inline(" / ".join(section.get("notes", [])[:4])) if section.get("notes") else ""
-        interpretation = clean_inline(" / ".join(section.get("points", [])[:3])) or "症候・曝露量を総合評価"
+    return {
+        "ingredient_name": ingredient_name,
+        "component": component,
+        "aliases": aliases,
+        "product_aliases": product_aliases,
+        "toxic_threshold_mg_kg": thresholds,
+        "symptoms": symptoms,
+        "critical_symptoms": critical_symptoms,
+        "symptom_timeline": timeline,
+        "toxicokinetics": {
+            "tmaxHours": "情報不足",
+            "halfLifeHours": "情報不足",
+            "vdLKg": "情報不足",
+            "proteinBindingPct": "情報不足",
+            "metabolism": pk_summary,
+            "elimination": pk_summary,
+        },
+        "treatment": treatment,
+        "analysis": {
+            "recommended_tests": recommended_tests,
+            "interpretation": interpretation,
+            "notes": notes_summary,
+        },
+        "evidence": {
+            "source": "ocr_result_1770368005162.txt",
+            "pages": sorted({page for page in pages if page > 0}),
+            "updated_at": datetime.now(timezone.utc).date().isoformat(),
+            "level": "ocr-auto",
+        },
+    }
 
-        profiles.append(
-            {
-                "ingredient_name": ingredient_name,
-                "component": component,
-                "aliases": aliases,
-                "product_aliases": product_aliases,
-                "toxic_threshold_mg_kg": thresholds,
-                "symptoms": symptoms,
-                "critical_symptoms": critical_symptoms,
-                "symptom_timeline": timeline,
-                "toxicokinetics": {
-                    "tmaxHours": "情報不足",
-                    "halfLifeHours": "情報不足",
-                    "vdLKg": "情報不足",
-                    "proteinBindingPct": "情報不足",
-                    "metabolism": pk_summary,
-                    "elimination": pk_summary,
-                },
-                "treatment": treatment,
-                "analysis": {
-                    "recommended_tests": recommended_tests,
-                    "interpretation": interpretation,
-                    "notes": notes_summary,
-                },
-                "evidence": {
-                    "source": "ocr_result_1770368005162.txt",
-                    "pages": sorted({page for page in pages if page > 0}),
-                    "updated_at": datetime.now(timezone.utc).date().isoformat(),
-                    "level": "ocr-auto",
-                },
-            }
-        )
-    return profiles
+
+def block_key(block: Sequence[Line]) -> str:
+    # 項目ブロック(見出し行から次の見出しの手前までの行とそのページ番号)の SHA-256。
+    digest = hashlib.sha256()
+    for line in block:
+        digest.update(f"{line.page}\t{line.text}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def builder_digest() -> str:
+    # プロファイル作成の実装(このスクリプトとキーワード照合器)の SHA-256。変わった場合はキャッシュを再利用しない。
+    digest = hashlib.sha256()
+    script = Path(__file__).resolve()
+    for path in (script, script.with_name("keyword_scanner.py")):
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+class ProfileCache:
+    # 前回の実行で作ったプロファイルを項目ブロックのハッシュで引く。
+    # 1行目がヘッダ({"format", "builder"})、以降は「ハッシュ<TAB>プロファイルの JSON」の JSONL で、
+    # プロファイルは使うまで文字列のまま持つ。今回の結果は一時ファイルへ書き、commit() で置き換える。
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.builder = builder_digest()
+        self.previous: Dict[str, str] = {}
+        self.reusable = False
+        self.hits = 0
+        self.misses = 0
+        if path.exists():
+            with path.open(encoding="utf-8") as handle:
+                header = json.loads(handle.readline() or "{}")
+                if header.get("format") == PROFILE_CACHE_FORMAT:
+                    self.reusable = header.get("builder") == self.builder
+                    for row in handle:
+                        key, _, profile = row.rstrip("\n").partition("\t")
+                        self.previous[key] = profile
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.tmp_path = path.with_name(path.name + ".tmp")
+        self.handle = self.tmp_path.open("w", encoding="utf-8")
+        self.handle.write(json.dumps({"format": PROFILE_CACHE_FORMAT, "builder": self.builder}) + "\n")
+
+    def lookup(self, key: str) -> Optional[str]:
+        # 再利用できる前回の結果(成分名が取れなかった項目は "null")。
+        return self.previous.get(key) if self.reusable else None
+
+    def resolve(self, key: str, profile: Optional[Dict[str, object]]) -> Optional[Dict[str, object]]:
+        # lookup() で見つかった項目は前回の結果を返し、それ以外は作成した profile を記録して返す。
+        cached = self.lookup(key)
+        if cached is not None:
+            self.hits += 1
+            self.handle.write(f"{key}\t{cached}\n")
+            return json.loads(cached)
+        self.misses += 1
+        previous = self.previous.get(key)
+        if profile is not None and previous is not None:
+            # 実装が変わっても結果が前回と同じ項目は、前回の updated_at を保つ。
+            before = json.loads(previous)
+            if isinstance(before, dict):
+                updated_at = before["evidence"]["updated_at"]
+                before["evidence"]["updated_at"] = profile["evidence"]["updated_at"]  # type: ignore[index]
+                if before == profile:
+                    profile["evidence"]["updated_at"] = updated_at  # type: ignore[index]
+        self.handle.write(f"{key}\t{json.dumps(profile, ensure_ascii=False)}\n")
+        return profile
+
+    def commit(self) -> None:
+        self.handle.close()
+        os.replace(self.tmp_path, self.path)
+
+
+def _build_task(task: Tuple[str, Optional[List[Line]]]) -> Tuple[str, Optional[Dict[str, object]]]:
+    # キャッシュから再利用する項目はブロックを渡さない(結果は呼び出し側が ProfileCache.resolve で補う)。
+    key, block = task
+    return key, build_profile(block) if block is not None else None
+
+
+def _iter_tasks(blocks: Iterable[List[Line]], cache: Optional[ProfileCache]) -> Iterator[Tuple[str, Optional[List[Line]]]]:
+    for block in blocks:
+        if cache is None:
+            yield "", block
+            continue
+        key = block_key(block)
+        yield key, None if cache.lookup(key) is not None else block
+
+
+def _bounded(items: Iterable[_T], slots: threading.Semaphore, stop: threading.Event) -> Iterator[_T]:
+    # Pool.imap は入力を先読みし続けるため、結果を受け取るまで次の項目を渡さないよう件数を制限する。
+    for item in items:
+        slots.acquire()
+        if stop.is_set():
+            return
+        yield item
+
+
+def iter_entries(
+    lines: Iterable[Line],
+    jobs: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    cache: Optional[ProfileCache] = None,
+) -> Iterator[Dict[str, object]]:
+    # jobs > 1 では項目ごとのプロファイル作成をプロセスプールで行い、入力(ページ)順に返す。0 は CPU 数。
+    # cache を渡すと、前回と同じブロックの項目は作成せずに前回の結果を返す。
+    jobs = jobs or os.cpu_count() or 1
+    tasks = _iter_tasks(iter_blocks(lines), cache)
+    if jobs == 1:
+        for key, profile in map(_build_task, tasks):
+            if cache is not None:
+                profile = cache.resolve(key, profile)
+            if profile is not None:
+                yield profile
+        return
+
+    slots = threading.Semaphore(jobs * chunk_size * 4)
+    stop = threading.Event()
+    with multiprocessing.Pool(jobs) as pool:
+        try:
+            for key, profile in pool.imap(_build_task, _bounded(tasks, slots, stop), chunksize=chunk_size):
+                slots.release()
+                if cache is not None:
+                    profile = cache.resolve(key, profile)
+                if profile is not None:
+                    yield profile
+        finally:
+            # 途中で打ち切られた場合に、入力待ちの先読みスレッドを終わらせる。
+            stop.set()
+            slots.release()
+
+
+def parse_entries(lines: Sequence[Line], jobs: int = 1) -> List[Dict[str, object]]:
+    return list(iter_entries(lines, jobs=jobs))
 
 
 def write_json(path: Path, payload: object) -> None:
@@ -425,39 +614,98 @@ def write_json(path: Path, payload: object) -> None:
     path.write_text(json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8")
 
 
+def read_volumes(paths: Sequence[Path]) -> Iterator[str]:
+    # 複数巻の OCR 出力を順に1行ずつ読む(ページ番号・項目は巻をまたいで続く)。
+    for path in paths:
+        with path.open(encoding="utf-8", errors="replace") as handle:
+            yield from handle
+
+
+def write_profiles_json(path: Path, profiles: Iterable[Dict[str, object]], metadata: Dict[str, object]) -> int:
+    # write_json(path, {"metadata": ..., "profiles": [...]}) と同じ内容を、プロファイルを溜めずに書き出す。
+    # entry_count は最後に決まるため、プロファイル部分を一時ファイルへ書いてから metadata の後ろに連結する。
+    path.parent.mkdir(parents=True, exist_ok=True)
+    body_path = path.with_name(path.name + ".profiles.tmp")
+    count = 0
+    with body_path.open("w", encoding="utf-8") as body:
+        for profile in profiles:
+            text = json.dumps(profile, ensure_ascii=False, indent=2).replace("\n", "\n    ")
+            body.write(("," if count else "") + "\n    " + text)
+            count += 1
+    document = json.dumps({"metadata": {**metadata, "entry_count": count}, "profiles": []}, ensure_ascii=False, indent=2)
+    with path.open("w", encoding="utf-8") as handle:
+        if count:
+            head, tail = document.rsplit("[]", 1)
+            handle.write(head + "[")
+            with body_path.open(encoding="utf-8") as body:
+                shutil.copyfileobj(body, handle)
+            handle.write("\n  ]" + tail)
+        else:
+            handle.write(document)
+    body_path.unlink()
+    return count
+
+
+def write_profiles_jsonl(path: Path, profiles: Iterable[Dict[str, object]]) -> int:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    count = 0
+    with path.open("w", encoding="utf-8") as handle:
+        for profile in profiles:
+            handle.write(json.dumps(profile, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="OCR家庭用品中毒データを構造化JSONへ変換")
     parser.add_argument(
         "--input",
-        default="/home/ubuntu/.cursor/projects/workspace/uploads/ocr_result_1770368005162.txt",
-        help="OCR入力テキストのパス",
+        nargs="+",
+        default=["/home/ubuntu/.cursor/projects/workspace/uploads/ocr_result_1770368005162.txt"],
+        help="OCR入力テキストのパス（複数巻は順に指定）",
     )
     parser.add_argument(
         "--output",
         default="data/ocr_household_knowledge.json",
         help="出力JSONパス",
     )
+    parser.add_argument("--jobs", type=int, default=1, help="プロファイル作成の並列プロセス数（0: CPU 数、1: 単一プロセス）")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="ワーカーへ一度に渡す項目数")
+    parser.add_argument(
+        "--cache",
+        default=None,
+        help="項目ごとの結果のキャッシュ（JSONL）。OCR 行が前回と同じ項目は再計算せず updated_at も保つ",
+    )
+    parser.add_argument(
+        "--format",
+        choices=("json", "jsonl"),
+        default=None,
+        help="出力形式（既定: 出力パスが .jsonl なら jsonl、それ以外は json）",
+    )
     args = parser.parse_args()
 
-    input_path = Path(args.input)
+    input_paths = [Path(value) for value in args.input]
     output_path = Path(args.output)
-
-    source = input_path.read_text(encoding="utf-8", errors="replace")
-    lines = parse_lines(source)
-    profiles = parse_entries(lines)
-
-    payload = {
-        "metadata": {
-            "source_file": str(input_path),
-            "compiled_at": datetime.now(timezone.utc).isoformat(),
-            "description": "OCR抽出資料から自動生成した中毒知識データ",
-            "entry_count": len(profiles),
-        },
-        "profiles": profiles,
-    }
-
-    write_json(output_path, payload)
-    print(f"saved: {output_path} (profiles={len(profiles)})")
+    output_format = args.format or ("jsonl" if output_path.suffix == ".jsonl" else "json")
+
+    cache = ProfileCache(Path(args.cache)) if args.cache else None
+    profiles = iter_entries(iter_lines(read_volumes(input_paths)), jobs=args.jobs, chunk_size=args.chunk_size, cache=cache)
+    if output_format == "jsonl":
+        count = write_profiles_jsonl(output_path, profiles)
+    else:
+        count = write_profiles_json(
+            output_path,
+            profiles,
+            {
+                "source_file": str(input_paths[0]) if len(input_paths) == 1 else [str(path) for path in input_paths],
+                "compiled_at": datetime.now(timezone.utc).isoformat(),
+                "description": "OCR抽出資料から自動生成した中毒知識データ",
+            },
+        )
+    if cache is not None:
+        cache.commit()
+        print(f"cache: {cache.path} (reused={cache.hits}, rebuilt={cache.misses})")
+    print(f"saved: {output_path} (profiles={count})")
 
 
 if __name__ == "__main__":
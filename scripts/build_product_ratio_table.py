@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+製品 → 成分の配合比と規格ヒントの事前計算表を生成する(index.html の起動時の配合比計算を省く)。
+
+計算は index.html の mergeProductsToDatabase と同一(toxicnavi.knowledge.KnowledgeBase.merge_products)で、
+OTC → 医療用の読み込み順に統合した結果を保存する。取得スクリプトは製品データセットの出力後に自動で再生成する。
+
+入力:
+  index.html (内蔵データ)
+  data/pmda_otc_products.json / data/pmda_iyaku_products.json
+
+出力:
+  data/toxicnavi_product_ratios.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from toxicnavi.product_table import DEFAULT_PRODUCT_TABLE_NAME, write_product_table  # noqa: E402
+
+
+def product_table_path_for(data_dir: Path) -> Path:
+    return data_dir / DEFAULT_PRODUCT_TABLE_NAME
+
+
+def write_ratio_table(data_dir: Path, index_html: Path = REPO_ROOT / "index.html", output: Optional[Path] = None) -> Dict[str, object]:
+    # 取得スクリプトからも呼ぶ(製品データセットを更新したら表も作り直す)。
+    return write_product_table(output or product_table_path_for(data_dir), data_dir, index_html)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="製品の配合比・規格ヒントの事前計算表の生成")
+    parser.add_argument("--data-dir", default=str(REPO_ROOT / "data"), help="データセットのディレクトリ")
+    parser.add_argument("--index-html", default=str(REPO_ROOT / "index.html"), help="内蔵データを含む index.html")
+    parser.add_argument("--output", default=None, help=f"出力先（既定: <data-dir>/{DEFAULT_PRODUCT_TABLE_NAME}）")
+    args = parser.parse_args()
+
+    data_dir = Path(args.data_dir)
+    output_path = Path(args.output) if args.output else product_table_path_for(data_dir)
+    payload = write_ratio_table(data_dir, Path(args.index_html), output_path)
+    datasets: List[Dict[str, object]] = payload["datasets"]  # type: ignore[assignment]
+    rows = sum(len(dataset["names"]) for dataset in datasets)  # type: ignore[arg-type]
+    print(f"saved: {output_path} (datasets={len(datasets)} rows={rows} ingredients={len(payload['ingredients'])})")  # type: ignore[arg-type]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+製品データを正規化名の先頭文字ごとの分割ファイルと目次(manifest.json)に分けて出力する。
+
+index.html は目次だけを起動時に読み、入力・OCR で必要になった分割ファイルを後から読み込む(製品数が増えても
+起動時の読み込み量が変わらない)。行の計算は配合比の事前計算表と同一(toxicnavi.product_shards)。
+取得スクリプトは製品データセットの出力後に自動で再生成する。OCR 知識を更新した場合も作り直す。
+
+入力:
+  index.html (内蔵データ)
+  data/pmda_otc_products.json / data/pmda_iyaku_products.json / data/ocr_household_knowledge.json
+
+出力:
+  data/product_shards/manifest.json
+  data/product_shards/shard-NNN.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import shutil
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from toxicnavi.product_shards import DEFAULT_SHARD_DIR_NAME, DEFAULT_SHARD_ROWS, write_product_shards  # noqa: E402
+
+
+def product_shards_dir_for(data_dir: Path) -> Path:
+    return data_dir / DEFAULT_SHARD_DIR_NAME
+
+
+def write_shard_bundle(
+    data_dir: Path,
+    index_html: Path = REPO_ROOT / "index.html",
+    output_dir: Optional[Path] = None,
+    shard_rows: int = DEFAULT_SHARD_ROWS,
+) -> Dict[str, object]:
+    # 取得スクリプトからも呼ぶ(製品データセットを更新したら分割ファイルも作り直す)。
+    return write_product_shards(output_dir or product_shards_dir_for(data_dir), data_dir, index_html, shard_rows)
+
+
+def remove_shard_bundle(data_dir: Path) -> None:
+    # 古い分割ファイルが残ると index.html が製品データセットの代わりに読むため削除する。
+    shutil.rmtree(product_shards_dir_for(data_dir), ignore_errors=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="製品データの先頭文字別分割ファイルの生成")
+    parser.add_argument("--data-dir", default=str(REPO_ROOT / "data"), help="データセットのディレクトリ")
+    parser.add_argument("--index-html", default=str(REPO_ROOT / "index.html"), help="内蔵データを含む index.html")
+    parser.add_argument("--output-dir", default=None, help=f"出力先（既定: <data-dir>/{DEFAULT_SHARD_DIR_NAME}）")
+    parser.add_argument("--shard-rows", type=int, default=DEFAULT_SHARD_ROWS, help="1ファイルにまとめる目安の製品数")
+    args = parser.parse_args()
+
+    data_dir = Path(args.data_dir)
+    output_dir = Path(args.output_dir) if args.output_dir else product_shards_dir_for(data_dir)
+    manifest = write_shard_bundle(data_dir, Path(args.index_html), output_dir, args.shard_rows)
+    shards: List[Dict[str, object]] = manifest["shards"]  # type: ignore[assignment]
+    rows = sum(int(shard["rows"]) for shard in shards)  # type: ignore[call-overload]
+    print(f"saved: {output_dir} (shards={len(shards)} rows={rows} keys={len(manifest['keys'])})")  # type: ignore[arg-type]
+
+
+if __name__ == "__main__":
+    main()
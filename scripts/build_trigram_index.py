@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+製品名・成分名・OCR 別名の文字 trigram 転置索引を生成する(OCR 薬剤名照合の一括処理用)。
+
+照合手順は index.html の matchDrugCandidate と同一(toxicnavi.matching.TrigramIndex.match)。
+
+入力:
+  index.html (内蔵データ)
+  data/pmda_otc_products.json / data/pmda_iyaku_products.json / data/ocr_household_knowledge.json
+
+出力:
+  data/toxicnavi_trigram_index.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from toxicnavi.knowledge import KnowledgeBase  # noqa: E402
+from toxicnavi.matching import DEFAULT_TRIGRAM_INDEX_NAME, TrigramIndex  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OCR 薬剤名照合用 trigram 索引の生成")
+    parser.add_argument("--data-dir", default=str(REPO_ROOT / "data"), help="データセットのディレクトリ")
+    parser.add_argument("--index-html", default=str(REPO_ROOT / "index.html"), help="内蔵データを含む index.html")
+    parser.add_argument("--output", default=None, help=f"出力先（既定: <data-dir>/{DEFAULT_TRIGRAM_INDEX_NAME}）")
+    parser.add_argument("--check", nargs="*", default=[], help="生成後に照合を試す薬剤名")
+    args = parser.parse_args()
+
+    data_dir = Path(args.data_dir)
+    output_path = Path(args.output) if args.output else data_dir / DEFAULT_TRIGRAM_INDEX_NAME
+    knowledge = KnowledgeBase.load_default(data_dir, Path(args.index_html))
+    index = TrigramIndex.from_knowledge(knowledge)
+    index.save(output_path, knowledge.merge_stats)
+    print(f"saved: {output_path} (entries={len(index.entries)} trigrams={len(index.postings)})")
+
+    for name in args.check:
+        started = time.perf_counter()
+        matched = index.match(name)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"{name} -> {matched} ({elapsed_ms:.2f}ms)")
+
+
+if __name__ == "__main__":
+    main()
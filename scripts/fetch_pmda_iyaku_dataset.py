@@ -9,24 +9,74 @@ PMDA 医療用医薬品(iyakuSearch)の検索結果CSVを収集し、
 from __future__ import annotations
 
 import argparse
+import codecs
 import csv
-import html
 import io
 import json
 import re
+import threading
 import time
 import unicodedata
+from bisect import bisect_left, bisect_right
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from build_product_ratio_table import product_table_path_for, write_ratio_table
+from build_product_shards import product_shards_dir_for, remove_shard_bundle, write_shard_bundle
+from pmda_compact_store import compact_path_for, write_compact
+from pmda_html import parse_search_page
+from pmda_http import RateLimiter, add_cache_arguments, clone_session, create_session
+from pmda_ingredient_index import IYAKU_INDEX_FIELDS, build_ingredient_index, write_ingredient_index
 
 
 BASE_URL = "https://www.pmda.go.jp"
 IYAKU_SEARCH_URL = f"{BASE_URL}/PmdaSearch/iyakuSearch/"
 IYAKU_EXPORT_CSV_URL = f"{BASE_URL}/PmdaSearch/iyakuSearch/exportSearchResult/csv"
 
+# Content-Type に charset が無く、UTF-8 として読めないエクスポートの符号化。
+EXPORT_FALLBACK_ENCODING = "cp932"
+# 符号化の判定に使う本文先頭のバイト数(見出し行の日本語を含む長さ)。
+EXPORT_DETECT_BYTES = 4096
+
+# 履歴件数の推定値が上限のこの倍率を超えるレンジは、検索せずに分割する。
+INDEX_SKIP_MARGIN = 1.2
+# 履歴密度から葉レンジを切り出す際の目標件数(上限に対する割合)。
+INDEX_LEAF_FILL = 0.85
+
+# 1日レンジでも上限を超える場合に、販売名の前方一致で追加分割する際の候補文字。
+# 既に取得した販売名・前回出力の販売名に現れた文字(漢字など)も実行時に候補へ加える。
+NAME_PREFIX_CHARS = (
+    "アイウエオカキクケコサシスセソタチツテトナニヌネノハヒフヘホマミムメモヤユヨラリルレロワヲンヴ"
+    "ガギグゲゴザジズゼゾダヂヅデドバビブベボパピプペポァィゥェォッャュョー・"
+    "ＡＢＣＤＥＦＧＨＩＪＫＬＭＮＯＰＱＲＳＴＵＶＷＸＹＺ０１２３４５６７８９"
+    "あいうえおかきくけこさしすせそたちつてとなにぬねのはひふへほまみむめもやゆよらりるれろわをん"
+    "がぎぐげござじずぜぞだぢづでどばびぶべぼぱぴぷぺぽ"
+    "ａｂｃｄｅｆｇｈｉｊｋｌｍｎｏｐｑｒｓｔｕｖｗｘｙｚ"
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+)
+# 上の候補で件数に届かない場合だけ、残りを文字コード範囲の総当たりで検索する(件数に達した時点で打ち切る)。
+# 記号・ひらがな・カタカナ、CJK 統合漢字(拡張A を含む)、全角/半角の英数記号。
+RESIDUAL_PREFIX_RANGES = (
+    (0x3001, 0x303F),
+    (0x3041, 0x30FF),
+    (0x3400, 0x4DBF),
+    (0x4E00, 0x9FFF),
+    (0xF900, 0xFAFF),
+    (0xFF01, 0xFF9F),
+    (0x0021, 0x007E),
+)
+# 上限超過した1日あたりの販売名prefix検索の既定上限。使い切っても件数に届かなければエラーで止める。
+DEFAULT_PREFIX_SEARCH_LIMIT = 3000
+# 前方一致の結果は全角/半角やかなの同一視で prefix 間に重複し得るため、取得件数は行の識別列で重複を除いて数える。
+# エクスポートに製品コード列は無く、文書ごとに異なる添付文書欄を販売名などと組み合わせて識別に使う。
+EXPORT_ROW_KEY_COLUMNS = ("販売名", "製造販売業者等", "一般名", "添付文書")
+
 
 def normalize_text(value: str) -> str:
     text = unicodedata.normalize("NFKC", value or "")
@@ -34,86 +84,111 @@ def normalize_text(value: str) -> str:
     return text
 
 
-def parse_html_form_defaults(page_html: str) -> Dict[str, str]:
-    payload: Dict[str, str] = {}
+class CsvRow:
+    # エクスポートCSVの1行。値はタプルで持ち、列名→位置の対応(header_index)と
+    # レンジ情報などの付加列(extra)は同じエクスポートの全行で共有する。
+    __slots__ = ("values", "header_index", "extra")
 
-    for tag in re.findall(r"<input[^>]*>", page_html, flags=re.I):
-        name_match = re.search(r'name="([^"]+)"', tag, flags=re.I)
-        if not name_match:
-            continue
-        name = name_match.group(1)
-        type_match = re.search(r'type="([^"]+)"', tag, flags=re.I)
-        input_type = (type_match.group(1).lower() if type_match else "text")
-        value_match = re.search(r'value="([^"]*)"', tag, flags=re.I)
-        value = html.unescape(value_match.group(1) if value_match else "")
-        checked = bool(re.search(r"checked", tag, flags=re.I))
-
-        if input_type in {"hidden", "text"}:
-            payload[name] = value
-        elif input_type == "radio" and checked:
-            payload[name] = value
-        elif input_type == "checkbox" and checked:
-            payload[name] = value or "on"
-
-    for select_match in re.finditer(
-        r'<select[^>]+name="([^"]+)"[^>]*>([\s\S]*?)</select>',
-        page_html,
-        flags=re.I,
-    ):
-        name = select_match.group(1)
-        body = select_match.group(2)
-        selected = re.search(
-            r'<option[^>]*selected="selected"[^>]*value="([^"]*)"',
-            body,
-            flags=re.I,
-        )
-        if not selected:
-            selected = re.search(
-                r'<option[^>]*value="([^"]*)"[^>]*selected="selected"',
-                body,
-                flags=re.I,
-            )
-        if not selected:
-            selected = re.search(r'<option[^>]*value="([^"]*)"', body, flags=re.I)
-        payload[name] = html.unescape(selected.group(1) if selected else "")
+    def __init__(self, values: Tuple[str, ...], header_index: Dict[str, int], extra: Dict[str, str]) -> None:
+        self.values = values
+        self.header_index = header_index
+        self.extra = extra
 
-    return payload
+    def get(self, name: str, default: str = "") -> str:
+        idx = self.header_index.get(name)
+        if idx is None:
+            return self.extra.get(name, default)
+        return self.values[idx] if idx < len(self.values) else ""
 
-
-def extract_hidden_inputs(result_html: str) -> Dict[str, str]:
-    values: Dict[str, str] = {}
-    for tag in re.findall(r'<input[^>]*type="hidden"[^>]*>', result_html, flags=re.I):
-        name_match = re.search(r'name="([^"]+)"', tag, flags=re.I)
-        if not name_match:
-            continue
-        value_match = re.search(r'value="([^"]*)"', tag, flags=re.I)
-        values[name_match.group(1)] = html.unescape(value_match.group(1) if value_match else "")
-    return values
+    def to_dict(self) -> Dict[str, str]:
+        item = {name: self.get(name) for name in self.header_index}
+        item.update(self.extra)
+        return item
 
 
-def parse_search_count(result_html: str) -> int:
-    match = re.search(r'name="searchCnt"[^>]*value="([0-9]+)"', result_html)
-    return int(match.group(1)) if match else 0
+RowLike = Union[CsvRow, Dict[str, str]]
 
 
-def parse_csv_rows(csv_text: str) -> List[Dict[str, str]]:
-    reader = csv.reader(io.StringIO(csv_text))
-    rows = list(reader)
-    if len(rows) < 4:
-        return []
-
-    header = rows[2]
-    data_rows: List[Dict[str, str]] = []
-    for row in rows[3:]:
+def iter_text_lines(chunks: Iterable[str]) -> Iterator[str]:
+    # 復号済みの断片を改行付きの行へ組み直す(引用符内の改行は csv.reader 側で結合される)。
+    pending = ""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        pending += chunk
+        lines = pending.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line + "\n"
+    if pending:
+        yield pending
+
+
+def iter_csv_rows(lines: Iterable[str], extra: Optional[Dict[str, str]] = None) -> Iterator[CsvRow]:
+    # 3行目を見出し、4行目以降をデータとして1行ずつ返す(空行は除外)。
+    header_index: Optional[Dict[str, int]] = None
+    shared_extra = extra or {}
+    for line_no, row in enumerate(csv.reader(lines)):
+        if line_no < 2:
+            continue
+        if header_index is None:
+            header_index = {col_name: idx for idx, col_name in enumerate(row)}
+            continue
         if not row:
             continue
         if all(not cell.strip() for cell in row):
             continue
-        item = {}
-        for idx, col_name in enumerate(header):
-            item[col_name] = row[idx].strip() if idx < len(row) else ""
-        data_rows.append(item)
-    return data_rows
+        yield CsvRow(tuple(cell.strip() for cell in row), header_index, shared_extra)
+
+
+def parse_csv_rows(csv_text: str) -> List[Dict[str, str]]:
+    return [row.to_dict() for row in iter_csv_rows(io.StringIO(csv_text))]
+
+
+def detect_export_encoding(head: bytes) -> str:
+    # charset の無いエクスポートは UTF-8(BOM 付きを含む)か Shift_JIS のいずれかとして、先頭の断片だけで判定する。
+    if head.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    try:
+        # 断片末尾で切れた多バイト文字は誤りとしない(final=False)。
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+    except UnicodeDecodeError:
+        return EXPORT_FALLBACK_ENCODING
+    return "utf-8"
+
+
+def iter_decoded_chunks(chunks: Iterable[bytes], encoding: Optional[str] = None) -> Iterator[str]:
+    # encoding が無ければ先頭 EXPORT_DETECT_BYTES バイト(本文がそれより短ければ全体)から判定し、
+    # 以降は同じ符号化で断片ごとに逐次復号する。小さな断片で BOM や多バイト文字が切れても判定を誤らない。
+    decoder: Optional[codecs.IncrementalDecoder] = None
+    head = b""
+    for chunk in chunks:
+        if not chunk:
+            continue
+        if decoder is None:
+            head += chunk
+            if encoding is None and len(head) < EXPORT_DETECT_BYTES:
+                continue
+            decoder = codecs.getincrementaldecoder(encoding or detect_export_encoding(head))(errors="replace")
+            chunk, head = head, b""
+        yield decoder.decode(chunk)
+    if decoder is None and head:
+        decoder = codecs.getincrementaldecoder(encoding or detect_export_encoding(head))(errors="replace")
+        yield decoder.decode(head)
+    if decoder is not None:
+        yield decoder.decode(b"", final=True)
+
+
+def iter_response_rows(response: requests.Response, extra: Optional[Dict[str, str]] = None) -> Iterator[CsvRow]:
+    # 応答本文を全体として保持せず、受信した分から順に CSV 行へ変換する。
+    # Content-Type に charset が無い場合は requests の既定値(text/* の ISO-8859-1 や本文全体からの推定)を使わない。
+    content_type = response.headers.get("Content-Type", "")
+    encoding = response.encoding if "charset" in content_type.lower() else None
+    try:
+        chunks = iter_decoded_chunks(response.iter_content(chunk_size=65536), encoding)
+        yield from iter_csv_rows(iter_text_lines(chunks), extra)
+    finally:
+        response.close()
 
 
 def split_generic_components(generic_name: str) -> List[str]:
@@ -158,12 +233,209 @@ def parse_doc_field(doc_field: str) -> Dict[str, str]:
     }
 
 
+class RangeCountIndex:
+    # 更新日レンジごとの検索件数を蓄積する区間インデックス。
+    # 実行をまたいで保存し、上限超過が分かっているレンジの検索省略と、
+    # 過去の件数密度に基づく分割日の決定に使う。
+    # 全レンジの境界で期間を細分した区間列を record() のたびに差分更新し、
+    # 各区間にはそれを含む最短の既知レンジ(同じ長さなら開始・終了日の早い方)を対応させる。
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = path
+        self.counts: Dict[Tuple[date, date], int] = {}
+        # 区間 i は [_bounds[i], _bounds[i + 1]) で、_owners[i] はその密度を決めるレンジ(どのレンジにも含まれなければ None)。
+        self._bounds: List[date] = []
+        self._owners: List[Optional[Tuple[date, date]]] = []
+
+    @classmethod
+    def load(cls, path: Path) -> "RangeCountIndex":
+        index = cls(path)
+        if path.exists():
+            payload = json.loads(path.read_text(encoding="utf-8"))
+            for item in payload.get("ranges", []):
+                index.record(date.fromisoformat(item["start"]), date.fromisoformat(item["end"]), int(item["count"]))
+        return index
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        write_json(
+            self.path,
+            {
+                "updated_at": datetime.now(timezone.utc).isoformat(),
+                "ranges": [
+                    {"start": start.isoformat(), "end": end.isoformat(), "count": count}
+                    for (start, end), count in sorted(self.counts.items())
+                ],
+            },
+        )
+
+    @staticmethod
+    def _rank(key: Tuple[date, date]) -> Tuple[int, Tuple[date, date]]:
+        return (key[1] - key[0]).days, key
+
+    def _split_at(self, boundary: date) -> int:
+        # boundary を区間境界に加え、その位置を返す。分割された区間は両側とも元の対応レンジを引き継ぐ。
+        idx = bisect_left(self._bounds, boundary)
+        if idx < len(self._bounds) and self._bounds[idx] == boundary:
+            return idx
+        if self._bounds:
+            if idx == 0:
+                self._owners.insert(0, None)
+            elif idx == len(self._bounds):
+                self._owners.append(None)
+            else:
+                self._owners.insert(idx, self._owners[idx - 1])
+        self._bounds.insert(idx, boundary)
+        return idx
+
+    def record(self, start_date: date, end_date: date, count: int) -> None:
+        key = (start_date, end_date)
+        known = key in self.counts
+        self.counts[key] = count
+        if known:
+            # 密度は参照時に counts から求めるため、既知レンジの件数更新は区間列を変えない。
+            return
+        first = self._split_at(start_date)
+        last = self._split_at(end_date + timedelta(days=1))
+        rank = self._rank(key)
+        for idx in range(first, last):
+            owner = self._owners[idx]
+            if owner is None or rank < self._rank(owner):
+                self._owners[idx] = key
+
+    def _density(self, idx: int) -> float:
+        owner = self._owners[idx]
+        assert owner is not None
+        return self.counts[owner] / ((owner[1] - owner[0]).days + 1)
+
+    def finest_ranges(self) -> List[Tuple[date, date, float]]:
+        # 全レンジの境界で細分した区間ごとに、含む最短の既知レンジの密度で按分した (開始, 終了, 件数)。
+        return [
+            (
+                self._bounds[idx],
+                self._bounds[idx + 1] - timedelta(days=1),
+                self._density(idx) * (self._bounds[idx + 1] - self._bounds[idx]).days,
+            )
+            for idx, owner in enumerate(self._owners)
+            if owner is not None
+        ]
+
+    def _covering_segments(self, start_date: date, end_date: date) -> Optional[List[Tuple[date, date, float]]]:
+        # [start_date, end_date] を隙間なく覆う (区間開始, 区間終了, 1日あたり件数) の列。覆えなければ None。
+        idx = bisect_right(self._bounds, start_date) - 1
+        if idx < 0:
+            return None
+        segments: List[Tuple[date, date, float]] = []
+        cursor = start_date
+        while cursor <= end_date:
+            if idx >= len(self._owners) or self._owners[idx] is None:
+                return None
+            segment_end = min(self._bounds[idx + 1] - timedelta(days=1), end_date)
+            segments.append((cursor, segment_end, self._density(idx)))
+            cursor = segment_end + timedelta(days=1)
+            idx += 1
+        return segments
+
+    def estimate(self, start_date: date, end_date: date) -> Optional[float]:
+        exact = self.counts.get((start_date, end_date))
+        if exact is not None:
+            return float(exact)
+        segments = self._covering_segments(start_date, end_date)
+        if segments is None:
+            return None
+        return sum(density * ((segment_end - segment_start).days + 1) for segment_start, segment_end, density in segments)
+
+    def split_date(self, start_date: date, end_date: date, target: float) -> Optional[date]:
+        # 先頭から推定件数が target に収まる最終日を返す(その日までを1つの葉レンジとする)。
+        segments = self._covering_segments(start_date, end_date)
+        if segments is None:
+            return None
+        cumulative = 0.0
+        for segment_start, segment_end, density in segments:
+            segment_days = (segment_end - segment_start).days + 1
+            if cumulative + density * segment_days > target:
+                fit_days = int((target - cumulative) / density)
+                split = segment_start + timedelta(days=fit_days - 1)
+                return max(start_date, min(split, end_date - timedelta(days=1)))
+            cumulative += density * segment_days
+        return None
+
+
+class PreviousIyakuRun:
+    # 前回出力(pmda_iyaku_products.json)の metadata.range_counts と製品を保持し、
+    # 件数が変わっていないレンジは前回の製品をそのまま再利用する(差分更新用)。
+    # 製品は統合済みのため、各製品は最終的に採用された行のレンジにのみ属する。
+    def __init__(self, payload: Dict[str, object]) -> None:
+        metadata = payload.get("metadata", {}) or {}
+        self.to_date = date.fromisoformat(str(metadata["to_date"]))
+        self.leaves: List[Tuple[date, date, int, str]] = [
+            (
+                date.fromisoformat(item["start"]),
+                date.fromisoformat(item["end"]),
+                int(item["count"]),
+                str(item.get("name_prefix", "")),
+            )
+            for item in metadata.get("range_counts", [])
+        ]
+        self.rows_by_range: Dict[Tuple[str, str], List[Dict[str, str]]] = {}
+        for product in payload.get("products", []) or []:
+            row = product_to_row(product)
+            self.rows_by_range.setdefault((row["_query_start"], row["_query_end"]), []).append(row)
+
+    @classmethod
+    def load(cls, path: Path) -> Optional["PreviousIyakuRun"]:
+        if not path.exists():
+            return None
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        metadata = payload.get("metadata", {}) or {}
+        if not metadata.get("range_counts") or not metadata.get("to_date"):
+            return None
+        return cls(payload)
+
+    def reuse(
+        self, start_date: date, end_date: date, count: int
+    ) -> Optional[Tuple[List[Tuple[date, date, int, str]], List[Dict[str, str]]]]:
+        inside: List[Tuple[date, date, int, str]] = []
+        for leaf in self.leaves:
+            leaf_start, leaf_end = leaf[0], leaf[1]
+            if leaf_end < start_date or leaf_start > end_date:
+                continue
+            if leaf_start < start_date or leaf_end > end_date:
+                # レンジ境界をまたぐ前回レンジがあると件数を比較できない。
+                return None
+            inside.append(leaf)
+        if not inside or sum(leaf[2] for leaf in inside) != count:
+            return None
+        rows: List[Dict[str, str]] = []
+        # 販売名prefixで分割した日は同じ日付レンジの葉が複数あるため、行は日付レンジ単位で1回だけ戻す。
+        for range_key in dict.fromkeys((leaf[0].isoformat(), leaf[1].isoformat()) for leaf in inside):
+            rows.extend(self.rows_by_range.get(range_key, []))
+        return inside, rows
+
+    def split_date(self, start_date: date, end_date: date) -> Optional[date]:
+        # 前回レンジの境界のうち中央に最も近い日で分割し、次の階層でも再利用できるようにする。
+        middle = start_date + timedelta(days=(end_date - start_date).days // 2)
+        boundaries = [leaf[1] for leaf in self.leaves if start_date <= leaf[1] < end_date]
+        if not boundaries:
+            return None
+        return min(boundaries, key=lambda boundary: (abs((boundary - middle).days), boundary))
+
+
 class IyakuFetcher:
-    def __init__(self, list_rows: int, max_search_count: int, sleep_sec: float) -> None:
+    def __init__(
+        self,
+        list_rows: int,
+        max_search_count: int,
+        sleep_sec: float,
+        session: Optional[requests.Session] = None,
+        range_index: Optional[RangeCountIndex] = None,
+        export_workers: int = 1,
+        prefix_search_limit: int = DEFAULT_PREFIX_SEARCH_LIMIT,
+    ) -> None:
         self.list_rows = list_rows
         self.max_search_count = max_search_count
         self.sleep_sec = sleep_sec
-        self.session = requests.Session()
+        self.session = session or requests.Session()
         self.session.headers.update(
             {
                 "User-Agent": "ToxicNavi-IyakuDatasetBuilder/1.0",
@@ -174,17 +446,48 @@ class IyakuFetcher:
         self.search_request_count = 0
         self.export_request_count = 0
         self.range_export_count = 0
+        self.reused_range_count = 0
+        self.reused_row_count = 0
+        self.range_counts: List[Dict[str, object]] = []
+        self.range_index = range_index
+        self.index_skipped_search_count = 0
+        self.prefix_split_days = 0
+        self.prefix_search_limit = prefix_search_limit
+        self.prefix_searches_left = 0
+        self.seen_sales_names: Set[str] = set()
+
+        # export_workers > 1 では葉レンジのCSVエクスポートをワーカーへ渡し、探索と並行させる。
+        # PMDA は検索条件をサーバー側セッションに保持するため、各ワーカーは Cookie を分けた個別セッション
+        # (接続プールは共有)で葉レンジを検索し直してからエクスポートする。全リクエストで1つのレート制限を共有する。
+        self.counter_lock = threading.Lock()
+        self.export_workers = max(1, export_workers)
+        self.export_executor: Optional[ThreadPoolExecutor] = None
+        self.rate_limiter: Optional[RateLimiter] = None
+        self.pending_exports: Deque[Tuple[Future, ProductAccumulator, Optional[Set[Tuple[str, ...]]]]] = deque()
+        self.worker_local = threading.local()
+        if self.export_workers > 1:
+            adapter = HTTPAdapter(pool_connections=self.export_workers + 1, pool_maxsize=self.export_workers + 1)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+            self.rate_limiter = RateLimiter(1.0 / sleep_sec if sleep_sec > 0 else 0.0)
+            self.export_executor = ThreadPoolExecutor(max_workers=self.export_workers)
 
     def initialize(self) -> None:
         page = self.session.get(IYAKU_SEARCH_URL, timeout=30)
         page.raise_for_status()
-        self.base_payload = parse_html_form_defaults(page.text)
-
-    def search_range(self, start_date: date, end_date: date) -> Tuple[int, str, Dict[str, str]]:
+        self.base_payload = parse_search_page(page.text).form_defaults
+
+    def search_range(
+        self,
+        start_date: date,
+        end_date: date,
+        name_prefix: str = "",
+        session: Optional[requests.Session] = None,
+    ) -> Tuple[int, str, Dict[str, str]]:
         payload = dict(self.base_payload)
         payload.update(
             {
-                "nameWord": "",
+                "nameWord": name_prefix,
                 "iyakuHowtoNameSearchRadioValue": "3",  # 販売名のみ
                 "howtoMatchRadioValue": "2",  # 前方一致
                 "updateDocFrDt": start_date.strftime("%Y%m%d"),
@@ -194,15 +497,23 @@ class IyakuFetcher:
                 "btnA.y": "0",
             }
         )
-        response = self.session.post(IYAKU_SEARCH_URL, data=payload, timeout=45)
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        response = (session or self.session).post(IYAKU_SEARCH_URL, data=payload, timeout=45)
         response.raise_for_status()
-        self.search_request_count += 1
+        with self.counter_lock:
+            self.search_request_count += 1
         result_html = response.text
-        count = parse_search_count(result_html)
-        hidden = extract_hidden_inputs(result_html)
-        return count, result_html, hidden
-
-    def export_csv(self, hidden_inputs: Dict[str, str], left_condition: str = "") -> List[Dict[str, str]]:
+        page = parse_search_page(result_html)
+        return page.search_count, result_html, page.hidden_inputs
+
+    def export_csv(
+        self,
+        hidden_inputs: Dict[str, str],
+        left_condition: str = "",
+        session: Optional[requests.Session] = None,
+        extra: Optional[Dict[str, str]] = None,
+    ) -> Iterator[CsvRow]:
         form: Dict[str, str] = {
             "searchNameTitle": "医療用医薬品 情報検索",
             "leftSearchName": "医薬品の添付文書等を調べる",
@@ -217,47 +528,244 @@ class IyakuFetcher:
         for i in range(19):
             form.setdefault(f"dispColumnsList[{i}]", "")
 
-        response = self.session.post(IYAKU_EXPORT_CSV_URL, data=form, timeout=90)
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+        response = (session or self.session).post(IYAKU_EXPORT_CSV_URL, data=form, timeout=90, stream=True)
         response.raise_for_status()
-        self.export_request_count += 1
-        return parse_csv_rows(response.text)
+        with self.counter_lock:
+            self.export_request_count += 1
+        return iter_response_rows(response, extra)
+
+    def collect_rows_recursive(
+        self,
+        start_date: date,
+        end_date: date,
+        out_rows: ProductAccumulator,
+        previous: Optional[PreviousIyakuRun] = None,
+    ) -> None:
+        range_label = f"{start_date.isoformat()}..{end_date.isoformat()}"
+        if self.range_index is not None and previous is None and start_date < end_date:
+            estimated = self.range_index.estimate(start_date, end_date)
+            if estimated is not None and estimated > self.max_search_count * INDEX_SKIP_MARGIN:
+                # 過去件数から上限超過が明らかなレンジは検索せずに分割する。
+                self.index_skipped_search_count += 1
+                print(f"range {range_label} estimated={estimated:.0f} (split without search)")
+                mid = self.choose_split_date(start_date, end_date, previous)
+                self.collect_rows_recursive(start_date, mid, out_rows, previous)
+                self.collect_rows_recursive(mid + timedelta(days=1), end_date, out_rows, previous)
+                return
 
-    def collect_rows_recursive(self, start_date: date, end_date: date, out_rows: List[Dict[str, str]]) -> None:
         count, _, hidden = self.search_range(start_date, end_date)
-        range_label = f"{start_date.isoformat()}..{end_date.isoformat()}"
+        if self.range_index is not None:
+            self.range_index.record(start_date, end_date, count)
         print(f"range {range_label} count={count}")
 
         if count == 0:
             return
 
+        if previous is not None:
+            reused = previous.reuse(start_date, end_date, count)
+            if reused is not None:
+                leaves, rows = reused
+                self.reused_range_count += len(leaves)
+                self.reused_row_count += len(rows)
+                for leaf_start, leaf_end, leaf_count, leaf_prefix in leaves:
+                    self.record_leaf(leaf_start, leaf_end, leaf_count, leaf_prefix)
+                for row in rows:
+                    self.seen_sales_names.add(row.get("販売名", ""))
+                out_rows.extend(rows)
+                print(f"  reused rows={len(rows)} ranges={len(leaves)} (unchanged)")
+                return
+
         if count <= self.max_search_count:
-            left_condition = f"改訂年月日:{start_date.strftime('%Y%m%d')}〜{end_date.strftime('%Y%m%d')}"
-            rows = self.export_csv(hidden, left_condition=left_condition)
-            self.range_export_count += 1
-            for row in rows:
-                row["_query_start"] = start_date.isoformat()
-                row["_query_end"] = end_date.isoformat()
-            out_rows.extend(rows)
-            print(f"  exported rows={len(rows)}")
-            time.sleep(self.sleep_sec)
+            self.export_leaf(start_date, end_date, hidden, count, out_rows)
             return
 
         if start_date >= end_date:
-            # 1日レンジでも上限超過する場合は、やむを得ず未取得としてスキップ。
-            # 実運用では追加分割条件(販売名prefix)を導入可能。
-            print(f"  skip day overflow: {range_label}")
+            # 1日レンジでも上限超過する場合は、販売名の前方一致で追加分割する。
+            self.prefix_split_days += 1
+            self.prefix_searches_left = self.prefix_search_limit
+            self.collect_day_by_prefix(start_date, "", count, out_rows)
             return
 
-        days = (end_date - start_date).days
-        mid = start_date + timedelta(days=days // 2)
-        self.collect_rows_recursive(start_date, mid, out_rows)
-        self.collect_rows_recursive(mid + timedelta(days=1), end_date, out_rows)
+        mid = self.choose_split_date(start_date, end_date, previous)
+        self.collect_rows_recursive(start_date, mid, out_rows, previous)
+        self.collect_rows_recursive(mid + timedelta(days=1), end_date, out_rows, previous)
+
+    def export_leaf(
+        self,
+        start_date: date,
+        end_date: date,
+        hidden: Dict[str, str],
+        count: int,
+        out_rows: ProductAccumulator,
+        name_prefix: str = "",
+        row_keys: Optional[Set[Tuple[str, ...]]] = None,
+    ) -> None:
+        # row_keys を渡すと、取り込んだ行の識別キー(EXPORT_ROW_KEY_COLUMNS)をそこへ加える。
+        self.range_export_count += 1
+        self.record_leaf(start_date, end_date, count, name_prefix)
+        if self.export_executor is None:
+            # 直列時は受信しながら集約器へ流し込み、エクスポート全体を保持しない。
+            rows = self.export_leaf_rows(start_date, end_date, hidden, name_prefix)
+            added = self.add_exported_rows(rows, out_rows, row_keys)
+            print(f"  exported rows={added}")
+            time.sleep(self.sleep_sec)
+            return
 
+        future = self.export_executor.submit(self.export_leaf_row_list, start_date, end_date, hidden, name_prefix)
+        self.pending_exports.append((future, out_rows, row_keys))
+        print(f"  queued export (pending={len(self.pending_exports)})")
+        # 完了済みの先頭から順に取り込み、未完了が溜まりすぎたら探索側を待たせる。
+        self.drain_exports(block=len(self.pending_exports) > self.export_workers * 2)
+
+    def export_leaf_rows(
+        self, start_date: date, end_date: date, hidden: Dict[str, str], name_prefix: str = ""
+    ) -> Iterator[CsvRow]:
+        left_condition = f"改訂年月日:{start_date.strftime('%Y%m%d')}〜{end_date.strftime('%Y%m%d')}"
+        if name_prefix:
+            left_condition += f" 販売名:{name_prefix}"
+        session: Optional[requests.Session] = None
+        if self.export_executor is not None:
+            if not hasattr(self.worker_local, "session"):
+                self.worker_local.session = clone_session(self.session, share_cookies=False)
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire()
+                self.worker_local.session.get(IYAKU_SEARCH_URL, timeout=30).raise_for_status()
+            session = self.worker_local.session
+            # 探索側の検索結果(hidden)は探索セッションの検索条件に対応するため使わず、
+            # このワーカーのセッションで同じ葉レンジを検索し直し、その直後にエクスポートする。
+            _, _, hidden = self.search_range(start_date, end_date, name_prefix=name_prefix, session=session)
+        return self.export_csv(
+            hidden,
+            left_condition=left_condition,
+            session=session,
+            extra={"_query_start": start_date.isoformat(), "_query_end": end_date.isoformat()},
+        )
 
-def build_products(rows: List[Dict[str, str]]) -> List[Dict[str, object]]:
-    product_map: Dict[Tuple[str, str, str], Dict[str, object]] = {}
+    def export_leaf_row_list(
+        self, start_date: date, end_date: date, hidden: Dict[str, str], name_prefix: str = ""
+    ) -> List[CsvRow]:
+        # 並列時はワーカー内で受信を完了させ、取り込み順を揃えるため1レンジ分だけ保持する。
+        return list(self.export_leaf_rows(start_date, end_date, hidden, name_prefix))
+
+    def add_exported_rows(
+        self, rows: Iterable[RowLike], out_rows: ProductAccumulator, row_keys: Optional[Set[Tuple[str, ...]]] = None
+    ) -> int:
+        added = 0
+        for row in rows:
+            self.seen_sales_names.add(row.get("販売名", ""))
+            if row_keys is not None:
+                row_keys.add(tuple(row.get(column, "") for column in EXPORT_ROW_KEY_COLUMNS))
+            out_rows.append(row)
+            added += 1
+        return added
+
+    def drain_exports(self, block: bool = False) -> None:
+        # 投入順に取り込むため、出力行の順序は直列実行と同じになる。
+        while self.pending_exports:
+            future, out_rows, row_keys = self.pending_exports[0]
+            if not block and not future.done():
+                return
+            rows = future.result()
+            self.pending_exports.popleft()
+            self.add_exported_rows(rows, out_rows, row_keys)
+            block = False
+
+    def finish_exports(self) -> None:
+        while self.pending_exports:
+            self.drain_exports(block=True)
+        if self.export_executor is not None:
+            self.export_executor.shutdown(wait=True)
+            self.export_executor = None
+
+    def record_leaf(self, start_date: date, end_date: date, count: int, name_prefix: str = "") -> None:
+        leaf: Dict[str, object] = {"start": start_date.isoformat(), "end": end_date.isoformat(), "count": count}
+        if name_prefix:
+            leaf["name_prefix"] = name_prefix
+        self.range_counts.append(leaf)
+
+    def next_prefix_chars(self, prefix: str) -> Iterator[str]:
+        # 候補文字(既定の文字と既知の販売名の次の文字)を先に、残りの文字コード範囲を後に返す。
+        # 並列エクスポート中も候補が直列実行と同じになるよう、投入済みのエクスポートをすべて取り込んでから数える。
+        while self.pending_exports:
+            self.drain_exports(block=True)
+        chars = dict.fromkeys(NAME_PREFIX_CHARS)
+        for name in sorted(self.seen_sales_names):
+            if len(name) > len(prefix) and name.startswith(prefix):
+                chars.setdefault(name[len(prefix)])
+        yield from chars
+        for first, last in RESIDUAL_PREFIX_RANGES:
+            for code in range(first, last + 1):
+                if chr(code) not in chars:
+                    yield chr(code)
+
+    def collect_day_by_prefix(
+        self, day: date, prefix: str, count: int, out_rows: ProductAccumulator
+    ) -> Set[Tuple[str, ...]]:
+        # prefix に1文字ずつ足して前方一致検索し、上限内に収まった prefix 単位でエクスポートする。
+        # 取り込んだ行の重複を除いた件数が prefix 全体の件数 count に達した時点で打ち切り、その行キーの集合を返す。
+        # 検索回数は1日あたり prefix_search_limit 回まで(prefix_searches_left)で、使い切るか候補文字が尽きても
+        # 件数に届かなければ RuntimeError を送出する。
+        row_keys: Set[Tuple[str, ...]] = set()
+        # 各 prefix の件数の合計(重複を含む上限値)。これが count に届くまでは重複除去後の件数も届かない。
+        covered = 0
+        for char in self.next_prefix_chars(prefix):
+            if covered >= count:
+                # 並列エクスポート中の行も数えるため、投入済みのエクスポートを取り込んでから判定する。
+                while self.pending_exports:
+                    self.drain_exports(block=True)
+                if len(row_keys) >= count:
+                    return row_keys
+            if self.prefix_searches_left <= 0:
+                break
+            self.prefix_searches_left -= 1
+            name_prefix = prefix + char
+            prefix_count, _, hidden = self.search_range(day, day, name_prefix=name_prefix)
+            if prefix_count == 0:
+                continue
+            print(f"range {day.isoformat()} prefix='{name_prefix}' count={prefix_count}")
+            if prefix_count <= self.max_search_count:
+                self.export_leaf(day, day, hidden, prefix_count, out_rows, name_prefix=name_prefix, row_keys=row_keys)
+            else:
+                row_keys |= self.collect_day_by_prefix(day, name_prefix, prefix_count, out_rows)
+            covered += prefix_count
+        while self.pending_exports:
+            self.drain_exports(block=True)
+        if len(row_keys) >= count:
+            return row_keys
+        reason = "search limit reached" if self.prefix_searches_left <= 0 else "prefix characters exhausted"
+        raise RuntimeError(
+            f"prefix split could not cover {day.isoformat()} prefix='{prefix}': "
+            f"count={count} distinct_rows={len(row_keys)} ({reason}, --max-prefix-searches={self.prefix_search_limit})"
+        )
 
-    for row in rows:
+    def choose_split_date(self, start_date: date, end_date: date, previous: Optional[PreviousIyakuRun]) -> date:
+        # 差分更新時は前回レンジ境界、履歴件数があれば密度から上限内に収まる日、
+        # いずれも無ければ日数で二分する。
+        mid: Optional[date] = None
+        if previous is not None:
+            mid = previous.split_date(start_date, end_date)
+        if mid is None and self.range_index is not None:
+            mid = self.range_index.split_date(start_date, end_date, self.max_search_count * INDEX_LEAF_FILL)
+        if mid is None:
+            days = (end_date - start_date).days
+            mid = start_date + timedelta(days=days // 2)
+        return mid
+
+
+class ProductAccumulator:
+    # エクスポート行を1行ずつ受け取り、(一般名, 販売名, 製造販売業者) 単位で製品へ集約する。
+    # 保持するのは集約後の製品のみで、生の行は取り込み後に破棄できる。
+    def __init__(self) -> None:
+        self.product_map: Dict[Tuple[str, str, str], Dict[str, object]] = {}
+        self.row_count = 0
+
+    def __len__(self) -> int:
+        return self.row_count
+
+    def append(self, row: RowLike) -> None:
+        self.row_count += 1
         generic_name = normalize_text(row.get("一般名", ""))
         product_name = normalize_text(row.get("販売名", ""))
         manufacturer = normalize_text(row.get("製造販売業者等", ""))
@@ -268,13 +776,13 @@ def build_products(rows: List[Dict[str, str]]) -> List[Dict[str, object]]:
         interview_field = row.get("インタビューフォーム", "")
 
         if not product_name:
-            continue
+            return
 
         ingredients = [{"name": name, "amount": ""} for name in split_generic_components(generic_name)]
         doc_info = parse_doc_field(document_field)
 
         key = (generic_name, product_name, manufacturer)
-        current = product_map.get(key)
+        current = self.product_map.get(key)
         candidate = {
             "generic_name": generic_name,
             "product_name": product_name,
@@ -299,47 +807,53 @@ def build_products(rows: List[Dict[str, str]]) -> List[Dict[str, object]]:
         }
 
         if current is None:
-            product_map[key] = candidate
-            continue
+            self.product_map[key] = candidate
+            return
 
         # より新しいPDF日付を優先して上書き
         cur_date = current["documents"].get("update_date", "")
         new_date = candidate["documents"].get("update_date", "")
         if new_date and (not cur_date or new_date > cur_date):
-            product_map[key] = candidate
+            self.product_map[key] = candidate
 
-    products = sorted(
-        product_map.values(),
-        key=lambda x: (x.get("product_name", ""), x.get("manufacturer", "")),
-    )
-    return products
+    def extend(self, rows: Iterable[RowLike]) -> None:
+        for row in rows:
+            self.append(row)
 
+    def products(self) -> List[Dict[str, object]]:
+        return sorted(
+            self.product_map.values(),
+            key=lambda x: (x.get("product_name", ""), x.get("manufacturer", "")),
+        )
 
-def build_ingredient_index(products: List[Dict[str, object]]) -> Dict[str, Dict[str, object]]:
-    index: Dict[str, Dict[str, object]] = {}
-    for product in products:
-        for ingredient in product.get("ingredients", []):
-            name = normalize_text(ingredient.get("name", ""))
-            if not name:
-                continue
-            if name not in index:
-                index[name] = {"count": 0, "products": []}
-            index[name]["count"] += 1
-            index[name]["products"].append(
-                {
-                    "product_name": product.get("product_name", ""),
-                    "generic_name": product.get("generic_name", ""),
-                    "manufacturer": product.get("manufacturer", ""),
-                }
-            )
 
-    for value in index.values():
-        value["products"] = sorted(
-            value["products"],
-            key=lambda x: (x["product_name"], x["manufacturer"]),
-        )
+def build_products(rows: Iterable[RowLike]) -> List[Dict[str, object]]:
+    accumulator = ProductAccumulator()
+    accumulator.extend(rows)
+    return accumulator.products()
+
+
+def product_to_row(product: Dict[str, object]) -> Dict[str, str]:
+    # build_products の出力を CSV 行形式へ戻す(差分更新時に前回製品を再投入するため)。
+    documents = product.get("documents", {}) or {}
+    source = product.get("source", {}) or {}
+    return {
+        "一般名": str(product.get("generic_name", "")),
+        "販売名": str(product.get("product_name", "")),
+        "製造販売業者等": str(product.get("manufacturer", "")),
+        "添付文書": str(documents.get("raw", "")),
+        "患者向医薬品ガイド／ワクチン接種を受ける人へのガイド": str(product.get("patient_guide", "")),
+        "インタビューフォーム": str(product.get("interview_form", "")),
+        "_query_start": str(source.get("query_start", "")),
+        "_query_end": str(source.get("query_end", "")),
+    }
+
 
-    return dict(sorted(index.items(), key=lambda x: x[0]))
+def load_sales_names(path: Path) -> Set[str]:
+    if not path.exists():
+        return set()
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    return {str(product.get("product_name", "")) for product in payload.get("products", []) or []}
 
 
 def write_json(path: Path, payload: object) -> None:
@@ -358,27 +872,104 @@ def main() -> None:
     parser.add_argument("--max-search-count", type=int, default=1000, help="検索1回で許容する最大件数")
     parser.add_argument("--list-rows", type=int, default=100, help="検索時の表示件数")
     parser.add_argument("--sleep-sec", type=float, default=0.05, help="リクエスト間待機秒")
+    parser.add_argument(
+        "--export-workers",
+        type=int,
+        default=1,
+        help="CSVエクスポートの並列ワーカー数（2以上で探索と並行、全体のリクエスト頻度は 1/--sleep-sec 件/秒まで）",
+    )
+    parser.add_argument(
+        "--max-prefix-searches",
+        type=int,
+        default=DEFAULT_PREFIX_SEARCH_LIMIT,
+        help="1日で上限件数を超えた場合の販売名前方一致検索の回数上限（使い切っても件数に届かなければエラー）",
+    )
     parser.add_argument("--output-dir", default="data", help="出力ディレクトリ")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="前回の pmda_iyaku_products.json の範囲別件数を使い、件数が変わったレンジと新規期間のみ再取得する",
+    )
+    parser.add_argument(
+        "--range-index",
+        default=None,
+        help="レンジ別検索件数の保存先（既定: <output-dir>/pmda_iyaku_range_counts.json）",
+    )
+    parser.add_argument("--no-range-index", action="store_true", help="レンジ別検索件数の再利用を無効にする")
+    parser.add_argument(
+        "--no-compact",
+        action="store_true",
+        help="列指向の圧縮版 (pmda_iyaku_products.compact.json) を出力しない（既存の圧縮版は削除）",
+    )
+    parser.add_argument(
+        "--no-ratio-table",
+        action="store_true",
+        help="配合比・規格ヒントの事前計算表 (toxicnavi_product_ratios.json) を再生成しない（既存の表は削除）",
+    )
+    parser.add_argument(
+        "--no-product-shards",
+        action="store_true",
+        help="先頭文字別の製品分割ファイル (product_shards/) を再生成しない（既存の分割ファイルは削除）",
+    )
+    add_cache_arguments(parser)
     args = parser.parse_args()
+    if args.incremental and args.cache_dir and args.cache_ttl_sec <= 0 and not args.offline:
+        # 無期限のキャッシュでは範囲別件数が前回から変わらず、差分更新が何も取り直さない。
+        parser.error("--incremental with --cache-dir needs a finite --cache-ttl-sec")
 
     start_date = parse_date_yyyymmdd(args.from_date)
     end_date = parse_date_yyyymmdd(args.to_date)
     if start_date > end_date:
         raise ValueError("from-date must be <= to-date")
 
+    output_dir = Path(args.output_dir)
+    range_index: Optional[RangeCountIndex] = None
+    if not args.no_range_index:
+        range_index = RangeCountIndex.load(
+            Path(args.range_index) if args.range_index else output_dir / "pmda_iyaku_range_counts.json"
+        )
+
     fetcher = IyakuFetcher(
         list_rows=args.list_rows,
         max_search_count=args.max_search_count,
         sleep_sec=args.sleep_sec,
+        session=create_session(args, {}),
+        range_index=range_index,
+        export_workers=args.export_workers,
+        prefix_search_limit=args.max_prefix_searches,
     )
     fetcher.initialize()
 
-    raw_rows: List[Dict[str, str]] = []
-    fetcher.collect_rows_recursive(start_date, end_date, raw_rows)
-    products = build_products(raw_rows)
-    ingredient_index = build_ingredient_index(products)
+    previous = PreviousIyakuRun.load(output_dir / "pmda_iyaku_products.json") if args.incremental else None
+    # 前回出力の販売名は、上限超過日の前方一致分割で先に試す候補文字に使う。
+    fetcher.seen_sales_names.update(load_sales_names(output_dir / "pmda_iyaku_products.json"))
+    if args.incremental and previous is None:
+        print("incremental: previous range_counts not found, running full fetch")
+
+    raw_rows = ProductAccumulator()
+    try:
+        if previous is not None and start_date <= previous.to_date:
+            # 前回取得済み期間は件数比較で差分のみ再取得し、それ以降は新規に取得する。
+            refresh_end = min(previous.to_date, end_date)
+            print(f"incremental: refresh {start_date.isoformat()}..{refresh_end.isoformat()}")
+            fetcher.collect_rows_recursive(start_date, refresh_end, raw_rows, previous)
+            if refresh_end < end_date:
+                fetcher.collect_rows_recursive(refresh_end + timedelta(days=1), end_date, raw_rows)
+        else:
+            fetcher.collect_rows_recursive(start_date, end_date, raw_rows)
+        fetcher.finish_exports()
+    finally:
+        # 途中で失敗しても、それまでに観測した件数は次回の分割に使えるよう保存する。
+        if range_index is not None:
+            range_index.save()
+    products = raw_rows.products()
+    ingredient_index = build_ingredient_index(
+        products,
+        IYAKU_INDEX_FIELDS,
+        lambda product: [normalize_text(ingredient.get("name", "")) for ingredient in product.get("ingredients", [])],
+        {"generated_at": datetime.now(timezone.utc).isoformat(), "source_file": "pmda_iyaku_products.json"},
+    )
 
-    output_dir = Path(args.output_dir)
     metadata = {
         "source": "PMDA 医療用医薬品 添付文書等情報検索(iyakuSearch)",
         "source_url": IYAKU_SEARCH_URL,
@@ -387,11 +978,17 @@ def main() -> None:
         "to_date": end_date.isoformat(),
         "max_search_count": args.max_search_count,
         "search_requests": fetcher.search_request_count,
+        "search_skipped_by_index": fetcher.index_skipped_search_count,
+        "prefix_split_days": fetcher.prefix_split_days,
         "export_requests": fetcher.export_request_count,
         "exported_ranges": fetcher.range_export_count,
+        "incremental": previous is not None,
+        "reused_ranges": fetcher.reused_range_count,
+        "reused_rows": fetcher.reused_row_count,
+        "range_counts": sorted(fetcher.range_counts, key=lambda item: (item["start"], item["end"])),
         "raw_export_rows": len(raw_rows),
         "unique_products": len(products),
-        "unique_ingredients": len(ingredient_index),
+        "unique_ingredients": len(ingredient_index["ingredients"]),  # type: ignore[arg-type]
     }
 
     write_json(
@@ -401,20 +998,34 @@ def main() -> None:
             "products": products,
         },
     )
-    write_json(
-        output_dir / "pmda_iyaku_ingredient_index.json",
-        {
-            "metadata": {
-                "generated_at": datetime.now(timezone.utc).isoformat(),
-                "source_file": "pmda_iyaku_products.json",
-                "ingredient_count": len(ingredient_index),
-            },
-            "ingredients": ingredient_index,
-        },
-    )
+    products_path = output_dir / "pmda_iyaku_products.json"
+    compact_path = compact_path_for(products_path)
+    if args.no_compact:
+        # 古い圧縮版が残ると index.html がそちらを優先して読むため削除する。
+        compact_path.unlink(missing_ok=True)
+    else:
+        write_compact(products_path, products, metadata)
+    ratio_table_path = product_table_path_for(output_dir)
+    if args.no_ratio_table:
+        # 古い表が残ると index.html が製品データセットの代わりに読むため削除する。
+        ratio_table_path.unlink(missing_ok=True)
+    else:
+        # 表は OTC → 医療用の順に統合した結果のため、出力先にある両データセットから作り直す。
+        write_ratio_table(output_dir)
+    if args.no_product_shards:
+        remove_shard_bundle(output_dir)
+    else:
+        write_shard_bundle(output_dir)
+    write_ingredient_index(output_dir / "pmda_iyaku_ingredient_index.json", ingredient_index)
 
     print(f"saved: {output_dir / 'pmda_iyaku_products.json'}")
     print(f"saved: {output_dir / 'pmda_iyaku_ingredient_index.json'}")
+    if not args.no_compact:
+        print(f"saved: {compact_path}")
+    if not args.no_ratio_table:
+        print(f"saved: {ratio_table_path}")
+    if not args.no_product_shards:
+        print(f"saved: {product_shards_dir_for(output_dir)}")
 
 
 if __name__ == "__main__":
@@ -9,17 +9,27 @@ from __future__ import annotations
 import argparse
 import html
 import json
+import queue
 import random
 import re
+import threading
 import time
-from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from html.parser import HTMLParser
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, TextIO, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from build_product_ratio_table import product_table_path_for, write_ratio_table
+from build_product_shards import product_shards_dir_for, remove_shard_bundle, write_shard_bundle
+from pmda_compact_store import compact_path_for, write_compact
+from pmda_html import SearchPage, parse_search_page
+from pmda_http import RateLimiter, add_cache_arguments, clone_session, create_session
+from pmda_ingredient_index import OTC_INDEX_FIELDS, build_ingredient_index, write_ingredient_index
 
 
 BASE_URL = "https://www.pmda.go.jp"
@@ -99,62 +109,50 @@ class SearchRow:
         return PDF_URL.format(code=self.code)
 
 
+# clean_text / parse_ingredients は詳細ページごとに何度も呼ばれるため、正規表現はモジュール読み込み時に1回だけ作る。
+LINE_BREAK_TAG_RE = re.compile(r"<br\s*/?>|</p\s*>", re.I)
+HTML_TAG_RE = re.compile(r"<[^>]+>")
+SPACES_RE = re.compile(r"[ \t]+")
+WHITESPACE_RE = re.compile(r"\s+")
+
+INGREDIENT_HEADING_RE = re.compile(r"\b(?:成分|分量|内訳)\b")
+INGREDIENT_AMOUNT_RE = re.compile(
+    r"([A-Za-z0-9一-龥ぁ-んァ-ヶー・αβγΑΒΓ\-\+／/\(\)]+)\s*"
+    r"([0-9]+(?:\.[0-9]+)?\s*(?:mg|g|mL|ml|μg|µg|mcg|IU|国際単位|単位|mEq|%|％))"
+)
+INGREDIENT_HEADINGS = frozenset({"成分", "分量", "内訳"})
+LEADING_DIGIT_RE = re.compile(r"[0-9０-９]")
+NAME_CHAR_RE = re.compile(r"[A-Za-z一-龥ぁ-んァ-ヶ]")
+
+
 def clean_text(fragment: str, keep_newline: bool = False) -> str:
-    fragment = re.sub(r"<br\s*/?>", "\n", fragment, flags=re.I)
-    fragment = re.sub(r"</p\s*>", "\n", fragment, flags=re.I)
-    fragment = re.sub(r"<[^>]+>", " ", fragment)
+    if "<" in fragment:
+        fragment = HTML_TAG_RE.sub(" ", LINE_BREAK_TAG_RE.sub("\n", fragment))
     fragment = html.unescape(fragment).replace("\u3000", " ")
     if keep_newline:
-        lines = [re.sub(r"[ \t]+", " ", line).strip() for line in fragment.splitlines()]
-        lines = [line for line in lines if line]
-        return "\n".join(lines)
-    fragment = re.sub(r"\s+", " ", fragment).strip()
-    return fragment
+        # 改行は [ \t] に含まれないため、行に分ける前にまとめて空白を圧縮できる。
+        lines = [line.strip() for line in SPACES_RE.sub(" ", fragment).splitlines()]
+        return "\n".join(line for line in lines if line)
+    return WHITESPACE_RE.sub(" ", fragment).strip()
 
 
 def normalize_key(key: str) -> str:
     return re.sub(r"[^\w一-龥ぁ-んァ-ヶー]", "", key)
 
 
-def extract_hidden_inputs(page_html: str) -> Dict[str, str]:
-    data: Dict[str, str] = {}
-    for tag in re.findall(r"<input[^>]*type=\"hidden\"[^>]*>", page_html, flags=re.I):
-        name_match = re.search(r"name=\"([^\"]+)\"", tag, flags=re.I)
-        if not name_match:
-            continue
-        value_match = re.search(r"value=\"([^\"]*)\"", tag, flags=re.I)
-        name = name_match.group(1)
-        value = value_match.group(1) if value_match else ""
-        data[name] = html.unescape(value)
-    return data
-
-
-def extract_rows_from_result_html(result_html: str) -> List[SearchRow]:
-    rows: List[SearchRow] = []
-    tr_list = re.findall(r"<tr class=['\"]TrColor[^'\"]*['\"]>(.*?)</tr>", result_html, flags=re.I | re.S)
-    if not tr_list:
-        tr_list = re.findall(r"<tr[^>]*>(.*?)</tr>", result_html, flags=re.I | re.S)
-
-    for row_html in tr_list:
-        name_match = re.search(
-            r"/PmdaSearch/otcDetail/GeneralList/([^'\"/]+)['\"][^>]*>\s*(.*?)\s*</a>",
-            row_html,
-            flags=re.I | re.S,
+def rows_from_search_page(page: SearchPage) -> List[SearchRow]:
+    return [
+        SearchRow(
+            code=row.code,
+            product_name=clean_text(row.name_html or ""),
+            manufacturer=clean_text(row.manufacturer_html) if row.manufacturer_html is not None else "",
         )
-        if not name_match:
-            continue
+        for row in page.rows
+    ]
 
-        code = name_match.group(1).strip()
-        product_name = clean_text(name_match.group(2))
-        manufacturer_match = re.search(
-            r"margin-top:10px; margin-bottom:0px;[^>]*>\s*(.*?)\s*</div>",
-            row_html,
-            flags=re.I | re.S,
-        )
-        manufacturer = clean_text(manufacturer_match.group(1)) if manufacturer_match else ""
 
-        rows.append(SearchRow(code=code, product_name=product_name, manufacturer=manufacturer))
-    return rows
+def extract_rows_from_result_html(result_html: str) -> List[SearchRow]:
+    return rows_from_search_page(parse_search_page(result_html))
 
 
 class DetailFieldParser(HTMLParser):
@@ -256,29 +254,27 @@ def parse_ingredients(ingredient_text: str) -> List[Dict[str, str]]:
 
     text = ingredient_text.replace("（", "(").replace("）", ")")
     text = text.replace("：", " ").replace("　", " ")
-    text = re.sub(r"\b(成分|分量|内訳)\b", " ", text)
-    text = re.sub(r"\s+", " ", text)
+    text = INGREDIENT_HEADING_RE.sub(" ", text)
 
-    pattern = re.compile(
-        r"([A-Za-z0-9一-龥ぁ-んァ-ヶー・αβγΑΒΓ\-\+／/\(\)]+)\s*"
-        r"([0-9]+(?:\.[0-9]+)?\s*(?:mg|g|mL|ml|μg|µg|mcg|IU|国際単位|単位|mEq|%|％))"
-    )
     seen = set()
     items: List[Dict[str, str]] = []
-    for name, amount in pattern.findall(text):
-        clean_name = name.strip().lstrip("・-")
+    # 成分名は空白を含まず、成分名と分量の間は \s* のため、テキスト全体の空白を圧縮しなくても同じ位置で一致する。
+    # 分量の数値と単位の間の空白だけを1つにまとめる。
+    for name, raw_amount in INGREDIENT_AMOUNT_RE.findall(text):
+        amount = " ".join(raw_amount.split())
+        clean_name = name.lstrip("・-")
         clean_name = clean_name.strip("()（）[]【】")
-        if clean_name in {"成分", "分量", "内訳"}:
+        if clean_name in INGREDIENT_HEADINGS:
             continue
-        if re.match(r"^[0-9０-９]", clean_name):
+        if LEADING_DIGIT_RE.match(clean_name):
             continue
-        if not re.search(r"[A-Za-z一-龥ぁ-んァ-ヶ]", clean_name):
+        if not NAME_CHAR_RE.search(clean_name):
             continue
-        key = (clean_name, amount.strip())
+        key = (clean_name, amount)
         if not clean_name or key in seen:
             continue
         seen.add(key)
-        items.append({"name": clean_name, "amount": amount.strip()})
+        items.append({"name": clean_name, "amount": amount})
     return items
 
 
@@ -308,37 +304,124 @@ def get_name_prefixes(session: requests.Session) -> List[str]:
     return prefixes
 
 
-def search_prefix(session: requests.Session, prefix: str, list_rows: int, sleep_sec: float) -> Tuple[List[SearchRow], int]:
+def search_prefix(
+    session: requests.Session,
+    prefix: str,
+    list_rows: int,
+    sleep_sec: float,
+    limiter: Optional[RateLimiter] = None,
+    page_executor: Optional[ThreadPoolExecutor] = None,
+) -> Tuple[List[SearchRow], int]:
+    # page_executor を渡すと2ページ目以降を並行して取得する(行の順序はページ順のまま)。
     payload = dict(SEARCH_PAYLOAD_BASE)
     payload["nameWord"] = prefix
     payload["ListRows"] = str(list_rows)
 
+    if limiter is not None:
+        limiter.acquire()
     response = session.post(SEARCH_URL, data=payload, timeout=30)
     response.raise_for_status()
     page_html = response.text
 
-    hidden_data = extract_hidden_inputs(page_html)
-    search_count = int(hidden_data.get("searchCnt", "0") or "0")
-    total_pages = int(hidden_data.get("totalPages", "1") or "1")
-
-    all_rows = extract_rows_from_result_html(page_html)
-    for page in range(2, total_pages + 1):
-        time.sleep(sleep_sec)
-        page_response = session.post(
-            PAGE_CHANGE_URL.format(page=page),
+    # hidden 入力・件数・ページ数・1ページ目の行を1回の走査で取り出す。
+    page = parse_search_page(page_html)
+    hidden_data = page.hidden_inputs
+    search_count = page.search_count
+    total_pages = page.total_pages
+
+    def fetch_page(page_no: int) -> List[SearchRow]:
+        # 並行取得では検索条件を持つサーバー側セッション(Cookie)を共有した複製で要求する。
+        page_session = session if page_executor is None else clone_session(session)
+        if limiter is not None:
+            limiter.acquire()
+        else:
+            time.sleep(sleep_sec)
+        page_response = page_session.post(
+            PAGE_CHANGE_URL.format(page=page_no),
             data=hidden_data,
             timeout=30,
         )
         page_response.raise_for_status()
         payload_json = page_response.json()
         result_list_html = payload_json.get("ResultList", "")
-        all_rows.extend(extract_rows_from_result_html(result_list_html))
+        return extract_rows_from_result_html(result_list_html)
+
+    all_rows = rows_from_search_page(page)
+    page_numbers = range(2, total_pages + 1)
+    if page_executor is None:
+        for page_no in page_numbers:
+            all_rows.extend(fetch_page(page_no))
+    else:
+        for rows in page_executor.map(fetch_page, page_numbers):
+            all_rows.extend(rows)
 
     return all_rows, search_count
 
 
-def fetch_detail(session: requests.Session, row: SearchRow, sleep_sec: float) -> Dict[str, object]:
-    time.sleep(sleep_sec)
+def iter_prefix_searches(
+    session: requests.Session,
+    prefixes: List[str],
+    list_rows: int,
+    sleep_sec: float,
+    workers: int,
+    limiter: RateLimiter,
+    searched_prefixes: Dict[str, Tuple[List[SearchRow], int]],
+) -> Iterator[Tuple[str, List[SearchRow], int]]:
+    # 接頭辞の順に (prefix, rows, search_count) を返す。searched_prefixes にある接頭辞は検索しない。
+    # limiter は製品詳細の取得と共有する全体の上限で、workers に関わらずすべての検索要求に適用する。
+    # workers > 1 では先の接頭辞を最大 workers 件まで並行して検索し、各接頭辞の2ページ目以降も
+    # 共有のスレッドプールで並行取得する。
+    # 呼び出し側が途中で打ち切ると未着手の検索は取り消す。
+    if workers <= 1:
+        for prefix in prefixes:
+            if prefix in searched_prefixes:
+                yield (prefix, *searched_prefixes[prefix])
+            else:
+                yield (prefix, *search_prefix(session, prefix, list_rows, sleep_sec, limiter=limiter))
+        return
+
+    adapter = HTTPAdapter(pool_connections=workers * 2, pool_maxsize=workers * 2)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    local = threading.local()
+    prefix_executor = ThreadPoolExecutor(max_workers=workers)
+    page_executor = ThreadPoolExecutor(max_workers=workers)
+
+    def worker(prefix: str) -> Tuple[List[SearchRow], int]:
+        if not hasattr(local, "session"):
+            # 並行する接頭辞検索がサーバー側の検索条件を上書きし合わないよう、ワーカーごとに別セッションにする。
+            local.session = clone_session(session, share_cookies=False)
+            limiter.acquire()
+            local.session.get(SEARCH_URL, timeout=30).raise_for_status()
+        return search_prefix(local.session, prefix, list_rows, sleep_sec, limiter=limiter, page_executor=page_executor)
+
+    pending = [prefix for prefix in prefixes if prefix not in searched_prefixes]
+    futures: Dict[str, Future] = {}
+    try:
+        for prefix in prefixes:
+            while pending and len(futures) < workers:
+                next_prefix = pending.pop(0)
+                futures[next_prefix] = prefix_executor.submit(worker, next_prefix)
+            if prefix in searched_prefixes:
+                yield (prefix, *searched_prefixes[prefix])
+            else:
+                yield (prefix, *futures.pop(prefix).result())
+    finally:
+        prefix_executor.shutdown(wait=False, cancel_futures=True)
+        page_executor.shutdown(wait=True, cancel_futures=True)
+        prefix_executor.shutdown(wait=True)
+
+
+def fetch_detail(
+    session: requests.Session,
+    row: SearchRow,
+    sleep_sec: float,
+    limiter: Optional[RateLimiter] = None,
+) -> Dict[str, object]:
+    if limiter is not None:
+        limiter.acquire()
+    else:
+        time.sleep(sleep_sec)
     response = session.get(DETAIL_URL.format(code=row.code), timeout=30)
     response.raise_for_status()
     detail_html = response.text
@@ -367,27 +450,152 @@ def fetch_detail(session: requests.Session, row: SearchRow, sleep_sec: float) ->
     return record
 
 
-def build_ingredient_index(products: List[Dict[str, object]]) -> Dict[str, Dict[str, object]]:
-    index: Dict[str, Dict[str, object]] = defaultdict(lambda: {"count": 0, "products": []})
-    for product in products:
-        names = []
-        for ingredient in product.get("ingredients", []):
-            ingredient_name = ingredient.get("name", "").strip()
-            if ingredient_name:
-                names.append(ingredient_name)
-
-        for ingredient_name in sorted(set(names)):
-            index[ingredient_name]["count"] += 1
-            index[ingredient_name]["products"].append(
-                {
-                    "code": product.get("code"),
-                    "product_name": product.get("product_name"),
-                }
-            )
-    # sort product list for stability
-    for value in index.values():
-        value["products"] = sorted(value["products"], key=lambda x: (x["product_name"] or "", x["code"] or ""))
-    return dict(sorted(index.items(), key=lambda x: x[0]))
+class DetailFetchPipeline:
+    # 接頭辞検索と並行して製品詳細を取得するワーカー群。
+    # submit() された行を上限付きキューで workers 個のスレッドへ渡す。キューが満杯の間は submit() が待つため、
+    # 検索が詳細取得より先行しすぎない。要求間隔は workers に関わらず limiter(接頭辞検索と共有する全体の上限)で制御する。
+    # on_record は取得完了ごとにワーカースレッドから排他して呼ばれる(チェックポイント記録用)。
+    def __init__(
+        self,
+        session: requests.Session,
+        sleep_sec: float,
+        workers: int,
+        limiter: RateLimiter,
+        on_record: Optional[Callable[[Dict[str, object]], None]] = None,
+        queue_size: int = 0,
+    ) -> None:
+        self.workers = max(1, workers)
+        self.sleep_sec = sleep_sec
+        self.on_record = on_record
+        self.rows: "queue.Queue[Optional[SearchRow]]" = queue.Queue(maxsize=queue_size or self.workers * 50)
+        self.records: Dict[str, Dict[str, object]] = {}
+        self.errors: Dict[str, Exception] = {}
+        self.lock = threading.Lock()
+        self.submitted = 0
+        self.done = 0
+        self.started_at = time.monotonic()
+        self.closed = False
+
+        if self.workers > 1:
+            adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+        # 検索はメインスレッドが元のセッションで続けるため、ワーカーは複製したセッションを使う。
+        self.threads = [
+            threading.Thread(target=self._run, args=(clone_session(session), limiter), daemon=True)
+            for _ in range(self.workers)
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, row: SearchRow) -> None:
+        self.submitted += 1
+        self.rows.put(row)
+
+    def _report_progress(self) -> None:
+        if self.done % 20 == 0:
+            elapsed = max(time.monotonic() - self.started_at, 1e-9)
+            print(f"  detail progress: {self.done}/{self.submitted} ({self.done / elapsed:.2f} products/sec)")
+
+    def _run(self, session: requests.Session, limiter: RateLimiter) -> None:
+        while True:
+            row = self.rows.get()
+            if row is None:
+                return
+            try:
+                record = fetch_detail(session, row, self.sleep_sec, limiter=limiter)
+            except Exception as exc:  # noqa: BLE001
+                with self.lock:
+                    self.errors[row.code] = exc
+                    print(f"  detail failed: code={row.code} error={exc}")
+                    self.done += 1
+                    self._report_progress()
+                continue
+            with self.lock:
+                self.records[row.code] = record
+                if self.on_record is not None:
+                    self.on_record(record)
+                self.done += 1
+                self._report_progress()
+
+    def close(self, cancel: bool = False) -> Tuple[Dict[str, Dict[str, object]], Dict[str, Exception]]:
+        # 投入済みの行をすべて取得し終えるまで待ち、(code → record, code → 例外) を返す。
+        # cancel=True では未着手の行を捨て、取得中の行だけを待つ(例外時の後始末用)。2回目以降の呼び出しは何もしない。
+        if self.closed:
+            return self.records, self.errors
+        self.closed = True
+        if cancel:
+            while True:
+                try:
+                    self.rows.get_nowait()
+                except queue.Empty:
+                    break
+        for _ in self.threads:
+            self.rows.put(None)
+        for thread in self.threads:
+            thread.join()
+        if self.done % 20 != 0:
+            elapsed = max(time.monotonic() - self.started_at, 1e-9)
+            print(f"  detail progress: {self.done}/{self.submitted} ({self.done / elapsed:.2f} products/sec)")
+        return self.records, self.errors
+
+
+class CheckpointJournal:
+    # 取得途中の結果を追記する JSONL ジャーナル。
+    # 1行目に取得条件(config)、以降に接頭辞検索結果(prefix)と製品詳細(detail)を記録し、
+    # --resume 時に再生して未完了分のみを取得する。追記は検索(メインスレッド)と詳細取得ワーカーの両方から行う。
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.handle: Optional[TextIO] = None
+        self.lock = threading.Lock()
+
+    def load(self) -> List[Dict[str, object]]:
+        if not self.path.exists():
+            return []
+        entries: List[Dict[str, object]] = []
+        with self.path.open(encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    entries.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # 異常終了時の書きかけ行は以降を含めて破棄する。
+                    break
+        return entries
+
+    def open(self, config: Dict[str, object], resume: bool) -> List[Dict[str, object]]:
+        entries = self.load() if resume else []
+        if entries:
+            saved_config = entries[0]
+            for key, value in config.items():
+                if saved_config.get(key) != value:
+                    raise ValueError(
+                        f"checkpoint {key} mismatch: {saved_config.get(key)!r} != {value!r} "
+                        f"({self.path} を削除するか --resume なしで再実行してください)"
+                    )
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # 書きかけ行を除いた内容で置き換えてから追記を再開する。
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with tmp_path.open("w", encoding="utf-8") as handle:
+            for entry in entries or [dict(config, type="config")]:
+                handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        tmp_path.replace(self.path)
+        self.handle = self.path.open("a", encoding="utf-8")
+        return entries[1:]
+
+    def append(self, entry: Dict[str, object]) -> None:
+        if self.handle is None:
+            raise RuntimeError("checkpoint journal is not open")
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self.lock:
+            self.handle.write(line)
+            self.handle.flush()
+
+    def close(self, remove: bool = False) -> None:
+        if self.handle is not None:
+            self.handle.close()
+            self.handle = None
+        if remove and self.path.exists():
+            self.path.unlink()
 
 
 def write_json(path: Path, payload: object) -> None:
@@ -400,6 +608,19 @@ def main() -> None:
     parser.add_argument("--max-products", type=int, default=200, help="取得する製品詳細の最大件数")
     parser.add_argument("--list-rows", type=int, default=100, help="検索一覧の1ページ表示件数")
     parser.add_argument("--sleep-sec", type=float, default=0.05, help="各リクエスト間の待機秒")
+    parser.add_argument("--workers", type=int, default=1, help="製品詳細取得の並列ワーカー数")
+    parser.add_argument(
+        "--search-workers",
+        type=int,
+        default=1,
+        help="接頭辞検索(一覧のページ送りを含む)の並列ワーカー数",
+    )
+    parser.add_argument(
+        "--max-rps",
+        type=float,
+        default=None,
+        help="全体のリクエスト上限(件/秒、並列数に関わらず接頭辞検索・ページ送り・製品詳細のすべての要求で共有)。未指定時は 1/--sleep-sec",
+    )
     parser.add_argument("--seed", type=int, default=20260213, help="接頭辞探索のシャッフルシード")
     parser.add_argument(
         "--priority-prefixes",
@@ -407,19 +628,49 @@ def main() -> None:
         help="先行探索する接頭辞（カンマ区切り）",
     )
     parser.add_argument("--output-dir", default="data", help="出力先ディレクトリ")
+    parser.add_argument(
+        "--checkpoint",
+        default=None,
+        help="途中経過を記録する JSONL パス（既定: <output-dir>/pmda_otc_products.checkpoint.jsonl）",
+    )
+    parser.add_argument("--resume", action="store_true", help="チェックポイントから未完了分のみ取得を再開する")
+    parser.add_argument(
+        "--no-compact",
+        action="store_true",
+        help="列指向の圧縮版 (pmda_otc_products.compact.json) を出力しない（既存の圧縮版は削除）",
+    )
+    parser.add_argument(
+        "--no-ratio-table",
+        action="store_true",
+        help="配合比・規格ヒントの事前計算表 (toxicnavi_product_ratios.json) を再生成しない（既存の表は削除）",
+    )
+    parser.add_argument(
+        "--no-product-shards",
+        action="store_true",
+        help="先頭文字別の製品分割ファイル (product_shards/) を再生成しない（既存の分割ファイルは削除）",
+    )
+    add_cache_arguments(parser)
     args = parser.parse_args()
 
-    session = requests.Session()
-    session.headers.update(
+    # --max-rps はこのスクリプトのすべての要求(接頭辞検索・ページ送り・製品詳細)で共有する1つの上限。
+    max_rps = args.max_rps
+    if max_rps is None:
+        max_rps = 1.0 / args.sleep_sec if args.sleep_sec > 0 else 0.0
+    limiter = RateLimiter(max_rps)
+
+    session = create_session(
+        args,
         {
             "User-Agent": "ToxicNavi-DatasetBuilder/1.0 (+https://github.com/consommeandcola-ctrl/toxicology_app)",
             "Accept-Language": "ja,en;q=0.8",
-        }
+        },
     )
 
     # セッション初期化
+    limiter.acquire()
     session.get(SEARCH_URL, timeout=30).raise_for_status()
 
+    limiter.acquire()
     prefixes = get_name_prefixes(session)
     rng = random.Random(args.seed)
     rng.shuffle(prefixes)
@@ -434,48 +685,121 @@ def main() -> None:
     if priority_prefixes:
         print(f"priority prefixes: {','.join(priority_prefixes)}")
 
-    rows_by_code: Dict[str, SearchRow] = {}
-    total_hits = 0
-
-    for idx, prefix in enumerate(prefixes, start=1):
-        rows, search_count = search_prefix(session, prefix, args.list_rows, args.sleep_sec)
-        total_hits += search_count
-        for row in rows:
-            if not row.code:
-                continue
-            if row.code not in rows_by_code:
-                rows_by_code[row.code] = row
-
+    output_dir = Path(args.output_dir)
+    journal = CheckpointJournal(
+        Path(args.checkpoint) if args.checkpoint else output_dir / "pmda_otc_products.checkpoint.jsonl"
+    )
+    journal_entries = journal.open(
+        {
+            "seed": args.seed,
+            "priority_prefixes": priority_prefixes,
+            "list_rows": args.list_rows,
+        },
+        resume=args.resume,
+    )
+    searched_prefixes: Dict[str, Tuple[List[SearchRow], int]] = {}
+    fetched_records: Dict[str, Dict[str, object]] = {}
+    for entry in journal_entries:
+        if entry.get("type") == "prefix":
+            searched_prefixes[str(entry["prefix"])] = (
+                [SearchRow(code=code, product_name=name, manufacturer=maker) for code, name, maker in entry["rows"]],
+                int(entry["search_count"]),
+            )
+        elif entry.get("type") == "detail":
+            record = entry["record"]
+            fetched_records[str(record["code"])] = record
+    if args.resume:
         print(
-            f"[{idx}/{len(prefixes)}] prefix='{prefix}' hit={search_count} "
-            f"unique_codes={len(rows_by_code)}"
+            f"resume: {journal.path} prefixes={len(searched_prefixes)} "
+            f"detail_records={len(fetched_records)}"
         )
 
-        if args.max_products > 0 and len(rows_by_code) >= args.max_products:
-            break
+    rows_by_code: Dict[str, SearchRow] = {}
+    total_hits = 0
 
-    # rows_by_code は探索順(挿入順)を保持する。max-products を指定した場合は
-    # 探索順で先に見つかった製品を優先して採用し、偏りを抑える。
-    selected_rows = list(rows_by_code.values())
-    if args.max_products > 0:
-        selected_rows = selected_rows[: args.max_products]
-    selected_rows = sorted(selected_rows, key=lambda row: (row.product_name, row.code))
+    # 接頭辞検索で新しく見つかった製品は、検索の完了を待たずに詳細取得へ回す。
+    # 採用するのは探索順(rows_by_code への登録順)で先に見つかった max-products 件で、一括実行と同じ。
+    # 検索と詳細取得は同じ limiter を通すため、重ねて実行しても合計の要求頻度は max_rps を超えない
+    # (既定の 1/--sleep-sec は直列実行時の上限と同じ)。
+    print(
+        f"detail fetch: pipelined with prefix search (workers={max(1, args.workers)}, "
+        f"shared max_rps={max_rps:g})"
+    )
+    pipeline = DetailFetchPipeline(
+        session,
+        sleep_sec=args.sleep_sec,
+        workers=args.workers,
+        limiter=limiter,
+        on_record=lambda record: journal.append({"type": "detail", "record": record}),
+    )
+    # 例外や中断で抜けた場合も、詳細取得のスレッドと接頭辞検索の生成器(とそのスレッドプール)を必ず閉じる。
+    searches: Optional[Iterator[Tuple[str, List[SearchRow], int]]] = None
+    try:
+        # 結果は並行検索でも接頭辞の順に受け取り、rows_by_code への登録順と打ち切り位置を直列実行と揃える。
+        searches = iter_prefix_searches(
+            session,
+            prefixes,
+            args.list_rows,
+            args.sleep_sec,
+            workers=args.search_workers,
+            limiter=limiter,
+            searched_prefixes=searched_prefixes,
+        )
+        for idx, (prefix, rows, search_count) in enumerate(searches, start=1):
+            if prefix not in searched_prefixes:
+                journal.append(
+                    {
+                        "type": "prefix",
+                        "prefix": prefix,
+                        "search_count": search_count,
+                        "rows": [[row.code, row.product_name, row.manufacturer] for row in rows],
+                    }
+                )
+            total_hits += search_count
+            for row in rows:
+                if not row.code:
+                    continue
+                if row.code not in rows_by_code:
+                    rows_by_code[row.code] = row
+                    selected = args.max_products <= 0 or len(rows_by_code) <= args.max_products
+                    if selected and row.code not in fetched_records:
+                        pipeline.submit(row)
+
+            print(
+                f"[{idx}/{len(prefixes)}] prefix='{prefix}' hit={search_count} "
+                f"unique_codes={len(rows_by_code)}"
+            )
 
-    print(f"detail fetch target: {len(selected_rows)} products")
-    products: List[Dict[str, object]] = []
-    failed_codes: List[str] = []
+            if args.max_products > 0 and len(rows_by_code) >= args.max_products:
+                break
+        searches.close()
 
-    for i, row in enumerate(selected_rows, start=1):
-        try:
-            product = fetch_detail(session, row, args.sleep_sec)
-            products.append(product)
-            if i % 20 == 0 or i == len(selected_rows):
-                print(f"  detail progress: {i}/{len(selected_rows)}")
-        except Exception as exc:  # noqa: BLE001
-            failed_codes.append(row.code)
-            print(f"  detail failed: code={row.code} error={exc}")
+        # rows_by_code は探索順(挿入順)を保持する。max-products を指定した場合は
+        # 探索順で先に見つかった製品を優先して採用し、偏りを抑える。
+        selected_rows = list(rows_by_code.values())
+        if args.max_products > 0:
+            selected_rows = selected_rows[: args.max_products]
+        selected_rows = sorted(selected_rows, key=lambda row: (row.product_name, row.code))
 
-    ingredient_index = build_ingredient_index(products)
+        print(
+            f"detail fetch target: {len(selected_rows)} products "
+            f"(pending={pipeline.submitted - pipeline.done}, workers={max(1, args.workers)})"
+        )
+        fetched_products, detail_errors = pipeline.close()
+    finally:
+        if searches is not None:
+            searches.close()
+        pipeline.close(cancel=True)
+    fetched_records.update(fetched_products)
+    failed_codes = [row.code for row in selected_rows if row.code in detail_errors]
+    products = [fetched_records[row.code] for row in selected_rows if row.code in fetched_records]
+
+    ingredient_index = build_ingredient_index(
+        products,
+        OTC_INDEX_FIELDS,
+        lambda product: [str(ingredient.get("name", "")).strip() for ingredient in product.get("ingredients", [])],
+        {"generated_at": datetime.now(timezone.utc).isoformat(), "source_file": "pmda_otc_products.json"},
+    )
 
     metadata = {
         "source": "PMDA 一般用医薬品・要指導医薬品 添付文書等情報検索",
@@ -491,26 +815,42 @@ def main() -> None:
         "priority_prefixes": priority_prefixes,
     }
 
-    output_dir = Path(args.output_dir)
     products_payload = {
         "metadata": metadata,
         "products": products,
     }
     write_json(output_dir / "pmda_otc_products.json", products_payload)
-    write_json(
-        output_dir / "pmda_otc_ingredient_index.json",
-        {
-            "metadata": {
-                "generated_at": datetime.now(timezone.utc).isoformat(),
-                "source_file": "pmda_otc_products.json",
-                "ingredient_count": len(ingredient_index),
-            },
-            "ingredients": ingredient_index,
-        },
-    )
+    products_path = output_dir / "pmda_otc_products.json"
+    compact_path = compact_path_for(products_path)
+    if args.no_compact:
+        # 古い圧縮版が残ると index.html がそちらを優先して読むため削除する。
+        compact_path.unlink(missing_ok=True)
+    else:
+        write_compact(products_path, products, metadata)
+    ratio_table_path = product_table_path_for(output_dir)
+    if args.no_ratio_table:
+        # 古い表が残ると index.html が製品データセットの代わりに読むため削除する。
+        ratio_table_path.unlink(missing_ok=True)
+    else:
+        # 表は OTC → 医療用の順に統合した結果のため、出力先にある両データセットから作り直す。
+        write_ratio_table(output_dir)
+    if args.no_product_shards:
+        remove_shard_bundle(output_dir)
+    else:
+        write_shard_bundle(output_dir)
+    write_ingredient_index(output_dir / "pmda_otc_ingredient_index.json", ingredient_index)
+
+    # 出力が揃ったのでジャーナルは破棄する。失敗コードがあれば --resume で再取得できるよう残す。
+    journal.close(remove=not failed_codes)
 
     print(f"saved: {output_dir / 'pmda_otc_products.json'}")
     print(f"saved: {output_dir / 'pmda_otc_ingredient_index.json'}")
+    if not args.no_compact:
+        print(f"saved: {compact_path}")
+    if not args.no_ratio_table:
+        print(f"saved: {ratio_table_path}")
+    if not args.no_product_shards:
+        print(f"saved: {product_shards_dir_for(output_dir)}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,96 @@
+"""
+複数のキーワードを1回の走査でまとめて検出する照合器。
+
+KeywordScanner(keywords).hits(text) は text に部分文字列として含まれるキーワードの集合を返し、
+各キーワードについて `keyword in text` を調べた結果と一致する(重なり合うキーワードもすべて検出する)。
+キーワードを Aho–Corasick 法の状態機械(文字の木 trie と失敗遷移を展開した遷移表)にまとめるため、
+テキストは先頭から1回だけ読み、走査の手間はキーワード数によらずテキスト長に比例する(一致の重なりで
+読み直すことはない)。キーワードの先頭になり得ない文字の並びは re で読み飛ばし、遷移表を辿るのは
+キーワードの途中にいる間だけにする。
+同じテキストの結果は保持し、ブロック全体の結合文字列や頻出する症状名などを繰り返し走査しない。
+"""
+
+from __future__ import annotations
+
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Deque, Dict, FrozenSet, Iterable, List
+
+EMPTY: FrozenSet[str] = frozenset()
+
+
+class KeywordScanner:
+    def __init__(self, keywords: Iterable[str], cache_size: int = 4096) -> None:
+        self.keywords: List[str] = list(dict.fromkeys(keyword for keyword in keywords if keyword))
+        # 状態 0 が根。goto[state] は次の文字 → 状態、outputs[state] はその状態で一致が確定するキーワード。
+        self.goto: List[Dict[str, int]] = [{}]
+        self.outputs: List[FrozenSet[str]] = [EMPTY]
+        for keyword in self.keywords:
+            state = 0
+            for char in keyword:
+                next_state = self.goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self.goto)
+                    self.goto.append({})
+                    self.outputs.append(EMPTY)
+                    self.goto[state][char] = next_state
+                state = next_state
+            self.outputs[state] = self.outputs[state] | {keyword}
+
+        # 失敗遷移は、その状態までの文字列の接尾辞のうち trie にある最長のものを指す。
+        # 幅優先で浅い状態から決め、失敗先で一致するキーワード(重なり)も outputs へ合わせておく。
+        self.fail: List[int] = [0] * len(self.goto)
+        queue: Deque[int] = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(char, 0) if state else 0
+                self.fail[next_state] = target
+                self.outputs[next_state] = self.outputs[next_state] | self.outputs[target]
+        # 失敗遷移を前もって辿っておき、各状態で文字 → 次状態を1回の参照で引ける遷移表にする
+        # (失敗先の表を写してから自身の分岐で上書きする。どの表にも無い文字は根へ戻る)。
+        self.delta: List[Dict[str, int]] = [{} for _ in self.goto]
+        order = [0]
+        for state in order:
+            order.extend(self.goto[state].values())
+            if state:
+                self.delta[state].update(self.delta[self.fail[state]])
+            self.delta[state].update(self.goto[state])
+        # キーワードの先頭になり得る文字の集合。根からの読み飛ばしに使う。
+        self.start_pattern = (
+            re.compile("[" + "".join(re.escape(char) for char in sorted(self.goto[0])) + "]") if self.keywords else None
+        )
+        self.hits = lru_cache(maxsize=cache_size)(self._scan)
+
+    def _scan(self, text: str) -> FrozenSet[str]:
+        if self.start_pattern is None:
+            return EMPTY
+        delta = self.delta
+        outputs = self.outputs
+        search = self.start_pattern.search
+        found = EMPTY
+        end = len(text)
+        pos = 0
+        while True:
+            # 根にいる間はキーワードの先頭文字まで re で読み飛ばし、そこから根へ戻るまで遷移表を辿る。
+            # 根へ戻った文字はどのキーワードの先頭でもないため、次の読み飛ばしはその次の文字から始める。
+            match = search(text, pos)
+            if match is None:
+                return found
+            pos = match.start()
+            state = 0
+            while pos < end:
+                state = delta[state].get(text[pos], 0)
+                pos += 1
+                if not state:
+                    break
+                if outputs[state]:
+                    found = found | outputs[state]
+
+    def contains_any(self, text: str, keywords: FrozenSet[str]) -> bool:
+        return not self.hits(text).isdisjoint(keywords)
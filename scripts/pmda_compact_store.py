@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+PMDA 製品データセット(pmda_*_products.json)の列指向・辞書圧縮形式。
+
+製品ごとの dict を項目(列)ごとの配列へ組み替え、繰り返し現れる文字列
+(製造販売業者・区分・成分名・分量など)は共有の文字列表への番号で持つ。
+code から導出できる URL (DETAIL_URL / GENERAL_URL / PDF_URL 相当) はテンプレートのみ保存する。
+index.html の loadDatasetFile も同じ形式を展開できる。
+
+  python3 scripts/pmda_compact_store.py data/pmda_otc_products.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+COMPACT_FORMAT = "pmda-compact"
+COMPACT_VERSION = 1
+
+# 導出テンプレートの置換記号と、テンプレート化するのに必要な一致率。
+CODE_PLACEHOLDER = "{code}"
+DERIVED_MIN_RATIO = 0.9
+# 異なり数がこの割合を下回る文字列列は文字列表へ寄せる(ほぼ一意な列はそのまま持つ)。
+INTERN_MAX_DISTINCT_RATIO = 0.5
+
+Path_ = Tuple[str, ...]
+
+
+def compact_path_for(path: Path) -> Path:
+    return path.with_name(f"{path.stem}.compact{path.suffix}")
+
+
+def flatten_product(product: Dict[str, object]) -> List[Tuple[Path_, object]]:
+    # 入れ子の dict は葉までのキー列へ展開する(空 dict はそのまま葉として扱う)。
+    items: List[Tuple[Path_, object]] = []
+
+    def walk(value: object, path: Path_) -> None:
+        if isinstance(value, dict) and value:
+            for key, child in value.items():
+                walk(child, path + (str(key),))
+        else:
+            items.append((path, value))
+
+    for key, value in product.items():
+        walk(value, (str(key),))
+    return items
+
+
+def classify_column(values: List[object]) -> str:
+    if all(isinstance(value, str) for value in values):
+        return "str"
+    if all(isinstance(value, list) for value in values):
+        elements = [item for value in values for item in value]  # type: ignore[union-attr]
+        if all(isinstance(item, str) for item in elements):
+            return "str_list"
+        if all(isinstance(item, dict) for item in elements):
+            fields = tuple(elements[0].keys())
+            if all(
+                tuple(item.keys()) == fields and all(isinstance(v, str) for v in item.values())
+                for item in elements
+            ):
+                return "records"
+    return "raw"
+
+
+def derive_template(value: str, code: str) -> Optional[str]:
+    if not code or code not in value or CODE_PLACEHOLDER in value:
+        return None
+    return value.replace(code, CODE_PLACEHOLDER)
+
+
+def encode_products(
+    products: List[Dict[str, object]],
+    metadata: Optional[Dict[str, object]] = None,
+    code_field: str = "code",
+) -> Dict[str, object]:
+    row_count = len(products)
+    column_paths: List[Path_] = []
+    column_cells: Dict[Path_, Dict[int, object]] = {}
+    for row_idx, product in enumerate(products):
+        for path, value in flatten_product(product):
+            if path not in column_cells:
+                column_paths.append(path)
+                column_cells[path] = {}
+            column_cells[path][row_idx] = value
+
+    codes = [str(product.get(code_field, "") or "") for product in products]
+    string_counts: Counter = Counter()
+    columns: List[Dict[str, object]] = []
+
+    for path in column_paths:
+        cells = column_cells[path]
+        rows = sorted(cells)
+        values = [cells[row_idx] for row_idx in rows]
+        column: Dict[str, object] = {"path": list(path)}
+        absent = [row_idx for row_idx in range(row_count) if row_idx not in cells]
+        if absent:
+            column["absent"] = absent
+
+        kind = classify_column(values)
+        if kind == "str":
+            template, hits = None, 0
+            if path != (code_field,):
+                templates = Counter(derive_template(value, codes[row_idx]) for row_idx, value in zip(rows, values))
+                template, hits = templates.most_common(1)[0] if templates else (None, 0)
+            if template is not None and hits >= len(values) * DERIVED_MIN_RATIO:
+                exceptions = {
+                    str(row_idx): value
+                    for row_idx, value in zip(rows, values)
+                    if value != template.replace(CODE_PLACEHOLDER, codes[row_idx])
+                }
+                column.update({"kind": "derived", "template": template})
+                if exceptions:
+                    column["exceptions"] = exceptions
+                columns.append(column)
+                continue
+            if values and len(set(values)) == 1:
+                column.update({"kind": "const", "value": values[0]})
+            elif len(set(values)) < len(values) * INTERN_MAX_DISTINCT_RATIO:
+                column.update({"kind": "str", "values": values})
+                string_counts.update(values)
+            else:
+                column.update({"kind": "text", "values": values})
+        elif kind == "str_list":
+            column.update({"kind": "str_list", "values": values})
+            for value in values:
+                string_counts.update(value)  # type: ignore[arg-type]
+        elif kind == "records":
+            elements = [item for value in values for item in value]  # type: ignore[union-attr]
+            fields = list(elements[0].keys())
+            column.update({"kind": "records", "fields": fields, "values": values})
+            for item in elements:
+                string_counts.update(item.values())
+        else:
+            column.update({"kind": "raw", "values": values})
+        columns.append(column)
+
+    # 出現回数の多い文字列ほど小さい番号にして、番号列の桁数を抑える。
+    strings = [value for value, _ in sorted(string_counts.items(), key=lambda item: (-item[1], item[0]))]
+    string_ids = {value: idx for idx, value in enumerate(strings)}
+    for column in columns:
+        kind = column["kind"]
+        if kind == "str":
+            column["values"] = [string_ids[value] for value in column["values"]]  # type: ignore[union-attr]
+        elif kind == "str_list":
+            column["values"] = [[string_ids[item] for item in value] for value in column["values"]]  # type: ignore[union-attr]
+        elif kind == "records":
+            # 1製品分の要素を [field0, field1, ..., field0, field1, ...] と平坦に並べる。
+            fields = column["fields"]
+            column["values"] = [
+                [string_ids[item[field]] for item in value for field in fields]  # type: ignore[index]
+                for value in column["values"]  # type: ignore[union-attr]
+            ]
+
+    return {
+        "format": COMPACT_FORMAT,
+        "version": COMPACT_VERSION,
+        "metadata": metadata or {},
+        "count": row_count,
+        "code_field": code_field,
+        "strings": strings,
+        "columns": columns,
+    }
+
+
+class _Absent:
+    pass
+
+
+_ABSENT = _Absent()
+
+
+def decode_column(column: Dict[str, object], strings: List[str], row_count: int, codes: List[str]) -> List[object]:
+    absent = set(column.get("absent", []))  # type: ignore[arg-type]
+    rows = [row_idx for row_idx in range(row_count) if row_idx not in absent]
+    kind = column["kind"]
+    if kind == "derived":
+        exceptions: Dict[str, object] = column.get("exceptions", {})  # type: ignore[assignment]
+        template = str(column["template"])
+        values = [exceptions.get(str(row_idx), template.replace(CODE_PLACEHOLDER, codes[row_idx])) for row_idx in rows]
+    elif kind == "const":
+        values = [column["value"]] * len(rows)
+    elif kind == "str":
+        values = [strings[idx] for idx in column["values"]]  # type: ignore[union-attr]
+    elif kind == "str_list":
+        values = [[strings[idx] for idx in value] for value in column["values"]]  # type: ignore[union-attr]
+    elif kind == "records":
+        fields: List[str] = column["fields"]  # type: ignore[assignment]
+        stride = len(fields)
+        values = [
+            [
+                {field: strings[value[offset + pos]] for pos, field in enumerate(fields)}
+                for offset in range(0, len(value), stride)
+            ]
+            for value in column["values"]  # type: ignore[union-attr]
+        ]
+    elif kind in {"text", "raw"}:
+        values = list(column["values"])  # type: ignore[call-overload]
+    else:
+        raise ValueError(f"unknown column kind: {kind}")
+
+    full: List[object] = [_ABSENT] * row_count
+    for row_idx, value in zip(rows, values):
+        full[row_idx] = value
+    return full
+
+
+def decode_products(payload: Dict[str, object]) -> List[Dict[str, object]]:
+    if payload.get("format") != COMPACT_FORMAT or payload.get("version") != COMPACT_VERSION:
+        raise ValueError(f"unsupported compact dataset: {payload.get('format')} v{payload.get('version')}")
+    strings: List[str] = payload["strings"]  # type: ignore[assignment]
+    row_count = int(payload["count"])  # type: ignore[arg-type]
+    code_field = str(payload.get("code_field", "code"))
+    columns: List[Dict[str, object]] = payload["columns"]  # type: ignore[assignment]
+
+    # 導出列は code 列を先に展開してから復元する。
+    decoded: Dict[int, List[object]] = {}
+    codes = [""] * row_count
+    for col_idx, column in enumerate(columns):
+        if column["kind"] != "derived":
+            decoded[col_idx] = decode_column(column, strings, row_count, codes)
+            if column["path"] == [code_field]:
+                codes = ["" if value is _ABSENT else str(value or "") for value in decoded[col_idx]]
+    for col_idx, column in enumerate(columns):
+        if column["kind"] == "derived":
+            decoded[col_idx] = decode_column(column, strings, row_count, codes)
+
+    products: List[Dict[str, object]] = [{} for _ in range(row_count)]
+    for col_idx, column in enumerate(columns):
+        path: List[str] = column["path"]  # type: ignore[assignment]
+        for product, value in zip(products, decoded[col_idx]):
+            if value is _ABSENT:
+                continue
+            target = product
+            for key in path[:-1]:
+                target = target.setdefault(key, {})  # type: ignore[assignment]
+            target[path[-1]] = value
+    return products
+
+
+def load_products(path: Path) -> Dict[str, object]:
+    # 通常形式・圧縮形式のどちらでも {"metadata", "products"} として読み込む。
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    if payload.get("format") == COMPACT_FORMAT:
+        return {"metadata": payload.get("metadata", {}), "products": decode_products(payload)}
+    return payload
+
+
+def write_compact(path: Path, products: List[Dict[str, object]], metadata: Dict[str, object]) -> Path:
+    payload = encode_products(products, metadata)
+    if decode_products(payload) != products:
+        raise ValueError(f"compact encoding does not round-trip: {path}")
+    compact_path = compact_path_for(path)
+    compact_path.parent.mkdir(parents=True, exist_ok=True)
+    compact_path.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    return compact_path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="PMDA 製品データセットを列指向・辞書圧縮形式へ変換")
+    parser.add_argument("inputs", nargs="+", help="pmda_*_products.json")
+    args = parser.parse_args()
+
+    for input_name in args.inputs:
+        input_path = Path(input_name)
+        payload = load_products(input_path)
+        compact_path = write_compact(input_path, payload["products"], payload.get("metadata", {}))
+        before = input_path.stat().st_size
+        after = compact_path.stat().st_size
+        print(f"saved: {compact_path} ({before:,} -> {after:,} bytes, {before / max(after, 1):.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+"""
+PMDA 検索ページ(otcSearch / iyakuSearch)の HTML を1回の走査で解析する。
+
+検索結果ページ・ページ送りの応答ごとに、hidden 入力(次ページ要求・CSV エクスポートに使う)、
+フォームの既定値、searchCnt / totalPages、結果一覧の行をまとめて取り出す。
+必要なタグ(input / select / option / tr / a / div)だけを先頭から順に読み、
+それ以外のタグ(td / span / script など)は正規表現の中で読み飛ばす。a / div は結果行の中で必要な間だけ読む。
+TrColor 行とすべての tr 行を同じ走査で集め、どちらを結果一覧とするかは最後に決める(ページの事前走査はしない)。
+"""
+
+from __future__ import annotations
+
+import html
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+TAG_RE = re.compile(r"<(/?)(input|select|option|tr|a|div)\b([^>]*)>", re.I)
+# 結果行の外で読むタグ(行の開始とフォーム部品)。
+OUTER_TAG_RE = re.compile(r"<(/?)(input|select|option|tr)\b([^>]*)>", re.I)
+ATTR_RE = re.compile(r"""([^\s=/"'<>]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+)))?""")
+# 結果一覧の行(class が TrColor で始まる tr。閉じた TrColor 行が無い場合はすべての tr)。
+TR_COLOR_ATTRS_RE = re.compile(r"""^\s+class=['"]TrColor[^'"]*['"]$""", re.I)
+# 製品名のリンク(GeneralList/{code} の直後に引用符が来るタグ)と製造販売業者の div。
+GENERAL_LIST_RE = re.compile(r"""/PmdaSearch/otcDetail/GeneralList/([^'"/]+)['"]""", re.I)
+MANUFACTURER_STYLE_RE = re.compile(r"margin-top:10px; margin-bottom:0px;", re.I)
+DIGITS_RE = re.compile(r"[0-9]+")
+
+ATTR_TAGS = frozenset({"input", "select", "option"})
+
+
+def parse_attrs(raw: str) -> Dict[str, Optional[str]]:
+    # 属性名は小文字、値は文字参照を展開する。値の無い属性(checked など)は None。
+    attrs: Dict[str, Optional[str]] = {}
+    for match in ATTR_RE.finditer(raw):
+        name = match.group(1).lower()
+        if name in attrs:
+            continue
+        value = match.group(2)
+        if value is None:
+            value = match.group(3)
+        if value is None:
+            value = match.group(4)
+        attrs[name] = None if value is None else html.unescape(value)
+    return attrs
+
+
+@dataclass
+class ResultRow:
+    # 結果一覧の1行。製品名・製造販売業者は HTML 断片のまま持つ(整形は呼び出し側の clean_text)。
+    code: str = ""
+    name_html: Optional[str] = None
+    manufacturer_html: Optional[str] = None
+
+
+class _OpenRow:
+    # 開いている1行の製品名リンク・製造販売業者 div の位置を追い、閉じたタグの位置で HTML 断片を切り出す。
+    __slots__ = ("row", "name_start", "manufacturer_start")
+
+    def __init__(self) -> None:
+        self.row = ResultRow()
+        self.name_start = -1
+        self.manufacturer_start = -1
+
+    def start_tag(self, raw_attrs: str, end: int) -> None:
+        row = self.row
+        if row.name_html is None and self.name_start < 0:
+            match = GENERAL_LIST_RE.search(raw_attrs)
+            if match:
+                row.code = match.group(1).strip()
+                self.name_start = end
+        if row.manufacturer_html is None and self.manufacturer_start < 0 and MANUFACTURER_STYLE_RE.search(raw_attrs):
+            self.manufacturer_start = end
+
+    def end_tag(self, tag: str, page_html: str, start: int) -> None:
+        row = self.row
+        if tag == "a" and self.name_start >= 0 and row.name_html is None:
+            row.name_html = page_html[self.name_start:start]
+        elif tag == "div" and self.manufacturer_start >= 0 and row.manufacturer_html is None:
+            row.manufacturer_html = page_html[self.manufacturer_start:start]
+
+
+class _RowTracker:
+    # tr から最初の </tr> までを1行として、すべての tr の行(rows)と TrColor の tr で始まる行(color_rows)を同時に集める。
+    # TrColor の行は通常すべての tr の行と同じ tr で始まるため同じ行を共有し、
+    # 開いている行の途中に TrColor の tr が現れた場合だけ別の行として追う(どちらも同じ </tr> で閉じる)。
+    def __init__(self) -> None:
+        self.current: Optional[_OpenRow] = None
+        self.current_is_color = False
+        self.nested_color: Optional[_OpenRow] = None
+        self.rows: List[ResultRow] = []
+        self.color_rows: List[ResultRow] = []
+        self.closed_color_row = False  # TrColor の tr が </tr> で閉じられたか(行の中身によらない)
+
+    def reading_links(self) -> bool:
+        # 開いている行に未取得の製品名・製造販売業者がある間だけ a / div を読む必要がある。
+        for open_row in (self.current, self.nested_color):
+            if open_row is not None and (open_row.row.name_html is None or open_row.row.manufacturer_html is None):
+                return True
+        return False
+
+    def start_tag(self, tag: str, raw_attrs: str, end: int) -> None:
+        if tag == "tr":
+            is_color = TR_COLOR_ATTRS_RE.match(raw_attrs) is not None
+            if self.current is None:
+                self.current = _OpenRow()
+                self.current_is_color = is_color
+            elif is_color and not self.current_is_color and self.nested_color is None:
+                self.nested_color = _OpenRow()
+            return
+        if self.current is None:
+            return
+        self.current.start_tag(raw_attrs, end)
+        if self.nested_color is not None:
+            self.nested_color.start_tag(raw_attrs, end)
+
+    def end_tag(self, tag: str, page_html: str, start: int) -> None:
+        current = self.current
+        if current is None:
+            return
+        if tag != "tr":
+            current.end_tag(tag, page_html, start)
+            if self.nested_color is not None:
+                self.nested_color.end_tag(tag, page_html, start)
+            return
+        if current.row.name_html is not None:
+            self.rows.append(current.row)
+        color = current if self.current_is_color else self.nested_color
+        if color is not None:
+            self.closed_color_row = True
+            if color.row.name_html is not None:
+                self.color_rows.append(color.row)
+        self.current = None
+        self.nested_color = None
+
+
+@dataclass
+class SearchPage:
+    inputs: List[Tuple[str, str, str, bool]] = field(default_factory=list)  # (name, type, value, checked)
+    selects: Dict[str, str] = field(default_factory=dict)
+    rows: List[ResultRow] = field(default_factory=list)
+
+    @property
+    def hidden_inputs(self) -> Dict[str, str]:
+        return {name: value for name, input_type, value, _ in self.inputs if input_type == "hidden"}
+
+    @property
+    def form_defaults(self) -> Dict[str, str]:
+        # フォーム送信時の既定値(hidden / text、選択済みの radio / checkbox、select の選択値)。
+        payload: Dict[str, str] = {}
+        for name, input_type, value, checked in self.inputs:
+            if input_type in {"hidden", "text"}:
+                payload[name] = value
+            elif input_type == "radio" and checked:
+                payload[name] = value
+            elif input_type == "checkbox" and checked:
+                payload[name] = value or "on"
+        payload.update(self.selects)
+        return payload
+
+    def _int_input(self, key: str, default: int) -> int:
+        for name, _, value, _ in self.inputs:
+            if name == key and DIGITS_RE.fullmatch(value):
+                return int(value)
+        return default
+
+    @property
+    def search_count(self) -> int:
+        return self._int_input("searchCnt", 0)
+
+    @property
+    def total_pages(self) -> int:
+        return self._int_input("totalPages", 1)
+
+
+def parse_search_page(page_html: str) -> SearchPage:
+    page = SearchPage()
+    rows = _RowTracker()
+    select_name: Optional[str] = None
+    options: List[Tuple[str, bool]] = []
+
+    pos = 0
+    while True:
+        # 結果行の外と、製品名・製造販売業者を取り出し終えた行の残りでは、a / div を読まずに次の tr・フォーム部品まで進む。
+        match = (TAG_RE if rows.current is not None and rows.reading_links() else OUTER_TAG_RE).search(page_html, pos)
+        if match is None:
+            break
+        pos = match.end()
+        closing, tag, raw_attrs = match.groups()
+        tag = tag.lower()
+        if closing:
+            if tag == "select":
+                if select_name is not None:
+                    # 選択済みの option、無ければ先頭の option の値。
+                    chosen = next((value for value, selected in options if selected), options[0][0] if options else "")
+                    page.selects[select_name] = chosen
+                    select_name = None
+            elif rows.current is not None and tag != "input" and tag != "option":
+                rows.end_tag(tag, page_html, match.start())
+            continue
+
+        if tag not in ATTR_TAGS:
+            # 結果行の外では tr の開始だけを見る。
+            if rows.current is not None or tag == "tr":
+                rows.start_tag(tag, raw_attrs, pos)
+            continue
+        attrs = parse_attrs(raw_attrs)
+        if tag == "input":
+            name = attrs.get("name")
+            if name:
+                input_type = (attrs.get("type") or "text").lower()
+                page.inputs.append((name, input_type, attrs.get("value") or "", "checked" in attrs))
+        elif tag == "select":
+            select_name = attrs.get("name") or None
+            options = []
+        elif tag == "option" and select_name is not None and attrs.get("value") is not None:
+            options.append((attrs["value"] or "", "selected" in attrs))
+
+    # 閉じた TrColor 行があれば TrColor の行だけ、無ければすべての tr の行を結果一覧とする。
+    page.rows = rows.color_rows if rows.closed_color_row else rows.rows
+    return page
@@ -0,0 +1,501 @@
+"""
+PMDA 取得スクリプト共通の HTTP ユーティリティ。
+
+- リクエスト頻度を全ワーカーで共有するトークンバケット (RateLimiter)
+- 接続プールを共有したセッション複製 (clone_session)
+- URL + フォーム内容をキーにしたディスクキャッシュ (ResponseCache / CachedSession)。
+  stream=True の要求は本文をメモリに溜めず、読み進めながらキャッシュへ書き込む。
+  PMDA は検索条件をサーバー側セッション(Cookie)に保持するため、検索とそれに続くページ送り・CSV エクスポートは
+  1つの単位としてキャッシュし、検索ページの初期表示(Cookie の発行)はオンラインでは常に送信する
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+class RateLimiter:
+    # 複数ワーカーで共有するトークンバケット方式のリクエスト間隔制御。
+    def __init__(self, rate_per_sec: float, burst: int = 1) -> None:
+        self.rate_per_sec = rate_per_sec
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate_per_sec <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_sec)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_sec = (1 - self.tokens) / self.rate_per_sec
+            time.sleep(wait_sec)
+
+
+class CacheMissError(requests.ConnectionError):
+    pass
+
+
+# キャッシュの既定の有効秒数。検索件数などの変化を取り込めるよう、無期限にはしない。
+DEFAULT_CACHE_TTL_SEC = 24 * 60 * 60
+
+# 検索ページ(otcSearch/ や iyakuSearch/)。GET は初期表示でセッション Cookie を発行し、POST は検索条件をセッションに保存する。
+SEARCH_PAGE_PATH_RE = re.compile(r"/PmdaSearch/[A-Za-z]+Search/?$")
+# 直前の検索条件に依存する要求(ページ送り・CSV エクスポート)。
+SEARCH_DEPENDENT_PATH_RE = re.compile(r"/PmdaSearch/[A-Za-z]+Search/(?:PageChangeRequest|exportSearchResult)/")
+
+
+class ResponseCache:
+    # entries/<key>.json にリクエストキーごとの応答メタ情報を、
+    # blobs/<sha256> に本文を内容ハッシュで保存する(同一本文は1つだけ保持)。
+    # エントリファイルの mtime を最終アクセス時刻として LRU 退避に使う。
+    def __init__(self, cache_dir: Path, ttl_sec: float = 0, max_bytes: int = 0) -> None:
+        self.cache_dir = cache_dir
+        self.ttl_sec = ttl_sec
+        self.max_bytes = max_bytes
+        self.entries_dir = cache_dir / "entries"
+        self.blobs_dir = cache_dir / "blobs"
+        self.entries_dir.mkdir(parents=True, exist_ok=True)
+        self.blobs_dir.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.Lock()
+        self.total_bytes: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(method: str, url: str, params: object = None, data: object = None, scope: Optional[str] = None) -> str:
+        # scope は検索に依存する要求で、依存先の検索(要求と応答本文)を表す値。同じ要求でも検索ごとに別のキーになる。
+        def canonical(value: object) -> object:
+            if value is None:
+                return None
+            if isinstance(value, Mapping):
+                return sorted((str(k), str(v)) for k, v in value.items())
+            if isinstance(value, bytes):
+                return value.decode("utf-8", errors="replace")
+            if isinstance(value, (list, tuple)):
+                return [list(map(str, item)) if isinstance(item, (list, tuple)) else str(item) for item in value]
+            return str(value)
+
+        parts: List[object] = [method.upper(), url, canonical(params), canonical(data)]
+        if scope is not None:
+            parts.append(scope)
+        material = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.entries_dir / key[:2] / f"{key}.json"
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.blobs_dir / digest[:2] / digest
+
+    @staticmethod
+    def _write_atomic(path: Path, content: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_bytes(content)
+        tmp_path.replace(path)
+
+    def _count(self, hit: bool) -> None:
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _load_entry(self, key: str) -> Optional[Dict[str, Any]]:
+        # 有効期限内のエントリ。無い・壊れている・期限切れなら None。
+        try:
+            entry = json.loads(self._entry_path(key).read_text(encoding="utf-8"))
+            if self.ttl_sec > 0 and time.time() - float(entry["stored_at"]) > self.ttl_sec:
+                return None
+            return entry
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def has(self, key: str) -> bool:
+        entry = self._load_entry(key)
+        return entry is not None and self._blob_path(str(entry.get("body_sha256", ""))).exists()
+
+    def get(self, key: str, stream: bool = False, complete_unit: bool = False) -> Optional[requests.Response]:
+        # stream=True では本文を読み込まず、保存済みの本文ファイルを応答の raw として順に読ませる。
+        # complete_unit=True は検索の応答用で、検索単位が完了済み(mark_unit_complete)かつ
+        # 記録された依存要求がすべて有効な場合だけ返す。
+        entry_path = self._entry_path(key)
+        entry = self._load_entry(key)
+        if entry is None or (complete_unit and not self._unit_is_cached(entry)):
+            self._count(hit=False)
+            return None
+        try:
+            blob_path = self._blob_path(entry["body_sha256"])
+            if stream:
+                raw = blob_path.open("rb")
+            else:
+                body = blob_path.read_bytes()
+            os.utime(entry_path)
+        except (OSError, ValueError, KeyError):
+            self._count(hit=False)
+            return None
+
+        self._count(hit=True)
+        response = requests.Response()
+        response.status_code = int(entry["status_code"])
+        response.reason = entry.get("reason", "")
+        response.url = entry.get("url", "")
+        response.headers = CaseInsensitiveDict(entry.get("headers", {}))
+        response.encoding = entry.get("encoding")
+        if stream:
+            response.raw = raw
+        else:
+            response._content = body
+            response._content_consumed = True
+        return response
+
+    def put(self, key: str, response: requests.Response) -> None:
+        body = response.content
+        digest = hashlib.sha256(body).hexdigest()
+        self._store(key, response, digest, len(body), lambda blob_path: self._write_atomic(blob_path, body))
+
+    def _unit_is_cached(self, entry: Dict[str, Any]) -> bool:
+        unit = entry.get("unit")
+        if not isinstance(unit, dict) or not unit.get("complete"):
+            return False
+        return all(self.has(str(key)) for key in unit.get("dependents", []))
+
+    def mark_unit_complete(self, key: str, dependents: List[str]) -> None:
+        # 検索 key の応答エントリに、その検索条件で送った依存要求のキーを記録して検索単位を完了とする。
+        with self.lock:
+            entry_path = self._entry_path(key)
+            try:
+                entry = json.loads(entry_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                return
+            entry["unit"] = {"complete": True, "dependents": list(dict.fromkeys(dependents))}
+            self._write_atomic(entry_path, json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+
+    def put_stream(self, key: str, response: requests.Response) -> None:
+        # 本文は呼び出し側が読み進めるのに合わせて一時ファイルへ書き、最後まで読まれた時点で登録する。
+        response.raw = _CachingStream(response.raw, self, key, response)
+
+    def _store(
+        self,
+        key: str,
+        response: requests.Response,
+        digest: str,
+        size: int,
+        write_blob: Callable[[Path], None],
+    ) -> None:
+        # 本文が未登録なら write_blob で書き込む。
+        entry = {
+            "url": response.url,
+            "status_code": response.status_code,
+            "reason": response.reason,
+            "headers": dict(response.headers),
+            "encoding": response.encoding,
+            "body_sha256": digest,
+            "stored_at": time.time(),
+        }
+        with self.lock:
+            blob_path = self._blob_path(digest)
+            added_bytes = 0
+            if not blob_path.exists():
+                write_blob(blob_path)
+                added_bytes = size
+            self._write_atomic(self._entry_path(key), json.dumps(entry, ensure_ascii=False).encode("utf-8"))
+
+            if self.max_bytes > 0:
+                if self.total_bytes is None:
+                    self.total_bytes = sum(path.stat().st_size for path in self.blobs_dir.glob("*/*"))
+                else:
+                    self.total_bytes += added_bytes
+                if self.total_bytes > self.max_bytes:
+                    self._prune_locked()
+
+    def prune(self) -> None:
+        with self.lock:
+            self._prune_locked()
+
+    def _prune_locked(self) -> None:
+        entries: List[Tuple[float, Path, str]] = []
+        for entry_path in self.entries_dir.glob("*/*.json"):
+            try:
+                entry = json.loads(entry_path.read_text(encoding="utf-8"))
+                entries.append((entry_path.stat().st_mtime, entry_path, entry["body_sha256"]))
+            except (OSError, ValueError, KeyError):
+                entry_path.unlink(missing_ok=True)
+
+        blob_sizes: Dict[str, int] = {}
+        for blob_path in self.blobs_dir.glob("*/*"):
+            if blob_path.name.endswith(".tmp"):
+                continue
+            blob_sizes[blob_path.name] = blob_path.stat().st_size
+
+        # 古いアクセス順に退避し、参照されなくなった本文を削除する。
+        refcount: Dict[str, int] = {}
+        for _, _, digest in entries:
+            refcount[digest] = refcount.get(digest, 0) + 1
+        total = sum(size for digest, size in blob_sizes.items() if digest in refcount)
+        for _, entry_path, digest in sorted(entries):
+            if self.max_bytes <= 0 or total <= self.max_bytes:
+                break
+            entry_path.unlink(missing_ok=True)
+            refcount[digest] -= 1
+            if refcount[digest] == 0:
+                total -= blob_sizes.get(digest, 0)
+        for digest in blob_sizes:
+            if refcount.get(digest, 0) <= 0:
+                self._blob_path(digest).unlink(missing_ok=True)
+        self.total_bytes = total
+
+
+class _CachingStream:
+    # urllib3 の応答(raw)を包み、stream() で読み出した本文を一時ファイルへ書き写す。
+    # 最後まで読まれた場合だけキャッシュへ登録し、途中で閉じられた場合は一時ファイルを捨てる。
+    def __init__(self, raw: object, cache: ResponseCache, key: str, response: requests.Response) -> None:
+        self._raw = raw
+        self._cache = cache
+        self._key = key
+        self._response = response
+        self._digest = hashlib.sha256()
+        self._size = 0
+        self._tmp_path = cache.blobs_dir / f"stream.{os.getpid()}.{threading.get_ident()}.{id(self)}.tmp"
+        self._handle = self._tmp_path.open("wb")
+
+    def __getattr__(self, name: str) -> object:
+        return getattr(self._raw, name)
+
+    def stream(self, amt: int = 2 ** 16, decode_content: Optional[bool] = None) -> Iterator[bytes]:
+        try:
+            for chunk in self._raw.stream(amt, decode_content=decode_content):  # type: ignore[attr-defined]
+                self._handle.write(chunk)
+                self._digest.update(chunk)
+                self._size += len(chunk)
+                yield chunk
+        except BaseException:
+            self._discard()
+            raise
+        self._finish()
+
+    def _finish(self) -> None:
+        self._handle.close()
+
+        def move_blob(blob_path: Path) -> None:
+            blob_path.parent.mkdir(parents=True, exist_ok=True)
+            self._tmp_path.replace(blob_path)
+
+        self._cache._store(self._key, self._response, self._digest.hexdigest(), self._size, move_blob)
+        self._tmp_path.unlink(missing_ok=True)
+
+    def _discard(self) -> None:
+        self._handle.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+    def close(self) -> None:
+        if not self._handle.closed:
+            self._discard()
+        self._raw.close()  # type: ignore[attr-defined]
+
+
+class _SearchUnit:
+    # 1回の検索と、その検索条件で送った依存要求(ページ送り・CSV エクスポート)のキャッシュキー。
+    # Cookie を共有する複製セッション(並行ページ送り)とも共有する。
+    def __init__(self, key: str, scope: str, replay: Tuple[str, str, Any, Any, Dict[str, Any]]) -> None:
+        self.key = key
+        self.scope = scope
+        self.replay = replay
+        self.dependents: List[str] = []
+        self.lock = threading.Lock()
+
+    def add_dependent(self, key: str) -> None:
+        with self.lock:
+            self.dependents.append(key)
+
+
+class CachedSession(requests.Session):
+    # ResponseCache を介してリクエストする Session。
+    # offline=True ではネットワークに出ず、キャッシュに無い場合は CacheMissError を送出する。
+    # 検索(検索ページへの POST)と依存要求は検索単位でキャッシュする。
+    # - 依存要求のキーには依存先の検索(要求キーと応答本文)を含め、別の検索結果の応答を返さない。
+    # - 検索の応答は、次の検索を送るまでに送った依存要求がすべてキャッシュにある場合だけキャッシュから返す。
+    # - キャッシュから返した検索に続く依存要求がキャッシュに無ければ、先に同じ検索をオンラインで送り直して
+    #   サーバー側の検索条件を揃えてから送る。
+    # - 検索ページの GET(Cookie の発行)はオンラインでは常に送信する(キャッシュからでは Set-Cookie が反映されない)。
+    def __init__(self, cache: Optional[ResponseCache], offline: bool = False) -> None:
+        super().__init__()
+        self.cache = cache
+        self.offline = offline
+        self.search_unit: Optional[_SearchUnit] = None
+        # サーバー側セッションの検索条件が search_unit の検索と一致しているか(検索をオンラインで送ったか)。
+        self.search_live = False
+
+    @staticmethod
+    def request_kind(method: str, url: str) -> str:
+        # "session"(検索ページの初期表示)/ "search" / "dependent"(直前の検索に依存)/ "plain"。
+        path = urlsplit(url).path
+        if SEARCH_PAGE_PATH_RE.search(path):
+            return "search" if method.upper() == "POST" else "session"
+        if SEARCH_DEPENDENT_PATH_RE.search(path):
+            return "dependent"
+        return "plain"
+
+    def request(self, method, url, params=None, data=None, **kwargs):  # type: ignore[override]
+        if self.cache is None:
+            return super().request(method, url, params=params, data=data, **kwargs)
+        kind = self.request_kind(method, url)
+        if kind == "search":
+            return self._search(method, url, params, data, kwargs)
+        if kind == "dependent":
+            return self._dependent(method, url, params, data, kwargs)
+        if kind == "session" and not self.offline:
+            response = super().request(method, url, params=params, data=data, **kwargs)
+            if response.status_code == 200 and not kwargs.get("stream"):
+                # オフライン実行用に保存だけしておく。
+                self.cache.put(self.cache.make_key(method, url, params, data), response)
+            return response
+        return self._cached(self.cache.make_key(method, url, params, data), method, url, params, data, kwargs)
+
+    def _cached(self, key: str, method, url, params, data, kwargs: Dict[str, Any]) -> requests.Response:
+        assert self.cache is not None
+        stream = bool(kwargs.get("stream"))
+        cached = self.cache.get(key, stream=stream)
+        if cached is not None:
+            return cached
+        if self.offline:
+            raise CacheMissError(f"offline cache miss: {method} {url}")
+        response = super().request(method, url, params=params, data=data, **kwargs)
+        if response.status_code == 200:
+            if stream:
+                self.cache.put_stream(key, response)
+            else:
+                self.cache.put(key, response)
+        return response
+
+    def _search(self, method, url, params, data, kwargs: Dict[str, Any]) -> requests.Response:
+        assert self.cache is not None
+        self.finish_search_unit()
+        key = self.cache.make_key(method, url, params, data)
+        replay = (method, url, params, data, dict(kwargs))
+        # オフラインでは完了していない検索単位も返す(足りない依存要求は CacheMissError になる)。
+        cached = self.cache.get(key, complete_unit=not self.offline)
+        if cached is not None:
+            self.search_unit = _SearchUnit(key, self._scope(key, cached.content), replay)
+            self.search_live = False
+            return cached
+        if self.offline:
+            raise CacheMissError(f"offline cache miss: {method} {url}")
+        return self._send_search(key, replay)
+
+    def _send_search(self, key: str, replay: Tuple[str, str, Any, Any, Dict[str, Any]]) -> requests.Response:
+        assert self.cache is not None
+        method, url, params, data, kwargs = replay
+        response = super().request(method, url, params=params, data=data, **kwargs)
+        self.search_live = True
+        if response.status_code != 200:
+            self.search_unit = None
+            return response
+        self.cache.put(key, response)
+        self.search_unit = _SearchUnit(key, self._scope(key, response.content), replay)
+        return response
+
+    @staticmethod
+    def _scope(key: str, body: bytes) -> str:
+        return hashlib.sha256(key.encode("ascii") + b"\0" + body).hexdigest()
+
+    def _dependent(self, method, url, params, data, kwargs: Dict[str, Any]) -> requests.Response:
+        assert self.cache is not None
+        unit = self.search_unit
+        if unit is None:
+            # どの検索に続く要求か分からないため、キャッシュを使わない。
+            if self.offline:
+                raise CacheMissError(f"offline cache miss (no preceding search): {method} {url}")
+            return super().request(method, url, params=params, data=data, **kwargs)
+        key = self.cache.make_key(method, url, params, data, scope=unit.scope)
+        unit.add_dependent(key)
+        if not self.search_live and not self.offline and not self.cache.has(key):
+            # 検索はキャッシュから返したため、サーバー側の検索条件を揃えてから送る。
+            self._send_search(unit.key, unit.replay)
+            if self.search_unit is None:
+                raise requests.HTTPError(f"re-search before {method} {url} failed")
+            if self.search_unit.scope != unit.scope:
+                # 検索結果が変わっていれば、呼び出し側が持つ検索結果とこの要求の応答が食い違うため続けない。
+                raise requests.HTTPError(f"search results changed since they were cached: {unit.replay[1]}")
+            self.search_unit = unit
+        return self._cached(key, method, url, params, data, kwargs)
+
+    def finish_search_unit(self) -> None:
+        # 直前の検索単位を完了として記録する(次の検索・close() で呼ばれる)。
+        unit = self.search_unit
+        self.search_unit = None
+        if unit is not None and self.cache is not None and not self.offline:
+            with unit.lock:
+                dependents = list(unit.dependents)
+            self.cache.mark_unit_complete(unit.key, dependents)
+
+    def close(self) -> None:
+        self.finish_search_unit()
+        super().close()
+
+
+def clone_session(session: requests.Session, share_cookies: bool = True) -> requests.Session:
+    # ヘッダ・Cookie・キャッシュ設定を引き継ぎ、接続プール(HTTPAdapter)は元セッションと共有する。
+    # share_cookies=False ではサーバー側のセッション(検索条件など)を分けるため Cookie を引き継がない。
+    if isinstance(session, CachedSession):
+        cloned: requests.Session = CachedSession(session.cache, offline=session.offline)
+        if share_cookies:
+            # 同じサーバー側セッションを使うため、直前の検索単位も引き継ぐ(依存要求は元の検索単位に記録する)。
+            cloned.search_unit = session.search_unit
+            cloned.search_live = session.search_live
+    else:
+        cloned = requests.Session()
+    cloned.headers.update(session.headers)
+    if share_cookies:
+        cloned.cookies.update(session.cookies)
+    for prefix, adapter in session.adapters.items():
+        cloned.mount(prefix, adapter)
+    return cloned
+
+
+def add_cache_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--cache-dir", default=None, help="HTTP 応答キャッシュのディレクトリ（未指定時はキャッシュしない）")
+    parser.add_argument(
+        "--cache-ttl-sec",
+        type=float,
+        default=DEFAULT_CACHE_TTL_SEC,
+        help=f"キャッシュの有効秒数（既定 {DEFAULT_CACHE_TTL_SEC} 秒、0 は無期限。--offline では期限を見ない）",
+    )
+    parser.add_argument("--cache-max-mb", type=float, default=0, help="キャッシュ本文の合計上限MB（0 は無制限、超過時は LRU で退避）")
+    parser.add_argument("--offline", action="store_true", help="ネットワークに出ずキャッシュのみから応答する")
+
+
+def create_session(args: argparse.Namespace, headers: Dict[str, str]) -> requests.Session:
+    if args.offline and not args.cache_dir:
+        raise ValueError("--offline requires --cache-dir")
+    if args.cache_dir:
+        cache = ResponseCache(
+            Path(args.cache_dir),
+            # オフラインでは取得し直せないため、期限切れの応答も使う。
+            ttl_sec=0 if args.offline else args.cache_ttl_sec,
+            max_bytes=int(args.cache_max_mb * 1024 * 1024),
+        )
+        session: requests.Session = CachedSession(cache, offline=args.offline)
+    else:
+        session = requests.Session()
+    session.headers.update(headers)
+    return session
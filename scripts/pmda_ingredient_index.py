@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+PMDA 成分名 → 製品の逆引きインデックス(pmda_*_ingredient_index.json)。
+
+製品は一覧表(products)に1回だけ持ち、成分ごとの postings は製品番号の昇順の配列で持つ。
+製品番号は表示用の項目(製品名 → その他の項目)の順に振るため、postings の順がそのまま製品名順になる。
+異なり数の少ない項目(製造販売業者・一般名など)は項目内の文字列表への番号で持つ。
+
+旧形式(成分ごとに製品 dict を複製した形式)も読み込めるため、既存ファイルの変換にも使う。
+
+  python3 scripts/pmda_ingredient_index.py data/pmda_iyaku_ingredient_index.json
+  python3 scripts/pmda_ingredient_index.py data/pmda_otc_ingredient_index.json --all アセトアミノフェン カフェイン水和物
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+from bisect import bisect_left
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+INDEX_FORMAT = "pmda-ingredient-index"
+INDEX_VERSION = 1
+
+# 製品一覧に持つ項目(先頭の項目から順に製品番号の並び順を決める)。
+OTC_INDEX_FIELDS = ("product_name", "code")
+IYAKU_INDEX_FIELDS = ("product_name", "generic_name", "manufacturer")
+# 異なり数がこの割合を下回る項目は文字列表へ寄せる(pmda_compact_store と同じ基準)。
+INTERN_MAX_DISTINCT_RATIO = 0.5
+
+
+def encode_column(values: List[str]) -> object:
+    if not values or len(set(values)) >= len(values) * INTERN_MAX_DISTINCT_RATIO:
+        return values
+    strings = sorted(set(values))
+    ids = {value: pos for pos, value in enumerate(strings)}
+    return {"strings": strings, "ids": [ids[value] for value in values]}
+
+
+def decode_column(column: object) -> List[str]:
+    if isinstance(column, dict):
+        strings: List[str] = column["strings"]
+        return [strings[pos] for pos in column["ids"]]
+    return list(column)  # type: ignore[call-overload]
+
+
+def build_ingredient_index(
+    products: Iterable[Dict[str, object]],
+    fields: Sequence[str],
+    ingredient_names: Callable[[Dict[str, object]], Iterable[str]],
+    metadata: Optional[Dict[str, object]] = None,
+) -> Dict[str, object]:
+    # 同じ表示項目の製品は1件として扱う(旧形式の一覧でも区別できないため)。成分の無い製品は一覧に含めない。
+    rows: Dict[Tuple[str, ...], List[str]] = {}
+    for product in products:
+        names = [name for name in ingredient_names(product) if name]
+        if names:
+            rows.setdefault(tuple(str(product.get(field) or "") for field in fields), []).extend(names)
+
+    ordered = sorted(rows)
+    postings: Dict[str, List[int]] = {}
+    for product_id, row in enumerate(ordered):
+        for name in dict.fromkeys(rows[row]):
+            postings.setdefault(name, []).append(product_id)
+
+    return {
+        "format": INDEX_FORMAT,
+        "version": INDEX_VERSION,
+        "metadata": {**(metadata or {}), "ingredient_count": len(postings), "product_count": len(ordered)},
+        "fields": list(fields),
+        "products": {field: encode_column([row[pos] for row in ordered]) for pos, field in enumerate(fields)},
+        "ingredients": dict(sorted(postings.items())),
+    }
+
+
+def convert_legacy_index(payload: Dict[str, object]) -> Dict[str, object]:
+    # 旧形式 {"ingredients": {成分名: {"count", "products": [{...}, ...]}}} を変換する。
+    ingredients: Dict[str, Dict[str, object]] = payload.get("ingredients") or {}  # type: ignore[assignment]
+    fields: List[str] = []
+    for value in ingredients.values():
+        for product in value.get("products") or []:  # type: ignore[union-attr]
+            fields.extend(key for key in product if key not in fields)
+    # 製品名を先頭に置き、製品番号を製品名順にする。
+    fields.sort(key=lambda field: field != "product_name")
+    pairs = [
+        (product, name)
+        for name, value in ingredients.items()
+        for product in value.get("products") or []  # type: ignore[union-attr]
+    ]
+    grouped: Dict[Tuple[str, ...], Dict[str, object]] = {}
+    for product, name in pairs:
+        key = tuple(str(product.get(field) or "") for field in fields)
+        entry = grouped.setdefault(key, {**product, "_names": []})
+        entry["_names"].append(name)  # type: ignore[union-attr]
+    metadata = {key: value for key, value in (payload.get("metadata") or {}).items() if key not in ("ingredient_count", "product_count")}  # type: ignore[union-attr]
+    return build_ingredient_index(grouped.values(), fields, lambda product: product["_names"], metadata)  # type: ignore[arg-type,return-value]
+
+
+def intersect_postings(lists: Sequence[Sequence[int]]) -> List[int]:
+    # 昇順の postings の共通部分。短い配列から順に、長い配列は二分探索で進める。
+    if not lists:
+        return []
+    ordered = sorted(lists, key=len)
+    result = list(ordered[0])
+    for other in ordered[1:]:
+        matched: List[int] = []
+        pos = 0
+        for product_id in result:
+            pos = bisect_left(other, product_id, pos)
+            if pos == len(other):
+                break
+            if other[pos] == product_id:
+                matched.append(product_id)
+        result = matched
+        if not result:
+            break
+    return result
+
+
+class IngredientIndex:
+    def __init__(self, payload: Dict[str, object]) -> None:
+        if payload.get("format") != INDEX_FORMAT:
+            payload = convert_legacy_index(payload)
+        elif payload.get("version") != INDEX_VERSION:
+            raise ValueError(f"unsupported ingredient index version: {payload.get('version')}")
+        self.payload = payload
+        self.fields: List[str] = list(payload["fields"])  # type: ignore[call-overload]
+        columns: Dict[str, object] = payload["products"]  # type: ignore[assignment]
+        self.columns = {field: decode_column(columns[field]) for field in self.fields}
+        self.postings: Dict[str, List[int]] = payload["ingredients"]  # type: ignore[assignment]
+
+    @classmethod
+    def load(cls, path: Path) -> "IngredientIndex":
+        return cls(json.loads(path.read_text(encoding="utf-8")))
+
+    def __len__(self) -> int:
+        return len(self.postings)
+
+    def ingredients(self) -> List[str]:
+        return list(self.postings)
+
+    def product(self, product_id: int) -> Dict[str, str]:
+        return {field: self.columns[field][product_id] for field in self.fields}
+
+    def product_ids(self, ingredient: str) -> List[int]:
+        return self.postings.get(ingredient, [])
+
+    def product_ids_with_all(self, ingredients: Sequence[str]) -> List[int]:
+        return intersect_postings([self.product_ids(name) for name in ingredients])
+
+    def products_with(self, ingredient: str) -> List[Dict[str, str]]:
+        # 成分 X を含む製品(製品名順)。
+        return [self.product(product_id) for product_id in self.product_ids(ingredient)]
+
+    def products_with_all(self, ingredients: Sequence[str]) -> List[Dict[str, str]]:
+        # 成分 X, Y, ... をすべて含む製品(製品名順)。
+        return [self.product(product_id) for product_id in self.product_ids_with_all(ingredients)]
+
+
+def write_ingredient_index(path: Path, payload: Dict[str, object]) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    return path
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="PMDA 成分インデックスの変換・検索")
+    parser.add_argument("input", help="pmda_*_ingredient_index.json")
+    parser.add_argument("--all", nargs="+", default=None, metavar="INGREDIENT", help="すべて含む製品を表示（変換はしない）")
+    args = parser.parse_args()
+
+    input_path = Path(args.input)
+    if args.all:
+        index = IngredientIndex.load(input_path)
+        for product in index.products_with_all(args.all):
+            print(json.dumps(product, ensure_ascii=False))
+        return
+
+    before = input_path.stat().st_size
+    index = IngredientIndex.load(input_path)
+    write_ingredient_index(input_path, index.payload)
+    after = input_path.stat().st_size
+    print(f"saved: {input_path} ({before:,} -> {after:,} bytes, ingredients={len(index)})")
+
+
+if __name__ == "__main__":
+    main()
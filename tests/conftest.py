@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# scripts/ のモジュールはパッケージではなく、スクリプトと同じく scripts/ を import パスに置いて読み込む。
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
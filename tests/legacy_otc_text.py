@@ -0,0 +1,69 @@
+"""
+OTC 取得スクリプトの clean_text / parse_ingredients の従来実装(正規表現を呼び出しごとに指定していた版)。
+
+現在の実装の出力がこれと一致することを tests/test_otc_text_parsing.py で確かめ、
+benchmarks/bench_otc_text_parsing.py では処理速度の比較対象にする。比較に使う clean_text の入力もここで作る。
+"""
+
+from __future__ import annotations
+
+import html
+import re
+from typing import Dict, List, Sequence, Tuple
+
+
+def legacy_clean_text(fragment: str, keep_newline: bool = False) -> str:
+    fragment = re.sub(r"<br\s*/?>", "\n", fragment, flags=re.I)
+    fragment = re.sub(r"</p\s*>", "\n", fragment, flags=re.I)
+    fragment = re.sub(r"<[^>]+>", " ", fragment)
+    fragment = html.unescape(fragment).replace("　", " ")
+    if keep_newline:
+        lines = [re.sub(r"[ \t]+", " ", line).strip() for line in fragment.splitlines()]
+        lines = [line for line in lines if line]
+        return "\n".join(lines)
+    fragment = re.sub(r"\s+", " ", fragment).strip()
+    return fragment
+
+
+def legacy_parse_ingredients(ingredient_text: str) -> List[Dict[str, str]]:
+    if not ingredient_text:
+        return []
+
+    text = ingredient_text.replace("（", "(").replace("）", ")")
+    text = text.replace("：", " ").replace("　", " ")
+    text = re.sub(r"\b(成分|分量|内訳)\b", " ", text)
+    text = re.sub(r"\s+", " ", text)
+
+    pattern = re.compile(
+        r"([A-Za-z0-9一-龥ぁ-んァ-ヶー・αβγΑΒΓ\-\+／/\(\)]+)\s*"
+        r"([0-9]+(?:\.[0-9]+)?\s*(?:mg|g|mL|ml|μg|µg|mcg|IU|国際単位|単位|mEq|%|％))"
+    )
+    seen = set()
+    items: List[Dict[str, str]] = []
+    for name, amount in pattern.findall(text):
+        clean_name = name.strip().lstrip("・-")
+        clean_name = clean_name.strip("()（）[]【】")
+        if clean_name in {"成分", "分量", "内訳"}:
+            continue
+        if re.match(r"^[0-9０-９]", clean_name):
+            continue
+        if not re.search(r"[A-Za-z一-龥ぁ-んァ-ヶ]", clean_name):
+            continue
+        key = (clean_name, amount.strip())
+        if not clean_name or key in seen:
+            continue
+        seen.add(key)
+        items.append({"name": clean_name, "amount": amount.strip()})
+    return items
+
+
+def build_clean_text_corpus(products: Sequence[Dict[str, object]]) -> List[Tuple[str, bool]]:
+    # 詳細ページの項目値(改行を保つ)と、一覧ページの HTML 断片(タグ・文字参照を含む)の両方を用意する。
+    corpus: List[Tuple[str, bool]] = []
+    for product in products:
+        text = str(product.get("ingredient_text") or "")
+        corpus.append((text, True))
+        fragment = html.escape(text, quote=False).replace("\n", "<br />\n　")
+        corpus.append((f"<td class=\"deta\"><p>{fragment}</p></td>", False))
+        corpus.append((f"<a href=\"#\"> {html.escape(str(product.get('product_name') or ''))} </a>", False))
+    return corpus
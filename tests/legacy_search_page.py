@@ -0,0 +1,170 @@
+"""
+検索ページを正規表現で何度も走査していた従来の関数(extract_hidden_inputs / parse_html_form_defaults /
+parse_search_count / extract_rows_from_result_html)と、比較に使う検索結果ページの生成。
+
+pmda_html.parse_search_page の出力がこれと一致することを tests/test_pmda_html.py で確かめ、
+benchmarks/bench_search_page_parsing.py では処理速度の比較対象にする。
+"""
+
+from __future__ import annotations
+
+import html
+import re
+from typing import Dict, List, Sequence, Tuple
+
+from fetch_pmda_otc_dataset import SearchRow, clean_text, rows_from_search_page
+from pmda_html import parse_search_page
+
+
+def legacy_extract_hidden_inputs(page_html: str) -> Dict[str, str]:
+    data: Dict[str, str] = {}
+    for tag in re.findall(r"<input[^>]*type=\"hidden\"[^>]*>", page_html, flags=re.I):
+        name_match = re.search(r"name=\"([^\"]+)\"", tag, flags=re.I)
+        if not name_match:
+            continue
+        value_match = re.search(r"value=\"([^\"]*)\"", tag, flags=re.I)
+        name = name_match.group(1)
+        value = value_match.group(1) if value_match else ""
+        data[name] = html.unescape(value)
+    return data
+
+
+def legacy_extract_rows_from_result_html(result_html: str) -> List[SearchRow]:
+    rows: List[SearchRow] = []
+    tr_list = re.findall(r"<tr class=['\"]TrColor[^'\"]*['\"]>(.*?)</tr>", result_html, flags=re.I | re.S)
+    if not tr_list:
+        tr_list = re.findall(r"<tr[^>]*>(.*?)</tr>", result_html, flags=re.I | re.S)
+
+    for row_html in tr_list:
+        name_match = re.search(
+            r"/PmdaSearch/otcDetail/GeneralList/([^'\"/]+)['\"][^>]*>\s*(.*?)\s*</a>",
+            row_html,
+            flags=re.I | re.S,
+        )
+        if not name_match:
+            continue
+
+        code = name_match.group(1).strip()
+        product_name = clean_text(name_match.group(2))
+        manufacturer_match = re.search(
+            r"margin-top:10px; margin-bottom:0px;[^>]*>\s*(.*?)\s*</div>",
+            row_html,
+            flags=re.I | re.S,
+        )
+        manufacturer = clean_text(manufacturer_match.group(1)) if manufacturer_match else ""
+
+        rows.append(SearchRow(code=code, product_name=product_name, manufacturer=manufacturer))
+    return rows
+
+
+def legacy_parse_html_form_defaults(page_html: str) -> Dict[str, str]:
+    payload: Dict[str, str] = {}
+
+    for tag in re.findall(r"<input[^>]*>", page_html, flags=re.I):
+        name_match = re.search(r'name="([^"]+)"', tag, flags=re.I)
+        if not name_match:
+            continue
+        name = name_match.group(1)
+        type_match = re.search(r'type="([^"]+)"', tag, flags=re.I)
+        input_type = (type_match.group(1).lower() if type_match else "text")
+        value_match = re.search(r'value="([^"]*)"', tag, flags=re.I)
+        value = html.unescape(value_match.group(1) if value_match else "")
+        checked = bool(re.search(r"checked", tag, flags=re.I))
+
+        if input_type in {"hidden", "text"}:
+            payload[name] = value
+        elif input_type == "radio" and checked:
+            payload[name] = value
+        elif input_type == "checkbox" and checked:
+            payload[name] = value or "on"
+
+    for select_match in re.finditer(
+        r'<select[^>]+name="([^"]+)"[^>]*>([\s\S]*?)</select>',
+        page_html,
+        flags=re.I,
+    ):
+        name = select_match.group(1)
+        body = select_match.group(2)
+        selected = re.search(
+            r'<option[^>]*selected="selected"[^>]*value="([^"]*)"',
+            body,
+            flags=re.I,
+        )
+        if not selected:
+            selected = re.search(
+                r'<option[^>]*value="([^"]*)"[^>]*selected="selected"',
+                body,
+                flags=re.I,
+            )
+        if not selected:
+            selected = re.search(r'<option[^>]*value="([^"]*)"', body, flags=re.I)
+        payload[name] = html.unescape(selected.group(1) if selected else "")
+
+    return payload
+
+
+def legacy_parse_search_count(result_html: str) -> int:
+    match = re.search(r'name="searchCnt"[^>]*value="([0-9]+)"', result_html)
+    return int(match.group(1)) if match else 0
+
+
+def legacy_parse(page_html: str) -> Tuple[object, ...]:
+    # 従来は検索結果ページごとに以下をそれぞれ呼んでいた(OTC: hidden・行、医療用: 件数・hidden、初期ページ: 既定値)。
+    hidden = legacy_extract_hidden_inputs(page_html)
+    return (
+        hidden,
+        int(hidden.get("searchCnt", "0") or "0"),
+        int(hidden.get("totalPages", "1") or "1"),
+        legacy_parse_search_count(page_html),
+        legacy_parse_html_form_defaults(page_html),
+        legacy_extract_rows_from_result_html(page_html),
+    )
+
+
+def single_pass_parse(page_html: str) -> Tuple[object, ...]:
+    page = parse_search_page(page_html)
+    return (
+        page.hidden_inputs,
+        page.search_count,
+        page.total_pages,
+        page.search_count,
+        page.form_defaults,
+        rows_from_search_page(page),
+    )
+
+
+def synthetic_search_page(products: Sequence[Dict[str, object]], page_no: int, list_rows: int, total: int) -> str:
+    # 検索フォーム(hidden / text / radio / checkbox / select)と結果一覧(TrColor 行)を持つ検索結果ページ。
+    form = [
+        '<form id="searchForm" method="post" action="/PmdaSearch/otcSearch/">',
+        '<input type="text" name="nameWord" value="" size="40">',
+        '<input type="radio" name="howtoMatchRadioValue" value="1">',
+        '<input type="radio" name="howtoMatchRadioValue" value="2" checked="checked">',
+        '<input type="checkbox" name="dispColumnsList[0]" value="1" checked="checked">',
+        '<input type="checkbox" name="dispColumnsList[1]" value="2">',
+        '<select name="ListRows" class="select"><option value="10">10</option>'
+        '<option value="100" selected="selected">100</option><option value="500">500</option></select>',
+        '<select name="effectValue"><option value="">--</option><option value="01">解熱鎮痛薬</option></select>',
+    ]
+    form.extend(
+        f'<input type="hidden" name="hidden{index}" value="{html.escape(f"値&{index}")}">' for index in range(40)
+    )
+    form.append(f'<input type="hidden" name="searchCnt" value="{total}">')
+    form.append(f'<input type="hidden" name="totalPages" value="{(total + list_rows - 1) // list_rows}">')
+    form.append(f'<input type="hidden" name="currentPage" value="{page_no}">')
+    form.append("</form>")
+
+    rows = ['<table class="result"><tr><th>販売名</th><th>製造販売業者</th><th>文書</th></tr>']
+    for index, product in enumerate(products):
+        name = html.escape(str(product.get("product_name") or ""))
+        rows.append(
+            f'<tr class="TrColor{index % 2}"><td class="cell">'
+            f'<a href="/PmdaSearch/otcDetail/GeneralList/{product.get("code")}" target="_blank">\n  {name}\n</a>'
+            f'<div style="margin-top:10px; margin-bottom:0px;" class="maker">\n  '
+            f'{html.escape(str(product.get("manufacturer") or ""))}<br>\n</div></td>'
+            f'<td>{html.escape(str(product.get("risk_class") or ""))}</td>'
+            f'<td><a href="/PmdaSearch/otcDetail/ResultDataSetPDF/{product.get("code")}/A">PDF</a></td></tr>'
+        )
+    rows.append("</table>")
+    filler = "<script>var x = 1;</script>" + "<div class=\"nav\"><span>メニュー</span></div>" * 50
+    return "<html><head><title>一般用医薬品</title></head><body>" + filler + "".join(form) + "".join(rows) + "</body></html>"
@@ -0,0 +1,109 @@
+import json
+import threading
+
+import pytest
+
+from fetch_pmda_otc_dataset import CheckpointJournal
+
+CONFIG = {"seed": 1, "priority_prefixes": ["ア"], "list_rows": 100}
+
+
+def read_lines(path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_fresh_open_writes_config_line(tmp_path):
+    journal = CheckpointJournal(tmp_path / "journal.jsonl")
+    assert journal.open(CONFIG, resume=False) == []
+    journal.append({"type": "prefix", "prefix": "ア", "search_count": 0, "rows": []})
+    journal.close()
+
+    lines = read_lines(journal.path)
+    assert lines[0] == dict(CONFIG, type="config")
+    assert lines[1]["prefix"] == "ア"
+
+
+def test_resume_replays_entries_and_keeps_appending(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = CheckpointJournal(path)
+    journal.open(CONFIG, resume=False)
+    journal.append({"type": "detail", "record": {"code": "1"}})
+    journal.close()
+
+    resumed = CheckpointJournal(path)
+    assert resumed.open(CONFIG, resume=True) == [{"type": "detail", "record": {"code": "1"}}]
+    resumed.append({"type": "detail", "record": {"code": "2"}})
+    resumed.close()
+
+    assert [line["record"]["code"] for line in read_lines(path)[1:]] == ["1", "2"]
+
+
+def test_open_without_resume_discards_previous_entries(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = CheckpointJournal(path)
+    journal.open(CONFIG, resume=False)
+    journal.append({"type": "detail", "record": {"code": "1"}})
+    journal.close()
+
+    assert CheckpointJournal(path).open(CONFIG, resume=False) == []
+    assert read_lines(path) == [dict(CONFIG, type="config")]
+
+
+def test_resume_with_different_config_is_rejected(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = CheckpointJournal(path)
+    journal.open(CONFIG, resume=False)
+    journal.close()
+
+    with pytest.raises(ValueError, match="seed mismatch"):
+        CheckpointJournal(path).open(dict(CONFIG, seed=2), resume=True)
+
+
+def test_resume_drops_partially_written_tail(tmp_path):
+    path = tmp_path / "journal.jsonl"
+    journal = CheckpointJournal(path)
+    journal.open(CONFIG, resume=False)
+    journal.append({"type": "detail", "record": {"code": "1"}})
+    journal.close()
+    with path.open("a", encoding="utf-8") as handle:
+        handle.write('{"type": "detail", "rec')
+
+    resumed = CheckpointJournal(path)
+    assert resumed.open(CONFIG, resume=True) == [{"type": "detail", "record": {"code": "1"}}]
+    resumed.append({"type": "detail", "record": {"code": "2"}})
+    resumed.close()
+
+    # 書きかけ行は再開時に取り除かれ、以降の追記は正しい行として読める。
+    assert [line["record"]["code"] for line in read_lines(path)[1:]] == ["1", "2"]
+
+
+def test_concurrent_appends_produce_whole_lines(tmp_path):
+    journal = CheckpointJournal(tmp_path / "journal.jsonl")
+    journal.open(CONFIG, resume=False)
+    text = "成分" * 500
+
+    def worker(worker_id):
+        for pos in range(200):
+            journal.append({"type": "detail", "record": {"code": f"{worker_id}-{pos}", "text": text}})
+
+    threads = [threading.Thread(target=worker, args=(worker_id,)) for worker_id in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    journal.close()
+
+    codes = [line["record"]["code"] for line in read_lines(journal.path)[1:]]
+    assert sorted(codes) == sorted(f"{worker_id}-{pos}" for worker_id in range(8) for pos in range(200))
+
+
+def test_append_requires_open_journal(tmp_path):
+    with pytest.raises(RuntimeError):
+        CheckpointJournal(tmp_path / "journal.jsonl").append({"type": "detail"})
+
+
+def test_close_with_remove_deletes_journal(tmp_path):
+    journal = CheckpointJournal(tmp_path / "journal.jsonl")
+    journal.open(CONFIG, resume=False)
+    journal.close(remove=True)
+    assert not journal.path.exists()
@@ -0,0 +1,57 @@
+import threading
+
+import requests
+
+import fetch_pmda_otc_dataset
+from fetch_pmda_otc_dataset import DetailFetchPipeline, SearchRow
+from pmda_http import RateLimiter
+
+
+def make_row(code: str) -> SearchRow:
+    return SearchRow(code=code, product_name=f"製品{code}", manufacturer="製造元")
+
+
+def test_close_waits_for_every_submitted_row(monkeypatch):
+    monkeypatch.setattr(
+        fetch_pmda_otc_dataset, "fetch_detail", lambda session, row, sleep_sec, limiter=None: {"code": row.code}
+    )
+    recorded = []
+    pipeline = DetailFetchPipeline(
+        requests.Session(), sleep_sec=0, workers=3, limiter=RateLimiter(0), on_record=recorded.append
+    )
+    for code in map(str, range(30)):
+        pipeline.submit(make_row(code))
+    records, errors = pipeline.close()
+
+    assert sorted(records, key=int) == [str(code) for code in range(30)]
+    assert errors == {}
+    assert len(recorded) == 30
+
+
+def test_cancel_drops_queued_rows_and_second_close_is_noop(monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+    fetched = []
+
+    def fetch_detail(session, row, sleep_sec, limiter=None):
+        fetched.append(row.code)
+        started.set()
+        release.wait(5)
+        return {"code": row.code}
+
+    monkeypatch.setattr(fetch_pmda_otc_dataset, "fetch_detail", fetch_detail)
+    pipeline = DetailFetchPipeline(requests.Session(), sleep_sec=0, workers=1, limiter=RateLimiter(0))
+    for code in map(str, range(10)):
+        pipeline.submit(make_row(code))
+    assert started.wait(5)
+
+    # 取得中の1件は close() がキューを空にした後で終わらせる。
+    timer = threading.Timer(0.2, release.set)
+    timer.start()
+    records, _ = pipeline.close(cancel=True)
+    timer.join()
+    # 取得中だった1件だけが終わり、キューに残っていた行は取得しない。
+    assert fetched == ["0"]
+    assert list(records) == ["0"]
+    assert all(not thread.is_alive() for thread in pipeline.threads)
+    assert pipeline.close() == (records, {})
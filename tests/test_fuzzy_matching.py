@@ -0,0 +1,106 @@
+import random
+
+import pytest
+
+from toxicnavi.matching import (
+    TrigramIndex,
+    allowed_edits,
+    build_search_entries,
+    padded_trigrams,
+    substring_edit_distance,
+)
+
+NAMES = ["アセトアミノフェン", "イブプロフェン", "ロキソプロフェン", "ロキソニン", "カフェイン", "アスピリン", "エテンザミド"]
+
+
+def reference_substring_distance(query: str, target: str) -> int:
+    # query 全体と target の部分文字列との最小編集距離(素朴な DP)。
+    previous = [0] * (len(target) + 1)
+    for row, query_char in enumerate(query, 1):
+        current = [row] + [0] * len(target)
+        for col, target_char in enumerate(target, 1):
+            current[col] = min(
+                previous[col] + 1,
+                current[col - 1] + 1,
+                previous[col - 1] + (query_char != target_char),
+            )
+        previous = current
+    return min(previous)
+
+
+def make_index() -> TrigramIndex:
+    return TrigramIndex(build_search_entries(["ロキソニン錠"], NAMES, {"タイレノール": "アセトアミノフェン"}))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_substring_edit_distance_matches_reference(seed):
+    rng = random.Random(seed)
+    alphabet = "アイウエオカキ"
+    for _ in range(200):
+        query = "".join(rng.choice(alphabet) for _ in range(rng.randrange(1, 9)))
+        target = "".join(rng.choice(alphabet) for _ in range(rng.randrange(0, 15)))
+        expected = reference_substring_distance(query, target)
+        for limit in range(3):
+            assert substring_edit_distance(query, target, limit) == (expected if expected <= limit else None)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_fuzzy_finds_every_entry_within_the_allowed_edits(seed):
+    # trigram による候補の絞り込みで、編集距離 k 以内の候補を落とさない。
+    rng = random.Random(seed)
+    index = make_index()
+    for _ in range(300):
+        name = rng.choice(NAMES)
+        chars = list(name)
+        for _ in range(rng.randrange(0, 3)):
+            pos = rng.randrange(len(chars))
+            operation = rng.choice(["replace", "delete", "insert"])
+            if operation == "replace":
+                chars[pos] = rng.choice("アイウエオ")
+            elif operation == "delete" and len(chars) > 1:
+                del chars[pos]
+            else:
+                chars.insert(pos, rng.choice("アイウエオ"))
+        query = "".join(chars)
+        limit = allowed_edits(len(query))
+        if len(set(padded_trigrams(query))) - 3 * limit - 4 < 1:
+            # 共有 trigram 数の下限が 0 以下の短い入力は、trigram を共有しない候補を見ない。
+            continue
+        expected = {
+            entry_id
+            for entry_id, entry in enumerate(index.entries)
+            if limit and len(entry.normalized) >= len(query) - limit
+            and reference_substring_distance(query, entry.normalized) <= limit
+        }
+        assert {entry_id for entry_id, _ in index.fuzzy(query)} == expected, query
+
+
+def test_candidates_prefer_exact_then_contains_then_fuzzy():
+    index = make_index()
+    assert index.match("イブプロフェン")["strategy"] == "exact"
+    # 数字は除いて照合する。
+    assert index.match("ロキソニン錠60")["strategy"] == "exact"
+
+    contains = index.match("アセトアミノフェン配合")
+    assert (contains["name"], contains["strategy"]) == ("アセトアミノフェン", "contains")
+
+    # OCR の誤読(1文字)は近似一致で拾う。
+    fuzzy = index.match("アセトアミノフエソ")
+    assert (fuzzy["name"], fuzzy["strategy"], fuzzy["distance"]) == ("アセトアミノフェン", "fuzzy", 2)
+    misread = index.match("イブプロフエン")
+    assert (misread["name"], misread["distance"]) == ("イブプロフェン", 1)
+
+    alias = index.match("タイレノ-ル")
+    assert (alias["name"], alias["alias"]) == ("アセトアミノフェン", "タイレノール")
+    # 3文字以下は近似照合しない。
+    assert index.match("アスピ") is not None
+    assert index.candidates("ケロ") == []
+
+
+def test_payload_round_trip_keeps_candidates(tmp_path):
+    index = make_index()
+    loaded = TrigramIndex.load(index.save(tmp_path / "trigram.json"))
+    assert loaded.entries == index.entries
+    assert loaded.postings == index.postings
+    for query in ["アセトアミノフエソ", "ロキソ", "カフエイン", "エテンザミド錠"]:
+        assert loaded.candidates(query) == index.candidates(query)
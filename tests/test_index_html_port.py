@@ -0,0 +1,126 @@
+"""
+toxicnavi が移植している index.html のメソッドが変わっていないことを確認する。
+
+内蔵データの指紋(builtin_fingerprint)はデータしか見ないため、移植元のメソッドの本文を
+SHA-256 で記録しておき、変わった場合は対応する Python 側の移植を見直してから
+`python tests/test_index_html_port.py` で記録を更新する。
+"""
+
+import hashlib
+import json
+import re
+import sys
+from pathlib import Path
+from typing import Dict
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+INDEX_HTML = REPO_ROOT / "index.html"
+RECORD_PATH = Path(__file__).resolve().parent / "fixtures" / "index_html_ported_methods.json"
+
+# ToxicNaviApp のメソッド名 → 移植先のモジュール。
+PORTED_METHODS = {
+    "normalizeName": "toxicnavi.jscompat",
+    "toStringList": "toxicnavi.knowledge",
+    "parseNumericOrNull": "toxicnavi.knowledge",
+    "parseAmountToken": "toxicnavi.knowledge",
+    "amountTokenToMg": "toxicnavi.knowledge",
+    "parseDoseUnitCountFromText": "toxicnavi.knowledge",
+    "inferStrengthFromProductName": "toxicnavi.knowledge",
+    "estimateStrengthHintFromProduct": "toxicnavi.knowledge",
+    "calculateIngredientRatios": "toxicnavi.knowledge",
+    "isUsefulOcrAlias": "toxicnavi.knowledge",
+    "isUsefulOcrProductAlias": "toxicnavi.knowledge",
+    "bootstrapJpicSchema": "toxicnavi.knowledge",
+    "buildLegacyJpicProfile": "toxicnavi.knowledge",
+    "normalizeJpicProfile": "toxicnavi.knowledge",
+    "buildUnknownJpicProfile": "toxicnavi.knowledge",
+    "buildUnknownIngredientInfo": "toxicnavi.knowledge",
+    "canonicalizeIngredientName": "toxicnavi.knowledge",
+    "canonicalizeIngredientRatios": "toxicnavi.knowledge",
+    "seedStrengthHintsFromProductNames": "toxicnavi.knowledge",
+    "applyProductRow": "toxicnavi.knowledge",
+    "mergeProductsToDatabase": "toxicnavi.knowledge",
+    "mergeOcrKnowledgeProfiles": "toxicnavi.knowledge",
+    "loadExternalDatasets": "toxicnavi.knowledge",
+    "computeBuiltinFingerprint": "toxicnavi.product_table",
+    "findKeyByNormalizedName": "toxicnavi.name_index",
+    "getJpicProfile": "toxicnavi.assessment",
+    "getIngredientInfo": "toxicnavi.assessment",
+    "resolveDrugToIngredients": "toxicnavi.assessment",
+    "classifySeverity": "toxicnavi.assessment",
+    "calculateRiskScore": "toxicnavi.assessment",
+    "parseSymptoms": "toxicnavi.assessment",
+    "matchSymptoms": "toxicnavi.assessment",
+    "parseHourRangeFromWindow": "toxicnavi.assessment",
+    "assessTimeline": "toxicnavi.assessment",
+    "evaluateTreatments": "toxicnavi.assessment",
+    "addDrugCore": "toxicnavi.assessment",
+    "estimateStrengthForDrugName": "toxicnavi.assessment",
+    "findBestProductKeyByPartialName": "toxicnavi.assessment",
+    "normalizeDrugNameCandidate": "toxicnavi.assessment",
+    "convertDoseToMg": "toxicnavi.assessment",
+    "extractDrugCandidatesFromText": "toxicnavi.assessment",
+    "addDrug": "toxicnavi.batch",
+    "buildIngestionContextFromInputs": "toxicnavi.batch",
+    "buildSearchEntries": "toxicnavi.matching",
+    "substringEditDistance": "toxicnavi.matching",
+    "allowedOcrEdits": "toxicnavi.matching",
+    "paddedNameTrigrams": "toxicnavi.matching",
+    "findContainingSearchEntries": "toxicnavi.matching",
+    "findFuzzySearchEntries": "toxicnavi.matching",
+    "matchDrugCandidate": "toxicnavi.matching",
+    "productShardCandidates": "toxicnavi.product_shards",
+}
+
+# クラス本体のメソッド定義(12桁字下げ)。本文は同じ字下げの閉じ括弧までとする。
+METHOD_INDENT = " " * 12
+
+
+def method_source(source: str, name: str) -> str:
+    match = re.search(rf"^{METHOD_INDENT}(?:async )?{name}\(.*\{{$", source, re.M)
+    if match is None:
+        raise LookupError(f"method not found in index.html: {name}")
+    end = source.index(f"\n{METHOD_INDENT}}}\n", match.end())
+    # 行末の空白の違いは無視する。
+    return "\n".join(line.rstrip() for line in source[match.start():end + len(METHOD_INDENT) + 2].splitlines())
+
+
+def method_digests(source: str) -> Dict[str, str]:
+    return {name: hashlib.sha256(method_source(source, name).encode("utf-8")).hexdigest() for name in sorted(PORTED_METHODS)}
+
+
+def write_record() -> None:
+    digests = method_digests(INDEX_HTML.read_text(encoding="utf-8"))
+    record = {name: {"module": PORTED_METHODS[name], "sha256": digest} for name, digest in digests.items()}
+    RECORD_PATH.write_text(json.dumps(record, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+
+
+def test_method_source_stops_at_the_method_end():
+    source = INDEX_HTML.read_text(encoding="utf-8")
+    body = method_source(source, "classifySeverity")
+    assert body.startswith(f"{METHOD_INDENT}classifySeverity(")
+    assert body.endswith(f"\n{METHOD_INDENT}}}")
+    assert body.count(f"\n{METHOD_INDENT}}}") == 1
+
+
+def test_ported_methods_are_unchanged():
+    recorded = json.loads(RECORD_PATH.read_text(encoding="utf-8"))
+    assert sorted(recorded) == sorted(PORTED_METHODS), "update the record: python tests/test_index_html_port.py"
+    changed = [
+        f"{name} (ported in {PORTED_METHODS[name]})"
+        for name, digest in method_digests(INDEX_HTML.read_text(encoding="utf-8")).items()
+        if recorded[name]["sha256"] != digest
+    ]
+    if changed:
+        pytest.fail(
+            "index.html methods changed since the Python port was checked: "
+            + ", ".join(changed)
+            + ". Update the port, then run: python tests/test_index_html_port.py"
+        )
+
+
+if __name__ == "__main__":
+    write_record()
+    print(f"saved: {RECORD_PATH}", file=sys.stderr)
@@ -0,0 +1,88 @@
+import codecs
+import io
+
+import pytest
+import requests
+from urllib3.response import HTTPResponse
+
+import fetch_pmda_iyaku_dataset
+from fetch_pmda_iyaku_dataset import (
+    detect_export_encoding,
+    iter_decoded_chunks,
+    iter_response_rows,
+    iter_text_lines,
+    parse_csv_rows,
+)
+
+CSV_TEXT = (
+    "医療用医薬品 検索結果\r\n"
+    "検索条件:改訂年月日\r\n"
+    "一般名,販売名,製造販売業者等,添付文書\r\n"
+    'アセトアミノフェン,カロナール錠２００,あゆみ製薬,"PDF(2024年04月01日)\r\nHTML"\r\n'
+    "\r\n"
+    "ロキソプロフェンナトリウム水和物,ロキソニン錠６０ｍｇ,第一三共,PDF(2023年10月01日)\r\n"
+)
+
+
+def split_every(data: bytes, size: int):
+    return [data[pos : pos + size] for pos in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize(
+    ("head", "expected"),
+    [
+        (codecs.BOM_UTF8 + "一般名".encode("utf-8"), "utf-8-sig"),
+        ("一般名".encode("utf-8"), "utf-8"),
+        ("一般名".encode("cp932"), "cp932"),
+        # 断片末尾で切れた UTF-8 の多バイト文字は Shift_JIS と誤判定しない。
+        ("一般名".encode("utf-8")[:-1], "utf-8"),
+    ],
+)
+def test_detect_export_encoding(head, expected):
+    assert detect_export_encoding(head) == expected
+
+
+@pytest.mark.parametrize("encoding", ["cp932", "utf-8", "utf-8-sig"])
+@pytest.mark.parametrize("chunk_size", [1, 3, 7, 64])
+def test_streaming_decode_matches_whole_body(encoding, chunk_size):
+    body = CSV_TEXT.encode(encoding)
+    # 1バイト・奇数バイトずつ渡すと、2バイト文字(cp932)・3バイト文字(UTF-8)が断片の境目で切れる。
+    text = "".join(iter_decoded_chunks(split_every(body, chunk_size)))
+    assert text == CSV_TEXT
+
+
+def test_cp932_character_split_across_chunks():
+    body = "ア一般".encode("cp932")
+    chunks = [body[:1], body[1:3], body[3:]]
+    assert "".join(iter_decoded_chunks(chunks)) == "ア一般"
+    # 判定は先頭の断片を溜めてから行うため、最初の断片が ASCII だけでも Shift_JIS と判定できる。
+    assert "".join(iter_decoded_chunks([b"a,", body[:1], body[1:]])) == "a,ア一般"
+    assert "".join(iter_decoded_chunks([b"a,", body[:1], body[1:]], "cp932")) == "a,ア一般"
+
+
+def test_encoding_is_detected_from_the_buffered_head(monkeypatch):
+    monkeypatch.setattr(fetch_pmda_iyaku_dataset, "EXPORT_DETECT_BYTES", 4)
+    body = b"abcd" + "一般".encode("cp932")
+    # 4バイト溜まった時点の先頭が ASCII だけなら UTF-8 として読む(以降の Shift_JIS は置換文字になる)。
+    assert "".join(iter_decoded_chunks([body[:2], body[2:4], body[4:]])).startswith("abcd\ufffd")
+    # 4バイトに届かない断片は次の断片と合わせて判定する。
+    assert "".join(iter_decoded_chunks([body[2:4], body[4:]])) == "cd一般"
+
+
+def test_text_lines_keep_line_breaks_across_chunks():
+    assert list(iter_text_lines(["a,b\nc", "", ",d\n", "e"])) == ["a,b\n", "c,d\n", "e"]
+
+
+def test_response_rows_stream_without_charset():
+    body = CSV_TEXT.encode("cp932")
+    response = requests.Response()
+    response.status_code = 200
+    response.headers["Content-Type"] = "text/csv"
+    response.raw = HTTPResponse(body=io.BytesIO(body), preload_content=False)
+
+    rows = [row.to_dict() for row in iter_response_rows(response, {"query": "x"})]
+
+    assert rows == [dict(row, query="x") for row in parse_csv_rows(CSV_TEXT)]
+    assert [row["販売名"] for row in rows] == ["カロナール錠２００", "ロキソニン錠６０ｍｇ"]
+    assert rows[0]["添付文書"] == "PDF(2024年04月01日)\r\nHTML"
+    assert response.raw.closed
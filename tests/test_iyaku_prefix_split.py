@@ -0,0 +1,92 @@
+import unicodedata
+from datetime import date
+
+import pytest
+import requests
+
+import fetch_pmda_iyaku_dataset
+from fetch_pmda_iyaku_dataset import IyakuFetcher, ProductAccumulator
+
+DAY = date(2024, 4, 1)
+
+
+def fold(text: str) -> str:
+    return unicodedata.normalize("NFKC", text)
+
+
+class FakeDayFetcher(IyakuFetcher):
+    # 1日分の販売名を持つ検索サーバーの代わり。前方一致は PMDA と同じく全角/半角を同一視する。
+    def __init__(self, names, **kwargs):
+        super().__init__(list_rows=100, sleep_sec=0, session=requests.Session(), **kwargs)
+        self.names = names
+        self.searched_prefixes = []
+
+    def matching(self, name_prefix: str):
+        return [name for name in self.names if fold(name).startswith(fold(name_prefix))]
+
+    def search_range(self, start_date, end_date, name_prefix="", session=None):
+        assert start_date == end_date == DAY
+        if session is None:
+            self.searched_prefixes.append(name_prefix)
+        return len(self.matching(name_prefix)), "", {"nameWord": name_prefix}
+
+    def export_leaf_rows(self, start_date, end_date, hidden, name_prefix=""):
+        return iter(
+            [
+                {"一般名": "一般名", "販売名": name, "製造販売業者等": "製造元", "添付文書": f"PDF {name}"}
+                for name in self.matching(name_prefix)
+            ]
+        )
+
+
+@pytest.fixture
+def narrow_residual(monkeypatch):
+    # 総当たり範囲は「漢」の前後だけに絞る(全範囲だと数万回の検索になる)。
+    monkeypatch.setattr(fetch_pmda_iyaku_dataset, "RESIDUAL_PREFIX_RANGES", ((0x6F20, 0x6F24),))
+
+
+@pytest.mark.parametrize("export_workers", [1, 3])
+def test_overlapping_prefixes_do_not_stop_the_split_early(narrow_residual, export_workers):
+    # 「ア」と半角「ｱ」の検索結果は同じ2行。件数の単純合計では 2+2 ≥ 3 で「漢方薬」を取りこぼす。
+    fetcher = FakeDayFetcher(["アスピリン", "ｱﾚｸﾞﾗ", "漢方薬"], max_search_count=2, export_workers=export_workers)
+    fetcher.seen_sales_names.add("ｱﾚｸﾞﾗ")
+    out = ProductAccumulator()
+    fetcher.collect_rows_recursive(DAY, DAY, out)
+    fetcher.finish_exports()
+
+    searched = fetcher.searched_prefixes
+    assert searched.index("ア") < searched.index("ｱ") < searched.index("漢")
+    assert sorted(product["product_name"] for product in out.products()) == ["アスピリン", "アレグラ", "漢方薬"]
+    assert fetcher.prefix_split_days == 1
+
+
+def test_split_stops_once_distinct_rows_reach_the_count(narrow_residual):
+    fetcher = FakeDayFetcher(["アスピリン", "アレグラ", "イブ"], max_search_count=2)
+    fetcher.collect_rows_recursive(DAY, DAY, ProductAccumulator())
+
+    assert fetcher.searched_prefixes[:3] == ["", "ア", "イ"]
+    assert len(fetcher.searched_prefixes) == 3
+
+
+def test_overflowing_prefix_is_split_again(narrow_residual):
+    fetcher = FakeDayFetcher(["アスピリン", "アスパラ", "アレグラ", "イブ"], max_search_count=2)
+    out = ProductAccumulator()
+    fetcher.collect_rows_recursive(DAY, DAY, out)
+
+    assert [prefix for prefix in fetcher.searched_prefixes if prefix.startswith("ア")][:3] == ["ア", "アア", "アイ"]
+    assert len(out.products()) == 4
+    assert {leaf.get("name_prefix") for leaf in fetcher.range_counts} == {"アス", "アレ", "イ"}
+
+
+def test_sweep_limit_raises_when_rows_are_missing(narrow_residual):
+    fetcher = FakeDayFetcher(["アスピリン", "アレグラ", "漢方薬"], max_search_count=2, prefix_search_limit=10)
+    with pytest.raises(RuntimeError, match="search limit reached"):
+        fetcher.collect_rows_recursive(DAY, DAY, ProductAccumulator())
+    assert len(fetcher.searched_prefixes) == 1 + 10
+
+
+def test_exhausted_characters_raise(monkeypatch):
+    monkeypatch.setattr(fetch_pmda_iyaku_dataset, "RESIDUAL_PREFIX_RANGES", ())
+    fetcher = FakeDayFetcher(["アスピリン", "アレグラ", "漢方薬"], max_search_count=2)
+    with pytest.raises(RuntimeError, match="prefix characters exhausted"):
+        fetcher.collect_rows_recursive(DAY, DAY, ProductAccumulator())
@@ -0,0 +1,80 @@
+import json
+from datetime import date
+
+from fetch_pmda_iyaku_dataset import PreviousIyakuRun
+
+
+def product(name: str, start: str, end: str) -> dict:
+    return {
+        "generic_name": f"{name}一般名",
+        "product_name": name,
+        "manufacturer": "製造元",
+        "documents": {"raw": ""},
+        "source": {"query_start": start, "query_end": end},
+    }
+
+
+def make_run() -> PreviousIyakuRun:
+    return PreviousIyakuRun(
+        {
+            "metadata": {
+                "to_date": "2024-12-31",
+                "range_counts": [
+                    {"start": "2024-01-01", "end": "2024-03-31", "count": 2},
+                    {"start": "2024-04-01", "end": "2024-06-30", "count": 1},
+                    # 販売名prefixで分割した日は同じ日付レンジの葉が複数ある。
+                    {"start": "2024-07-01", "end": "2024-07-01", "count": 1, "name_prefix": "ア"},
+                    {"start": "2024-07-01", "end": "2024-07-01", "count": 1, "name_prefix": "イ"},
+                ],
+            },
+            "products": [
+                product("製品A", "2024-01-01", "2024-03-31"),
+                product("製品B", "2024-01-01", "2024-03-31"),
+                product("製品C", "2024-04-01", "2024-06-30"),
+                product("アスピリン", "2024-07-01", "2024-07-01"),
+                product("イブプロフェン", "2024-07-01", "2024-07-01"),
+            ],
+        }
+    )
+
+
+def test_reuse_returns_previous_leaves_and_rows_when_count_is_unchanged():
+    reused = make_run().reuse(date(2024, 1, 1), date(2024, 6, 30), 3)
+    assert reused is not None
+    leaves, rows = reused
+    assert [(leaf[0], leaf[1], leaf[2]) for leaf in leaves] == [
+        (date(2024, 1, 1), date(2024, 3, 31), 2),
+        (date(2024, 4, 1), date(2024, 6, 30), 1),
+    ]
+    assert [row["販売名"] for row in rows] == ["製品A", "製品B", "製品C"]
+
+
+def test_reuse_is_refused_when_count_changed():
+    assert make_run().reuse(date(2024, 1, 1), date(2024, 6, 30), 4) is None
+
+
+def test_reuse_is_refused_when_a_previous_leaf_crosses_the_range():
+    assert make_run().reuse(date(2024, 2, 1), date(2024, 6, 30), 1) is None
+
+
+def test_reuse_is_refused_for_a_range_without_previous_leaves():
+    assert make_run().reuse(date(2024, 8, 1), date(2024, 8, 31), 0) is None
+
+
+def test_prefix_split_day_returns_its_rows_once():
+    leaves, rows = make_run().reuse(date(2024, 7, 1), date(2024, 7, 1), 2)
+    assert [leaf[3] for leaf in leaves] == ["ア", "イ"]
+    assert [row["販売名"] for row in rows] == ["アスピリン", "イブプロフェン"]
+
+
+def test_split_date_prefers_previous_boundary_nearest_the_middle():
+    run = make_run()
+    assert run.split_date(date(2024, 1, 1), date(2024, 7, 1)) == date(2024, 3, 31)
+    assert run.split_date(date(2024, 4, 1), date(2024, 6, 30)) is None
+
+
+def test_load_requires_range_counts(tmp_path):
+    path = tmp_path / "pmda_iyaku_products.json"
+    assert PreviousIyakuRun.load(path) is None
+    path.write_text(json.dumps({"metadata": {"to_date": "2024-12-31"}, "products": []}), encoding="utf-8")
+    assert PreviousIyakuRun.load(path) is None
@@ -0,0 +1,91 @@
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from fetch_pmda_iyaku_dataset import RangeCountIndex
+
+BASE = date(2024, 1, 1)
+
+
+def day(offset: int) -> date:
+    return BASE + timedelta(days=offset)
+
+
+def reference_finest_ranges(counts):
+    # 差分更新前の実装(全レンジから毎回作り直す)。区間列の基準として使う。
+    boundaries = sorted({start for start, _ in counts} | {end + timedelta(days=1) for _, end in counts})
+    by_length = sorted(counts.items(), key=lambda item: ((item[0][1] - item[0][0]).days, item[0]))
+    segments = []
+    for segment_start, next_start in zip(boundaries, boundaries[1:]):
+        segment_end = next_start - timedelta(days=1)
+        for (range_start, range_end), count in by_length:
+            if range_start <= segment_start and segment_end <= range_end:
+                density = count / ((range_end - range_start).days + 1)
+                segments.append((segment_start, segment_end, density * ((segment_end - segment_start).days + 1)))
+                break
+    return segments
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_incremental_finest_ranges_match_full_rebuild(seed):
+    rng = random.Random(seed)
+    index = RangeCountIndex()
+    for _ in range(60):
+        start = rng.randrange(0, 400)
+        end = start + rng.randrange(0, 120)
+        # 既知レンジの件数更新も混ぜる。
+        if index.counts and rng.random() < 0.2:
+            start_date, end_date = rng.choice(sorted(index.counts))
+        else:
+            start_date, end_date = day(start), day(end)
+        index.record(start_date, end_date, rng.randrange(0, 3000))
+
+        expected = reference_finest_ranges(index.counts)
+        actual = index.finest_ranges()
+        assert [(start, end) for start, end, _ in actual] == [(start, end) for start, end, _ in expected]
+        assert [count for _, _, count in actual] == pytest.approx([count for _, _, count in expected])
+
+
+def test_estimate_uses_exact_count_then_shortest_covering_density():
+    index = RangeCountIndex()
+    index.record(day(0), day(99), 1000)
+    index.record(day(0), day(9), 400)
+
+    assert index.estimate(day(0), day(99)) == 1000
+    assert index.estimate(day(0), day(9)) == 400
+    # 0〜9日目は短いレンジの密度(40/日)、10〜19日目は長いレンジの密度(10/日)で按分する。
+    assert index.estimate(day(5), day(14)) == pytest.approx(5 * 40 + 5 * 10)
+    assert index.estimate(day(90), day(100)) is None
+
+
+def test_estimate_is_none_across_a_gap():
+    index = RangeCountIndex()
+    index.record(day(0), day(9), 100)
+    index.record(day(20), day(29), 100)
+
+    assert index.estimate(day(5), day(24)) is None
+    assert index.estimate(day(20), day(24)) == pytest.approx(50)
+
+
+def test_split_date_fills_the_target_from_the_start():
+    index = RangeCountIndex()
+    index.record(day(0), day(99), 1000)
+
+    assert index.split_date(day(0), day(99), 250) == day(24)
+    # 全体が target に収まるなら分割しない。
+    assert index.split_date(day(0), day(99), 1000) is None
+    # 分割日は最終日より前に留め、2つ目の葉が空にならないようにする。
+    assert index.split_date(day(0), day(1), 0.1) == day(0)
+
+
+def test_save_and_load_round_trip(tmp_path):
+    path = tmp_path / "range_index.json"
+    index = RangeCountIndex(path)
+    index.record(day(0), day(99), 1000)
+    index.record(day(10), day(19), 30)
+    index.save()
+
+    loaded = RangeCountIndex.load(path)
+    assert loaded.counts == index.counts
+    assert loaded.finest_ranges() == index.finest_ranges()
@@ -0,0 +1,43 @@
+import random
+
+import pytest
+
+from keyword_scanner import KeywordScanner
+
+
+def expected_hits(keywords, text):
+    return frozenset(keyword for keyword in keywords if keyword and keyword in text)
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_hits_match_substring_checks_on_random_inputs(seed):
+    # 小さな文字集合で重なり・包含・接頭辞/接尾辞の関係にあるキーワードを多く作る。
+    # 正規表現の特殊文字も混ぜ、文字クラスへの変換が崩れないことも確かめる。
+    rng = random.Random(seed)
+    alphabet = "ab]^-\\中毒"
+    for _ in range(300):
+        keywords = ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, 4))) for _ in range(rng.randint(0, 10))]
+        scanner = KeywordScanner(keywords)
+        for _ in range(5):
+            text = "".join(rng.choice(alphabet + "x") for _ in range(rng.randint(0, 40)))
+            assert scanner.hits(text) == expected_hits(keywords, text), (keywords, text)
+
+
+def test_overlapping_and_nested_keywords_are_all_found():
+    scanner = KeywordScanner(["意識障害", "障害", "意識", "識障", "害"])
+    assert scanner.hits("軽い意識障害あり") == frozenset({"意識障害", "障害", "意識", "識障", "害"})
+    # 失敗遷移で別のキーワードの途中へ移る場合。
+    scanner = KeywordScanner(["abcd", "bce"])
+    assert scanner.hits("abce") == frozenset({"bce"})
+
+
+def test_empty_keywords_and_text():
+    assert KeywordScanner([]).hits("中毒") == frozenset()
+    assert KeywordScanner(["", "中毒"]).hits("") == frozenset()
+    assert KeywordScanner(["", "中毒"]).keywords == ["中毒"]
+
+
+def test_contains_any():
+    scanner = KeywordScanner(["嘔吐", "下痢", "痙攣"])
+    assert scanner.contains_any("嘔吐と下痢", frozenset({"下痢"}))
+    assert not scanner.contains_any("嘔吐と下痢", frozenset({"痙攣"}))
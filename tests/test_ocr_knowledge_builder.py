@@ -0,0 +1,134 @@
+import json
+
+import pytest
+
+import build_ocr_household_knowledge
+from build_ocr_household_knowledge import (
+    ProfileCache,
+    iter_entries,
+    iter_lines,
+    parse_lines,
+    read_volumes,
+    write_json,
+    write_profiles_json,
+)
+
+VOLUME_1 = """前書き 本書の使い方
+===== ページ 1 =====
+医薬品 アセトアミノフェン 危険度 : 中
+中毒症状
+悪心 | 嘔吐、肝障害
+処置法
+活性炭 胃洗浄
+===== ページ 2 =====
+ポイント
+150 mg/kg 以上で中毒
+主な製品
+タイレノール、カロナール
+"""
+
+VOLUME_2 = """===== ページ 3 =====
+洗剤 界面活性剤 危険度 : 低
+中毒症状
+嘔吐 | 下痢
+医薬品 カフェイン 危険度 : 中
+中毒症状
+頻脈 | 痙攣
+処置法
+血液透析
+主な製品
+エスタロンモカ
+"""
+
+
+def entries(text: str, **kwargs):
+    return list(iter_entries(parse_lines(text), **kwargs))
+
+
+@pytest.fixture
+def volumes(tmp_path):
+    paths = [tmp_path / "vol1.txt", tmp_path / "vol2.txt"]
+    paths[0].write_text(VOLUME_1, encoding="utf-8")
+    paths[1].write_text(VOLUME_2, encoding="utf-8")
+    return paths
+
+
+def test_streamed_volumes_match_the_joined_text(volumes):
+    streamed = list(iter_lines(read_volumes(volumes)))
+    assert streamed == parse_lines(VOLUME_1 + VOLUME_2)
+    assert [line.page for line in streamed if "危険度" in line.text] == [1, 3, 3]
+    assert list(iter_entries(iter(streamed))) == entries(VOLUME_1 + VOLUME_2)
+
+
+def test_profiles_keep_pages_across_page_breaks():
+    profiles = entries(VOLUME_1 + VOLUME_2)
+    assert [profile["ingredient_name"] for profile in profiles] == ["アセトアミノフェン", "洗剤 界面活性剤", "カフェイン"]
+    assert profiles[0]["evidence"]["pages"] == [1, 2]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2])
+def test_parallel_jobs_match_serial_output(chunk_size):
+    text = (VOLUME_1 + VOLUME_2) * 3
+    assert entries(text, jobs=2, chunk_size=chunk_size) == entries(text)
+
+
+def test_parallel_iteration_can_stop_early():
+    profiles = iter_entries(parse_lines((VOLUME_1 + VOLUME_2) * 20), jobs=2, chunk_size=1)
+    first = next(profiles)
+    profiles.close()
+    assert first == entries(VOLUME_1)[0]
+
+
+def run_with_cache(path, text, jobs=1):
+    cache = ProfileCache(path)
+    profiles = list(iter_entries(parse_lines(text), jobs=jobs, cache=cache))
+    cache.commit()
+    return cache, profiles
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_profile_cache_reuses_unchanged_blocks(tmp_path, jobs):
+    path = tmp_path / "cache.jsonl"
+    cache, first = run_with_cache(path, VOLUME_1 + VOLUME_2, jobs)
+    assert cache.hits == 0
+    assert first == entries(VOLUME_1 + VOLUME_2)
+
+    cache, second = run_with_cache(path, VOLUME_1 + VOLUME_2, jobs)
+    assert second == first
+    assert (cache.hits, cache.misses) == (3, 0)
+
+    # 変わった項目だけ作り直す。
+    changed = VOLUME_1 + VOLUME_2.replace("頻脈", "不整脈")
+    cache, third = run_with_cache(path, changed, jobs)
+    assert (cache.hits, cache.misses) == (2, 1)
+    assert third == entries(changed)
+    assert not path.with_name(path.name + ".tmp").exists()
+
+
+def test_profile_cache_is_not_reused_after_builder_change(tmp_path, monkeypatch):
+    path = tmp_path / "cache.jsonl"
+    run_with_cache(path, VOLUME_1)
+    # 前回の結果の updated_at を古い日付にしておく。
+    header, *rows = path.read_text(encoding="utf-8").splitlines()
+    rows = [row.replace('"updated_at": "', '"updated_at": "2000-01-01/') for row in rows]
+    path.write_text("\n".join([header, *rows]) + "\n", encoding="utf-8")
+
+    monkeypatch.setattr(build_ocr_household_knowledge, "builder_digest", lambda: "changed")
+    cache, profiles = run_with_cache(path, VOLUME_1)
+    assert (cache.hits, cache.misses) == (0, 1)
+    # 作り直した結果が前回と同じなら、前回の updated_at を保つ。
+    assert profiles[0]["evidence"]["updated_at"].startswith("2000-01-01/")
+
+    cache, profiles = run_with_cache(path, VOLUME_1)
+    assert cache.hits == 1
+
+
+def test_streamed_json_matches_write_json(tmp_path):
+    profiles = entries(VOLUME_1 + VOLUME_2)
+    metadata = {"description": "テスト"}
+    write_json(tmp_path / "expected.json", {"metadata": {**metadata, "entry_count": len(profiles)}, "profiles": profiles})
+
+    assert write_profiles_json(tmp_path / "actual.json", iter(profiles), metadata) == len(profiles)
+    assert (tmp_path / "actual.json").read_text(encoding="utf-8") == (tmp_path / "expected.json").read_text(encoding="utf-8")
+    assert write_profiles_json(tmp_path / "empty.json", iter([]), metadata) == 0
+    assert json.loads((tmp_path / "empty.json").read_text(encoding="utf-8"))["profiles"] == []
@@ -0,0 +1,56 @@
+from pathlib import Path
+
+import pytest
+
+from fetch_pmda_otc_dataset import clean_text, parse_ingredients
+from legacy_otc_text import build_clean_text_corpus, legacy_clean_text, legacy_parse_ingredients
+from pmda_compact_store import load_products
+
+PRODUCTS_PATH = Path(__file__).resolve().parent.parent / "data" / "pmda_otc_products.json"
+
+INGREDIENT_TEXTS = [
+    "",
+    "成分 分量\nアセトアミノフェン 300mg\nエテンザミド 250mg",
+    "（成分）イブプロフェン：150mg、アリルイソプロピルアセチル尿素60mg、無水カフェイン80mg",
+    "ビタミンＢ１ 10mg ビタミンB1 10mg ビタミンB1 10mg",
+    "内訳 l-メントール 3.5％ dl-カンフル 1% 100g中",
+    "1日量(3錠)中 2-アミノエタノール 5mg ・クロルフェニラミン 2.5mg",
+    "レチノールパルミチン酸エステル 2000国際単位 トコフェロール 10単位 β-カロテン 3mg",
+    "シアノコバラミン 30μg 葉酸 200µg ビオチン 50mcg 塩化カリウム 1.5mEq",
+    "(成分) 123 456mg ／ 分量 200mL",
+]
+
+CLEAN_TEXT_FRAGMENTS = [
+    "",
+    "<td class=\"deta\"><p>アセトアミノフェン<br>300mg</p><p>カフェイン</p></td>",
+    "<a href=\"#\">\n  バファリン&amp;Ａ&#12288;錠 </a>",
+    "行1<BR/>行2<br />\t\t行3</P>行4",
+    "&lt;script&gt; 　全角空白　と　タブ\t\tの連続  ",
+    "<div style=\"margin-top:10px;\">製造元<br>\n</div>",
+]
+
+
+@pytest.fixture(scope="module")
+def products():
+    return load_products(PRODUCTS_PATH)["products"]
+
+
+@pytest.mark.parametrize("text", INGREDIENT_TEXTS)
+def test_parse_ingredients_matches_legacy_on_edge_cases(text):
+    assert parse_ingredients(text) == legacy_parse_ingredients(text)
+
+
+def test_parse_ingredients_matches_legacy_on_dataset(products):
+    texts = [str(product.get("ingredient_text") or "") for product in products]
+    assert [parse_ingredients(text) for text in texts] == [legacy_parse_ingredients(text) for text in texts]
+
+
+@pytest.mark.parametrize("keep_newline", [False, True])
+@pytest.mark.parametrize("fragment", CLEAN_TEXT_FRAGMENTS)
+def test_clean_text_matches_legacy_on_edge_cases(fragment, keep_newline):
+    assert clean_text(fragment, keep_newline) == legacy_clean_text(fragment, keep_newline)
+
+
+def test_clean_text_matches_legacy_on_dataset(products):
+    corpus = build_clean_text_corpus(products)
+    assert [clean_text(text, keep) for text, keep in corpus] == [legacy_clean_text(text, keep) for text, keep in corpus]
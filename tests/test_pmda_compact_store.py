@@ -0,0 +1,83 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from pmda_compact_store import (
+    COMPACT_FORMAT,
+    compact_path_for,
+    decode_products,
+    encode_products,
+    load_products,
+    write_compact,
+)
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+def make_product(code: str, **overrides) -> dict:
+    product = {
+        "code": code,
+        "product_name": f"製品{int(code)}",
+        "manufacturer": "製造元A" if int(code) % 3 else "製造元B",
+        "category": "第2類医薬品",
+        "ingredients": [{"name": "アセトアミノフェン", "amount": "300mg"}],
+        "keywords": ["解熱", "鎮痛"],
+        "urls": {"detail": f"https://example.test/detail/{code}", "pdf": f"https://example.test/pdf/{code}/A"},
+        "flags": {},
+        "count": int(code),
+    }
+    product.update(overrides)
+    return product
+
+
+def test_round_trip_covers_every_column_kind():
+    products = [make_product(f"{idx:04d}") for idx in range(20)]
+    # 導出列の例外・欠けた項目・入れ子・空リスト・数値列を混ぜる。
+    products[3]["urls"]["pdf"] = "https://example.test/other.pdf"
+    del products[5]["keywords"]
+    products[7]["ingredients"] = []
+    products[8]["extra"] = {"note": "備考"}
+
+    payload = encode_products(products, {"source": "test"})
+    kinds = {tuple(column["path"]): column["kind"] for column in payload["columns"]}
+
+    assert kinds[("urls", "detail")] == "derived"
+    assert kinds[("urls", "pdf")] == "derived"
+    assert kinds[("category",)] == "const"
+    assert kinds[("manufacturer",)] == "str"
+    assert kinds[("product_name",)] == "text"
+    assert kinds[("ingredients",)] == "records"
+    assert kinds[("keywords",)] == "str_list"
+    assert kinds[("count",)] == "raw"
+    assert decode_products(json.loads(json.dumps(payload))) == products
+
+
+def test_round_trip_keeps_key_order():
+    products = [{"b": "1", "a": {"y": "2", "x": "3"}}, {"a": {"x": "4"}, "b": "5"}]
+    decoded = decode_products(encode_products(products))
+    assert decoded == products
+    assert [list(product) for product in decoded] == [["b", "a"], ["b", "a"]]
+
+
+def test_write_compact_and_load_products(tmp_path):
+    products = [make_product(f"{idx:04d}") for idx in range(5)]
+    path = tmp_path / "pmda_otc_products.json"
+    compact_path = write_compact(path, products, {"source": "test"})
+
+    assert compact_path == compact_path_for(path) == tmp_path / "pmda_otc_products.compact.json"
+    assert json.loads(compact_path.read_text(encoding="utf-8"))["format"] == COMPACT_FORMAT
+    assert load_products(compact_path) == {"metadata": {"source": "test"}, "products": products}
+
+
+def test_decode_rejects_unknown_version():
+    payload = encode_products([make_product("0001")])
+    payload["version"] = 999
+    with pytest.raises(ValueError, match="unsupported compact dataset"):
+        decode_products(payload)
+
+
+@pytest.mark.skipif(not (DATA_DIR / "pmda_otc_products.json").exists(), reason="dataset not generated")
+def test_bundled_dataset_round_trips():
+    payload = load_products(DATA_DIR / "pmda_otc_products.json")
+    assert decode_products(encode_products(payload["products"], payload["metadata"])) == payload["products"]
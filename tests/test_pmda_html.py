@@ -0,0 +1,141 @@
+from pathlib import Path
+
+import pytest
+
+from fetch_pmda_otc_dataset import SearchRow, extract_rows_from_result_html, rows_from_search_page
+from legacy_search_page import legacy_extract_rows_from_result_html, legacy_parse, single_pass_parse, synthetic_search_page
+from pmda_compact_store import load_products
+from pmda_html import parse_search_page
+
+PRODUCTS_PATH = Path(__file__).resolve().parent.parent / "data" / "pmda_otc_products.json"
+
+
+def result_row(code: str, name: str) -> str:
+    return (
+        f'<tr class="TrColor1"><td><a href="/PmdaSearch/otcDetail/GeneralList/{code}" target="_blank">\n {name} </a>'
+        f'<div style="margin-top:10px; margin-bottom:0px;">製造{code}<br></div></td></tr>'
+    )
+
+
+# 崩れたマークアップを含む検索ページ。従来の関数と同じ結果になることを確かめる。
+MALFORMED_PAGES = {
+    "last_tr_unclosed": result_row("A1", "甲") + result_row("A2", "乙")[: -len("</tr>")],
+    "tr_not_closed_before_next_tr": (
+        '<tr class="TrColor1"><td><a href="/PmdaSearch/otcDetail/GeneralList/B1">甲</a>' + result_row("B2", "乙")
+    ),
+    "color_tr_inside_plain_tr": "<tr><td>見出し" + result_row("C1", "丙"),
+    "no_color_rows": (
+        '<table><tr><td><a href="/PmdaSearch/otcDetail/GeneralList/D1">丁</a>'
+        '<div style="margin-top:10px; margin-bottom:0px;">製造</div></td></tr></table>'
+    ),
+    "closed_color_row_without_link": (
+        '<tr class="TrColor1"><td>x</td></tr><tr><td><a href="/PmdaSearch/otcDetail/GeneralList/M1">m</a></td></tr>'
+    ),
+    "name_link_unclosed": (
+        '<tr class="TrColor1"><td><a href="/PmdaSearch/otcDetail/GeneralList/E1">戊<td><a href="/x">PDF</a></td></tr>'
+    ),
+    "manufacturer_div_unclosed": (
+        '<tr class="TrColor1"><td><a href="/PmdaSearch/otcDetail/GeneralList/F1">己</a>'
+        '<div style="margin-top:10px; margin-bottom:0px;">製造</td></tr>' + result_row("F2", "庚")
+    ),
+    "name_with_markup_and_entities": (
+        '<tr class="TrColor1"><td><a href="/PmdaSearch/otcDetail/GeneralList/J1"> <span>甲</span><br>乙&amp;丙 </a></td></tr>'
+    ),
+    "code_followed_by_path": '<tr class="TrColor1"><td><a href="/PmdaSearch/otcDetail/GeneralList/K1/extra">x</a></td></tr>',
+    "tr_with_extra_attributes": (
+        '<tr class="TrColor1" id="r1"><td><a href="/PmdaSearch/otcDetail/GeneralList/I1">癸</a></td></tr>'
+    ),
+    "tags_inside_script": (
+        "<script>var s = \"<tr class=\\\"TrColor1\\\"><a href='/PmdaSearch/otcDetail/GeneralList/L1'>z</a></tr>\";</script>"
+    ),
+    "gt_inside_attribute_value": '<input type="hidden" name="q" value="a>b"><input type="hidden" name="r" value="1">',
+    "input_inside_comment": '<!-- <input type="hidden" name="c" value="1"> --><input type="hidden" name="d" value="2">',
+    "entities_in_value": '<input type="hidden" name="e" value="&amp;&lt;x&#12354;">',
+    "duplicate_hidden_name": '<input type="hidden" name="x" value="1"><input type="hidden" name="x" value="2">',
+    "type_after_name": '<input name="h" type="hidden" value="1">',
+    "input_without_type": '<input name="t" value="v">',
+    "checkbox_without_value": '<input type="checkbox" name="cb" checked>',
+    "radio_group": '<input type="radio" name="r" value="1"><input type="radio" name="r" value="2" checked="checked">',
+    "empty_search_count": '<input type="hidden" name="searchCnt" value=""><input type="hidden" name="totalPages" value="">',
+    "select_without_selected": '<select name="s"><option value="1">a</option><option value="2">b</option></select>',
+    "select_unclosed": '<select name="s"><option value="1">a</option><option value="2" selected="selected">b</option>',
+    "selected_before_value": '<select name="s"><option selected="selected" value="2">b</option></select>',
+    "option_without_value": '<select name="s"><option>a</option><option value="3">c</option></select>',
+    "empty": "",
+}
+
+
+@pytest.fixture(scope="module")
+def synthetic_pages():
+    products = load_products(PRODUCTS_PATH)["products"]
+    chunks = [products[pos:pos + 100] for pos in range(0, len(products), 100)]
+    return [synthetic_search_page(chunk, page_no, 100, len(products)) for page_no, chunk in enumerate(chunks, 1)]
+
+
+def test_matches_legacy_on_search_pages(synthetic_pages):
+    assert synthetic_pages
+    for page in synthetic_pages:
+        assert single_pass_parse(page) == legacy_parse(page)
+        assert extract_rows_from_result_html(page) == legacy_extract_rows_from_result_html(page)
+
+
+def test_matches_legacy_on_page_change_fragment(synthetic_pages):
+    # ページ送り応答の ResultList は結果一覧の断片だけでフォームを含まない。
+    fragment = synthetic_pages[0][synthetic_pages[0].index('<table class="result">'):]
+    assert single_pass_parse(fragment) == legacy_parse(fragment)
+
+
+@pytest.mark.parametrize("page", MALFORMED_PAGES.values(), ids=list(MALFORMED_PAGES))
+def test_matches_legacy_on_malformed_markup(page):
+    assert single_pass_parse(page) == legacy_parse(page)
+    assert extract_rows_from_result_html(page) == legacy_extract_rows_from_result_html(page)
+
+
+def test_page_values(synthetic_pages):
+    page = parse_search_page(synthetic_pages[1])
+    assert page.search_count == 1500
+    assert page.total_pages == 15
+    assert page.hidden_inputs["currentPage"] == "2"
+    assert page.hidden_inputs["hidden3"] == "値&3"
+    defaults = page.form_defaults
+    assert defaults["nameWord"] == ""
+    assert defaults["howtoMatchRadioValue"] == "2"
+    assert defaults["dispColumnsList[0]"] == "1"
+    assert "dispColumnsList[1]" not in defaults
+    assert defaults["ListRows"] == "100"
+    assert defaults["effectValue"] == ""
+    assert len(page.rows) == 100
+
+
+# 従来の関数が属性の書き方によって値を取りこぼしていた場合は、意図して異なる結果にしている。
+def test_upper_case_search_count_is_read_consistently():
+    # 従来は hidden 入力の抽出(大文字小文字を区別しない)と parse_search_count(区別する)で件数が食い違っていた。
+    page = parse_search_page('<INPUT TYPE="hidden" NAME="searchCnt" VALUE="12">')
+    assert page.search_count == 12
+    assert page.hidden_inputs == {"searchCnt": "12"}
+
+
+def test_single_quoted_attributes_are_read():
+    page = parse_search_page(
+        "<tr class='TrColor1'><td><a href='/PmdaSearch/otcDetail/GeneralList/H1'>壬</a></td></tr>"
+        "<input type='hidden' name='q' value='x'>"
+    )
+    assert page.hidden_inputs == {"q": "x"}
+    assert [row.code for row in page.rows] == ["H1"]
+
+
+def test_unquoted_value_is_read():
+    assert parse_search_page('<input type="hidden" name="u" value=5>').hidden_inputs == {"u": "5"}
+
+
+def test_bare_selected_option_is_chosen():
+    page = parse_search_page('<select name="s"><option value="1">a</option><option value="2" selected>b</option></select>')
+    assert page.form_defaults == {"s": "2"}
+
+
+def test_rows_from_search_page_cleans_fragments():
+    page = parse_search_page(MALFORMED_PAGES["name_with_markup_and_entities"] + result_row("Z9", "&lt;錠&gt;"))
+    assert rows_from_search_page(page) == [
+        SearchRow(code="J1", product_name="甲 乙&丙", manufacturer=""),
+        SearchRow(code="Z9", product_name="<錠>", manufacturer="製造Z9"),
+    ]
@@ -0,0 +1,245 @@
+import io
+import os
+
+import pytest
+import requests
+from urllib3.response import HTTPResponse
+
+import pmda_http
+from pmda_http import CachedSession, CacheMissError, ResponseCache
+
+
+def make_response(body: bytes, url: str = "https://example.test/page", stream: bool = False) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response.encoding = "utf-8"
+    response.headers["Content-Type"] = "text/html; charset=utf-8"
+    if stream:
+        response.raw = HTTPResponse(body=io.BytesIO(body), preload_content=False)
+    else:
+        response._content = body
+    return response
+
+
+def blob_files(cache: ResponseCache):
+    return sorted(path for path in cache.blobs_dir.glob("*/*") if not path.name.endswith(".tmp"))
+
+
+def tmp_files(cache: ResponseCache):
+    return sorted(cache.cache_dir.rglob("*.tmp"))
+
+
+def test_make_key_ignores_form_order_and_method_case():
+    key = ResponseCache.make_key("post", "https://example.test/", data={"b": "2", "a": "1"})
+    assert key == ResponseCache.make_key("POST", "https://example.test/", data={"a": "1", "b": "2"})
+    assert key == ResponseCache.make_key("POST", "https://example.test/", data=[("a", "1"), ("b", "2")])
+
+
+def test_make_key_distinguishes_url_params_and_form():
+    base = ResponseCache.make_key("POST", "https://example.test/", data={"a": "1"})
+    assert base != ResponseCache.make_key("POST", "https://example.test/", data={"a": "2"})
+    assert base != ResponseCache.make_key("POST", "https://example.test/other", data={"a": "1"})
+    assert base != ResponseCache.make_key("POST", "https://example.test/", params={"a": "1"})
+    assert base != ResponseCache.make_key("GET", "https://example.test/", data={"a": "1"})
+
+
+def test_put_get_round_trip_and_shared_blob(tmp_path):
+    cache = ResponseCache(tmp_path)
+    cache.put("k1", make_response(b"same body"))
+    cache.put("k2", make_response(b"same body"))
+
+    cached = cache.get("k1")
+    assert cached is not None
+    assert cached.content == b"same body"
+    assert cached.status_code == 200
+    assert cached.headers["Content-Type"] == "text/html; charset=utf-8"
+    assert len(blob_files(cache)) == 1
+    assert cache.get("missing") is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_ttl_expires_entries(tmp_path, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(pmda_http.time, "time", lambda: now[0])
+    cache = ResponseCache(tmp_path, ttl_sec=60)
+    cache.put("k", make_response(b"body"))
+
+    now[0] += 59
+    assert cache.get("k") is not None
+    now[0] += 2
+    assert cache.get("k") is None
+
+
+def test_prune_evicts_least_recently_used_entries(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=250)
+    for pos, key in enumerate(["old", "used"]):
+        cache.put(key, make_response(bytes([pos]) * 100))
+        os.utime(cache._entry_path(key), (1000 + pos, 1000 + pos))
+    # get() は最終アクセス時刻を更新するため、"old" を読むと "used" の方が古くなる。
+    assert cache.get("old") is not None
+
+    cache.put("new", make_response(b"\x02" * 100))
+
+    assert cache.get("used") is None
+    assert cache.get("old") is not None
+    assert cache.get("new") is not None
+    assert len(blob_files(cache)) == 2
+    assert cache.total_bytes == 200
+
+
+def test_prune_keeps_blob_shared_with_surviving_entry(tmp_path):
+    cache = ResponseCache(tmp_path, max_bytes=150)
+    cache.put("a", make_response(b"x" * 100))
+    os.utime(cache._entry_path("a"), (1000, 1000))
+    cache.put("b", make_response(b"x" * 100))
+    cache.put("c", make_response(b"y" * 100))
+
+    assert cache.get("a") is None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+    assert len(blob_files(cache)) == 1
+
+
+def test_stream_is_cached_only_after_full_read(tmp_path):
+    cache = ResponseCache(tmp_path)
+    body = b"row\n" * 50_000
+    response = make_response(body, stream=True)
+    cache.put_stream("k", response)
+    assert cache.get("k") is None
+
+    assert b"".join(response.iter_content(chunk_size=4096)) == body
+
+    cached = cache.get("k", stream=True)
+    assert cached is not None
+    assert b"".join(cached.iter_content(chunk_size=4096)) == body
+    cached.close()
+    assert cache.get("k").content == body
+    assert tmp_files(cache) == []
+
+
+def test_partially_read_stream_is_not_cached(tmp_path):
+    cache = ResponseCache(tmp_path)
+    response = make_response(b"row\n" * 50_000, stream=True)
+    cache.put_stream("k", response)
+
+    next(response.iter_content(chunk_size=4096))
+    response.close()
+
+    assert cache.get("k") is None
+    assert blob_files(cache) == []
+    assert tmp_files(cache) == []
+
+
+def test_offline_session_raises_on_cache_miss(tmp_path):
+    session = CachedSession(ResponseCache(tmp_path), offline=True)
+    with pytest.raises(CacheMissError):
+        session.get("https://example.test/not-cached")
+
+
+SEARCH = "https://www.pmda.go.jp/PmdaSearch/otcSearch/"
+PAGE = "https://www.pmda.go.jp/PmdaSearch/otcSearch/PageChangeRequest/2"
+
+
+class FakeSearchServer:
+    # 検索条件をサーバー側セッションに保持する PMDA の代わり。ページ送りは直前の検索の結果を返す。
+    def __init__(self):
+        self.calls = []
+        self.condition = None
+        self.results = {"a": b"results a", "b": b"results b"}
+
+    def __call__(self, method, url, params=None, data=None, **kwargs):
+        self.calls.append((method.upper(), url))
+        if url == SEARCH and method.upper() == "POST":
+            self.condition = data["word"]
+            return make_response(self.results[self.condition], url)
+        if url == PAGE:
+            return make_response(self.results[self.condition] + b" page 2", url)
+        return make_response(b"init", url)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    fake = FakeSearchServer()
+    monkeypatch.setattr(requests.Session, "request", lambda session, *args, **kwargs: fake(*args, **kwargs))
+    return fake
+
+
+def search_and_page(session, word):
+    session.get(SEARCH)
+    searched = session.post(SEARCH, data={"word": word})
+    return searched.content, session.post(PAGE, data={"page": "2"}).content
+
+
+def test_search_unit_is_served_from_cache_once_complete(tmp_path, server):
+    cache = ResponseCache(tmp_path)
+    session = CachedSession(cache)
+    assert search_and_page(session, "a") == (b"results a", b"results a page 2")
+    session.close()
+    server.calls.clear()
+
+    session = CachedSession(cache)
+    assert search_and_page(session, "a") == (b"results a", b"results a page 2")
+    # 検索ページの GET(Cookie の発行)だけはキャッシュがあっても送る。
+    assert server.calls == [("GET", SEARCH)]
+
+
+def test_dependent_miss_re_sends_the_cached_search(tmp_path, server):
+    cache = ResponseCache(tmp_path)
+    session = CachedSession(cache)
+    search_and_page(session, "a")
+    session.close()
+    server.calls.clear()
+
+    # 別の検索でサーバー側の検索条件が変わった後、キャッシュ済みの検索から未取得のページへ進む。
+    session = CachedSession(cache)
+    session.post(SEARCH, data={"word": "b"})
+    session.post(SEARCH, data={"word": "a"})
+    assert session.post(PAGE, data={"page": "3"}).content == b"results a page 2"
+    assert server.calls == [("POST", SEARCH), ("POST", SEARCH), ("POST", PAGE)]
+
+
+def test_incomplete_search_unit_is_not_served_from_cache(tmp_path, server):
+    cache = ResponseCache(tmp_path)
+    session = CachedSession(cache)
+    search_and_page(session, "a")
+    session.close()
+    # 依存要求の応答が消えていれば(期限切れ・容量超過)、検索もオンラインで送り直す。
+    search_key = ResponseCache.make_key("POST", SEARCH, data={"word": "a"})
+    page_key = ResponseCache.make_key(
+        "POST", PAGE, data={"page": "2"}, scope=CachedSession._scope(search_key, b"results a")
+    )
+    cache._entry_path(page_key).unlink()
+    server.calls.clear()
+
+    session = CachedSession(cache)
+    assert search_and_page(session, "a") == (b"results a", b"results a page 2")
+    assert server.calls == [("GET", SEARCH), ("POST", SEARCH), ("POST", PAGE)]
+
+
+def test_dependent_keys_are_scoped_to_the_search(tmp_path, server):
+    cache = ResponseCache(tmp_path)
+    session = CachedSession(cache)
+    assert search_and_page(session, "a")[1] == b"results a page 2"
+    assert search_and_page(session, "b")[1] == b"results b page 2"
+    session.close()
+
+    session = CachedSession(cache, offline=True)
+    session.post(SEARCH, data={"word": "a"})
+    assert session.post(PAGE, data={"page": "2"}).content == b"results a page 2"
+
+
+def test_cookie_sharing_clone_records_dependents_in_the_same_unit(tmp_path, server):
+    cache = ResponseCache(tmp_path)
+    session = CachedSession(cache)
+    session.post(SEARCH, data={"word": "a"})
+    clone = pmda_http.clone_session(session)
+    assert clone.post(PAGE, data={"page": "2"}).content == b"results a page 2"
+    assert pmda_http.clone_session(session, share_cookies=False).search_unit is None
+    session.close()
+    server.calls.clear()
+
+    session = CachedSession(cache)
+    session.post(SEARCH, data={"word": "a"})
+    session.post(PAGE, data={"page": "2"})
+    assert server.calls == []
@@ -0,0 +1,104 @@
+import pytest
+
+from pmda_ingredient_index import (
+    IYAKU_INDEX_FIELDS,
+    IngredientIndex,
+    build_ingredient_index,
+    convert_legacy_index,
+    intersect_postings,
+    write_ingredient_index,
+)
+
+PRODUCTS = [
+    {"product_name": "ロキソニン錠", "generic_name": "ロキソプロフェン", "manufacturer": "第一三共", "ingredients": ["ロキソプロフェン"]},
+    {"product_name": "カロナール錠", "generic_name": "アセトアミノフェン", "manufacturer": "あゆみ", "ingredients": ["アセトアミノフェン"]},
+    {
+        "product_name": "イブ",
+        "generic_name": "イブプロフェン",
+        "manufacturer": "エスエス",
+        "ingredients": ["イブプロフェン", "アリルイソプロピルアセチル尿素", "カフェイン"],
+    },
+    {
+        "product_name": "ナロン",
+        "generic_name": "配合剤",
+        "manufacturer": "大正",
+        "ingredients": ["アセトアミノフェン", "カフェイン", "アセトアミノフェン"],
+    },
+    {"product_name": "成分なし", "generic_name": "", "manufacturer": "大正", "ingredients": []},
+]
+
+
+def build(products=PRODUCTS):
+    return build_ingredient_index(products, IYAKU_INDEX_FIELDS, lambda product: product["ingredients"], {"source_file": "x.json"})
+
+
+def names(products):
+    return [product["product_name"] for product in products]
+
+
+def test_postings_are_sorted_product_ids_in_name_order():
+    payload = build()
+    index = IngredientIndex(payload)
+
+    assert payload["metadata"] == {"source_file": "x.json", "ingredient_count": 5, "product_count": 4}
+    for ids in payload["ingredients"].values():
+        assert ids == sorted(set(ids))
+    assert names(index.products_with("アセトアミノフェン")) == ["カロナール錠", "ナロン"]
+    assert names(index.products_with("カフェイン")) == ["イブ", "ナロン"]
+    assert index.products_with("存在しない成分") == []
+    # 成分の無い製品は一覧に含めない。
+    assert "成分なし" not in index.columns["product_name"]
+
+
+def test_products_with_all_intersects_postings():
+    index = IngredientIndex(build())
+    assert names(index.products_with_all(["アセトアミノフェン", "カフェイン"])) == ["ナロン"]
+    assert index.products_with_all(["ロキソプロフェン", "カフェイン"]) == []
+    assert intersect_postings([[1, 3, 5, 7], [0, 3, 7], [3, 4, 7, 9]]) == [3, 7]
+    assert intersect_postings([]) == []
+
+
+def test_write_and_load_round_trip(tmp_path):
+    payload = build()
+    path = write_ingredient_index(tmp_path / "index.json", payload)
+    loaded = IngredientIndex.load(path)
+
+    assert loaded.payload == payload
+    assert loaded.ingredients() == sorted(loaded.ingredients())
+    assert loaded.product(0) == {"product_name": "イブ", "generic_name": "イブプロフェン", "manufacturer": "エスエス"}
+
+
+def test_low_cardinality_columns_are_interned():
+    products = [
+        {"product_name": f"製品{pos:02d}", "generic_name": "", "manufacturer": "大正" if pos % 2 else "第一三共", "ingredients": ["カフェイン"]}
+        for pos in range(10)
+    ]
+    payload = build(products)
+    assert isinstance(payload["products"]["manufacturer"], dict)
+    assert isinstance(payload["products"]["product_name"], list)
+    index = IngredientIndex(payload)
+    assert [product["manufacturer"] for product in index.products_with("カフェイン")] == [
+        "大正" if pos % 2 else "第一三共" for pos in range(10)
+    ]
+
+
+def test_legacy_index_converts_to_same_answers():
+    legacy = {"metadata": {"source_file": "x.json", "ingredient_count": 99}, "ingredients": {}}
+    for product in PRODUCTS:
+        for name in dict.fromkeys(product["ingredients"]):
+            entry = legacy["ingredients"].setdefault(name, {"count": 0, "products": []})
+            entry["products"].append({field: product[field] for field in IYAKU_INDEX_FIELDS})
+            entry["count"] += 1
+
+    converted = IngredientIndex(legacy)
+    current = IngredientIndex(build())
+    assert converted.payload == convert_legacy_index(legacy)
+    assert converted.payload["metadata"]["ingredient_count"] == 5
+    for name in current.ingredients():
+        assert converted.products_with(name) == current.products_with(name)
+
+
+def test_unsupported_version_is_rejected():
+    payload = dict(build(), version=99)
+    with pytest.raises(ValueError, match="unsupported ingredient index version"):
+        IngredientIndex(payload)
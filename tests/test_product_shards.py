@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+from toxicnavi.jscompat import normalize_name
+from toxicnavi.matching import DIGITS_RE, SearchEntry, TrigramIndex
+from toxicnavi.product_shards import build_product_shards, candidate_shards
+
+PRODUCT_NAMES = [
+    "アスピリン錠100",
+    "アセトアミノフェン錠200",
+    "イブプロフェン顆粒",
+    "カフェイン錠",
+    "キョーリンかぜ薬",
+    "サリチル酸軟膏",
+    "ロキソプロフェン錠60",
+    "ロートアイ",
+    "ビタミンC錠",
+    "ル",
+]
+
+QUERIES = [
+    "アスピリン錠100",
+    "アスピリン",
+    "プロフェン",
+    "ロキソプロフエン",
+    "イブプロフエン顆粒",
+    "ロート",
+    "かぜ",
+    "ル",
+    "ビタミンC錠500",
+    "存在しない名前",
+]
+
+
+@pytest.fixture(scope="module")
+def bundle(tmp_path_factory):
+    data_dir = tmp_path_factory.mktemp("data")
+    products = [
+        {"product_name": name, "ingredients": [{"name": "アセトアミノフェン", "amount": "100mg"}]}
+        for name in PRODUCT_NAMES
+    ]
+    (data_dir / "pmda_otc_products.json").write_text(
+        json.dumps({"products": products}, ensure_ascii=False), encoding="utf-8"
+    )
+    # 先頭文字ごとに別の分割ファイルにする。
+    return build_product_shards(data_dir, shard_rows=1)
+
+
+def matching_shards(bundle, query):
+    # 全製品を読み込んだ場合に完全一致・包含一致・近似一致する製品の分割ファイル。
+    shard_of = {name: shard["index"] for shard in bundle["shards"] for name in shard["names"]}
+    index = TrigramIndex([SearchEntry(name, "product", normalize_name(name)) for name in shard_of])
+    found = set()
+    normalized = normalize_name(query)
+    for variant in {normalized, DIGITS_RE.sub("", normalized)}:
+        entry_ids = set(index.containing(variant)) | {entry_id for entry_id, _ in index.fuzzy(variant)}
+        found.update(shard_of[index.entries[entry_id].name] for entry_id in entry_ids)
+    return found
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_candidates_cover_every_matching_shard(bundle, query):
+    assert matching_shards(bundle, query) <= set(candidate_shards(bundle["manifest"], query))
+
+
+def test_candidates_skip_shards_that_cannot_match(bundle):
+    manifest = bundle["manifest"]
+    total = len(manifest["shards"])
+    assert total == len({normalize_name(name)[0] for name in PRODUCT_NAMES})
+    assert len(candidate_shards(manifest, "ロキソプロフエン")) < total
+    assert candidate_shards(manifest, "存在しない名前") == []
+
+
+def test_manifest_trigram_postings_are_sorted_shard_indexes(bundle):
+    manifest = bundle["manifest"]
+    for indexes in manifest["trigrams"].values():
+        assert indexes == sorted(set(indexes))
+    # "プロフ" はイブプロフェンとロキソプロフェンの分割ファイルにある。
+    assert manifest["trigrams"]["プロフ"] == sorted({manifest["keys"]["イ"], manifest["keys"]["ロ"]})
@@ -0,0 +1,216 @@
+"""
+Assessor と KnowledgeBase.merge_* の出力を記録済みの結果(fixtures/toxicnavi_golden.json)と比べる。
+
+入力は内蔵データ(index.html)と下の製品・OCR プロファイルのみで、data/ の生成物には依存しない。
+意図して結果を変えた場合は `python tests/test_toxicnavi_golden.py` で記録を更新する。
+"""
+
+import json
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+# スクリプトとして実行した場合(記録の更新)も toxicnavi を読み込めるようにする。
+sys.path.insert(0, str(REPO_ROOT))
+
+from toxicnavi import Assessor, IngestionContext, KnowledgeBase, load_builtin_tables  # noqa: E402
+from toxicnavi.batch import assess_record  # noqa: E402
+from toxicnavi.store import to_json_value  # noqa: E402
+
+GOLDEN_PATH = REPO_ROOT / "tests" / "fixtures" / "toxicnavi_golden.json"
+
+PRODUCTS = [
+    {"product_name": "テスト解熱錠200", "ingredients": [{"name": "アセトアミノフェン", "amount": "200mg"}]},
+    {
+        "product_name": "テスト総合かぜ薬",
+        "ingredients": [
+            {"name": "アセトアミノフェン", "amount": "0.9g"},
+            {"name": "無水カフェイン", "amount": "75 mg"},
+            {"name": "テスト新成分塩酸塩", "amount": "12mg"},
+        ],
+    },
+    {"product_name": "テスト点眼液", "ingredients": [{"name": "ナファゾリン塩酸塩", "amount": "0.003％"}]},
+    # 成分が無い製品・名前の無い製品は統合しない。同名の製品は先に統合したものを残す。
+    {"product_name": "テスト成分なし", "ingredients": []},
+    {"product_name": "", "ingredients": [{"name": "アスピリン", "amount": "330mg"}]},
+    {"product_name": "テスト解熱錠200", "ingredients": [{"name": "イブプロフェン", "amount": "150mg"}]},
+]
+
+OCR_PROFILES = [
+    {
+        "ingredient_name": "テスト洗剤",
+        "component": "Test detergent",
+        "aliases": ["テスト洗剤", "テストセンザイ", "(N)", "Test detergent"],
+        "product_aliases": ["テスト洗剤A", "危険度", "ア"],
+        "toxic_threshold_mg_kg": {"caution": 50.0, "toxic": 100.0, "severe": 300.0, "critical": 1000.0},
+        "symptoms": ["嘔吐", "腹痛"],
+        "critical_symptoms": ["意識障害"],
+        "symptom_timeline": [
+            {"window": "0-2時間", "symptoms": ["嘔吐"], "red_flags": ["意識障害"]},
+            {"window": "2時間以降", "symptoms": ["腹痛"], "red_flags": []},
+        ],
+        "toxicokinetics": {"metabolism": "不明"},
+        "treatment": {
+            "antidote": {"name": "なし"},
+            "lavage": {"allow": False, "window_min": 60},
+            "charcoal": {"allow": True, "window_min": 120, "extended_window_min": 240},
+            "dialysis": {"effective": True},
+            "other": [{"name": "希釈", "severity_min": 1, "note": "牛乳または水"}],
+        },
+        "analysis": {"recommended_tests": ["電解質"], "interpretation": "刺激症状を評価"},
+        "evidence": {"updated_at": "2024-01-01", "pages": [1]},
+    },
+    # 内蔵データの成分は上書きしない(別名・製品名のみ追加する)。
+    {
+        "ingredient_name": "アセトアミノフェン",
+        "aliases": ["テストアセトアミノフェン別名"],
+        "product_aliases": ["テスト内蔵成分製品"],
+        "toxic_threshold_mg_kg": {"toxic": 1.0},
+    },
+    # 閾値の無い新規成分。
+    {"ingredient_name": "テスト閾値なし", "symptoms": ["咳"]},
+    {"ingredient_name": "", "aliases": ["無視される"]},
+]
+
+CASES = [
+    {"id": "product", "weight": 20, "elapsedMin": 30, "drugs": [{"name": "テスト総合かぜ薬", "amountMg": 3000}]},
+    {
+        "id": "symptoms-and-late",
+        "weight": 50,
+        "elapsedMin": 600,
+        "airwaySecured": True,
+        "symptoms": "嘔気、意識障害",
+        "drugs": [{"name": "アセトアミノフェン", "amountMg": 15000}, {"name": "テスト洗剤", "amountMg": 5000}],
+    },
+    {"id": "tablets", "weight": 10, "elapsedMin": 0, "drugs": [{"name": "テスト解熱錠200", "tablets": 10}]},
+    {"id": "unknown", "weight": 10, "elapsedMin": 90, "drugs": [{"name": "テスト未登録薬", "amountMg": 100}, {"name": "テスト閾値なし", "amountMg": 100}]},
+    {
+        "id": "ocr",
+        "weight": 15,
+        "elapsedMin": 45,
+        "ocrText": "カロナール錠500 5錠\nカロナール 500mg 4錠\nテストセンザイ 2g\n血圧 120/80\nﾃｽﾄ解熱錠200 3錠",
+    },
+    {"id": "alias", "weight": 30, "elapsedMin": 200, "drugs": [{"name": "テストアセトアミノフェン別名", "amountMg": 6000}]},
+]
+
+# アセトアミノフェン(内蔵: toxic 150 / severe 250 / critical 300 mg/kg)の各閾値の直前・ちょうど。
+THRESHOLD_EDGES = [
+    (74.99, 1),
+    (75, 2),
+    (149.99, 2),
+    (150, 3),
+    (249.99, 3),
+    (250, 4),
+    (299.99, 4),
+    (300, 5),
+]
+
+
+def new_knowledge() -> KnowledgeBase:
+    return KnowledgeBase(load_builtin_tables())
+
+
+def changed_state(knowledge: KnowledgeBase) -> Dict[str, object]:
+    # 内蔵データだけの状態から追加・変更された部分。
+    base = new_knowledge()
+
+    def diff(current: Dict[str, object], before: Dict[str, object]) -> Dict[str, object]:
+        return {key: value for key, value in current.items() if to_json_value(before.get(key)) != to_json_value(value)}
+
+    return to_json_value(
+        {
+            "product_db": diff(knowledge.product_db, base.product_db),
+            "ingredient_db": diff(knowledge.ingredient_db, base.ingredient_db),
+            "ingredient_synonyms": diff(knowledge.ingredient_synonyms, base.ingredient_synonyms),
+            "product_strength_hints_mg": diff(knowledge.product_strength_hints_mg, base.product_strength_hints_mg),
+            "merge_stats": knowledge.merge_stats,
+        }
+    )  # type: ignore[return-value]
+
+
+@pytest.fixture(scope="module")
+def merged_knowledge() -> KnowledgeBase:
+    knowledge = new_knowledge()
+    knowledge.merge_products(PRODUCTS, "PMDA-OTC")
+    knowledge.merge_ocr_profiles(OCR_PROFILES)
+    return knowledge
+
+
+@pytest.fixture(scope="module")
+def assessor(merged_knowledge) -> Assessor:
+    return Assessor(merged_knowledge)
+
+
+@pytest.fixture(scope="module")
+def assessed(assessor) -> List[object]:
+    return assess_cases(assessor)
+
+
+@pytest.fixture(scope="module")
+def golden() -> Dict[str, object]:
+    return json.loads(GOLDEN_PATH.read_text(encoding="utf-8"))
+
+
+def assess_cases(assessor: Assessor) -> List[object]:
+    return [to_json_value({"id": case["id"], **assess_record(assessor, case)}) for case in CASES]
+
+
+def build_golden() -> Dict[str, object]:
+    knowledge = new_knowledge()
+    knowledge.merge_products(PRODUCTS, "PMDA-OTC")
+    knowledge.merge_ocr_profiles(OCR_PROFILES)
+    return {"merged": changed_state(knowledge), "cases": assess_cases(Assessor(knowledge))}
+
+
+def test_merged_knowledge_matches_golden(merged_knowledge, golden):
+    assert changed_state(merged_knowledge) == golden["merged"]
+
+
+def test_merge_products_stats():
+    knowledge = new_knowledge()
+    stats = knowledge.merge_products(PRODUCTS, "PMDA-OTC")
+    # 同名で統合しなかった製品の成分(イブプロフェン)も、applyProductRow と同じく成分としては追加する。
+    assert stats == {"addedProducts": 3, "addedIngredients": 3, "updatedStrengthHints": 1}
+    assert "イブプロフェン" in knowledge.ingredient_db
+    assert knowledge.merge_stats["PMDA-OTC"]["loadedProducts"] == len(PRODUCTS)
+    # 2回目は何も追加しない。
+    assert knowledge.merge_products(PRODUCTS, "PMDA-OTC") == {"addedProducts": 0, "addedIngredients": 0, "updatedStrengthHints": 0}
+
+
+def test_merge_product_rows_matches_merge_products():
+    rows: list = []
+    direct = new_knowledge()
+    direct.merge_products(PRODUCTS, "PMDA-OTC", rows=rows)
+    replayed = new_knowledge()
+    replayed.merge_product_rows(rows, "PMDA-OTC", loaded_products=len(PRODUCTS))
+    assert changed_state(replayed) == changed_state(direct)
+
+
+@pytest.mark.parametrize("case_index", range(len(CASES)), ids=[case["id"] for case in CASES])
+def test_assessment_matches_golden(assessed, golden, case_index):
+    assert assessed[case_index] == golden["cases"][case_index]
+
+
+@pytest.mark.parametrize(("dose_mg_kg", "rank"), THRESHOLD_EDGES)
+def test_severity_threshold_edges(assessor, dose_mg_kg, rank):
+    info = assessor.get_ingredient_info("アセトアミノフェン")
+    assert assessor.classify_severity(dose_mg_kg, info)["rank"] == rank
+
+
+@pytest.mark.parametrize(("dose_mg_kg", "rank"), [(49.99, 1), (50, 2), (100, 3), (300, 4), (999.99, 4), (1000, 5)])
+def test_ocr_profile_threshold_edges(assessor, dose_mg_kg, rank):
+    info = assessor.get_ingredient_info("テスト洗剤")
+    assert assessor.classify_severity(dose_mg_kg, info)["rank"] == rank
+
+
+def test_missing_threshold_is_no_data(assessor):
+    entry = assessor.assess_drug("テスト閾値なし", 1000, IngestionContext(patient_weight=10, elapsed_min=0))[0]
+    assert entry["severity"]["label"] == "情報不足"
+
+
+if __name__ == "__main__":
+    GOLDEN_PATH.write_text(json.dumps(build_golden(), ensure_ascii=False, indent=1) + "\n", encoding="utf-8")
+    print(f"saved: {GOLDEN_PATH}", file=sys.stderr)
@@ -0,0 +1,34 @@
+"""
+ToxicNavi の判定ロジック・データ統合処理を Python から利用するためのパッケージ。
+
+index.html(ToxicNaviApp)と同じ規則でデータを統合し、オフラインの前処理や一括処理に用いる。
+"""
+
+from .assessment import Assessor, IngestionContext
+from .batch import run_batch
+from .builtin import BuiltinTables, load_builtin_tables
+from .jscompat import normalize_name
+from .knowledge import KnowledgeBase, read_ocr_profiles, read_product_datasets
+from .matching import SearchEntry, TrigramIndex, build_search_entries
+from .name_index import build_name_index, load_name_index, write_name_index
+from .store import KnowledgeStore, build_database
+
+__all__ = [
+    "Assessor",
+    "BuiltinTables",
+    "IngestionContext",
+    "KnowledgeBase",
+    "KnowledgeStore",
+    "SearchEntry",
+    "TrigramIndex",
+    "build_database",
+    "build_name_index",
+    "build_search_entries",
+    "load_builtin_tables",
+    "load_name_index",
+    "normalize_name",
+    "read_ocr_profiles",
+    "read_product_datasets",
+    "run_batch",
+    "write_name_index",
+]
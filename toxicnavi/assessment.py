@@ -0,0 +1,531 @@
+"""
+ToxicNaviApp の診療評価(重症度・時間経過・治療適応・優先度)の Python 移植。
+
+index.html の以下のメソッドと同じ規則で、薬剤名と総量(mg)から成分ごとの評価を作る。
+- resolveDrugToIngredients / getIngredientInfo / classifySeverity / calculateRiskScore
+- parseSymptoms / matchSymptoms / assessTimeline / evaluateTreatments / addDrugCore
+- estimateStrengthForDrugName / findBestProductKeyByPartialName
+- normalizeDrugNameCandidate / convertDoseToMg / extractDrugCandidatesFromText
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from .jscompat import (
+    JS_WHITESPACE,
+    JS_WHITESPACE_RE,
+    MISSING,
+    is_finite_number,
+    js_number,
+    js_or,
+    js_string,
+    js_to_fixed,
+    js_trim,
+    js_truthy,
+    normalize_name,
+)
+from .knowledge import NOT_AVAILABLE, KnowledgeBase, infer_strength_from_product_name
+from .matching import TrigramIndex, build_search_entries
+
+SYMPTOM_SPLIT_RE = re.compile("[,、\n]")
+WINDOW_RANGE_RE = re.compile(r"([0-9]+(?:\.[0-9]+)?)-([0-9]+(?:\.[0-9]+)?)時間")
+WINDOW_AFTER_RE = re.compile(r"([0-9]+(?:\.[0-9]+)?)時間以降")
+
+DRUG_NAME_STOP_WORDS = (
+    "ssri", "snri", "nassa", "抗うつ薬", "抗不安薬", "睡眠薬", "抗精神病薬", "解熱鎮痛薬",
+    "主なリスク", "一般名", "薬剤名", "推定合計量", "摂取錠数", "1錠含有量", "mg", "錠",
+)
+DRUG_NAME_STOP_WORD_RES = tuple(re.compile(word, re.I) for word in DRUG_NAME_STOP_WORDS)
+DRUG_NAME_SEPARATOR_RE = re.compile("[|｜]")
+DRUG_NAME_COLON_RE = re.compile("[：:]")
+DRUG_NAME_LEADING_RE = re.compile(f"^[-{JS_WHITESPACE}・]+")
+OCR_DOSE_LINE_RE = re.compile("(錠|mg|g|μg|ug|mcg)", re.I)
+OCR_VITAL_LINE_RE = re.compile("(bp|hr|rr|spo2|etco2|gcs|jcs|mmhg|体温)", re.I)
+OCR_TABLET_COUNT_RE = re.compile(r"([0-9]+(?:\.[0-9]+)?)" + f"[{JS_WHITESPACE}]*" + "錠")
+OCR_DOSE_RE = re.compile(r"([0-9]+(?:\.[0-9]+)?)" + f"[{JS_WHITESPACE}]*" + "(mg|ｍｇ|g|ｇ|μg|µg|ug|mcg)", re.I)
+
+# classifySeverity の判定結果(label, rank, badgeClass, detail)。
+SEVERITY_NO_DATA = ("情報不足", 3, "severity-mid", "中毒量データなし")
+SEVERITY_CRITICAL = ("最重症", 5, "severity-critical", "致死域の可能性")
+SEVERITY_HIGH = ("重症", 4, "severity-high", "集中治療を要する可能性")
+SEVERITY_MID = ("中等症", 3, "severity-mid", "中毒域に到達")
+SEVERITY_LOW = ("軽症", 2, "severity-low", "症状発現に注意")
+SEVERITY_MINIMAL = ("低リスク", 1, "severity-minimal", "現時点では低リスク")
+
+
+@dataclass
+class IngestionContext:
+    # buildIngestionContextFromInputs の戻り値に相当する。
+    patient_weight: float
+    elapsed_min: float
+    airway_secured: bool = False
+    observed_symptoms: List[str] = field(default_factory=list)
+
+
+def _severity(values: tuple) -> Dict[str, object]:
+    label, rank, badge_class, detail = values
+    return {"label": label, "rank": rank, "badgeClass": badge_class, "detail": detail}
+
+
+def _get(mapping: object, key: str) -> object:
+    return mapping.get(key, MISSING) if isinstance(mapping, dict) else MISSING
+
+
+def _list(value: object) -> List[object]:
+    return value if isinstance(value, list) else []
+
+
+def _overlaps(left: str, right: str) -> bool:
+    return left in right or right in left
+
+
+def parse_symptoms(symptom_text: object) -> List[str]:
+    # parseSymptoms。一括処理では文字列の配列も受け付け、各要素を同じ規則で分割する。
+    if isinstance(symptom_text, list):
+        symptom_text = "\n".join(js_string(item) for item in symptom_text)
+    if not js_truthy(symptom_text):
+        return []
+    parsed = (js_trim(item) for item in SYMPTOM_SPLIT_RE.split(js_string(symptom_text)))
+    return list(dict.fromkeys(item for item in parsed if item))
+
+
+def match_symptoms(predicted: List[str], observed: List[str]) -> List[str]:
+    matches = (
+        predicted_symptom
+        for predicted_symptom in predicted
+        if any(_overlaps(js_string(predicted_symptom), observed_symptom) for observed_symptom in observed)
+    )
+    return list(dict.fromkeys(matches))
+
+
+def parse_hour_range_from_window(window_label: object) -> Optional[Dict[str, float]]:
+    normalized = JS_WHITESPACE_RE.sub("", js_string(js_or(window_label, "")))
+    match = WINDOW_RANGE_RE.search(normalized)
+    if match:
+        return {"start": float(match.group(1)), "end": float(match.group(2))}
+    single = WINDOW_AFTER_RE.search(normalized)
+    if single:
+        return {"start": float(single.group(1)), "end": math.inf}
+    return None
+
+
+def assess_timeline(jpic_profile: Dict[str, object], elapsed_min: float, observed_symptoms: List[str]) -> Dict[str, object]:
+    elapsed_hour = elapsed_min / 60
+    timeline = _list(_get(jpic_profile, "symptomTimeline"))
+    if not timeline:
+        return {"phase": "不明", "expectedSymptoms": [NOT_AVAILABLE], "redFlags": [], "matchedRedFlags": []}
+
+    current_phase = timeline[0]
+    for phase in timeline:
+        hour_range = parse_hour_range_from_window(_get(phase, "window"))
+        if not hour_range:
+            continue
+        if hour_range["start"] <= elapsed_hour <= hour_range["end"]:
+            current_phase = phase
+            break
+
+    red_flags = js_or(_get(current_phase, "redFlags"), [])
+    matched_red_flags = [
+        flag for flag in _list(red_flags) if any(_overlaps(js_string(flag), symptom) for symptom in observed_symptoms)
+    ]
+    return {
+        "phase": js_or(_get(current_phase, "window"), "不明"),
+        "expectedSymptoms": js_or(_get(current_phase, "symptoms"), []),
+        "redFlags": red_flags,
+        "matchedRedFlags": matched_red_flags,
+    }
+
+
+def calculate_risk_score(
+    severity: Dict[str, object],
+    toxic_ratio: Optional[float],
+    match_count: int,
+    is_unknown: object,
+    red_flag_count: int = 0,
+) -> float:
+    if js_truthy(is_unknown):
+        return 320 + match_count * 8 + red_flag_count * 12
+    ratio_score = min(100, toxic_ratio * 30) if js_truthy(toxic_ratio) else 0
+    return int(severity["rank"]) * 100 + ratio_score + match_count * 8 + red_flag_count * 12  # type: ignore[call-overload]
+
+
+def evaluate_treatments(
+    ingredient_info: Dict[str, object],
+    jpic_profile: Dict[str, object],
+    severity: Dict[str, object],
+    toxic_ratio: Optional[float],
+    context: IngestionContext,
+    matched_symptoms: List[str],
+) -> Dict[str, object]:
+    if js_truthy(ingredient_info.get("unknown")):
+        tests = _list(_get(_get(jpic_profile, "analysis"), "recommendedTests"))
+        return {
+            "antidote": {"status": "要情報確認", "action": "成分特定を優先", "reason": "拮抗薬の適応判定に成分同定が必須"},
+            "lavage": {"status": "要情報確認", "action": "毒性情報確認後に判断", "reason": "毒性・誤嚥リスクの評価が未確定"},
+            "charcoal": {"status": "要情報確認", "action": "吸着性を確認", "reason": "成分の吸着可否データがない"},
+            "dialysis": {"status": "要情報確認", "action": "血液浄化の有効性を確認", "reason": "蛋白結合率/分布容積データが必要"},
+            "others": [
+                {"name": "中毒情報センターへ即時照会", "status": "妥当", "reason": "不明成分の初期対応として必須"},
+                {"name": "推奨検査", "status": "妥当", "reason": js_or(", ".join(js_string(test) for test in tests), "血液ガス・電解質を中心に評価")},
+            ],
+        }
+
+    rank = int(severity["rank"])  # type: ignore[call-overload]
+    critical_symptoms = _list(ingredient_info.get("criticalSymptoms"))
+    has_critical_symptom = any(symptom in critical_symptoms for symptom in matched_symptoms)
+    toxic_exceeded = toxic_ratio is not None and toxic_ratio >= 1
+    toxic_doubled = toxic_ratio is not None and toxic_ratio >= 2
+    elapsed_min = context.elapsed_min
+
+    antidote_info = _get(ingredient_info, "antidote")
+    antidote_action = _get(antidote_info, "name")
+    antidote_indication = js_string(_get(antidote_info, "indication"))
+    if "なし" in js_string(antidote_action):
+        antidote = {"status": "適応なし", "action": antidote_action, "reason": _get(antidote_info, "indication")}
+    elif rank >= 3 or has_critical_symptom or toxic_exceeded:
+        guide = js_string(js_or(_get(_get(jpic_profile, "treatmentGuide"), "antidote"), ""))
+        antidote = {"status": "妥当", "action": antidote_action, "reason": f"{antidote_indication} / {guide}"}
+    else:
+        antidote = {"status": "条件付き", "action": antidote_action, "reason": f"現時点は低〜軽症。ただし {antidote_indication}"}
+
+    lavage_info = _get(ingredient_info, "lavage")
+    lavage_window = _get(lavage_info, "windowMin")
+    if not js_truthy(_get(lavage_info, "allow")):
+        lavage = {"status": "非推奨", "action": "胃洗浄を通常は行わない", "reason": _get(lavage_info, "note")}
+    elif elapsed_min > js_number(lavage_window):
+        lavage = {"status": "非推奨", "action": "適応時間外", "reason": f"{js_string(lavage_window)} 分を超過"}
+    elif not context.airway_secured:
+        lavage = {"status": "慎重", "action": "気道確保後に再評価", "reason": "誤嚥リスクが高い"}
+    elif rank >= 4 or toxic_doubled:
+        lavage = {"status": "妥当", "action": "胃洗浄を検討", "reason": _get(lavage_info, "note")}
+    else:
+        lavage = {"status": "条件付き", "action": "症状進行時に検討", "reason": "重症度が上がれば適応"}
+
+    charcoal_info = _get(ingredient_info, "charcoal")
+    if not js_truthy(_get(charcoal_info, "allow")):
+        charcoal = {"status": "非推奨", "action": "活性炭は効果乏しい", "reason": _get(charcoal_info, "note")}
+    elif elapsed_min <= js_number(_get(charcoal_info, "windowMin")):
+        charcoal = {"status": "妥当", "action": "活性炭投与を検討", "reason": _get(charcoal_info, "note")}
+    elif elapsed_min <= js_number(_get(charcoal_info, "extendedWindowMin")) and rank >= 3:
+        charcoal = {"status": "条件付き", "action": "遅延投与を検討", "reason": "重症例であれば利益が残る可能性"}
+    else:
+        charcoal = {"status": "非推奨", "action": "投与メリットが限定的", "reason": "有効時間を超過"}
+
+    dialysis_info = _get(ingredient_info, "dialysis")
+    if not js_truthy(_get(dialysis_info, "effective")):
+        dialysis = {"status": "適応なし", "action": "血液浄化は通常不要", "reason": _get(dialysis_info, "indication")}
+    elif rank >= 4 or has_critical_symptom or toxic_doubled:
+        dialysis = {"status": "妥当", "action": "血液浄化を早期検討", "reason": _get(dialysis_info, "indication")}
+    elif rank >= 3:
+        dialysis = {"status": "条件付き", "action": "重症化時に導入検討", "reason": _get(dialysis_info, "indication")}
+    else:
+        dialysis = {"status": "慎重", "action": "現時点では経過観察", "reason": "明確な導入基準に未達"}
+
+    others = []
+    for item in _list(ingredient_info.get("otherTreatments")):
+        symptom_any = _get(item, "symptomAny")
+        symptom_hit = not js_truthy(symptom_any) or any(
+            _overlaps(js_string(symptom), observed) for symptom in _list(symptom_any) for observed in context.observed_symptoms
+        )
+        severity_hit = rank >= js_number(js_or(_get(item, "severityMin"), 1))
+        status = "慎重"
+        if severity_hit and symptom_hit:
+            status = "妥当"
+        elif severity_hit or symptom_hit:
+            status = "条件付き"
+        others.append({"name": _get(item, "name"), "status": status, "reason": _get(item, "note")})
+
+    return {"antidote": antidote, "lavage": lavage, "charcoal": charcoal, "dialysis": dialysis, "others": others}
+
+
+def normalize_drug_name_candidate(raw_name: object) -> str:
+    name = unicodedata.normalize("NFKC", js_string(js_or(raw_name, "")))
+    name = DRUG_NAME_SEPARATOR_RE.sub(" ", name)
+    name = DRUG_NAME_COLON_RE.sub(" ", name)
+    name = DRUG_NAME_LEADING_RE.sub("", name, count=1)
+    name = js_trim(JS_WHITESPACE_RE.sub(" ", name))
+    for pattern in DRUG_NAME_STOP_WORD_RES:
+        name = pattern.sub(" ", name)
+    return js_trim(JS_WHITESPACE_RE.sub(" ", name))
+
+
+def convert_dose_to_mg(value: object, unit: object) -> Optional[float]:
+    numeric = js_number(value)
+    if not math.isfinite(numeric):
+        return None
+    normalized_unit = js_string(js_or(unit, "")).lower().replace("ｍｇ", "mg", 1).replace("ｇ", "g", 1)
+    if normalized_unit == "mg":
+        return numeric
+    if normalized_unit == "g":
+        return numeric * 1000
+    if normalized_unit in {"μg", "µg", "ug", "mcg"}:
+        return numeric / 1000
+    return None
+
+
+class Assessor:
+    # KnowledgeBase を参照して addDrugCore と同じ評価エントリを作る。
+    # matcher は OCR テキストの薬剤名照合に使う(未指定なら KnowledgeBase から構築する)。
+    def __init__(self, knowledge: KnowledgeBase, matcher: Optional[TrigramIndex] = None) -> None:
+        self.knowledge = knowledge
+        self.matcher = matcher or TrigramIndex.from_knowledge(knowledge)
+        # findBestProductKeyByPartialName 用の製品名のみの索引。正規化名が重複する製品は全キーを候補にする。
+        self.product_matcher = TrigramIndex(build_search_entries(knowledge.product_db, (), {}))
+        self.product_keys_by_norm: Dict[str, List[str]] = {}
+        self.product_order: Dict[str, int] = {}
+        for position, key in enumerate(knowledge.product_db):
+            self.product_keys_by_norm.setdefault(normalize_name(key), []).append(key)
+            self.product_order[key] = position
+        # ingredientDB の成分情報から作る JPIC プロファイルは同じ内容になるため、(成分情報, 名前) ごとに再利用する。
+        # 未登録成分の情報は毎回新しく作られるので対象外とする。
+        self._registered_info_ids = {id(info) for info in knowledge.ingredient_db.values()}
+        self._jpic_profiles: Dict[Tuple[int, str], Dict[str, object]] = {}
+
+    # --- 成分の解決 ---
+
+    def resolve_drug_to_ingredients(self, drug_name: str, amount_mg: float) -> Dict[str, object]:
+        knowledge = self.knowledge
+        matched_product_key = knowledge.find_product_key(drug_name)
+        if matched_product_key:
+            ingredient_defs = knowledge.canonicalize_ingredient_ratios(knowledge.product_db[matched_product_key])
+            ratio_total = 0.0
+            for item in ingredient_defs:
+                ratio_total += item["ratio"]  # type: ignore[operator]
+            ratio_total = ratio_total or 1
+            return {
+                "sourceName": matched_product_key,
+                "ingredients": [
+                    {"ingredient": item["ingredient"], "ratio": item["ratio"] / ratio_total}  # type: ignore[operator]
+                    for item in ingredient_defs
+                ],
+                "totalAmountMg": amount_mg,
+            }
+
+        canonical_drug_name = knowledge.canonicalize_ingredient_name(drug_name)
+        matched_ingredient_key = knowledge.find_ingredient_key(canonical_drug_name)
+        if matched_ingredient_key:
+            return {
+                "sourceName": matched_ingredient_key,
+                "ingredients": [{"ingredient": matched_ingredient_key, "ratio": 1}],
+                "totalAmountMg": amount_mg,
+            }
+        return {
+            "sourceName": f"{drug_name} (データ未登録)",
+            "ingredients": [{"ingredient": canonical_drug_name or drug_name, "ratio": 1}],
+            "totalAmountMg": amount_mg,
+        }
+
+    def get_ingredient_info(self, ingredient_name: str) -> Dict[str, object]:
+        canonical_name = self.knowledge.canonicalize_ingredient_name(ingredient_name)
+        matched_key = self.knowledge.find_ingredient_key(canonical_name)
+        if matched_key:
+            return self.knowledge.ingredient_db[matched_key]
+        return self.knowledge.build_unknown_ingredient_info(canonical_name or ingredient_name)
+
+    def get_jpic_profile(self, ingredient_info: Dict[str, object], ingredient_name: str) -> Dict[str, object]:
+        if id(ingredient_info) not in self._registered_info_ids:
+            return self.knowledge.get_jpic_profile(ingredient_info, ingredient_name)
+        key = (id(ingredient_info), ingredient_name)
+        profile = self._jpic_profiles.get(key)
+        if profile is None:
+            profile = self._jpic_profiles[key] = self.knowledge.get_jpic_profile(ingredient_info, ingredient_name)
+        return profile
+
+    def classify_severity(self, dose_mg_kg: float, ingredient_info: Dict[str, object]) -> Dict[str, object]:
+        profile = self.get_jpic_profile(ingredient_info, js_string(js_or(ingredient_info.get("component", MISSING), "不明成分")))
+        thresholds = js_or(profile.get("toxicThresholdMgKg"), {})
+
+        def dose(key: str, threshold_key: str) -> object:
+            value = ingredient_info.get(key)
+            return value if is_finite_number(value) else _get(thresholds, threshold_key)
+
+        toxic_dose = dose("toxicDoseMgKg", "toxic")
+        severe_dose = dose("severeDoseMgKg", "severe")
+        critical_dose = dose("criticalDoseMgKg", "critical")
+
+        if not is_finite_number(toxic_dose):
+            return _severity(SEVERITY_NO_DATA)
+        if is_finite_number(critical_dose) and dose_mg_kg >= critical_dose:  # type: ignore[operator]
+            return _severity(SEVERITY_CRITICAL)
+        if is_finite_number(severe_dose) and dose_mg_kg >= severe_dose:  # type: ignore[operator]
+            return _severity(SEVERITY_HIGH)
+        if dose_mg_kg >= toxic_dose:  # type: ignore[operator]
+            return _severity(SEVERITY_MID)
+        if dose_mg_kg >= toxic_dose * 0.5:  # type: ignore[operator]
+            return _severity(SEVERITY_LOW)
+        return _severity(SEVERITY_MINIMAL)
+
+    # --- 規格(mg/錠)の推定 ---
+
+    def find_best_product_key_by_partial_name(self, target_name: str) -> Optional[str]:
+        normalized_target = normalize_name(target_name)
+        if len(normalized_target) < 2:
+            return None
+        candidates = sorted(
+            (
+                key
+                for entry_id in self.product_matcher.containing(normalized_target)
+                for key in self.product_keys_by_norm[self.product_matcher.entries[entry_id].normalized]
+            ),
+            key=self.product_order.__getitem__,
+        )
+        if not candidates:
+            return None
+        if len(candidates) == 1:
+            return candidates[0]
+        starts_with = [key for key in candidates if normalize_name(key).startswith(normalized_target)]
+        return starts_with[0] if len(starts_with) == 1 else None
+
+    def _strength_for_product(self, product_key: Optional[str]) -> Optional[float]:
+        if not product_key:
+            return None
+        hinted = self.knowledge.product_strength_hints_mg.get(product_key)
+        if is_finite_number(hinted):
+            return hinted
+        inferred = infer_strength_from_product_name(product_key)
+        return inferred if inferred is not None and inferred > 0 else None
+
+    def estimate_strength_for_drug_name(self, drug_name: str) -> Optional[float]:
+        if not drug_name:
+            return None
+        exact = self._strength_for_product(self.knowledge.find_product_key(drug_name))
+        if exact is not None:
+            return exact
+        partial = self._strength_for_product(self.find_best_product_key_by_partial_name(drug_name))
+        if partial is not None:
+            return partial
+        direct = infer_strength_from_product_name(drug_name)
+        return direct if direct is not None and direct > 0 else None
+
+    # --- OCR テキストからの抽出 ---
+
+    def extract_drug_candidates_from_text(self, raw_text: object) -> List[Dict[str, object]]:
+        normalized_text = js_string(js_or(raw_text, "")).replace("\r", "")
+        lines = [line for line in (js_trim(line) for line in normalized_text.split("\n")) if line]
+        candidates = []
+
+        for line in lines:
+            line_normalized = unicodedata.normalize("NFKC", line)
+            if not OCR_DOSE_LINE_RE.search(line_normalized):
+                continue
+            if OCR_VITAL_LINE_RE.search(line_normalized) and "錠" not in line_normalized:
+                continue
+
+            count_match = OCR_TABLET_COUNT_RE.search(line_normalized)
+            if not count_match:
+                continue
+            tablet_count = float(count_match.group(1))
+            if not math.isfinite(tablet_count) or tablet_count <= 0:
+                continue
+
+            dose_matches = list(OCR_DOSE_RE.finditer(line_normalized))
+            strength_per_tablet_mg = None
+            total_amount_mg = None
+            if dose_matches:
+                strength_per_tablet_mg = convert_dose_to_mg(dose_matches[0].group(1), dose_matches[0].group(2))
+            if len(dose_matches) > 1:
+                total_amount_mg = convert_dose_to_mg(dose_matches[-1].group(1), dose_matches[-1].group(2))
+            if total_amount_mg is None and strength_per_tablet_mg is not None:
+                total_amount_mg = strength_per_tablet_mg * tablet_count
+
+            first_dose_index = dose_matches[0].start() if dose_matches else len(line_normalized)
+            name_index = min(first_dose_index, count_match.start())
+            name_candidate = normalize_drug_name_candidate(line_normalized[:name_index])
+            if len(name_candidate) < 2:
+                continue
+
+            matched = self.matcher.match(name_candidate)
+            candidates.append(
+                {
+                    "sourceLine": line_normalized,
+                    "detectedName": name_candidate,
+                    "resolvedName": matched["name"] if matched else name_candidate,
+                    "matchType": f"{matched['type']}:{matched['strategy']}" if matched else "none",
+                    "confidence": js_to_fixed(matched["score"], 2) if matched else 0,  # type: ignore[arg-type]
+                    "tabletCount": tablet_count,
+                    "strengthPerTabletMg": strength_per_tablet_mg,
+                    "totalAmountMg": total_amount_mg,
+                }
+            )
+
+        merged: Dict[str, Dict[str, object]] = {}
+        for item in candidates:
+            key = f"{item['resolvedName']}__{js_string(js_or(item['strengthPerTabletMg'], 'na'))}"
+            current = merged.get(key)
+            if current is None:
+                merged[key] = dict(item)
+                continue
+            current["tabletCount"] += item["tabletCount"]  # type: ignore[operator]
+            if current["totalAmountMg"] is not None and item["totalAmountMg"] is not None:
+                current["totalAmountMg"] += item["totalAmountMg"]  # type: ignore[operator]
+            elif current["totalAmountMg"] is None:
+                current["totalAmountMg"] = item["totalAmountMg"]
+            current["confidence"] = max(current["confidence"], item["confidence"])  # type: ignore[type-var]
+        return list(merged.values())
+
+    # --- 評価エントリ ---
+
+    def assess_drug(
+        self,
+        drug_name: str,
+        amount_mg: float,
+        context: IngestionContext,
+        source_mode: str = "manual",
+        source_line: str = "",
+    ) -> List[Dict[str, object]]:
+        # addDrugCore。成分ごとのエントリを返す(id と並べ替えは呼び出し側で行う)。
+        resolved = self.resolve_drug_to_ingredients(drug_name, amount_mg)
+        entries = []
+        for ingredient_item in resolved["ingredients"]:  # type: ignore[union-attr]
+            ingredient = ingredient_item["ingredient"]
+            amount_for_ingredient = amount_mg * ingredient_item["ratio"]
+            ingredient_info = self.get_ingredient_info(ingredient)
+            jpic_profile = self.get_jpic_profile(ingredient_info, ingredient)
+            dose_mg_kg = amount_for_ingredient / context.patient_weight
+            severity = self.classify_severity(dose_mg_kg, ingredient_info)
+            predicted_symptoms = js_or(ingredient_info.get("symptoms", MISSING), [])
+            matched_symptoms = match_symptoms(_list(predicted_symptoms), context.observed_symptoms)
+            toxic_dose = ingredient_info.get("toxicDoseMgKg")
+            toxic_ratio = dose_mg_kg / toxic_dose if js_truthy(toxic_dose) else None  # type: ignore[operator]
+            timeline_assessment = assess_timeline(jpic_profile, context.elapsed_min, context.observed_symptoms)
+            treatment = evaluate_treatments(ingredient_info, jpic_profile, severity, toxic_ratio, context, matched_symptoms)
+            risk_score = calculate_risk_score(
+                severity,
+                toxic_ratio,
+                len(matched_symptoms),
+                ingredient_info.get("unknown"),
+                len(timeline_assessment["matchedRedFlags"]),  # type: ignore[arg-type]
+            )
+            entries.append(
+                {
+                    "sourceDrug": resolved["sourceName"],
+                    "inputDrug": drug_name,
+                    "ingredient": ingredient,
+                    "component": ingredient_info.get("component", MISSING),
+                    "ingredientAmountMg": amount_for_ingredient,
+                    "doseMgKg": dose_mg_kg,
+                    "toxicRatio": toxic_ratio,
+                    "severity": severity,
+                    "predictedSymptoms": predicted_symptoms,
+                    "matchedSymptoms": matched_symptoms,
+                    "jpicProfile": jpic_profile,
+                    "timelineAssessment": timeline_assessment,
+                    "treatment": treatment,
+                    "riskScore": risk_score,
+                    "unknown": ingredient_info.get("unknown", MISSING),
+                    "sourceMode": source_mode,
+                    "sourceLine": source_line,
+                }
+            )
+        return entries
+
+
+def rank_entries(entries: List[Dict[str, object]]) -> List[Dict[str, object]]:
+    # 追加順に id を振り、entries.sort((a, b) => b.riskScore - a.riskScore) と同じ安定ソートで並べる。
+    numbered = [{"id": entry_id, **entry} for entry_id, entry in enumerate(entries, start=1)]
+    return sorted(numbered, key=lambda entry: -entry["riskScore"])  # type: ignore[operator]
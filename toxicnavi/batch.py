@@ -0,0 +1,206 @@
+"""
+症例 JSONL を一括評価する(index.html の「診療評価」を画面なしで大量に実行する)。
+
+入力は1行1症例の JSON。
+  {"id": "case-1", "weight": 50, "elapsedMin": 90, "symptoms": "嘔吐、傾眠",
+   "airwaySecured": false,
+   "drugs": [{"name": "カロナール錠500", "amountMg": 10000},
+             {"name": "デパス錠0.5mg", "tablets": 20},
+             "ロキソニン錠60mg 10錠"],
+   "ocrText": "..."}
+- drugs の要素は {name, amountMg} / {name, tablets, strengthMg?} / OCR テキストと同じ書式の1行
+  (tablets のみの場合は addDrug と同じく規格を製品名から推定し、総量を優先的に計算する)
+- ocrText は extractDrugCandidatesFromText で抽出し、総量が分かる薬剤のみ評価する
+- symptoms は文字列(, 、 改行区切り)または文字列の配列
+
+出力は入力と同じ順の1行1症例の JSON で、entries は riskScore の降順(画面の優先度順と同じ)。
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import multiprocessing
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from .assessment import Assessor, IngestionContext, parse_symptoms, rank_entries
+from .builtin import DEFAULT_INDEX_HTML
+from .jscompat import is_finite_number, js_number, js_string, js_trim, js_truthy
+from .knowledge import DEFAULT_DATA_DIR, KnowledgeBase
+from .store import dump_json
+
+DEFAULT_CHUNK_SIZE = 64
+
+# ワーカーごとに1回だけ読み込む評価器(fork の場合は親プロセスで作成したものを引き継ぐ)。
+_ASSESSOR: Optional[Assessor] = None
+_SUMMARY = False
+
+
+class RecordError(ValueError):
+    pass
+
+
+def load_assessor(data_dir: Path = DEFAULT_DATA_DIR, index_html: Path = DEFAULT_INDEX_HTML) -> Assessor:
+    return Assessor(KnowledgeBase.load_default(data_dir, index_html))
+
+
+def build_context(record: Dict[str, object]) -> IngestionContext:
+    # buildIngestionContextFromInputs と同じ条件で検証する。
+    patient_weight = js_number(record.get("weight"))
+    if not math.isfinite(patient_weight) or patient_weight <= 0:
+        raise RecordError("体重(kg)を正しく入力してください。")
+    elapsed_min = js_number(record.get("elapsedMin"))
+    if not math.isfinite(elapsed_min) or elapsed_min < 0:
+        raise RecordError("摂取からの時間(分)を0以上で入力してください。")
+    return IngestionContext(
+        patient_weight=patient_weight,
+        elapsed_min=elapsed_min,
+        airway_secured=bool(record.get("airwaySecured")),
+        observed_symptoms=parse_symptoms(record.get("symptoms")),
+    )
+
+
+def resolve_amount(assessor: Assessor, drug: Dict[str, object]) -> Optional[float]:
+    # addDrug と同じく、規格 × 錠数で計算できればそれを優先し、できなければ総量を使う。
+    name = js_trim(js_string(drug.get("name") or ""))
+    tablets = js_number(drug.get("tablets"))
+    if math.isfinite(tablets) and tablets > 0:
+        strength = js_number(drug.get("strengthMg"))
+        if not math.isfinite(strength) or strength <= 0:
+            strength = assessor.estimate_strength_for_drug_name(name) or math.nan
+        if math.isfinite(strength) and strength > 0:
+            return strength * tablets
+    amount = js_number(drug.get("amountMg"))
+    return amount if math.isfinite(amount) and amount > 0 else None
+
+
+def assess_record(assessor: Assessor, record: Dict[str, object], summary: bool = False) -> Dict[str, object]:
+    context = build_context(record)
+    entries: List[Dict[str, object]] = []
+    skipped: List[Dict[str, object]] = []
+    detected: List[Dict[str, object]] = []
+
+    def assess_text(text: str) -> None:
+        items = assessor.extract_drug_candidates_from_text(text)
+        if not items:
+            skipped.append({"input": text, "reason": "薬剤候補を抽出できませんでした。"})
+        for item in items:
+            detected.append(item)
+            total = item["totalAmountMg"]
+            if not is_finite_number(total) or total <= 0:  # type: ignore[operator]
+                skipped.append({"input": item["sourceLine"], "reason": "規格(mg)と錠数の記載から総量を計算できません。"})
+                continue
+            entries.extend(
+                assessor.assess_drug(
+                    str(item["resolvedName"]), total, context, "photo_ocr", str(item["sourceLine"])  # type: ignore[arg-type]
+                )
+            )
+
+    drugs = record.get("drugs") or []
+    if not isinstance(drugs, list):
+        raise RecordError("drugs は配列で指定してください。")
+    for drug in drugs:
+        if isinstance(drug, str):
+            assess_text(drug)
+            continue
+        if not isinstance(drug, dict) or not js_trim(js_string(drug.get("name") or "")):
+            skipped.append({"input": drug, "reason": "薬剤名を入力してください。"})
+            continue
+        amount_mg = resolve_amount(assessor, drug)
+        if amount_mg is None:
+            skipped.append({"input": drug, "reason": "総量(mg)を入力するか、規格(mg/錠)と錠数を入力してください。"})
+            continue
+        entries.extend(assessor.assess_drug(js_trim(js_string(drug["name"])), amount_mg, context))
+    if js_truthy(record.get("ocrText")):
+        assess_text(js_string(record["ocrText"]))
+
+    ranked = rank_entries(entries)
+    result: Dict[str, object] = {"entries": [summarize_entry(entry) for entry in ranked] if summary else ranked}
+    if detected:
+        result["detected"] = detected
+    if skipped:
+        result["skipped"] = skipped
+    return result
+
+
+def summarize_entry(entry: Dict[str, object]) -> Dict[str, object]:
+    # 優先度一覧の表示項目に絞った出力(--summary)。
+    severity: Dict[str, object] = entry["severity"]  # type: ignore[assignment]
+    timeline: Dict[str, object] = entry["timelineAssessment"]  # type: ignore[assignment]
+    return {
+        "id": entry["id"],
+        "sourceDrug": entry["sourceDrug"],
+        "ingredient": entry["ingredient"],
+        "ingredientAmountMg": entry["ingredientAmountMg"],
+        "doseMgKg": entry["doseMgKg"],
+        "toxicRatio": entry["toxicRatio"],
+        "severity": severity["label"],
+        "severityRank": severity["rank"],
+        "riskScore": entry["riskScore"],
+        "phase": timeline["phase"],
+        "matchedSymptoms": entry["matchedSymptoms"],
+        "matchedRedFlags": timeline["matchedRedFlags"],
+        "unknown": js_truthy(entry.get("unknown")),
+    }
+
+
+def process_line(assessor: Assessor, line_no: int, text: str, summary: bool = False) -> str:
+    # 1行を評価して出力行(JSON)を返す。不正な行はエラー内容を出力し、処理は続ける。
+    result: Dict[str, object] = {"line": line_no}
+    try:
+        record = json.loads(text)
+        if not isinstance(record, dict):
+            raise RecordError("症例は JSON オブジェクトで指定してください。")
+        if "id" in record:
+            result["id"] = record["id"]
+        result.update(assess_record(assessor, record, summary))
+    except (json.JSONDecodeError, RecordError) as exc:
+        result["error"] = str(exc)
+    return dump_json(result)
+
+
+def _init_worker(data_dir: str, index_html: str, summary: bool) -> None:
+    global _ASSESSOR, _SUMMARY
+    if _ASSESSOR is None:
+        _ASSESSOR = load_assessor(Path(data_dir), Path(index_html))
+    _SUMMARY = summary
+
+
+def _process_item(item: Tuple[int, str]) -> str:
+    assert _ASSESSOR is not None
+    return process_line(_ASSESSOR, item[0], item[1], _SUMMARY)
+
+
+def _numbered_records(lines: Iterable[str]) -> Iterator[Tuple[int, str]]:
+    for line_no, line in enumerate(lines, start=1):
+        if line.strip():
+            yield line_no, line
+
+
+def run_batch(
+    lines: Iterable[str],
+    output: TextIO,
+    data_dir: Path = DEFAULT_DATA_DIR,
+    index_html: Path = DEFAULT_INDEX_HTML,
+    jobs: int = 0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    summary: bool = False,
+) -> int:
+    # 入力順を保ったまま結果を逐次書き出す。jobs=0 は CPU 数、1 は単一プロセスで処理する。
+    global _ASSESSOR
+    jobs = jobs or os.cpu_count() or 1
+    _ASSESSOR = load_assessor(data_dir, index_html)
+    count = 0
+    if jobs == 1:
+        for line_no, text in _numbered_records(lines):
+            output.write(process_line(_ASSESSOR, line_no, text, summary) + "\n")
+            count += 1
+        return count
+
+    with multiprocessing.Pool(jobs, initializer=_init_worker, initargs=(str(data_dir), str(index_html), summary)) as pool:
+        for result in pool.imap(_process_item, _numbered_records(lines), chunksize=chunk_size):
+            output.write(result + "\n")
+            count += 1
+    return count
@@ -0,0 +1,175 @@
+"""
+index.html に埋め込まれた内蔵データ(productDB / ingredientDB / ingredientSynonyms / jpicMaster など)を読み出す。
+
+内蔵データの正本は index.html のオブジェクトリテラルであり、Python 側では複製せずに
+該当箇所を JavaScript のリテラルとして解釈する(キーの引用符省略・末尾カンマに対応)。
+"""
+
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+DEFAULT_INDEX_HTML = REPO_ROOT / "index.html"
+
+# index.html 内で各内蔵データの代入が始まる位置。
+LITERAL_MARKERS = {
+    "product_db": "this.productDB = ",
+    "ingredient_db": "this.ingredientDB = ",
+    "ingredient_synonyms": "this.ingredientSynonyms = ",
+    "heuristic_synonyms": "this.ingredientHeuristicSynonyms = ",
+    "jpic_schema_spec": "this.jpicSchemaSpec = ",
+    "jpic_master": "const jpicMaster = ",
+}
+
+
+class JsLiteralError(ValueError):
+    pass
+
+
+class _LiteralParser:
+    def __init__(self, text: str, pos: int) -> None:
+        self.text = text
+        self.pos = pos
+
+    def skip_space(self) -> None:
+        text = self.text
+        while self.pos < len(text):
+            if text[self.pos].isspace():
+                self.pos += 1
+            elif text.startswith("//", self.pos):
+                end = text.find("\n", self.pos)
+                self.pos = len(text) if end < 0 else end + 1
+            elif text.startswith("/*", self.pos):
+                end = text.find("*/", self.pos + 2)
+                if end < 0:
+                    raise JsLiteralError("unterminated comment")
+                self.pos = end + 2
+            else:
+                break
+
+    def expect(self, char: str) -> None:
+        self.skip_space()
+        if not self.text.startswith(char, self.pos):
+            raise JsLiteralError(f"expected {char!r} at {self.pos}: {self.text[self.pos:self.pos + 40]!r}")
+        self.pos += 1
+
+    def peek(self) -> str:
+        self.skip_space()
+        return self.text[self.pos] if self.pos < len(self.text) else ""
+
+    def parse_value(self) -> object:
+        char = self.peek()
+        if char == "{":
+            return self.parse_object()
+        if char == "[":
+            return self.parse_array()
+        if char in "\"'":
+            return self.parse_string()
+        if char == "-" or char.isdigit():
+            return self.parse_number()
+        word = self.parse_identifier()
+        if word == "true":
+            return True
+        if word == "false":
+            return False
+        if word == "null":
+            return None
+        raise JsLiteralError(f"unsupported token {word!r} at {self.pos}")
+
+    def parse_object(self) -> Dict[str, object]:
+        self.expect("{")
+        result: Dict[str, object] = {}
+        while True:
+            char = self.peek()
+            if char == "}":
+                self.pos += 1
+                return result
+            key = self.parse_string() if char in "\"'" else self.parse_identifier()
+            self.expect(":")
+            result[key] = self.parse_value()
+            if self.peek() == ",":
+                self.pos += 1
+            elif self.peek() != "}":
+                raise JsLiteralError(f"expected ',' or '}}' at {self.pos}")
+
+    def parse_array(self) -> List[object]:
+        self.expect("[")
+        result: List[object] = []
+        while True:
+            if self.peek() == "]":
+                self.pos += 1
+                return result
+            result.append(self.parse_value())
+            if self.peek() == ",":
+                self.pos += 1
+            elif self.peek() != "]":
+                raise JsLiteralError(f"expected ',' or ']' at {self.pos}")
+
+    def parse_string(self) -> str:
+        quote = self.text[self.pos]
+        end = self.pos + 1
+        while True:
+            if end >= len(self.text):
+                raise JsLiteralError("unterminated string")
+            if self.text[end] == "\\":
+                end += 2
+                continue
+            if self.text[end] == quote:
+                break
+            end += 1
+        body = self.text[self.pos + 1:end]
+        self.pos = end + 1
+        if quote == "'":
+            body = body.replace("\\'", "'").replace('"', '\\"')
+        return json.loads(f'"{body}"')
+
+    def parse_number(self) -> object:
+        start = self.pos
+        self.pos += 1
+        while self.pos < len(self.text) and (self.text[self.pos].isdigit() or self.text[self.pos] in ".eE+-"):
+            self.pos += 1
+        literal = self.text[start:self.pos]
+        return float(literal) if any(c in literal for c in ".eE") else int(literal)
+
+    def parse_identifier(self) -> str:
+        start = self.pos
+        while self.pos < len(self.text) and (self.text[self.pos].isalnum() or self.text[self.pos] in "_$"):
+            self.pos += 1
+        if start == self.pos:
+            raise JsLiteralError(f"unexpected character at {self.pos}: {self.text[self.pos:self.pos + 20]!r}")
+        return self.text[start:self.pos]
+
+
+def parse_js_literal(text: str, pos: int = 0) -> Tuple[object, int]:
+    # text[pos:] から始まるリテラルを1つ読み、(値, 読み終えた位置) を返す。
+    parser = _LiteralParser(text, pos)
+    value = parser.parse_value()
+    return value, parser.pos
+
+
+def extract_literal(source: str, marker: str) -> object:
+    start = source.find(marker)
+    if start < 0:
+        raise JsLiteralError(f"marker not found in index.html: {marker!r}")
+    value, _ = parse_js_literal(source, start + len(marker))
+    return value
+
+
+@dataclass
+class BuiltinTables:
+    product_db: Dict[str, List[Dict[str, object]]] = field(default_factory=dict)
+    ingredient_db: Dict[str, Dict[str, object]] = field(default_factory=dict)
+    ingredient_synonyms: Dict[str, str] = field(default_factory=dict)
+    heuristic_synonyms: List[Dict[str, str]] = field(default_factory=list)
+    jpic_schema_spec: Dict[str, object] = field(default_factory=dict)
+    jpic_master: Dict[str, Dict[str, object]] = field(default_factory=dict)
+
+
+def load_builtin_tables(index_html: Path = DEFAULT_INDEX_HTML) -> BuiltinTables:
+    source = index_html.read_text(encoding="utf-8")
+    values = {name: extract_literal(source, marker) for name, marker in LITERAL_MARKERS.items()}
+    return BuiltinTables(**values)  # type: ignore[arg-type]
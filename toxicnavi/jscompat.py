@@ -0,0 +1,124 @@
+"""
+index.html のロジックを Python へ移植する際に、JavaScript の値の扱いを再現する補助関数。
+
+- `normalize_name` は ToxicNaviApp.normalizeName と同一の結果を返す
+- `js_truthy` / `js_or` は `||` の評価、`js_number` / `js_string` は Number() / String() に相当
+"""
+
+from __future__ import annotations
+
+import math
+import re
+import unicodedata
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Optional
+
+# JavaScript の \s に相当する文字集合(Python の \s は \x1c-\x1f, \x85 も含むため明示する)。
+JS_WHITESPACE = "\t\n\v\f\r \u00a0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000\ufeff"
+JS_WHITESPACE_RE = re.compile(f"[{JS_WHITESPACE}]+")
+# normalize_name の規則を変えた場合は更新する(事前計算した名前索引の互換確認に使う)。
+NAME_NORMALIZATION = "nfkc-dash-space-lower-v1"
+NAME_DASH_RE = re.compile("[\u2010\u2011\u2012\u2013\u2014\u2015\u30fc\u2212]")
+
+
+class _Missing:
+    # JavaScript の undefined(キーが存在しない)を null と区別するための番兵。
+    def __repr__(self) -> str:
+        return "undefined"
+
+
+MISSING = _Missing()
+
+
+def normalize_name(value: object) -> str:
+    text = unicodedata.normalize("NFKC", js_string(value))
+    text = NAME_DASH_RE.sub("-", text)
+    text = JS_WHITESPACE_RE.sub("", text)
+    return text.lower()
+
+
+def js_trim(value: str) -> str:
+    return re.sub(f"^[{JS_WHITESPACE}]+|[{JS_WHITESPACE}]+$", "", value)
+
+
+def is_finite_number(value: object) -> bool:
+    # Number.isFinite と同じく、数値型かつ有限のときのみ True。
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+
+
+def js_truthy(value: object) -> bool:
+    if value is None or value is MISSING or value is False:
+        return False
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value != 0 and not math.isnan(value)
+    if isinstance(value, str):
+        return value != ""
+    return True
+
+
+def js_or(value: object, fallback: object) -> object:
+    return value if js_truthy(value) else fallback
+
+
+def js_number(value: object) -> float:
+    # Number(value)。変換できない場合は NaN。整数はそのまま返し、JSON 化したときの表記を JavaScript と揃える。
+    if value is MISSING:
+        return math.nan
+    if value is None or value is False:
+        return 0.0
+    if value is True:
+        return 1.0
+    if isinstance(value, (int, float)):
+        return value
+    if isinstance(value, str):
+        text = js_trim(value)
+        if not text:
+            return 0.0
+        try:
+            return float(text)
+        except ValueError:
+            return math.nan
+    if isinstance(value, list):
+        if not value:
+            return 0.0
+        if len(value) == 1:
+            return js_number(js_string(value[0]))
+    return math.nan
+
+
+def js_string(value: object) -> str:
+    # String(value)。数値は整数値なら小数点なしで表す。
+    if isinstance(value, str):
+        return value
+    if value is None:
+        return "null"
+    if value is MISSING:
+        return "undefined"
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "NaN"
+        if math.isinf(value):
+            return "Infinity" if value > 0 else "-Infinity"
+        if value.is_integer() and abs(value) < 1e21:
+            return str(int(value))
+        return repr(value)
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, list):
+        return ",".join("" if item is None or item is MISSING else js_string(item) for item in value)
+    return "[object Object]"
+
+
+def js_to_fixed(value: float, digits: int) -> float:
+    # Number(value.toFixed(digits))。toFixed は2進値の厳密な10進表現を四捨五入する(round の偶数丸めとは異なる)。
+    if not math.isfinite(value):
+        return value
+    return float(Decimal(value).quantize(Decimal(1).scaleb(-digits), rounding=ROUND_HALF_UP))
+
+
+def finite_or_none(value: object) -> Optional[float]:
+    return value if is_finite_number(value) else None  # type: ignore[return-value]
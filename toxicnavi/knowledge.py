@@ -0,0 +1,805 @@
+"""
+ToxicNaviApp のデータ統合処理(内蔵データ + PMDA 製品 + OCR 知識)の Python 移植。
+
+index.html の以下のメソッドと同じ規則・同じ順序で productDB / ingredientDB / 同義語を構築する。
+- bootstrapJpicSchema / buildLegacyJpicProfile / normalizeJpicProfile
+- calculateIngredientRatios / canonicalizeIngredientRatios / canonicalizeIngredientName
+- estimateStrengthHintFromProduct / seedStrengthHintsFromProductNames
+- mergeProductsToDatabase / mergeOcrKnowledgeProfiles
+"""
+
+from __future__ import annotations
+
+import copy
+import json
+import math
+import re
+import unicodedata
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .builtin import DEFAULT_INDEX_HTML, REPO_ROOT, BuiltinTables, load_builtin_tables
+from .jscompat import (
+    JS_WHITESPACE,
+    JS_WHITESPACE_RE,
+    MISSING,
+    finite_or_none,
+    is_finite_number,
+    js_number,
+    js_or,
+    js_string,
+    js_trim,
+    js_truthy,
+    normalize_name,
+)
+
+DEFAULT_DATA_DIR = REPO_ROOT / "data"
+
+# loadExternalDatasets の読み込み順(ラベルは画面表示と同じ)。
+PRODUCT_DATASETS = (
+    ("pmda_otc_products.json", "PMDA-OTC"),
+    ("pmda_iyaku_products.json", "PMDA-医療用"),
+)
+OCR_KNOWLEDGE_FILE = "ocr_household_knowledge.json"
+
+AMOUNT_TOKEN_RE = re.compile(r"([0-9]+(?:\.[0-9]+)?)" + f"[{JS_WHITESPACE}]*" + r"(mg|g|ml|mL|μg|µg|mcg|%|IU|単位|国際単位|mEq)", re.I)
+DOSE_UNIT_COUNT_RES = (
+    re.compile(r"([0-9]+(?:\.[0-9]+)?)(錠|カプセル)中"),
+    re.compile(r"1回量[（(]([0-9]+(?:\.[0-9]+)?)(錠|カプセル)[）)]中"),
+)
+STRENGTH_MG_RE = re.compile(r"([0-9]+(?:\.[0-9]+)?)" + f"[{JS_WHITESPACE}]*" + "mg", re.I)
+STRENGTH_TABLET_RE = re.compile("(?:OD)?錠" + f"[{JS_WHITESPACE}]*" + r"([0-9]+(?:\.[0-9]+)?)", re.I)
+# canonicalizeIngredientName の除去規則(JavaScript の $ は文字列末尾のみに一致するため \Z で表す)。
+INGREDIENT_STRIP_RULES = (
+    (re.compile(r"（[^）]*）"), ""),
+    (re.compile(r"\([^)]*\)"), ""),
+    (re.compile(r"^無水"), ""),
+    (re.compile(r"水和物\Z"), ""),
+    (re.compile(r"塩酸塩\Z"), ""),
+    (re.compile(r"リン酸塩\Z"), ""),
+    (re.compile(r"臭化水素酸塩(?:水和物)?\Z"), ""),
+    (re.compile(r"マレイン酸塩\Z"), ""),
+    (re.compile(r"硫酸塩\Z"), ""),
+    (re.compile(r"^[dDlL]+[-－]?"), ""),
+)
+OCR_ALIAS_SYMBOLS_RE = re.compile(r"^[\(\)\[\]{}\-_=+*~.。、,:;'\"`!?！？0-9A-Za-z]+$")
+OCR_NAME_CHAR_RE = re.compile("[A-Za-z一-龥ぁ-んァ-ヶ]")
+OCR_PRODUCT_BLOCKED_WORDS = (
+    "危険度", "ファイルシート", "中毒", "体内動態", "処置法", "治療", "ポイント", "特記事項", "文献", "強アルカリ性", "中性",
+)
+TOXICOKINETICS_KEYS = ("tmaxHours", "halfLifeHours", "vdLKg", "proteinBindingPct", "metabolism", "elimination")
+NOT_AVAILABLE = "情報不足"
+
+
+def to_string_list(values: object) -> List[str]:
+    # toStringList: 文字列化・前後空白除去・空要素除去・重複除去(出現順)。
+    if not isinstance(values, list):
+        return []
+    result: Dict[str, None] = {}
+    for item in values:
+        text = js_trim(js_string(js_or(item, "")))
+        if text:
+            result.setdefault(text)
+    return list(result)
+
+
+def _unique_trimmed(values: object) -> List[str]:
+    # [...new Set((values || []).map((v) => String(v).trim()).filter(Boolean))]
+    result: Dict[str, None] = {}
+    items = js_or(values, [])
+    if isinstance(items, list):
+        for item in items:
+            text = js_trim(js_string(item))
+            if text:
+                result.setdefault(text)
+    return list(result)
+
+
+def parse_numeric_or_null(value: object) -> Optional[float]:
+    if value is None or value is MISSING or value == "":
+        return None
+    number = js_number(value)
+    return number if math.isfinite(number) else None
+
+
+def parse_amount_token(amount_text: object) -> Optional[Dict[str, object]]:
+    normalized = js_trim(JS_WHITESPACE_RE.sub(" ", js_string(js_or(amount_text, "")).replace("％", "%")))
+    match = AMOUNT_TOKEN_RE.fullmatch(normalized)
+    if not match:
+        return None
+    return {"value": float(match.group(1)), "unit": match.group(2).lower()}
+
+
+def amount_token_to_mg(parsed_amount: Optional[Dict[str, object]]) -> Optional[float]:
+    if not parsed_amount:
+        return None
+    value = js_number(parsed_amount.get("value", MISSING))
+    if not math.isfinite(value) or value <= 0:
+        return None
+    unit = js_string(js_or(parsed_amount.get("unit", MISSING), "")).lower()
+    if unit == "mg":
+        return value
+    if unit == "g":
+        return value * 1000
+    if unit in {"μg", "µg", "mcg"}:
+        return value / 1000
+    return None
+
+
+def parse_dose_unit_count_from_text(ingredient_text: object) -> Optional[Dict[str, object]]:
+    normalized = JS_WHITESPACE_RE.sub("", unicodedata.normalize("NFKC", js_string(js_or(ingredient_text, ""))))
+    if not normalized:
+        return None
+    for pattern in DOSE_UNIT_COUNT_RES:
+        match = pattern.search(normalized)
+        if match:
+            return {"count": float(match.group(1)), "unit": match.group(2)}
+    return None
+
+
+def infer_strength_from_product_name(product_name: object) -> Optional[float]:
+    normalized = unicodedata.normalize("NFKC", js_string(js_or(product_name, "")))
+    with_mg = STRENGTH_MG_RE.search(normalized)
+    if with_mg:
+        return float(with_mg.group(1))
+    tablet_value = STRENGTH_TABLET_RE.search(normalized)
+    if tablet_value:
+        return float(tablet_value.group(1))
+    return None
+
+
+def estimate_strength_hint_from_product(product: Dict[str, object]) -> Optional[float]:
+    dosage_form = js_string(js_or(product.get("dosage_form", MISSING), ""))
+    product_name = product.get("product_name", MISSING)
+    if "錠" not in dosage_form:
+        return infer_strength_from_product_name(js_or(product_name, ""))
+
+    unit_info = parse_dose_unit_count_from_text(js_or(product.get("ingredient_text", MISSING), ""))
+    if not unit_info or unit_info["unit"] != "錠" or not unit_info["count"] > 0:  # type: ignore[operator]
+        return infer_strength_from_product_name(js_or(product_name, ""))
+
+    ingredients = product.get("ingredients")
+    total_mg = 0.0
+    for item in ingredients if isinstance(ingredients, list) else []:
+        amount = item.get("amount", MISSING) if isinstance(item, dict) else MISSING
+        mg = amount_token_to_mg(parse_amount_token(js_or(amount, "")))
+        if is_finite_number(mg):
+            total_mg += mg  # type: ignore[operator]
+
+    if math.isfinite(total_mg) and total_mg > 0:
+        return total_mg / unit_info["count"]  # type: ignore[operator]
+    return infer_strength_from_product_name(js_or(product_name, ""))
+
+
+def calculate_ingredient_ratios(ingredients: List[Dict[str, object]]) -> List[Dict[str, object]]:
+    normalized = []
+    for item in ingredients:
+        name = item.get("name", MISSING) if isinstance(item, dict) else MISSING
+        ingredient = js_trim(js_string(js_or(name, "")))
+        ingredient = re.sub(r"^[・\-]+", "", ingredient)
+        ingredient = JS_WHITESPACE_RE.sub(" ", ingredient)
+        amount = item.get("amount", MISSING) if isinstance(item, dict) else MISSING
+        parsed = parse_amount_token(js_or(amount, ""))
+        if ingredient:
+            normalized.append((ingredient, parsed))
+
+    if not normalized:
+        return []
+
+    parsed_only = [(name, parsed) for name, parsed in normalized if parsed and parsed["value"] > 0]  # type: ignore[operator]
+    unit_set = {parsed["unit"] for _, parsed in parsed_only}  # type: ignore[index]
+    if len(parsed_only) == len(normalized) and len(unit_set) == 1:
+        total = 0.0
+        for _, parsed in parsed_only:
+            total += parsed["value"]  # type: ignore[index,operator]
+        if total > 0:
+            return [{"ingredient": name, "ratio": parsed["value"] / total} for name, parsed in normalized]  # type: ignore[index,operator]
+
+    equal_ratio = 1 / len(normalized)
+    return [{"ingredient": name, "ratio": equal_ratio} for name, _ in normalized]
+
+
+def is_useful_ocr_alias(alias: object) -> bool:
+    value = js_trim(js_string(js_or(alias, "")))
+    if not value or len(value) < 2 or len(value) > 80:
+        return False
+    if "危険度" in value:
+        return False
+    if OCR_ALIAS_SYMBOLS_RE.fullmatch(value) and len(value) < 4:
+        return False
+    if not OCR_NAME_CHAR_RE.search(value):
+        return False
+    return True
+
+
+def is_useful_ocr_product_alias(name: object) -> bool:
+    value = js_trim(js_string(js_or(name, "")))
+    if not value or len(value) < 2 or len(value) > 40:
+        return False
+    if not OCR_NAME_CHAR_RE.search(value):
+        return False
+    return not any(word in value for word in OCR_PRODUCT_BLOCKED_WORDS)
+
+
+def read_product_datasets(data_dir: Path = DEFAULT_DATA_DIR) -> List[Tuple[str, List[Dict[str, object]]]]:
+    # 圧縮形式(*.compact.json)は通常形式と同内容のため、通常形式のみを読む。
+    datasets = []
+    for file_name, label in PRODUCT_DATASETS:
+        path = data_dir / file_name
+        if not path.exists():
+            continue
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        products = payload.get("products")
+        datasets.append((label, products if isinstance(products, list) else []))
+    return datasets
+
+
+def read_ocr_profiles(data_dir: Path = DEFAULT_DATA_DIR) -> List[Dict[str, object]]:
+    path = data_dir / OCR_KNOWLEDGE_FILE
+    if not path.exists():
+        return []
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    profiles = payload.get("profiles")
+    return profiles if isinstance(profiles, list) else []
+
+
+def _get(mapping: object, key: str) -> object:
+    # profile.key / profile?.key に相当(存在しなければ undefined)。
+    if isinstance(mapping, dict):
+        return mapping.get(key, MISSING)
+    return MISSING
+
+
+def _obj(value: object) -> Dict[str, object]:
+    # `value || {}`
+    return value if isinstance(value, dict) else {}
+
+
+class KnowledgeBase:
+    # ToxicNaviApp の productDB / ingredientDB / ingredientSynonyms 等と同じ構造を保持する。
+    # 名前の正規化キー → 元のキーの対応を挿入時に更新し、findKeyByNormalizedName の線形探索を置き換える。
+    def __init__(self, tables: Optional[BuiltinTables] = None) -> None:
+        tables = tables or load_builtin_tables()
+        self.schema_version = str(tables.jpic_schema_spec.get("schemaVersion", "jpic-compatible-v1"))
+        self.product_db: Dict[str, List[Dict[str, object]]] = {}
+        self.ingredient_db: Dict[str, Dict[str, object]] = {}
+        self.product_keys: Dict[str, str] = {}
+        self.ingredient_keys: Dict[str, str] = {}
+        self.ingredient_synonyms: Dict[str, str] = {}
+        self.ingredient_synonym_index: Dict[str, str] = {}
+        self.synonym_aliases: Dict[str, str] = {}
+        self.heuristic_synonyms = copy.deepcopy(tables.heuristic_synonyms)
+        self.product_strength_hints_mg: Dict[str, float] = {}
+        # 製品・成分・同義語の出所(builtin / PMDA-OTC / PMDA-医療用 / OCR)。
+        self.product_sources: Dict[str, str] = {}
+        self.ingredient_sources: Dict[str, str] = {}
+        # データセットごとの統合件数(loadExternalDatasets の表示内容に相当)。
+        self.merge_stats: Dict[str, Dict[str, int]] = {}
+
+        for name, ratio_defs in tables.product_db.items():
+            self.set_product(name, copy.deepcopy(ratio_defs), "builtin")
+        for name, info in tables.ingredient_db.items():
+            self.set_ingredient(name, copy.deepcopy(info), "builtin")
+        for alias, canonical in tables.ingredient_synonyms.items():
+            self.ingredient_synonyms[alias] = canonical
+            self.index_synonym(alias, canonical)
+        self.seed_strength_hints_from_product_names()
+        self.bootstrap_jpic_schema(tables.jpic_master)
+
+    @classmethod
+    def load_default(
+        cls,
+        data_dir: Path = DEFAULT_DATA_DIR,
+        index_html: Path = DEFAULT_INDEX_HTML,
+    ) -> "KnowledgeBase":
+        # loadExternalDatasets と同じ順で、存在するデータファイルのみ統合する。
+        knowledge = cls(load_builtin_tables(index_html))
+        for label, products in read_product_datasets(data_dir):
+            knowledge.merge_products(products, label)
+        if (data_dir / OCR_KNOWLEDGE_FILE).exists():
+            knowledge.merge_ocr_profiles(read_ocr_profiles(data_dir))
+        return knowledge
+
+    # --- 名前の索引 ---
+
+    def set_product(self, name: str, ratio_defs: List[Dict[str, object]], source: str) -> None:
+        if name not in self.product_db:
+            self.product_keys.setdefault(normalize_name(name), name)
+            self.product_sources[name] = source
+        self.product_db[name] = ratio_defs
+
+    def set_ingredient(self, name: str, info: Dict[str, object], source: str) -> None:
+        if name not in self.ingredient_db:
+            self.ingredient_keys.setdefault(normalize_name(name), name)
+            self.ingredient_sources[name] = source
+        self.ingredient_db[name] = info
+
+    def index_synonym(self, alias: str, canonical: str) -> None:
+        key = normalize_name(alias)
+        self.ingredient_synonym_index[key] = canonical
+        self.synonym_aliases[key] = alias
+
+    def find_product_key(self, name: object) -> Optional[str]:
+        return self.product_keys.get(normalize_name(name))
+
+    def find_ingredient_key(self, name: object) -> Optional[str]:
+        return self.ingredient_keys.get(normalize_name(name))
+
+    # --- JPIC 互換プロファイル ---
+
+    def bootstrap_jpic_schema(self, jpic_master: Dict[str, Dict[str, object]]) -> None:
+        for ingredient_name, legacy in self.ingredient_db.items():
+            combined = {**self.build_legacy_jpic_profile(ingredient_name, legacy), **_obj(jpic_master.get(ingredient_name))}
+            normalized = self.normalize_jpic_profile(combined, ingredient_name)
+            legacy["jpic"] = normalized
+            thresholds = normalized["toxicThresholdMgKg"]
+            for legacy_key, threshold_key in (
+                ("toxicDoseMgKg", "toxic"),
+                ("severeDoseMgKg", "severe"),
+                ("criticalDoseMgKg", "critical"),
+            ):
+                if not is_finite_number(legacy.get(legacy_key)) and is_finite_number(thresholds[threshold_key]):
+                    legacy[legacy_key] = thresholds[threshold_key]
+
+    def build_legacy_jpic_profile(self, ingredient_name: str, legacy: Dict[str, object]) -> Dict[str, object]:
+        toxic = finite_or_none(legacy.get("toxicDoseMgKg"))
+        severe = finite_or_none(legacy.get("severeDoseMgKg"))
+        if severe is None:
+            severe = toxic * 1.5 if toxic else None
+        critical = finite_or_none(legacy.get("criticalDoseMgKg"))
+        if critical is None:
+            critical = toxic * 2 if toxic else None
+
+        symptoms = legacy.get("symptoms")
+        early_symptoms = symptoms[:3] if isinstance(symptoms, list) else []
+        critical_symptoms = legacy.get("criticalSymptoms")
+        late_symptoms = critical_symptoms if isinstance(critical_symptoms, list) else []
+        all_symptoms = js_or(legacy.get("symptoms", MISSING), [])
+        lavage = _obj(legacy.get("lavage"))
+        charcoal = _obj(legacy.get("charcoal"))
+        antidote = _obj(legacy.get("antidote"))
+        dialysis = _obj(legacy.get("dialysis"))
+
+        return {
+            "schemaVersion": self.schema_version,
+            "ingredientName": ingredient_name,
+            "aliases": [],
+            "toxicThresholdMgKg": {
+                "caution": toxic * 0.5 if toxic else None,
+                "toxic": toxic,
+                "severe": severe,
+                "critical": critical,
+            },
+            "symptomTimeline": [
+                {"window": "0-2時間", "symptoms": early_symptoms, "redFlags": []},
+                {"window": "2-8時間", "symptoms": all_symptoms, "redFlags": late_symptoms},
+                {
+                    "window": "8-24時間",
+                    "symptoms": late_symptoms if len(late_symptoms) > 0 else all_symptoms,
+                    "redFlags": late_symptoms,
+                },
+            ],
+            "toxicokinetics": {key: NOT_AVAILABLE for key in TOXICOKINETICS_KEYS},
+            "treatmentGuide": {
+                "decontamination": (
+                    f"{'胃洗浄検討' if js_truthy(lavage.get('allow')) else '胃洗浄は通常非推奨'} / "
+                    f"{'活性炭検討' if js_truthy(charcoal.get('allow')) else '活性炭は条件確認'}"
+                ),
+                "antidote": js_or(antidote.get("name", MISSING), NOT_AVAILABLE),
+                "extracorporeal": "血液浄化有効性あり" if js_truthy(dialysis.get("effective")) else "血液浄化有効性低い",
+                "other": "個別症状に応じた支持療法",
+            },
+            "analysis": {
+                "recommendedTests": ["バイタル", "血液ガス", "電解質"],
+                "interpretation": "臨床症状と摂取量から総合判断",
+                "notes": "必要に応じて中毒情報センターへ確認",
+            },
+            "evidence": {
+                "source": "JPIC互換内部マスタ（既存ロジック由来）",
+                "updatedAt": "2026-02-13",
+                "level": "training",
+            },
+        }
+
+    def normalize_jpic_profile(self, profile: object, fallback_name: str = "不明成分") -> Dict[str, object]:
+        raw = _obj(profile)
+        thresholds = _obj(raw.get("toxicThresholdMgKg"))
+        timeline = raw.get("symptomTimeline")
+        toxicokinetics = _obj(raw.get("toxicokinetics"))
+        treatment_guide = _obj(raw.get("treatmentGuide"))
+        analysis = _obj(raw.get("analysis"))
+        evidence = _obj(raw.get("evidence"))
+
+        def text(mapping: Dict[str, object], key: str, fallback: str) -> str:
+            return js_string(js_or(mapping.get(key, MISSING), fallback))
+
+        return {
+            "schemaVersion": js_or(raw.get("schemaVersion", MISSING), self.schema_version),
+            "ingredientName": js_or(raw.get("ingredientName", MISSING), fallback_name),
+            "aliases": _unique_trimmed(raw.get("aliases", MISSING)),
+            "toxicThresholdMgKg": {
+                key: finite_or_none(thresholds.get(key)) for key in ("caution", "toxic", "severe", "critical")
+            },
+            "symptomTimeline": [
+                {
+                    "window": js_string(js_or(_get(item, "window"), "不明")),
+                    "symptoms": _unique_trimmed(_get(item, "symptoms")),
+                    "redFlags": _unique_trimmed(_get(item, "redFlags")),
+                }
+                for item in (timeline if isinstance(timeline, list) else [])
+            ],
+            "toxicokinetics": {key: text(toxicokinetics, key, NOT_AVAILABLE) for key in TOXICOKINETICS_KEYS},
+            "treatmentGuide": {
+                key: text(treatment_guide, key, NOT_AVAILABLE)
+                for key in ("decontamination", "antidote", "extracorporeal", "other")
+            },
+            "analysis": {
+                "recommendedTests": _unique_trimmed(analysis.get("recommendedTests", MISSING)),
+                "interpretation": text(analysis, "interpretation", NOT_AVAILABLE),
+                "notes": text(analysis, "notes", ""),
+            },
+            "evidence": {
+                "source": text(evidence, "source", "JPIC互換内部マスタ"),
+                "updatedAt": text(evidence, "updatedAt", "不明"),
+                "level": text(evidence, "level", "training"),
+            },
+        }
+
+    def build_unknown_jpic_profile(self, ingredient_name: str = "不明成分") -> Dict[str, object]:
+        return self.normalize_jpic_profile(
+            {
+                "ingredientName": ingredient_name,
+                "toxicThresholdMgKg": {"caution": None, "toxic": None, "severe": None, "critical": None},
+                "symptomTimeline": [
+                    {"window": "0-24時間", "symptoms": [NOT_AVAILABLE], "redFlags": ["重症徴候があれば直ちに専門相談"]}
+                ],
+                "toxicokinetics": {key: NOT_AVAILABLE for key in TOXICOKINETICS_KEYS},
+                "treatmentGuide": {
+                    "decontamination": "成分同定後に適応判断",
+                    "antidote": "不明",
+                    "extracorporeal": "物性情報確認後に判断",
+                    "other": "中毒情報センターへ照会",
+                },
+                "analysis": {
+                    "recommendedTests": ["血液ガス", "電解質", "腎機能", "肝機能"],
+                    "interpretation": "症候学的に重症度を暫定判定",
+                    "notes": "一次情報ソースで再評価",
+                },
+                "evidence": {"source": "JPIC互換内部マスタ", "updatedAt": "2026-02-13", "level": "unknown"},
+            },
+            ingredient_name,
+        )
+
+    def get_jpic_profile(self, ingredient_info: Optional[Dict[str, object]], ingredient_name: str = "不明成分") -> Dict[str, object]:
+        if ingredient_info and js_truthy(ingredient_info.get("jpic")):
+            return self.normalize_jpic_profile(ingredient_info["jpic"], ingredient_name)
+        return self.build_unknown_jpic_profile(ingredient_name)
+
+    def build_unknown_ingredient_info(self, ingredient_name: str = "不明成分") -> Dict[str, object]:
+        return {
+            "component": "Unknown",
+            "toxicDoseMgKg": None,
+            "severeDoseMgKg": None,
+            "criticalDoseMgKg": None,
+            "symptoms": [NOT_AVAILABLE],
+            "criticalSymptoms": [],
+            "antidote": {"name": "要情報確認", "indication": "製剤情報、成分、毒性データを至急確認"},
+            "lavage": {"allow": False, "windowMin": 0, "note": "毒性不明のため慎重判断"},
+            "charcoal": {"allow": False, "windowMin": 0, "extendedWindowMin": 0, "note": "適応可否を確認"},
+            "dialysis": {"effective": False, "indication": "成分特性の確認が必要"},
+            "otherTreatments": [{"name": "中毒情報センターへ照会", "severityMin": 1, "note": "不明成分は一次情報を収集"}],
+            "jpic": self.build_unknown_jpic_profile(ingredient_name),
+            "unknown": True,
+        }
+
+    # --- 成分名の正規化と配合比 ---
+
+    def canonicalize_ingredient_name(self, name: object) -> str:
+        raw = js_trim(js_string(js_or(name, "")))
+        if not raw:
+            return ""
+
+        direct = self.find_ingredient_key(raw)
+        if direct:
+            return direct
+        by_alias = self.ingredient_synonym_index.get(normalize_name(raw))
+        if by_alias:
+            return by_alias
+
+        stripped = raw
+        for pattern, replacement in INGREDIENT_STRIP_RULES:
+            stripped = pattern.sub(replacement, stripped)
+        stripped = js_trim(stripped)
+
+        if stripped:
+            direct_stripped = self.find_ingredient_key(stripped)
+            if direct_stripped:
+                return direct_stripped
+            by_alias_stripped = self.ingredient_synonym_index.get(normalize_name(stripped))
+            if by_alias_stripped:
+                return by_alias_stripped
+
+        for rule in self.heuristic_synonyms:
+            keyword = str(rule.get("keyword", ""))
+            if keyword in raw or keyword in stripped:
+                return str(rule.get("canonical", ""))
+        return raw
+
+    def canonicalize_ingredient_ratios(self, ratio_defs: List[Dict[str, object]]) -> List[Dict[str, object]]:
+        merged: Dict[str, float] = {}
+        for item in ratio_defs:
+            canonical = self.canonicalize_ingredient_name(item.get("ingredient", MISSING))
+            ratio = js_number(item.get("ratio", MISSING))
+            if not canonical or not math.isfinite(ratio) or ratio <= 0:
+                continue
+            merged[canonical] = merged.get(canonical, 0) + ratio
+
+        total_ratio = 0.0
+        for ratio in merged.values():
+            total_ratio += ratio
+        if not math.isfinite(total_ratio) or total_ratio <= 0:
+            return []
+        return [{"ingredient": ingredient, "ratio": ratio / total_ratio} for ingredient, ratio in merged.items()]
+
+    def seed_strength_hints_from_product_names(self) -> None:
+        for product_name in self.product_db:
+            hinted = infer_strength_from_product_name(product_name)
+            if hinted is not None and hinted > 0:
+                self.product_strength_hints_mg[product_name] = hinted
+
+    # --- データセット統合 ---
+
+    def prepare_product_row(self, product: Dict[str, object]) -> Optional[Tuple[str, List[Dict[str, object]], Optional[float]]]:
+        # 製品1件の (製品名, 配合比, 規格ヒント)。統合対象外なら None。
+        # 成分名の正規化は統合済みの成分に依存するため、直前の行まで統合した状態で呼ぶ。
+        product_name = js_trim(js_string(js_or(product.get("product_name", MISSING), "")))
+        source_ingredients = product.get("ingredients")
+        ratio_defs = self.canonicalize_ingredient_ratios(
+            calculate_ingredient_ratios(source_ingredients if isinstance(source_ingredients, list) else [])
+        )
+        if not product_name or not ratio_defs:
+            return None
+        strength_hint = estimate_strength_hint_from_product(product)
+        if strength_hint is None or not math.isfinite(strength_hint) or strength_hint <= 0:
+            strength_hint = None
+        return product_name, ratio_defs, strength_hint
+
+    def apply_product_row(
+        self,
+        product_name: str,
+        ratio_defs: List[Dict[str, object]],
+        strength_hint: Optional[float],
+        source: str,
+        stats: Dict[str, int],
+    ) -> None:
+        if not js_truthy(self.product_db.get(product_name)):
+            self.set_product(product_name, ratio_defs, source)
+            stats["addedProducts"] += 1
+
+        if strength_hint is not None and not is_finite_number(self.product_strength_hints_mg.get(product_name)):
+            self.product_strength_hints_mg[product_name] = strength_hint
+            stats["updatedStrengthHints"] += 1
+
+        for item in ratio_defs:
+            ingredient = str(item["ingredient"])
+            if not js_truthy(self.ingredient_db.get(ingredient)):
+                self.set_ingredient(ingredient, self.build_unknown_ingredient_info(ingredient), source)
+                stats["addedIngredients"] += 1
+
+    def merge_products(
+        self,
+        products: List[Dict[str, object]],
+        source: str = "",
+        rows: Optional[List[Tuple[str, List[Dict[str, object]], Optional[float]]]] = None,
+    ) -> Dict[str, int]:
+        # rows を渡すと統合した行を順に追加する(事前計算した配合比表の生成用)。
+        stats = {"addedProducts": 0, "addedIngredients": 0, "updatedStrengthHints": 0}
+        for product in products:
+            row = self.prepare_product_row(product)
+            if row is None:
+                continue
+            if rows is not None:
+                rows.append(row)
+            self.apply_product_row(*row, source, stats)
+        self.merge_stats[source] = {"loadedProducts": len(products), **stats}
+        return stats
+
+    def merge_product_rows(
+        self,
+        rows: List[Tuple[str, List[Dict[str, object]], Optional[float]]],
+        source: str = "",
+        loaded_products: Optional[int] = None,
+    ) -> Dict[str, int]:
+        # 事前計算済みの行を統合する(merge_products と同じ結果になる)。
+        stats = {"addedProducts": 0, "addedIngredients": 0, "updatedStrengthHints": 0}
+        for row in rows:
+            self.apply_product_row(*row, source, stats)
+        self.merge_stats[source] = {"loadedProducts": len(rows) if loaded_products is None else loaded_products, **stats}
+        return stats
+
+    def merge_ocr_profiles(self, profiles: List[Dict[str, object]], source: str = "OCR") -> Dict[str, int]:
+        loaded_profiles = 0
+        added_products = 0
+        added_ingredients = 0
+        added_synonyms = 0
+
+        for profile in profiles:
+            ingredient_name = js_trim(js_string(js_or(profile.get("ingredient_name", MISSING), "")))
+            if not ingredient_name:
+                continue
+            loaded_profiles += 1
+
+            existed_before = js_truthy(self.ingredient_db.get(ingredient_name))
+            if not existed_before:
+                self.set_ingredient(ingredient_name, self.build_unknown_ingredient_info(ingredient_name), source)
+                added_ingredients += 1
+
+            ingredient = self.ingredient_db[ingredient_name]
+            allow_overwrite = not existed_before or js_truthy(ingredient.get("unknown"))
+            if allow_overwrite:
+                ingredient["unknown"] = False
+                ingredient["component"] = js_string(
+                    js_or(profile.get("component", MISSING), js_or(ingredient.get("component", MISSING), "Unknown"))
+                )
+
+            symptoms = to_string_list(profile.get("symptoms"))
+            if allow_overwrite and symptoms:
+                ingredient["symptoms"] = symptoms
+            critical_symptoms = to_string_list(profile.get("critical_symptoms"))
+            if allow_overwrite and critical_symptoms:
+                ingredient["criticalSymptoms"] = critical_symptoms
+
+            thresholds = _obj(js_or(profile.get("toxic_threshold_mg_kg", MISSING), {}))
+            toxic = parse_numeric_or_null(thresholds.get("toxic", MISSING))
+            severe = parse_numeric_or_null(thresholds.get("severe", MISSING))
+            critical = parse_numeric_or_null(thresholds.get("critical", MISSING))
+            if allow_overwrite and toxic is not None:
+                ingredient["toxicDoseMgKg"] = toxic
+            if allow_overwrite and severe is not None:
+                ingredient["severeDoseMgKg"] = severe
+            if allow_overwrite and critical is not None:
+                ingredient["criticalDoseMgKg"] = critical
+
+            treatment = _obj(js_or(profile.get("treatment", MISSING), {}))
+            antidote = _obj(js_or(treatment.get("antidote", MISSING), {}))
+            if allow_overwrite:
+                current = _obj(ingredient.get("antidote"))
+                ingredient["antidote"] = {
+                    "name": js_string(js_or(antidote.get("name", MISSING), js_or(current.get("name", MISSING), "特異的解毒剤なし"))),
+                    "indication": js_string(
+                        js_or(antidote.get("indication", MISSING), js_or(current.get("indication", MISSING), "支持療法を優先"))
+                    ),
+                }
+
+            lavage = _obj(js_or(treatment.get("lavage", MISSING), {}))
+            if allow_overwrite:
+                current = _obj(ingredient.get("lavage"))
+                window_min = js_number(lavage.get("window_min", MISSING))
+                ingredient["lavage"] = {
+                    "allow": js_truthy(lavage.get("allow", MISSING)),
+                    "windowMin": window_min if math.isfinite(window_min) else js_number(js_or(current.get("windowMin", MISSING), 0)),
+                    "note": js_string(js_or(lavage.get("note", MISSING), js_or(current.get("note", MISSING), "適応を個別判断"))),
+                }
+
+            charcoal = _obj(js_or(treatment.get("charcoal", MISSING), {}))
+            if allow_overwrite:
+                current = _obj(ingredient.get("charcoal"))
+                window_min = js_number(charcoal.get("window_min", MISSING))
+                extended_window_min = js_number(charcoal.get("extended_window_min", MISSING))
+                ingredient["charcoal"] = {
+                    "allow": js_truthy(charcoal.get("allow", MISSING)),
+                    "windowMin": window_min if math.isfinite(window_min) else js_number(js_or(current.get("windowMin", MISSING), 0)),
+                    "extendedWindowMin": (
+                        extended_window_min
+                        if math.isfinite(extended_window_min)
+                        else js_number(js_or(current.get("extendedWindowMin", MISSING), 0))
+                    ),
+                    "note": js_string(js_or(charcoal.get("note", MISSING), js_or(current.get("note", MISSING), "適応を個別判断"))),
+                }
+
+            dialysis = _obj(js_or(treatment.get("dialysis", MISSING), {}))
+            if allow_overwrite:
+                current = _obj(ingredient.get("dialysis"))
+                ingredient["dialysis"] = {
+                    "effective": js_truthy(dialysis.get("effective", MISSING)),
+                    "indication": js_string(
+                        js_or(dialysis.get("indication", MISSING), js_or(current.get("indication", MISSING), "有効性情報を確認"))
+                    ),
+                }
+
+            other_treatments = treatment.get("other")
+            other_treatments = other_treatments if isinstance(other_treatments, list) else []
+            if allow_overwrite and other_treatments:
+                converted = []
+                for item in other_treatments:
+                    severity_min = js_number(_get(item, "severity_min"))
+                    converted.append(
+                        {
+                            "name": js_string(js_or(_get(item, "name"), "支持療法")),
+                            "severityMin": severity_min if math.isfinite(severity_min) else 1,
+                            "note": js_string(js_or(_get(item, "note"), "")),
+                        }
+                    )
+                ingredient["otherTreatments"] = converted
+
+            timeline = profile.get("symptom_timeline")
+            normalized_timeline = [
+                {
+                    "window": js_string(js_or(_get(phase, "window"), "不明")),
+                    "symptoms": to_string_list(_get(phase, "symptoms")),
+                    "redFlags": to_string_list(_get(phase, "red_flags")),
+                }
+                for phase in (timeline if isinstance(timeline, list) else [])
+            ]
+
+            toxicokinetics = _obj(js_or(profile.get("toxicokinetics", MISSING), {}))
+            analysis = _obj(js_or(profile.get("analysis", MISSING), {}))
+            evidence = _obj(js_or(profile.get("evidence", MISSING), {}))
+            if allow_overwrite:
+                lavage_info = ingredient["lavage"]
+                charcoal_info = ingredient["charcoal"]
+                other_names = js_or(treatment.get("other", MISSING), [])
+                treatment_guide = {
+                    "decontamination": " / ".join(
+                        [
+                            f"胃洗浄({js_string(lavage_info['windowMin'])}分以内)" if lavage_info["allow"] else "胃洗浄は原則非推奨",
+                            f"活性炭({js_string(charcoal_info['windowMin'])}分以内)" if charcoal_info["allow"] else "活性炭は原則非推奨",
+                        ]
+                    ),
+                    "antidote": ingredient["antidote"]["name"],
+                    "extracorporeal": "血液浄化を検討" if ingredient["dialysis"]["effective"] else "血液浄化は通常適応外",
+                    "other": ", ".join(
+                        to_string_list([_get(item, "name") for item in other_names] if isinstance(other_names, list) else [])
+                    )
+                    or "支持療法",
+                }
+                ingredient["jpic"] = self.normalize_jpic_profile(
+                    {
+                        "ingredientName": ingredient_name,
+                        "aliases": to_string_list(profile.get("aliases")),
+                        "toxicThresholdMgKg": {
+                            key: parse_numeric_or_null(thresholds.get(key, MISSING))
+                            for key in ("caution", "toxic", "severe", "critical")
+                        },
+                        "symptomTimeline": normalized_timeline,
+                        "toxicokinetics": {
+                            key: js_string(js_or(toxicokinetics.get(key, MISSING), NOT_AVAILABLE)) for key in TOXICOKINETICS_KEYS
+                        },
+                        "treatmentGuide": treatment_guide,
+                        "analysis": {
+                            "recommendedTests": to_string_list(analysis.get("recommended_tests")),
+                            "interpretation": js_string(js_or(analysis.get("interpretation", MISSING), "症候と曝露量から総合判断")),
+                            "notes": js_string(js_or(analysis.get("notes", MISSING), "")),
+                        },
+                        "evidence": {
+                            "source": js_string(js_or(evidence.get("source", MISSING), "ocr_result_1770368005162.txt")),
+                            "updatedAt": js_string(js_or(evidence.get("updated_at", MISSING), "不明")),
+                            "level": js_string(js_or(evidence.get("level", MISSING), "ocr-reference")),
+                        },
+                    },
+                    ingredient_name,
+                )
+
+            for alias in to_string_list(profile.get("aliases")):
+                if alias == ingredient_name or not is_useful_ocr_alias(alias):
+                    continue
+                if not js_truthy(self.ingredient_synonyms.get(alias)):
+                    self.ingredient_synonyms[alias] = ingredient_name
+                    added_synonyms += 1
+                self.index_synonym(alias, ingredient_name)
+
+            for product_name in to_string_list(profile.get("product_aliases")):
+                if not is_useful_ocr_product_alias(product_name):
+                    continue
+                if not js_truthy(self.product_db.get(product_name)):
+                    self.set_product(product_name, [{"ingredient": ingredient_name, "ratio": 1}], source)
+                    added_products += 1
+
+        stats = {
+            "loadedProfiles": loaded_profiles,
+            "addedProducts": added_products,
+            "addedIngredients": added_ingredients,
+            "addedSynonyms": added_synonyms,
+        }
+        self.merge_stats[source] = stats
+        return stats
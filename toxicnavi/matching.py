@@ -0,0 +1,291 @@
+"""
+OCR で読み取った薬剤名を製品名・成分名・別名へ照合する(index.html の matchDrugCandidate と同一の手順)。
+
+候補生成は正規化名の文字 trigram 転置索引で行い、照合は次の順で試す。
+1. exact: 正規化名(数字除去)の完全一致
+2. contains: 一方が他方を含む(従来の includes 判定と同じ候補・同じ得点)
+3. fuzzy: 誤読 1〜2 文字までの近似一致(入力全体が候補名のいずれかの部分と編集距離 k 以内)。
+   包含一致が無いか得点が低い(CONTAINS_ACCEPT_SCORE 未満)場合に試し、得点の高い方を採用する
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .jscompat import NAME_NORMALIZATION, normalize_name
+from .knowledge import KnowledgeBase
+
+TRIGRAM_INDEX_FORMAT = "toxicnavi-trigram-index"
+TRIGRAM_INDEX_VERSION = 1
+DEFAULT_TRIGRAM_INDEX_NAME = "toxicnavi_trigram_index.json"
+
+ENTRY_TYPES = ("product", "ingredient", "alias")
+# 前後に境界記号を2つずつ付けて trigram を作る(短い名前でも先頭・末尾の文字が照合に効く)。
+PAD_START = "\u0002\u0002"
+PAD_END = "\u0003\u0003"
+DIGITS_RE = re.compile("[0-9]")
+# 包含一致の得点がこれ未満(短い名前の断片一致など)なら、近似一致の候補と得点を比べる。
+CONTAINS_ACCEPT_SCORE = 0.8
+
+
+@dataclass(frozen=True)
+class SearchEntry:
+    name: str
+    type: str
+    normalized: str
+    alias: Optional[str] = None
+
+
+def trigrams(text: str) -> List[str]:
+    return [text[pos:pos + 3] for pos in range(len(text) - 2)]
+
+
+def padded_trigrams(normalized: str) -> List[str]:
+    return trigrams(PAD_START + normalized + PAD_END)
+
+
+def allowed_edits(length: int) -> int:
+    # 誤読の許容数。3文字以下は近似照合を行わない。
+    if length < 4:
+        return 0
+    if length < 8:
+        return 1
+    return 2
+
+
+def substring_edit_distance(query: str, target: str, limit: int) -> Optional[int]:
+    # query 全体と target の任意の部分文字列との最小編集距離(limit を超えたら None)。
+    # Myers のビット並列法で、target 1文字あたり定数回の整数演算で DP の1列を更新する。
+    if not query:
+        return 0
+    mask = (1 << len(query)) - 1
+    high = 1 << (len(query) - 1)
+    peq: Dict[str, int] = {}
+    for pos, char in enumerate(query):
+        peq[char] = peq.get(char, 0) | (1 << pos)
+    pv, mv = mask, 0
+    score = best = len(query)
+    for char in target:
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        # 部分文字列照合では開始位置が自由なため、先頭行(距離0)から 0 を送り込む。
+        ph = (ph << 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+        if score < best:
+            best = score
+    return best if best <= limit else None
+
+
+def build_search_entries(
+    product_names: Iterable[str],
+    ingredient_names: Iterable[str],
+    synonyms: Dict[str, str],
+) -> List[SearchEntry]:
+    # buildSearchEntries と同じく正規化名ごとに1件へまとめ、製品名 > 成分名 > 別名の順に優先する。
+    by_norm: Dict[str, SearchEntry] = {}
+
+    def push(name: str, entry_type: str, alias: Optional[str] = None) -> None:
+        normalized = normalize_name(alias if alias is not None else name)
+        if not normalized:
+            return
+        current = by_norm.get(normalized)
+        if current is None or (current.type == "ingredient" and entry_type == "product"):
+            by_norm[normalized] = SearchEntry(name, entry_type, normalized, alias)
+
+    for name in product_names:
+        push(name, "product")
+    for name in ingredient_names:
+        push(name, "ingredient")
+    for alias, canonical in synonyms.items():
+        push(canonical, "alias", alias)
+    return list(by_norm.values())
+
+
+class TrigramIndex:
+    def __init__(self, entries: List[SearchEntry], postings: Optional[Dict[str, List[int]]] = None) -> None:
+        self.entries = entries
+        self.by_norm = {entry.normalized: entry_id for entry_id, entry in enumerate(entries)}
+        if postings is None:
+            collected: Dict[str, List[int]] = {}
+            for entry_id, entry in enumerate(entries):
+                for gram in dict.fromkeys(padded_trigrams(entry.normalized)):
+                    collected.setdefault(gram, []).append(entry_id)
+            postings = collected
+        self.postings = postings
+
+    @classmethod
+    def from_knowledge(cls, knowledge: KnowledgeBase) -> "TrigramIndex":
+        return cls(build_search_entries(knowledge.product_db, knowledge.ingredient_db, knowledge.ingredient_synonyms))
+
+    # --- 保存形式 ---
+
+    def to_payload(self, sources: Optional[Dict[str, object]] = None) -> Dict[str, object]:
+        # postings は昇順の番号列を差分で保存する。
+        encoded: Dict[str, List[int]] = {}
+        for gram in sorted(self.postings):
+            ids = self.postings[gram]
+            encoded[gram] = [ids[0]] + [ids[pos] - ids[pos - 1] for pos in range(1, len(ids))]
+        return {
+            "format": TRIGRAM_INDEX_FORMAT,
+            "version": TRIGRAM_INDEX_VERSION,
+            "normalization": NAME_NORMALIZATION,
+            "sources": sources or {},
+            "types": list(ENTRY_TYPES),
+            "entries": {
+                "name": [entry.name for entry in self.entries],
+                "type": [ENTRY_TYPES.index(entry.type) for entry in self.entries],
+                "normalized": [entry.normalized for entry in self.entries],
+                "alias": {str(entry_id): entry.alias for entry_id, entry in enumerate(self.entries) if entry.alias is not None},
+            },
+            "postings": encoded,
+        }
+
+    @classmethod
+    def from_payload(cls, payload: Dict[str, object]) -> "TrigramIndex":
+        if payload.get("format") != TRIGRAM_INDEX_FORMAT or payload.get("normalization") != NAME_NORMALIZATION:
+            raise ValueError(f"unsupported trigram index: {payload.get('format')} ({payload.get('normalization')})")
+        types: List[str] = payload["types"]  # type: ignore[assignment]
+        columns: Dict[str, object] = payload["entries"]  # type: ignore[assignment]
+        aliases: Dict[str, str] = columns.get("alias", {})  # type: ignore[assignment]
+        entries = [
+            SearchEntry(name, types[type_id], normalized, aliases.get(str(entry_id)))
+            for entry_id, (name, type_id, normalized) in enumerate(
+                zip(columns["name"], columns["type"], columns["normalized"])  # type: ignore[call-overload]
+            )
+        ]
+        postings: Dict[str, List[int]] = {}
+        for gram, deltas in payload["postings"].items():  # type: ignore[union-attr]
+            ids, total = [], 0
+            for delta in deltas:
+                total += delta
+                ids.append(total)
+            postings[gram] = ids
+        return cls(entries, postings)
+
+    def save(self, path: Path, sources: Optional[Dict[str, object]] = None) -> Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_payload(sources), ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        return path
+
+    @classmethod
+    def load(cls, path: Path) -> "TrigramIndex":
+        return cls.from_payload(json.loads(path.read_text(encoding="utf-8")))
+
+    # --- 照合 ---
+
+    def _result(self, entry_id: int, score: float, strategy: str, distance: int = 0) -> Dict[str, object]:
+        entry = self.entries[entry_id]
+        result: Dict[str, object] = {
+            "name": entry.name,
+            "type": entry.type,
+            "normalized": entry.normalized,
+            "score": score,
+            "strategy": strategy,
+        }
+        if entry.alias is not None:
+            result["alias"] = entry.alias
+        if strategy == "fuzzy":
+            result["distance"] = distance
+        return result
+
+    def containing(self, query: str) -> List[int]:
+        # query を含む候補(trigram の共通部分で絞ってから includes で確認)と、query に含まれる候補。
+        found = set()
+        if len(query) >= 3:
+            grams = sorted(set(trigrams(query)), key=lambda gram: len(self.postings.get(gram, ())))
+            candidate_ids = set(self.postings.get(grams[0], ()))
+            for gram in grams[1:]:
+                if not candidate_ids:
+                    break
+                candidate_ids.intersection_update(self.postings.get(gram, ()))
+            found.update(entry_id for entry_id in candidate_ids if query in self.entries[entry_id].normalized)
+        else:
+            found.update(entry_id for entry_id, entry in enumerate(self.entries) if query in entry.normalized)
+        for start in range(len(query)):
+            for end in range(start + 1, len(query) + 1):
+                entry_id = self.by_norm.get(query[start:end])
+                if entry_id is not None:
+                    found.add(entry_id)
+        return sorted(found)
+
+    def fuzzy(self, query: str) -> List[Tuple[int, int]]:
+        # (entry_id, 編集距離) を返す。共有 trigram 数の下限(q-gram 補題)で候補を絞る。
+        limit = allowed_edits(len(query))
+        if limit == 0:
+            return []
+        grams = set(padded_trigrams(query))
+        # 候補の途中に一致する場合は境界記号を含む4つの trigram が一致しないため、その分を差し引く。
+        # 短い入力(下限が 0 以下)は trigram を1つ以上共有する候補だけを見る(索引全体の走査はしない)。
+        min_shared = max(1, len(grams) - 3 * limit - 4)
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for entry_id in self.postings.get(gram, ()):
+                shared[entry_id] = shared.get(entry_id, 0) + 1
+        matches = []
+        for entry_id, count in shared.items():
+            if count < min_shared:
+                continue
+            target = self.entries[entry_id].normalized
+            if len(target) < len(query) - limit:
+                continue
+            distance = substring_edit_distance(query, target, limit)
+            if distance is not None:
+                matches.append((entry_id, distance))
+        return matches
+
+    def _score(self, entry_id: int, query: str, similarity: float, base: float, weight: float, cap: float) -> float:
+        entry = self.entries[entry_id]
+        overlap = min(len(entry.normalized), len(query)) / max(len(entry.normalized), len(query))
+        type_bonus = 0.08 if entry.type == "product" else 0
+        return min(cap, base + overlap * weight * similarity + type_bonus)
+
+    def candidates(self, raw_name: str, limit: int = 5) -> List[Dict[str, object]]:
+        # 得点順の候補一覧(先頭が matchDrugCandidate の結果)。
+        query = DIGITS_RE.sub("", normalize_name(raw_name))
+        if not query:
+            return []
+
+        exact_id = self.by_norm.get(query)
+        if exact_id is not None:
+            return [self._result(exact_id, 1, "exact")]
+
+        # 同点は登録順で先の候補を優先する(従来の安定ソートと同じ)。
+        contains = sorted((-self._score(entry_id, query, 1, 0.58, 0.36, 0.96), entry_id) for entry_id in self.containing(query))
+        contains_results = [self._result(entry_id, -neg_score, "contains") for neg_score, entry_id in contains[:limit]]
+        if contains and -contains[0][0] >= CONTAINS_ACCEPT_SCORE:
+            return contains_results
+
+        # 包含候補が無いか、断片的な一致(短い名前を含むだけ等)の場合は近似一致と比べる。
+        # 近似一致は編集距離・文字数の差が小さい候補を優先し、その中で得点順。
+        fuzzy = sorted(
+            (
+                distance,
+                abs(len(self.entries[entry_id].normalized) - len(query)),
+                -self._score(entry_id, query, 1 - distance / len(query), 0.5, 0.3, 0.9),
+                entry_id,
+            )
+            for entry_id, distance in self.fuzzy(query)
+        )
+        fuzzy_results = [
+            self._result(entry_id, -neg_score, "fuzzy", distance) for distance, _, neg_score, entry_id in fuzzy[:limit]
+        ]
+        if fuzzy and (not contains or -fuzzy[0][2] > -contains[0][0]):
+            return (fuzzy_results + contains_results)[:limit]
+        return (contains_results + fuzzy_results)[:limit]
+
+    def match(self, raw_name: str) -> Optional[Dict[str, object]]:
+        found = self.candidates(raw_name, limit=1)
+        return found[0] if found else None
@@ -0,0 +1,50 @@
+"""
+正規化名 → 元のキーの事前計算索引(toxicnavi_name_index.json)。
+
+index.html の findKeyByNormalizedName / ingredientSynonymIndex と同じ対応を統合後のデータから求めて保存する。
+同じ正規化名を持つキーが複数ある場合は、アプリと同じく先に登録されたキーを採用する。
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Dict, Optional
+
+from .jscompat import NAME_NORMALIZATION
+from .knowledge import KnowledgeBase
+
+NAME_INDEX_FORMAT = "toxicnavi-name-index"
+NAME_INDEX_VERSION = 1
+DEFAULT_NAME_INDEX_NAME = "toxicnavi_name_index.json"
+
+
+def build_name_index(knowledge: KnowledgeBase, sources: Optional[Dict[str, object]] = None) -> Dict[str, object]:
+    return {
+        "format": NAME_INDEX_FORMAT,
+        "version": NAME_INDEX_VERSION,
+        "normalization": NAME_NORMALIZATION,
+        "sources": sources or {},
+        "counts": {
+            "products": len(knowledge.product_keys),
+            "ingredients": len(knowledge.ingredient_keys),
+            "synonyms": len(knowledge.ingredient_synonym_index),
+        },
+        "products": dict(knowledge.product_keys),
+        "ingredients": dict(knowledge.ingredient_keys),
+        "synonyms": dict(knowledge.ingredient_synonym_index),
+    }
+
+
+def write_name_index(path: Path, knowledge: KnowledgeBase, sources: Optional[Dict[str, object]] = None) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    payload = build_name_index(knowledge, sources)
+    path.write_text(json.dumps(payload, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+    return path
+
+
+def load_name_index(path: Path) -> Dict[str, Dict[str, str]]:
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    if payload.get("format") != NAME_INDEX_FORMAT or payload.get("normalization") != NAME_NORMALIZATION:
+        raise ValueError(f"unsupported name index: {payload.get('format')} ({payload.get('normalization')})")
+    return {section: payload.get(section, {}) for section in ("products", "ingredients", "synonyms")}
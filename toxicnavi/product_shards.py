@@ -0,0 +1,229 @@
+"""
+製品データを正規化名の先頭文字ごとに分割したバンドル(data/product_shards/)。
+
+index.html は起動時に manifest.json だけを読み、入力中の薬剤名や OCR で読み取った名前と一致しうる製品を含む
+分割ファイルだけを必要になった時点で読み込む。行の内容は配合比の事前計算表(toxicnavi_product_ratios.json)と同じで、
+統合結果は一括読み込みと一致する。
+
+- 完全一致・「名前に含まれる製品」は先頭文字(keys)、「名前を含む製品」・近似一致は manifest の製品名 trigram 索引
+  (trigrams: trigram → 分割ファイル番号)で候補の分割ファイルを決める(candidate_shards。index.html の
+  productShardCandidates と同じ)。候補以外の分割ファイルの製品は照合結果に現れないため、全件を読む必要はない
+- 同じ製品名・同じ正規化名の製品は同じ分割ファイルに入るため、「先に登録された製品を採用」の規則は変わらない
+- 製品の統合で追加される成分は manifest に記録し、起動時にまとめて登録する(成分の登録順は一括読み込みと同じ)
+- OCR 知識の製品別名のうち製品データと正規化名が重なるものは reserved_products として OCR 統合時には追加せず、
+  一括読み込みで追加される場合は該当する分割ファイルの末尾に含める
+"""
+
+from __future__ import annotations
+
+import json
+import shutil
+from pathlib import Path
+from typing import Dict, List, Set
+
+from .builtin import DEFAULT_INDEX_HTML, load_builtin_tables
+from .jscompat import NAME_NORMALIZATION, normalize_name
+from .knowledge import (
+    DEFAULT_DATA_DIR,
+    OCR_KNOWLEDGE_FILE,
+    KnowledgeBase,
+    is_useful_ocr_product_alias,
+    read_ocr_profiles,
+    read_product_datasets,
+    to_string_list,
+)
+from .matching import DIGITS_RE, allowed_edits, padded_trigrams, trigrams
+from .product_table import PRODUCT_TABLE_RULES, ProductRow, builtin_fingerprint
+from .store import dump_json
+
+SHARD_MANIFEST_FORMAT = "toxicnavi-product-shards"
+SHARD_FORMAT = "toxicnavi-product-shard"
+SHARD_VERSION = 2
+DEFAULT_SHARD_DIR_NAME = "product_shards"
+SHARD_MANIFEST_NAME = "manifest.json"
+# 1ファイルあたりの目安行数。先頭文字をコードポイント順に、この行数を超えない範囲で同じファイルへまとめる
+# (1文字でこの行数を超える場合はその文字だけのファイルになる)。
+DEFAULT_SHARD_ROWS = 300
+
+
+def shard_key(name: str) -> str:
+    normalized = normalize_name(name)
+    return normalized[0] if normalized else ""
+
+
+def build_product_shards(
+    data_dir: Path = DEFAULT_DATA_DIR,
+    index_html: Path = DEFAULT_INDEX_HTML,
+    shard_rows: int = DEFAULT_SHARD_ROWS,
+) -> Dict[str, object]:
+    # {"manifest": ..., "shards": [...]} を返す。
+    knowledge = KnowledgeBase(load_builtin_tables(index_html))
+    fingerprint = builtin_fingerprint(knowledge)
+    builtin_ingredients = set(knowledge.ingredient_db)
+
+    rows: List[ProductRow] = []
+    datasets = []
+    for label, products in read_product_datasets(data_dir):
+        knowledge.merge_products(products, label, rows)
+        datasets.append({"label": label, "loaded_products": len(products), "stats": knowledge.merge_stats[label]})
+    added_ingredients = [name for name in knowledge.ingredient_db if name not in builtin_ingredients]
+
+    # 製品データと正規化名が重なる OCR 製品別名。一括読み込みで追加されるものは分割ファイル側に含める。
+    product_norms = {normalize_name(name) for name, _, _ in rows}
+    reserved: Dict[str, None] = {}
+    if (data_dir / OCR_KNOWLEDGE_FILE).exists():
+        profiles = read_ocr_profiles(data_dir)
+        for profile in profiles:
+            for alias in to_string_list(profile.get("product_aliases")):
+                if is_useful_ocr_product_alias(alias) and normalize_name(alias) in product_norms:
+                    reserved.setdefault(alias)
+        knowledge.merge_ocr_profiles(profiles)
+    alias_rows: List[ProductRow] = [
+        (alias, knowledge.product_db[alias], None) for alias in reserved if knowledge.product_sources.get(alias) == "OCR"
+    ]
+
+    by_key: Dict[str, List[ProductRow]] = {}
+    for row in rows + alias_rows:
+        by_key.setdefault(shard_key(row[0]), []).append(row)
+
+    ingredient_ids: Dict[str, int] = {}
+
+    def encode(group: List[ProductRow]) -> Dict[str, object]:
+        ratios = []
+        for _, ratio_defs, _ in group:
+            flat: List[object] = []
+            for item in ratio_defs:
+                flat.append(ingredient_ids.setdefault(str(item["ingredient"]), len(ingredient_ids)))
+                flat.append(item["ratio"])
+            ratios.append(flat)
+        return {
+            "names": [name for name, _, _ in group],
+            "ratios": ratios,
+            "strength_hints": [hint for _, _, hint in group],
+        }
+
+    for name in added_ingredients:
+        ingredient_ids.setdefault(name, len(ingredient_ids))
+
+    shards = []
+    keys: Dict[str, int] = {}
+    # 製品名の正規化名の trigram(前後に境界記号。照合の索引と同じ)→ その trigram を持つ製品の分割ファイル番号
+    name_trigrams: Dict[str, List[int]] = {}
+    group_keys: List[str] = []
+    group_rows: List[ProductRow] = []
+
+    def flush() -> None:
+        if not group_keys:
+            return
+        index = len(shards)
+        for key in group_keys:
+            keys[key] = index
+        for name, _, _ in group_rows:
+            for gram in padded_trigrams(normalize_name(name)):
+                indexes = name_trigrams.setdefault(gram, [])
+                if not indexes or indexes[-1] != index:
+                    indexes.append(index)
+        shards.append({"keys": "".join(group_keys), "rows": encode(group_rows)})
+        group_keys.clear()
+        group_rows.clear()
+
+    for key in sorted(by_key):
+        if group_rows and len(group_rows) + len(by_key[key]) > shard_rows:
+            flush()
+        group_keys.append(key)
+        group_rows.extend(by_key[key])
+    flush()
+
+    manifest = {
+        "format": SHARD_MANIFEST_FORMAT,
+        "version": SHARD_VERSION,
+        "rules": PRODUCT_TABLE_RULES,
+        "normalization": NAME_NORMALIZATION,
+        "builtin_fingerprint": fingerprint,
+        "datasets": datasets,
+        "ingredients": list(ingredient_ids),
+        "added_ingredients": [ingredient_ids[name] for name in added_ingredients],
+        "reserved_products": list(reserved),
+        "keys": keys,
+        "trigrams": name_trigrams,
+        "shards": [
+            {"file": f"shard-{index:03d}.json", "keys": shard["keys"], "rows": len(shard["rows"]["names"])}  # type: ignore[index]
+            for index, shard in enumerate(shards)
+        ],
+    }
+    return {
+        "manifest": manifest,
+        "shards": [
+            {"format": SHARD_FORMAT, "version": SHARD_VERSION, "index": index, **shard["rows"]}  # type: ignore[dict-item]
+            for index, shard in enumerate(shards)
+        ],
+    }
+
+
+def write_product_shards(
+    output_dir: Path,
+    data_dir: Path = DEFAULT_DATA_DIR,
+    index_html: Path = DEFAULT_INDEX_HTML,
+    shard_rows: int = DEFAULT_SHARD_ROWS,
+) -> Dict[str, object]:
+    # 一時ディレクトリに書き出してから置き換える(古い分割ファイルを残さない)。
+    bundle = build_product_shards(data_dir, index_html, shard_rows)
+    tmp_dir = output_dir.with_name(f"{output_dir.name}.tmp")
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+    manifest: Dict[str, object] = bundle["manifest"]  # type: ignore[assignment]
+    for entry, shard in zip(manifest["shards"], bundle["shards"]):  # type: ignore[call-overload]
+        (tmp_dir / entry["file"]).write_text(dump_json(shard), encoding="utf-8")
+    (tmp_dir / SHARD_MANIFEST_NAME).write_text(dump_json(manifest), encoding="utf-8")
+    if output_dir.exists():
+        shutil.rmtree(output_dir)
+    tmp_dir.replace(output_dir)
+    return manifest
+
+
+def load_shard_manifest(path: Path) -> Dict[str, object]:
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    if (
+        payload.get("format") != SHARD_MANIFEST_FORMAT
+        or payload.get("version") != SHARD_VERSION
+        or payload.get("rules") != PRODUCT_TABLE_RULES
+    ):
+        raise ValueError(
+            f"unsupported shard manifest: {payload.get('format')} v{payload.get('version')} ({payload.get('rules')})"
+        )
+    return payload
+
+
+def candidate_shards(manifest: Dict[str, object], name: str) -> List[int]:
+    # name(正規化名・数字除去後の正規化名)と完全一致・包含一致・近似一致しうる製品を含む分割ファイルの番号。
+    # 分割ファイル単位の trigram 集合は各製品の集合を含むため、照合の索引と同じ絞り込み条件で取りこぼさない。
+    keys: Dict[str, int] = manifest["keys"]  # type: ignore[assignment]
+    postings: Dict[str, List[int]] = manifest["trigrams"]  # type: ignore[assignment]
+    found: Set[int] = set()
+    normalized = normalize_name(name)
+    for query in dict.fromkeys((normalized, DIGITS_RE.sub("", normalized))):
+        if not query:
+            continue
+        # 完全一致と query に含まれる製品(製品名の先頭文字は query のいずれかの文字)
+        found.update(keys[char] for char in query if char in keys)
+        # query を含む製品。2文字以下は query を含む trigram すべてが対象
+        if len(query) >= 3:
+            shard_sets = [set(postings.get(gram, ())) for gram in set(trigrams(query))]
+            found.update(set.intersection(*shard_sets))
+        else:
+            for gram, indexes in postings.items():
+                if query in gram:
+                    found.update(indexes)
+        # 近似一致(TrigramIndex.fuzzy と同じ共有 trigram 数の下限)
+        limit = allowed_edits(len(query))
+        if limit == 0:
+            continue
+        grams = set(padded_trigrams(query))
+        min_shared = max(1, len(grams) - 3 * limit - 4)
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for index in postings.get(gram, ()):
+                shared[index] = shared.get(index, 0) + 1
+        found.update(index for index, count in shared.items() if count >= min_shared)
+    return sorted(found)
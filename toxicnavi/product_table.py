@@ -0,0 +1,123 @@
+"""
+製品 → 成分の配合比と規格ヒントの事前計算表(toxicnavi_product_ratios.json)。
+
+index.html の mergeProductsToDatabase は製品ごとに calculateIngredientRatios / canonicalizeIngredientRatios /
+estimateStrengthHintFromProduct を実行する。この表は同じ計算を読み込み順(OTC → 医療用)に済ませた結果で、
+アプリは製品データセットを読まずに行を統合するだけでよい。
+
+成分名の正規化は内蔵の成分名・同義語に依存するため、生成時の内蔵データの指紋(builtin_fingerprint)を記録し、
+アプリ側で一致しない場合は従来どおり製品データセットから計算する。
+"""
+
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .builtin import DEFAULT_INDEX_HTML, load_builtin_tables
+from .knowledge import DEFAULT_DATA_DIR, KnowledgeBase, read_product_datasets
+from .store import dump_json
+
+PRODUCT_TABLE_FORMAT = "toxicnavi-product-ratios"
+PRODUCT_TABLE_VERSION = 1
+DEFAULT_PRODUCT_TABLE_NAME = "toxicnavi_product_ratios.json"
+# 配合比・成分名の正規化・規格ヒントの規則を変えた場合は更新する(index.html の productTableRules と揃える)。
+PRODUCT_TABLE_RULES = "ratio-rules-v1"
+
+FNV_OFFSET = 0x811C9DC5
+FNV_PRIME = 0x01000193
+
+ProductRow = Tuple[str, List[Dict[str, object]], Optional[float]]
+
+
+def fnv1a_utf16(text: str) -> str:
+    # JavaScript の文字列(UTF-16 コード単位)に対する FNV-1a 32bit。
+    value = FNV_OFFSET
+    data = text.encode("utf-16-le")
+    for pos in range(0, len(data), 2):
+        value ^= data[pos] | (data[pos + 1] << 8)
+        value = (value * FNV_PRIME) & 0xFFFFFFFF
+    return f"{value:08x}"
+
+
+def builtin_fingerprint(knowledge: KnowledgeBase) -> str:
+    # 成分名の正規化が参照する内蔵データ(成分名・同義語・部分一致規則)の指紋。外部データ統合前の状態で求める。
+    # index.html の computeBuiltinFingerprint と同じ文字列(JSON.stringify)から計算する。
+    source = [
+        list(knowledge.ingredient_db),
+        [[alias, canonical] for alias, canonical in knowledge.ingredient_synonyms.items()],
+        [[rule.get("keyword"), rule.get("canonical")] for rule in knowledge.heuristic_synonyms],
+    ]
+    return fnv1a_utf16(json.dumps(source, ensure_ascii=False, separators=(",", ":")))
+
+
+def build_product_table(
+    data_dir: Path = DEFAULT_DATA_DIR,
+    index_html: Path = DEFAULT_INDEX_HTML,
+) -> Dict[str, object]:
+    knowledge = KnowledgeBase(load_builtin_tables(index_html))
+    fingerprint = builtin_fingerprint(knowledge)
+    ingredient_ids: Dict[str, int] = {}
+    datasets = []
+    for label, products in read_product_datasets(data_dir):
+        rows: List[ProductRow] = []
+        knowledge.merge_products(products, label, rows)
+        ratios = []
+        for _, ratio_defs, _ in rows:
+            # [成分番号, 配合比, 成分番号, 配合比, ...]
+            flat: List[object] = []
+            for item in ratio_defs:
+                flat.append(ingredient_ids.setdefault(str(item["ingredient"]), len(ingredient_ids)))
+                flat.append(item["ratio"])
+            ratios.append(flat)
+        datasets.append(
+            {
+                "label": label,
+                "loaded_products": len(products),
+                "stats": knowledge.merge_stats[label],
+                "names": [name for name, _, _ in rows],
+                "ratios": ratios,
+                "strength_hints": [hint for _, _, hint in rows],
+            }
+        )
+    return {
+        "format": PRODUCT_TABLE_FORMAT,
+        "version": PRODUCT_TABLE_VERSION,
+        "rules": PRODUCT_TABLE_RULES,
+        "builtin_fingerprint": fingerprint,
+        "ingredients": list(ingredient_ids),
+        "datasets": datasets,
+    }
+
+
+def write_product_table(
+    path: Path,
+    data_dir: Path = DEFAULT_DATA_DIR,
+    index_html: Path = DEFAULT_INDEX_HTML,
+) -> Dict[str, object]:
+    payload = build_product_table(data_dir, index_html)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    tmp_path.write_text(dump_json(payload), encoding="utf-8")
+    tmp_path.replace(path)
+    return payload
+
+
+def load_product_table(path: Path, knowledge: KnowledgeBase) -> List[Tuple[str, int, List[ProductRow]]]:
+    # (ラベル, 読み込み製品数, 行) の一覧。knowledge は外部データ統合前の状態で渡す。
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    if payload.get("format") != PRODUCT_TABLE_FORMAT or payload.get("rules") != PRODUCT_TABLE_RULES:
+        raise ValueError(f"unsupported product table: {payload.get('format')} ({payload.get('rules')})")
+    if payload.get("builtin_fingerprint") != builtin_fingerprint(knowledge):
+        raise ValueError("product table was built from different builtin data")
+    ingredients: List[str] = payload["ingredients"]
+    result = []
+    for dataset in payload["datasets"]:
+        rows: List[ProductRow] = []
+        for name, flat, hint in zip(dataset["names"], dataset["ratios"], dataset["strength_hints"]):
+            # JSON では整数値の比率・規格が整数表記になるため、merge_products と同じ float に戻す。
+            ratio_defs = [{"ingredient": ingredients[flat[pos]], "ratio": float(flat[pos + 1])} for pos in range(0, len(flat), 2)]
+            rows.append((name, ratio_defs, None if hint is None else float(hint)))
+        result.append((dataset["label"], dataset["loaded_products"], rows))
+    return result
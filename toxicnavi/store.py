@@ -0,0 +1,365 @@
+"""
+統合済み知識ベース(KnowledgeBase)の SQLite 出力と、索引を使った参照 API。
+
+- 製品・成分・同義語は正規化名(normalize_name)に索引を持ち、完全一致は索引検索になる
+- 製品→成分の配合比は product_ingredients に正規化して保持する
+- names_fts (FTS5, trigram) で製品名・成分名・同義語の部分一致検索を行う
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .jscompat import MISSING, normalize_name
+from .knowledge import KnowledgeBase
+
+STORE_FORMAT = "toxicnavi-knowledge"
+STORE_VERSION = 1
+DEFAULT_DB_NAME = "toxicnavi_knowledge.sqlite"
+
+SCHEMA = """
+CREATE TABLE meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE products (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    normalized_name TEXT NOT NULL,
+    source TEXT NOT NULL,
+    strength_hint_mg REAL
+);
+CREATE TABLE ingredients (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    normalized_name TEXT NOT NULL,
+    source TEXT NOT NULL,
+    component TEXT,
+    unknown INTEGER NOT NULL,
+    toxic_dose_mg_kg REAL,
+    severe_dose_mg_kg REAL,
+    critical_dose_mg_kg REAL,
+    info_json TEXT NOT NULL
+);
+CREATE TABLE product_ingredients (
+    product_id INTEGER NOT NULL REFERENCES products(id),
+    position INTEGER NOT NULL,
+    ingredient_id INTEGER NOT NULL REFERENCES ingredients(id),
+    ratio REAL NOT NULL,
+    PRIMARY KEY (product_id, position)
+);
+CREATE TABLE synonyms (
+    normalized_alias TEXT PRIMARY KEY,
+    alias TEXT NOT NULL,
+    ingredient_id INTEGER NOT NULL REFERENCES ingredients(id)
+);
+CREATE TABLE jpic_profiles (
+    ingredient_id INTEGER PRIMARY KEY REFERENCES ingredients(id),
+    caution_mg_kg REAL,
+    toxic_mg_kg REAL,
+    severe_mg_kg REAL,
+    critical_mg_kg REAL,
+    evidence_source TEXT,
+    evidence_level TEXT,
+    updated_at TEXT,
+    profile_json TEXT NOT NULL
+);
+CREATE TABLE pmda_records (
+    id INTEGER PRIMARY KEY,
+    dataset TEXT NOT NULL,
+    code TEXT,
+    product_name TEXT NOT NULL,
+    normalized_name TEXT NOT NULL,
+    manufacturer TEXT,
+    dosage_form TEXT,
+    classification TEXT,
+    ingredient_text TEXT,
+    record_json TEXT NOT NULL
+);
+CREATE INDEX idx_products_normalized_name ON products(normalized_name);
+CREATE INDEX idx_ingredients_normalized_name ON ingredients(normalized_name);
+CREATE INDEX idx_product_ingredients_ingredient ON product_ingredients(ingredient_id);
+CREATE INDEX idx_synonyms_ingredient ON synonyms(ingredient_id);
+CREATE INDEX idx_pmda_records_normalized_name ON pmda_records(normalized_name);
+CREATE INDEX idx_pmda_records_code ON pmda_records(code);
+"""
+
+# trigram トークナイザ(SQLite 3.34 以降)が無い環境では既定のトークナイザで作成する。
+FTS_TOKENIZERS = ("trigram", "unicode61")
+FTS_MIN_TRIGRAM_CHARS = 3
+
+
+def to_json_value(value: object) -> object:
+    # 整数値の float は int として出力し、index.html 側の JSON と同じ表記にする。
+    # undefined(MISSING)のキーは JSON.stringify と同じく出力しない。
+    if isinstance(value, float) and math.isfinite(value) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {key: to_json_value(item) for key, item in value.items() if item is not MISSING}
+    if isinstance(value, list):
+        return [to_json_value(item) for item in value]
+    return value
+
+
+def dump_json(value: object) -> str:
+    return json.dumps(to_json_value(value), ensure_ascii=False, separators=(",", ":"))
+
+
+def real_or_none(value: object) -> Optional[float]:
+    if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value):
+        return float(value)
+    return None
+
+
+def create_fts_table(conn: sqlite3.Connection) -> str:
+    for tokenizer in FTS_TOKENIZERS:
+        try:
+            conn.execute(f"CREATE VIRTUAL TABLE names_fts USING fts5(name, kind UNINDEXED, ref_id UNINDEXED, tokenize='{tokenizer}')")
+            return tokenizer
+        except sqlite3.OperationalError:
+            continue
+    return ""
+
+
+def build_database(
+    knowledge: KnowledgeBase,
+    path: Path,
+    pmda_datasets: Iterable[Tuple[str, List[Dict[str, object]]]] = (),
+    sources: Optional[Dict[str, object]] = None,
+) -> Dict[str, int]:
+    # 既存ファイルは一時ファイルへ作り直してから置き換える(読み取り中の DB を壊さないため)。
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.tmp")
+    if tmp_path.exists():
+        tmp_path.unlink()
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.executescript(SCHEMA)
+        tokenizer = create_fts_table(conn)
+
+        ingredient_ids: Dict[str, int] = {}
+        for ingredient_id, (name, info) in enumerate(knowledge.ingredient_db.items(), start=1):
+            ingredient_ids[name] = ingredient_id
+            conn.execute(
+                "INSERT INTO ingredients VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    ingredient_id,
+                    name,
+                    normalize_name(name),
+                    knowledge.ingredient_sources.get(name, ""),
+                    info.get("component"),
+                    1 if info.get("unknown") else 0,
+                    real_or_none(info.get("toxicDoseMgKg")),
+                    real_or_none(info.get("severeDoseMgKg")),
+                    real_or_none(info.get("criticalDoseMgKg")),
+                    dump_json(info),
+                ),
+            )
+            jpic = info.get("jpic")
+            if isinstance(jpic, dict):
+                thresholds = jpic.get("toxicThresholdMgKg") or {}
+                evidence = jpic.get("evidence") or {}
+                conn.execute(
+                    "INSERT INTO jpic_profiles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        ingredient_id,
+                        real_or_none(thresholds.get("caution")),
+                        real_or_none(thresholds.get("toxic")),
+                        real_or_none(thresholds.get("severe")),
+                        real_or_none(thresholds.get("critical")),
+                        evidence.get("source"),
+                        evidence.get("level"),
+                        evidence.get("updatedAt"),
+                        dump_json(jpic),
+                    ),
+                )
+
+        for product_id, (name, ratio_defs) in enumerate(knowledge.product_db.items(), start=1):
+            conn.execute(
+                "INSERT INTO products VALUES (?, ?, ?, ?, ?)",
+                (
+                    product_id,
+                    name,
+                    normalize_name(name),
+                    knowledge.product_sources.get(name, ""),
+                    real_or_none(knowledge.product_strength_hints_mg.get(name)),
+                ),
+            )
+            conn.executemany(
+                "INSERT INTO product_ingredients VALUES (?, ?, ?, ?)",
+                [
+                    (product_id, position, ingredient_ids[str(item["ingredient"])], float(item["ratio"]))  # type: ignore[arg-type]
+                    for position, item in enumerate(ratio_defs)
+                ],
+            )
+
+        conn.executemany(
+            "INSERT INTO synonyms VALUES (?, ?, ?)",
+            [
+                (normalized_alias, knowledge.synonym_aliases[normalized_alias], ingredient_ids[canonical])
+                for normalized_alias, canonical in knowledge.ingredient_synonym_index.items()
+            ],
+        )
+
+        record_count = 0
+        for dataset, products in pmda_datasets:
+            for product in products:
+                product_name = str(product.get("product_name") or "").strip()
+                if not product_name:
+                    continue
+                record_count += 1
+                conn.execute(
+                    "INSERT INTO pmda_records VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        record_count,
+                        dataset,
+                        product.get("code") or None,
+                        product_name,
+                        normalize_name(product_name),
+                        product.get("manufacturer") or None,
+                        product.get("dosage_form") or None,
+                        product.get("classification") or None,
+                        product.get("ingredient_text") or None,
+                        dump_json(product),
+                    ),
+                )
+
+        if tokenizer:
+            conn.execute("INSERT INTO names_fts(name, kind, ref_id) SELECT name, 'product', id FROM products")
+            conn.execute("INSERT INTO names_fts(name, kind, ref_id) SELECT name, 'ingredient', id FROM ingredients")
+            conn.execute("INSERT INTO names_fts(name, kind, ref_id) SELECT alias, 'synonym', ingredient_id FROM synonyms")
+
+        stats = {
+            "products": len(knowledge.product_db),
+            "ingredients": len(knowledge.ingredient_db),
+            "product_ingredients": sum(len(ratio_defs) for ratio_defs in knowledge.product_db.values()),
+            "synonyms": len(knowledge.ingredient_synonym_index),
+            "pmda_records": record_count,
+        }
+        meta = {
+            "format": STORE_FORMAT,
+            "version": STORE_VERSION,
+            "built_at": datetime.now(timezone.utc).isoformat(),
+            "fts_tokenizer": tokenizer,
+            "schema_version": knowledge.schema_version,
+            "stats": stats,
+            "sources": sources or {},
+        }
+        conn.executemany(
+            "INSERT INTO meta VALUES (?, ?)",
+            [(key, value if isinstance(value, str) else dump_json(value)) for key, value in meta.items()],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+    tmp_path.replace(path)
+    return stats
+
+
+class KnowledgeStore:
+    # build_database で作成した DB の読み取り専用ラッパー。
+    def __init__(self, path: Path) -> None:
+        self.conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        self.conn.row_factory = sqlite3.Row
+        meta = {row["key"]: row["value"] for row in self.conn.execute("SELECT key, value FROM meta")}
+        if meta.get("format") != STORE_FORMAT or meta.get("version") != str(STORE_VERSION):
+            self.conn.close()
+            raise ValueError(f"unsupported knowledge store: {meta.get('format')} v{meta.get('version')}")
+        self.fts_tokenizer = meta.get("fts_tokenizer", "")
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "KnowledgeStore":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def find_product(self, name: str) -> Optional[str]:
+        # findKeyByNormalizedName(productDB, name) と同じく、正規化名が一致する最初の製品名を返す。
+        row = self.conn.execute(
+            "SELECT name FROM products WHERE normalized_name = ? ORDER BY id LIMIT 1", (normalize_name(name),)
+        ).fetchone()
+        return row["name"] if row else None
+
+    def find_ingredient(self, name: str) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT name FROM ingredients WHERE normalized_name = ? ORDER BY id LIMIT 1", (normalize_name(name),)
+        ).fetchone()
+        return row["name"] if row else None
+
+    def resolve_synonym(self, alias: str) -> Optional[str]:
+        row = self.conn.execute(
+            "SELECT i.name FROM synonyms s JOIN ingredients i ON i.id = s.ingredient_id WHERE s.normalized_alias = ?",
+            (normalize_name(alias),),
+        ).fetchone()
+        return row["name"] if row else None
+
+    def product_ingredients(self, product_name: str) -> List[Dict[str, object]]:
+        # productDB[product_name] と同じ {ingredient, ratio} の並び。
+        rows = self.conn.execute(
+            """
+            SELECT i.name AS ingredient, pi.ratio AS ratio
+            FROM products p
+            JOIN product_ingredients pi ON pi.product_id = p.id
+            JOIN ingredients i ON i.id = pi.ingredient_id
+            WHERE p.name = ?
+            ORDER BY pi.position
+            """,
+            (product_name,),
+        )
+        return [{"ingredient": row["ingredient"], "ratio": row["ratio"]} for row in rows]
+
+    def products_containing(self, ingredient_name: str, limit: int = 100) -> List[str]:
+        rows = self.conn.execute(
+            """
+            SELECT p.name FROM ingredients i
+            JOIN product_ingredients pi ON pi.ingredient_id = i.id
+            JOIN products p ON p.id = pi.product_id
+            WHERE i.name = ?
+            ORDER BY p.id
+            LIMIT ?
+            """,
+            (ingredient_name, limit),
+        )
+        return [row["name"] for row in rows]
+
+    def ingredient_info(self, ingredient_name: str) -> Optional[Dict[str, object]]:
+        row = self.conn.execute("SELECT info_json FROM ingredients WHERE name = ?", (ingredient_name,)).fetchone()
+        return json.loads(row["info_json"]) if row else None
+
+    def strength_hint_mg(self, product_name: str) -> Optional[float]:
+        row = self.conn.execute("SELECT strength_hint_mg FROM products WHERE name = ?", (product_name,)).fetchone()
+        return row["strength_hint_mg"] if row else None
+
+    def search_names(self, text: str, limit: int = 20) -> List[Dict[str, object]]:
+        # 製品名・成分名・同義語の部分一致検索。trigram は3文字未満を扱えないため LIKE で検索する。
+        query = text.strip()
+        if not query:
+            return []
+        if self.fts_tokenizer == "trigram" and len(query) >= FTS_MIN_TRIGRAM_CHARS:
+            rows = self.conn.execute(
+                "SELECT name, kind, ref_id FROM names_fts WHERE names_fts MATCH ? ORDER BY rank LIMIT ?",
+                ('"' + query.replace('"', '""') + '"', limit),
+            )
+        else:
+            pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            rows = self.conn.execute(
+                """
+                SELECT name, kind, ref_id FROM (
+                    SELECT name, 'product' AS kind, id AS ref_id FROM products
+                    UNION ALL SELECT name, 'ingredient', id FROM ingredients
+                    UNION ALL SELECT alias, 'synonym', ingredient_id FROM synonyms
+                ) WHERE name LIKE ? ESCAPE '\\' LIMIT ?
+                """,
+                (pattern, limit),
+            )
+        return [{"name": row["name"], "kind": row["kind"], "ref_id": row["ref_id"]} for row in rows]